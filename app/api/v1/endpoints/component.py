@@ -2,12 +2,13 @@ from typing import List
 from uuid import uuid4
 import json
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
 from app.db.models.component import Component, ComponentRelationship
 from app.schemas.component import ComponentCreate, ComponentUpdate, ComponentOut, ComponentRelationshipCreate
+from app.utils import response_cache
 
 router = APIRouter()
 
@@ -24,51 +25,56 @@ def create_component(component_in: ComponentCreate, db: Session = Depends(get_db
     )
     db.add(component)
     db.commit()
+    response_cache.invalidate("components")
     db.refresh(component)
     return component
 
 @router.get("/", response_model=List[ComponentOut])
-def read_components(skip: int = 0, limit: int = 100, project_id: str = None, db: Session = Depends(get_db)):
-    query = db.query(Component)
-    if project_id:
-        query = query.filter(Component.project_id == project_id)
-    components = query.offset(skip).limit(limit).all()
+def read_components(request: Request, skip: int = 0, limit: int = 100, project_id: str = None, db: Session = Depends(get_db)):
+    def load():
+        query = db.query(Component)
+        if project_id:
+            query = query.filter(Component.project_id == project_id)
+        components = query.offset(skip).limit(limit).all()
 
     
-    # Transform for output
-    results = []
-    for c in components:
-        children = []
-        for rel in c.children_relationships:
-            child = db.query(Component).filter(Component.id == rel.child_id).first()
-            if child:
-                children.append({
-                    "child_id": child.id,
-                    "child_name": child.name,
-                    "child_type": child.type,
-                    "cardinality": rel.cardinality,
-                    "type": rel.type,
-                    "protocol": rel.protocol,
-                    "data_items": rel.data_items
-                })
+        # Transform for output
+        results = []
+        for c in components:
+            children = []
+            for rel in c.children_relationships:
+                child = db.query(Component).filter(Component.id == rel.child_id).first()
+                if child:
+                    children.append({
+                        "child_id": child.id,
+                        "child_name": child.name,
+                        "child_type": child.type,
+                        "cardinality": rel.cardinality,
+                        "type": rel.type,
+                        "protocol": rel.protocol,
+                        "data_items": rel.data_items
+                    })
         
-        # Deserialize tags from JSON
-        tags = json.loads(c.tags) if c.tags else []
+            # Deserialize tags from JSON
+            tags = json.loads(c.tags) if c.tags else []
         
-        results.append(ComponentOut(
-            id=c.id,
-            name=c.name,
-            type=c.type,
-            description=c.description,
-            x=c.x,
-            y=c.y,
-            tags=tags,
-            lifecycle=c.lifecycle,
-            project_id=c.project_id,
-            children=children
-        ))
+            results.append(ComponentOut(
+                id=c.id,
+                name=c.name,
+                type=c.type,
+                description=c.description,
+                x=c.x,
+                y=c.y,
+                tags=tags,
+                lifecycle=c.lifecycle,
+                project_id=c.project_id,
+                children=children
+            ))
         
-    return results
+        return results
+
+    # Entries embed other components' names: every component write invalidates the whole namespace
+    return response_cache.cached(request, "components", project_id, List[ComponentOut], load)
 
 @router.get("/{component_id}", response_model=ComponentOut)
 def read_component(component_id: str, db: Session = Depends(get_db)):
@@ -130,6 +136,7 @@ def update_component(component_id: str, component_in: ComponentUpdate, db: Sessi
         component.project_id = component_in.project_id
         
     db.commit()
+    response_cache.invalidate("components")
     db.refresh(component)
     
     # Re-fetch for children
@@ -169,6 +176,7 @@ def delete_component(component_id: str, db: Session = Depends(get_db)):
     
     db.delete(component)
     db.commit()
+    response_cache.invalidate("components")
     return {"ok": True}
 
 @router.post("/{component_id}/link")
@@ -200,6 +208,7 @@ def link_component(component_id: str, link_in: ComponentRelationshipCreate, db:
         )
         db.add(new_link)
     db.commit()
+    response_cache.invalidate("components")
     return {"ok": True}
 
 @router.delete("/{component_id}/link/{child_id}")
@@ -214,4 +223,5 @@ def unlink_component(component_id: str, child_id: str, db: Session = Depends(get
         
     db.delete(link)
     db.commit()
+    response_cache.invalidate("components")
     return {"ok": True}
@@ -17,6 +17,7 @@ from app.db.base import Base, engine
 from sqlalchemy import inspect, text
 import json
 from app.api import deps
+from app.utils import response_cache
 
 router = APIRouter()
 
@@ -226,6 +227,7 @@ async def restore_database(request: Request, _perm=Depends(deps.check_permission
             # Check for errors (psql returns non-zero on errors)
             if result.returncode != 0 and "ERROR" in result.stderr:
                 raise Exception(f"Restore failed: {result.stderr}")
+            response_cache.clear()
             
             # Run database migrations to ensure schema is up to date
             try:
@@ -408,6 +410,7 @@ async def restore_from_backup(filename: str, _perm=Depends(deps.check_permission
         
         if result.returncode != 0 and "ERROR" in result.stderr:
             raise Exception(f"Restore failed: {result.stderr}")
+        response_cache.clear()
             
         # Run migrations
         try:
@@ -1,11 +1,23 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.api.deps import get_db
-from app.db.models.diagram import Diagram, DiagramComponent, DiagramEdge
+from app.core.config import settings
+from app.db.models.component import ComponentRelationship
+from app.db.models.diagram import Diagram, DiagramChange, DiagramComponent, DiagramEdge
 from app.db.models.project import Project
-from app.schemas.diagram import DiagramCreate, DiagramUpdate, DiagramOut, DiagramComponentUpdate, DiagramEdgeUpdate
+from app.schemas.diagram import (
+    DiagramCreate, DiagramUpdate, DiagramOut, DiagramComponentUpdate, DiagramEdgeUpdate, DiagramRenderRequest,
+    DiagramLayoutPatch, DiagramLayoutDelta, DiagramAutoLayoutRequest, DiagramChanges,
+)
+from app.db.models.use_case import UseCase
+from app.utils import diagram_layout, diagram_render, sequence_diagram, static_files
 
 router = APIRouter()
 
@@ -53,6 +65,62 @@ def create_diagram(project_id: str, diagram_in: DiagramCreate, db: Session = Dep
     db.refresh(diagram)
     return diagram
 
+@router.post("/projects/{project_id}/diagrams/prerender", status_code=202)
+def prerender_project_diagrams(project_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Render every text diagram and use case sequence diagram of the project
+    into the SVG cache in the background, so the first presentation view
+    does not wait for layout.
+    """
+    real_project_id = resolve_project_id(db, project_id)
+    rows = db.query(Diagram.type, Diagram.content).filter(
+        Diagram.project_id == real_project_id,
+        Diagram.type.in_(diagram_render.DIAGRAM_TYPES),
+        Diagram.content.isnot(None),
+    ).all()
+    sources = [(content, diagram_render.DIAGRAM_TYPES[type_]) for type_, content in rows if content.strip()]
+    # Use case sequence diagrams shown in presentations
+    for use_case in db.query(UseCase).filter(UseCase.project_id == real_project_id):
+        source = sequence_diagram.for_use_case(use_case)
+        if source:
+            sources.append((source, "plantuml"))
+    background_tasks.add_task(diagram_render.prerender, sources)
+    return {"queued": len(sources)}
+
+def _svg_response(request: Request, source: str, language: str) -> Response:
+    """SVG with the render key as ETag; a matching If-None-Match is answered without rendering."""
+    try:
+        key = diagram_render.render_key(source, language)
+        headers = {"etag": f'"{key}"', "cache-control": static_files.REVALIDATE_CACHE}
+        if static_files.is_not_modified(Headers(headers), request.headers):
+            return Response(status_code=304, headers=headers)
+        _, svg = diagram_render.render(source, language)
+    except diagram_render.DiagramSourceError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except diagram_render.DiagramRenderError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return Response(svg, media_type="image/svg+xml", headers=headers)
+
+@router.post("/diagrams/render")
+async def render_diagram_source(render_in: DiagramRenderRequest, request: Request):
+    """Render arbitrary Mermaid/PlantUML source (e.g. a Markdown fence) to SVG."""
+    language = render_in.language or diagram_render.detect_language(render_in.source)
+    return await run_in_threadpool(_svg_response, request, render_in.source, language)
+
+@router.get("/diagrams/{diagram_id}/svg")
+def get_diagram_svg(diagram_id: str, request: Request, db: Session = Depends(get_db)):
+    """The diagram's Mermaid/PlantUML content as SVG, laid out once per source version."""
+    row = db.query(Diagram.type, Diagram.content).filter(Diagram.id == diagram_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Diagram not found")
+    if not diagram_render.get_renderer().lays_out:
+        # The client draws the diagram itself (DiagramImage falls back on error)
+        raise HTTPException(status_code=503, detail="No diagram renderer configured")
+    language = diagram_render.DIAGRAM_TYPES.get(row.type)
+    if language is None or not (row.content or "").strip():
+        raise HTTPException(status_code=404, detail="Diagram has no text source to render")
+    return _svg_response(request, row.content, language)
+
 @router.get("/diagrams/{diagram_id}", response_model=DiagramOut)
 def get_diagram(diagram_id: str, db: Session = Depends(get_db)):
     diagram = db.query(Diagram).filter(Diagram.id == diagram_id).first()
@@ -87,60 +155,128 @@ def delete_diagram(diagram_id: str, db: Session = Depends(get_db)):
         
     # Delete associated diagram components first (though cascade might handle this, explicit is safer)
     db.query(DiagramComponent).filter(DiagramComponent.diagram_id == diagram_id).delete()
+    db.query(DiagramChange).filter(DiagramChange.diagram_id == diagram_id).delete()
     
     db.delete(diagram)
     db.commit()
     return {"ok": True}
 
-@router.put("/diagrams/{diagram_id}/components/{component_id}", response_model=DiagramOut)
+def _bump_layout_version(db: Session, diagram_id: str, expected: Optional[int] = None) -> Optional[int]:
+    """
+    Increment the diagram's layout_version in one UPDATE, only if it still
+    equals `expected` (when given). Returns the new version, or None if the
+    diagram does not exist or was changed meanwhile.
+    """
+    stmt = update(Diagram).where(Diagram.id == diagram_id)
+    if expected is not None:
+        stmt = stmt.where(Diagram.layout_version == expected)
+    stmt = (
+        stmt.values(layout_version=Diagram.layout_version + 1, updated_at=func.now())
+        .returning(Diagram.layout_version)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).scalar()
+
+def _claim_layout_version(db: Session, diagram_id: str, expected: Optional[int] = None) -> int:
+    """`_bump_layout_version`, raising 404 / 409 when it fails."""
+    new_version = _bump_layout_version(db, diagram_id, expected)
+    if new_version is None:
+        current = db.query(Diagram.layout_version).filter(Diagram.id == diagram_id).scalar()
+        db.rollback()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Diagram not found")
+        raise HTTPException(status_code=409, detail={
+            "message": "Diagram layout was changed by someone else; reload and retry",
+            "version": current,
+        })
+    return new_version
+
+def _upsert(db: Session, model, rows: list, keys: list, set_) -> None:
+    """INSERT ... ON CONFLICT (keys) DO UPDATE for a batch of rows, in one statement."""
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        for row in rows:
+            db.merge(model(**row))
+        return
+    stmt = insert(model).values(rows)
+    db.execute(stmt.on_conflict_do_update(index_elements=keys, set_=set_(stmt.excluded)))
+
+def _upsert_nodes(db: Session, diagram_id: str, nodes: list) -> None:
+    _upsert(
+        db, DiagramComponent,
+        [{"diagram_id": diagram_id, **node} for node in nodes],
+        ["diagram_id", "component_id"],
+        lambda excluded: {"x": excluded.x, "y": excluded.y},
+    )
+
+def _upsert_edges(db: Session, diagram_id: str, edges: list) -> None:
+    _upsert(
+        db, DiagramEdge,
+        [{"diagram_id": diagram_id, **edge} for edge in edges],
+        ["diagram_id", "source_id", "target_id"],
+        # A handle left out (None) keeps its current value
+        lambda excluded: {
+            "source_handle": func.coalesce(excluded.source_handle, DiagramEdge.source_handle),
+            "target_handle": func.coalesce(excluded.target_handle, DiagramEdge.target_handle),
+        },
+    )
+
+def _commit_change(db: Session, diagram_id: str, version: int, **delta) -> dict:
+    """
+    Log the delta under its version, drop entries older than
+    DIAGRAM_CHANGE_LOG_SIZE versions and commit. Returns the delta as sent
+    to the writer (and later to GET /changes).
+    """
+    data = {key: value for key, value in delta.items() if value}
+    db.add(DiagramChange(diagram_id=diagram_id, version=version, data=data))
+    db.query(DiagramChange).filter(
+        DiagramChange.diagram_id == diagram_id,
+        DiagramChange.version <= version - settings.DIAGRAM_CHANGE_LOG_SIZE,
+    ).delete(synchronize_session=False)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=422, detail="Unknown component in layout")
+    return {"diagram_id": diagram_id, "version": version, **data}
+
+@router.put("/diagrams/{diagram_id}/components/{component_id}", response_model=DiagramLayoutDelta)
 def update_diagram_component(
     diagram_id: str, 
     component_id: str, 
     comp_in: DiagramComponentUpdate, 
     db: Session = Depends(get_db)
 ):
-    diagram = db.query(Diagram).filter(Diagram.id == diagram_id).first()
-    if not diagram:
-        raise HTTPException(status_code=404, detail="Diagram not found")
-        
-    # Check if component exists in diagram
-    diagram_comp = db.query(DiagramComponent).filter(
-        DiagramComponent.diagram_id == diagram_id,
-        DiagramComponent.component_id == component_id
-    ).first()
-    
-    if diagram_comp:
-        diagram_comp.x = comp_in.x
-        diagram_comp.y = comp_in.y
-    else:
-        # Add new component to diagram
-        diagram_comp = DiagramComponent(
-            diagram_id=diagram_id,
-            component_id=component_id,
-            x=comp_in.x,
-            y=comp_in.y
-        )
-        db.add(diagram_comp)
-        
-    db.commit()
-    db.refresh(diagram)
-    return diagram
+    """Add a component to the diagram or move it."""
+    version = _claim_layout_version(db, diagram_id, comp_in.version)
+    node = {"component_id": component_id, "x": comp_in.x, "y": comp_in.y}
+    _upsert_nodes(db, diagram_id, [node])
+    return _commit_change(db, diagram_id, version, nodes=[node])
 
-@router.delete("/diagrams/{diagram_id}/components/{component_id}")
-def remove_component_from_diagram(diagram_id: str, component_id: str, db: Session = Depends(get_db)):
-    diagram_comp = db.query(DiagramComponent).filter(
+@router.delete("/diagrams/{diagram_id}/components/{component_id}", response_model=DiagramLayoutDelta)
+def remove_component_from_diagram(
+    diagram_id: str,
+    component_id: str,
+    version: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    new_version = _claim_layout_version(db, diagram_id, version)
+    removed = db.query(DiagramComponent).filter(
         DiagramComponent.diagram_id == diagram_id,
         DiagramComponent.component_id == component_id
-    ).first()
-    
-    if not diagram_comp:
+    ).delete(synchronize_session=False)
+    if not removed:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Component not found in diagram")
-        
-    db.delete(diagram_comp)
-    db.commit()
-    return {"ok": True}
+    return _commit_change(db, diagram_id, new_version, removed_nodes=[component_id])
 
-@router.put("/diagrams/{diagram_id}/edges", response_model=DiagramOut)
+@router.put("/diagrams/{diagram_id}/edges", response_model=DiagramLayoutDelta)
 def update_diagram_edge(
     diagram_id: str,
     source_id: str,
@@ -148,33 +284,83 @@ def update_diagram_edge(
     edge_in: DiagramEdgeUpdate,
     db: Session = Depends(get_db)
 ):
-    diagram = db.query(Diagram).filter(Diagram.id == diagram_id).first()
-    if not diagram:
+    """Create an edge entry or update its handles; a handle left out keeps its value."""
+    version = _claim_layout_version(db, diagram_id, edge_in.version)
+    edge = {
+        "source_id": source_id,
+        "target_id": target_id,
+        "source_handle": edge_in.source_handle,
+        "target_handle": edge_in.target_handle,
+    }
+    _upsert_edges(db, diagram_id, [edge])
+    return _commit_change(db, diagram_id, version, edges=[edge])
+
+@router.patch("/diagrams/{diagram_id}/layout", response_model=DiagramLayoutDelta)
+def patch_diagram_layout(diagram_id: str, layout_in: DiagramLayoutPatch, db: Session = Depends(get_db)):
+    """
+    Save a batch of node positions and edges (e.g. a group drag) at once:
+    one version check, one upsert per table, one commit.
+
+    `version` is the layout_version the client last saw; if someone saved
+    since, nothing is written and 409 returns the current version. The
+    response is the applied delta plus the new version, not the diagram.
+    """
+    new_version = _claim_layout_version(db, diagram_id, layout_in.version)
+
+    # Last entry wins if the batch names the same node or edge twice
+    nodes = {n.component_id: n.model_dump() for n in layout_in.nodes}
+    edges = {(e.source_id, e.target_id): e.model_dump() for e in layout_in.edges}
+    _upsert_nodes(db, diagram_id, list(nodes.values()))
+    _upsert_edges(db, diagram_id, list(edges.values()))
+    return _commit_change(db, diagram_id, new_version, nodes=list(nodes.values()), edges=list(edges.values()))
+
+@router.get("/diagrams/{diagram_id}/changes", response_model=DiagramChanges)
+def get_diagram_changes(diagram_id: str, since: int = Query(..., ge=0), db: Session = Depends(get_db)):
+    """
+    Node/edge deltas after version `since`, oldest first, for clients that
+    already hold the diagram at that version. `reset` means the log no
+    longer reaches back that far (or `since` is unknown): reload the diagram.
+    """
+    current = db.query(Diagram.layout_version).filter(Diagram.id == diagram_id).scalar()
+    if current is None:
         raise HTTPException(status_code=404, detail="Diagram not found")
+    result = {"diagram_id": diagram_id, "version": current, "changes": [], "reset": since > current}
+    if since >= current:
+        return result
 
-    # Check if edge exists
-    edge = db.query(DiagramEdge).filter(
-        DiagramEdge.diagram_id == diagram_id,
-        DiagramEdge.source_id == source_id,
-        DiagramEdge.target_id == target_id
-    ).first()
-
-    if edge:
-        if edge_in.source_handle is not None:
-            edge.source_handle = edge_in.source_handle
-        if edge_in.target_handle is not None:
-            edge.target_handle = edge_in.target_handle
-    else:
-        # Create new edge entry
-        edge = DiagramEdge(
-            diagram_id=diagram_id,
-            source_id=source_id,
-            target_id=target_id,
-            source_handle=edge_in.source_handle,
-            target_handle=edge_in.target_handle
-        )
-        db.add(edge)
+    rows = (
+        db.query(DiagramChange.version, DiagramChange.data)
+        .filter(DiagramChange.diagram_id == diagram_id, DiagramChange.version > since)
+        .order_by(DiagramChange.version)
+        .all()
+    )
+    if not rows or rows[0].version != since + 1 or rows[-1].version != current:
+        result["reset"] = True
+        return result
+    result["changes"] = [{"version": version, **data} for version, data in rows]
+    return result
 
-    db.commit()
-    db.refresh(diagram)
-    return diagram
+@router.post("/diagrams/{diagram_id}/layout/auto", response_model=DiagramLayoutDelta)
+def auto_layout_diagram(diagram_id: str, layout_in: DiagramAutoLayoutRequest, db: Session = Depends(get_db)):
+    """
+    Compute positions for every component of the diagram (see
+    app.utils.diagram_layout) and save them like PATCH /layout does.
+    Edges are the component relationships between the diagram's members.
+    """
+    component_ids = [
+        cid for (cid,) in db.query(DiagramComponent.component_id)
+        .filter(DiagramComponent.diagram_id == diagram_id)
+        .order_by(DiagramComponent.component_id)
+    ]
+    members = db.query(DiagramComponent.component_id).filter(DiagramComponent.diagram_id == diagram_id)
+    relationships = (
+        db.query(ComponentRelationship.parent_id, ComponentRelationship.child_id, ComponentRelationship.type)
+        .filter(ComponentRelationship.parent_id.in_(members), ComponentRelationship.child_id.in_(members))
+        .all()
+    )
+    positions = diagram_layout.layout(component_ids, relationships, layout_in.algorithm)
+
+    new_version = _claim_layout_version(db, diagram_id, layout_in.version)
+    nodes = [{"component_id": cid, "x": x, "y": y} for cid, (x, y) in positions.items()]
+    _upsert_nodes(db, diagram_id, nodes)
+    return _commit_change(db, diagram_id, new_version, nodes=nodes)
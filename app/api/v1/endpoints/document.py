@@ -1,15 +1,17 @@
+from datetime import datetime, UTC
 from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Header, Request
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.api import deps
 from app.db.models.document import Document, DocumentType
 from app.schemas import document as schemas
 from app.utils.id_generator import generate_artifact_id
 from app.core.config import settings
-import shutil
-import os
-from pathlib import Path
-from datetime import datetime
+from app.utils import blob_store, chunked_upload, etags, fast_json, markdown_render, static_files
 
 router = APIRouter()
 
@@ -17,6 +19,8 @@ UPLOAD_DIR = settings.UPLOAD_DIR
 
 @router.get("/", response_model=List[schemas.Document])
 def read_documents(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -25,11 +29,16 @@ def read_documents(
     query = db.query(Document)
     if project_id:
         query = query.filter(Document.project_id == project_id)
-    return query.offset(skip).limit(limit).all()
+    etag = etags.list_etag(query, Document, request)
+    if cached := etags.not_modified(request, etag):
+        return cached
+    etags.set_etag(response, etag)
+    return fast_json.list_response(query.offset(skip).limit(limit), Document, schemas.Document, response)
 
 @router.post("/", response_model=schemas.Document)
 def create_document(
     doc_in: schemas.DocumentCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(deps.get_db)
 ):
     # Use centralized ID generator
@@ -47,74 +56,215 @@ def create_document(
         project_id=doc_in.project_id
     )
     db.add(db_obj)
+    blob_store.acquire(db, *blob_store.document_digests(db_obj.content_url, db_obj.content_text))
     db.commit()
     db.refresh(db_obj)
+    # Render once now so the first view is served from the cache
+    background_tasks.add_task(markdown_render.warm, db_obj.content_text)
     
     return db_obj
 
 @router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), db: Session = Depends(deps.get_db)):
     """
-    Upload a file and return the local path.
+    Upload a file into the content-addressed store and return its URL.
+    Uploading the same content again returns the same URL.
+    For very large files use the resumable /uploads endpoints instead.
     """
+    limit = blob_store.max_upload_bytes("document")
+    if file.size is not None and file.size > limit:
+        raise HTTPException(status_code=413, detail=str(blob_store.UploadTooLarge(limit)))
     try:
-        file_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}"
-        file_path = UPLOAD_DIR / file_id
-        
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        return {
-            "url": f"/api/v1/documents/files/{file_id}",  # Return URL instead of file path
-            "filename": file.filename,
-            "content_type": file.content_type
-        }
+        blob = await blob_store.store_stream(
+            db, blob_store.iter_upload(file), file.filename, file.content_type, limit
+        )
+        return await run_in_threadpool(_commit_upload, db, blob, file.filename, file.content_type)
+    except blob_store.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
+        await run_in_threadpool(db.rollback)
         raise HTTPException(status_code=500, detail=f"Could not upload file: {str(e)}")
 
-@router.get("/files/{filename}")
-async def serve_file(filename: str):
+def _upload_response(blob, filename: str, content_type: str) -> dict:
+    return {
+        "url": blob_store.document_url(blob),  # Return URL instead of file path
+        "filename": filename,
+        "content_type": content_type,
+        "sha256": blob.sha256
+    }
+
+def _commit_upload(db: Session, blob, filename: str, content_type: str) -> dict:
+    """Commit the stored blob and return the upload response (runs in the threadpool)."""
+    # Built before the commit expires the blob, so no refresh query is needed
+    response = _upload_response(blob, filename, content_type)
+    db.commit()
+    return response
+
+def _complete_upload(db: Session, session: dict) -> dict:
+    """Store a fully received resumable upload and commit it (runs in the threadpool)."""
+    blob = chunked_upload.complete(db, session)
+    return {**_commit_upload(db, blob, session["filename"], session["content_type"]), "complete": True}
+
+def _session_response(session: dict) -> dict:
+    return {
+        "upload_id": session["upload_id"],
+        "filename": session["filename"],
+        "size": session["size"],
+        "offset": session["offset"],
+        "chunk_size": settings.UPLOAD_CHUNK_SIZE_MB * 1024 * 1024,
+    }
+
+@router.post("/uploads", status_code=201)
+def create_upload_session(session_in: schemas.UploadSessionCreate):
+    """
+    Start a resumable upload. Send the file with PATCH /uploads/{upload_id}
+    in chunks, each with an Upload-Offset header.
+    """
+    try:
+        session = chunked_upload.create_session(
+            session_in.filename, session_in.size, session_in.content_type, "document"
+        )
+    except blob_store.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return _session_response(session)
+
+@router.get("/uploads/{upload_id}")
+def get_upload_session(upload_id: str):
+    """
+    Current offset of a resumable upload; resume sending from there.
+    """
+    try:
+        return _session_response(chunked_upload.load_session(upload_id))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+
+@router.patch("/uploads/{upload_id}")
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Append the request body at `Upload-Offset`. The body is streamed to disk
+    as it arrives. Once the last byte is received the file is stored and its
+    URL returned, exactly like POST /upload.
+    """
+    try:
+        session = await chunked_upload.append_chunk(upload_id, upload_offset, request.stream())
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    except chunked_upload.OffsetMismatch as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "offset": e.expected})
+    except blob_store.UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Chunk goes past the declared upload size")
+
+    if session["offset"] < session["size"]:
+        return _session_response(session)
+
+    try:
+        return await run_in_threadpool(_complete_upload, db, session)
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=500, detail=f"Could not store upload: {str(e)}")
+
+@router.delete("/uploads/{upload_id}")
+def abort_upload(upload_id: str):
+    try:
+        chunked_upload.abort(upload_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    return {"ok": True}
+
+@router.get("/files/{filename:path}")
+async def serve_file(filename: str, request: Request):
     """
-    Serve an uploaded file.
+    Serve an uploaded file (legacy name or blobs/<shard>/<hash> path).
+    Supports conditional GET and byte ranges; blob-store files are cached as immutable.
     """
-    from fastapi.responses import FileResponse
-    file_path = UPLOAD_DIR / filename
+    upload_dir = settings.UPLOAD_DIR
+    file_path = (upload_dir / filename).resolve()
     
-    if not file_path.exists():
+    if upload_dir not in file_path.parents or not file_path.is_file():
         raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(file_path)
+    return static_files.cached_file_response(file_path, request.headers)
 
 @router.get("/{aid}", response_model=schemas.Document)
 def read_document(
     aid: str,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db)
 ):
     document = db.query(Document).filter(Document.aid == aid).first()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
+    etag = etags.artifact_etag(document)
+    if cached := etags.not_modified(request, etag):
+        return cached
+    etags.set_etag(response, etag)
     return document
 
+@router.get("/{aid}/rendered")
+def read_document_rendered(
+    aid: str,
+    request: Request,
+    db: Session = Depends(deps.get_db)
+):
+    """
+    The document's Markdown content as sanitized HTML, rendered once per
+    content hash and cached. The ETag is that hash, so an unchanged document
+    is revalidated with a 304 without rendering or sending it again.
+    """
+    if not markdown_render.RENDERING_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Server-side Markdown rendering is not available")
+    row = db.query(Document.content_text).filter(Document.aid == aid).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    digest = markdown_render.content_hash(row.content_text or "")
+    headers = {"etag": f'"{digest}"', "cache-control": static_files.REVALIDATE_CACHE}
+    if static_files.is_not_modified(Headers(headers), request.headers):
+        return Response(status_code=304, headers=headers)
+
+    rendered = markdown_render.render(db, row.content_text, digest)
+    return JSONResponse({"aid": aid, **rendered}, headers=headers)
+
 @router.put("/{aid}", response_model=schemas.Document)
 def update_document(
     aid: str,
     doc_in: schemas.DocumentUpdate,
+    background_tasks: BackgroundTasks,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db)
 ):
     document = db.query(Document).filter(Document.aid == aid).first()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
+    if etags.precondition_failed(request, etags.artifact_etag(document)):
+        raise HTTPException(status_code=412, detail="Document was modified since it was read; reload and retry")
         
     update_data = doc_in.dict(exclude_unset=True)
+    old_digests = blob_store.document_digests(document.content_url, document.content_text)
     # Ensure invalid fields aren't processed if Pydantic didn't catch them (extra safety)
     valid_fields = ['title', 'description', 'content_url', 'content_text', 'mime_type', 'document_type', 'status', 'area']
     for field, value in update_data.items():
         if field in valid_fields:
             setattr(document, field, value)
+    blob_store.update_references(
+        db, old_digests, blob_store.document_digests(document.content_url, document.content_text)
+    )
+    # Set explicitly: the column default's resolution may be a whole second, too coarse for ETags
+    document.last_updated = datetime.now(UTC)
         
     db.add(document)
     db.commit()
     db.refresh(document)
+    if "content_text" in update_data:
+        background_tasks.add_task(markdown_render.warm, document.content_text)
+    etags.set_etag(response, etags.artifact_etag(document))
     return document
 
 @router.delete("/{aid}", response_model=schemas.Document)
@@ -126,6 +276,7 @@ def delete_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
         
+    blob_store.release(db, *blob_store.document_digests(document.content_url, document.content_text))
     db.delete(document)
     db.commit()
     return document
@@ -1,5 +1,4 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-import shutil
 import os
 from pathlib import Path
 from typing import List
@@ -14,45 +13,85 @@ router = APIRouter()
 UPLOAD_DIR = settings.UPLOAD_DIR
 
 from app.db.models.image import Image as ImageModel
-from fastapi import Form, Query
+from app.db.models.blob import Blob
+from app.utils import blob_store, image_index, image_refs, image_variants, static_files
+from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
+from urllib.parse import quote
+from fastapi import Form, Query, Request
 from sqlalchemy import or_
 
+def _attach_image(db: Session, blob: Blob, filename: str, project_id: str) -> dict:
+    """Point the image named `filename` at `blob` and commit (runs in the threadpool)."""
+    existing = db.query(ImageModel).filter(ImageModel.filename == filename).first()
+    if existing:
+        # Re-upload under the same name points the image at the new content
+        if existing.blob_sha256 != blob.sha256:
+            blob_store.release(db, existing.blob_sha256)
+            blob_store.acquire(db, blob.sha256)
+            existing.blob_sha256 = blob.sha256
+        image = existing
+    else:
+        image = ImageModel(
+            filename=filename,
+            project_id=project_id,
+            blob_sha256=blob.sha256
+        )
+        db.add(image)
+        blob_store.acquire(db, blob.sha256)
+    # Store size/dimensions/type now so listings never touch the filesystem
+    image_index.apply_file_metadata(image, settings.UPLOAD_DIR / blob.path, blob.sha256, blob.mime_type)
+    db.commit()
+
+    # Thumbnails and width variants are produced off the request path
+    if blob.variants is None:
+        image_variants.schedule(blob.sha256, blob.path)
+
+    return {
+        "filename": filename,
+        "url": blob_store.blob_url(blob),
+        "sha256": blob.sha256,
+        "width": image.width,
+        "height": image.height
+    }
+
 @router.post("/upload")
 async def upload_image(
     file: UploadFile = File(...), 
     project_id: str = Form(None),
     db: Session = Depends(get_db) # Need to inject db session here, requires import update? No, existing import 'get_db' is in site.py not here. Need to check imports.
 ):
+    limit = blob_store.max_upload_bytes("image")
+    if file.size is not None and file.size > limit:
+        raise HTTPException(status_code=413, detail=str(blob_store.UploadTooLarge(limit)))
     try:
-        # Check if file exists in DB? Or just overwrite?
-        # For simplicity, we save file and create DB entry.
-        
-        file_path = UPLOAD_DIR / file.filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # Create DB record
-        # Check if exists
-        existing = db.query(ImageModel).filter(ImageModel.filename == file.filename).first()
-        if not existing:
-            new_image = ImageModel(
-                filename=file.filename,
-                project_id=project_id
-            )
-            db.add(new_image)
-            db.commit()
-            
-        return {"filename": file.filename, "url": f"/uploads/{file.filename}"}
+        # Content is stored once under its hash; the filename is just the image's name
+        blob = await blob_store.store_stream(
+            db, blob_store.iter_upload(file), file.filename, file.content_type, limit
+        )
+        return await run_in_threadpool(_attach_image, db, blob, file.filename, project_id)
+    except blob_store.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
+        # A newly stored file loses its row here; collect_garbage sweeps it after the grace period
+        await run_in_threadpool(db.rollback)
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
 
 @router.delete("/{filename}")
-def delete_image(filename: str, db: Session = Depends(get_db)): # Add db dependency
+def delete_image(filename: str, force: bool = False, db: Session = Depends(get_db)): # Add db dependency
     file_path = UPLOAD_DIR / filename
     
-    # Delete from DB
+    # Delete from DB; the stored content is removed by blob GC once nothing references it
     db_image = db.query(ImageModel).filter(ImageModel.filename == filename).first()
+    if not force and image_refs.name_references(db, filename):
+        # Links by name would break; links by content keep working (they hold their own blob reference)
+        usages = image_refs.usages(db, db_image or ImageModel(filename=filename))
+        raise HTTPException(status_code=409, detail={
+            "message": "Image is still embedded in documents or artifacts; pass force=true to delete anyway",
+            "usages": [u for u in usages if u["by_name"]],
+        })
     if db_image:
+        blob_store.release(db, db_image.blob_sha256)
         db.delete(db_image)
         db.commit()
         
@@ -60,59 +99,178 @@ def delete_image(filename: str, db: Session = Depends(get_db)): # Add db depende
         raise HTTPException(status_code=404, detail="Image not found")
     
     try:
-        if file_path.exists():
+        # Legacy images are stored by name
+        if file_path.is_file():
             os.remove(file_path)
+            image_variants.remove_variants(filename)
         return {"ok": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete image: {str(e)}")
 
 @router.get("/")
-def list_images(project_id: str = None, db: Session = Depends(get_db)): # Add db dependency
-    query = db.query(ImageModel)
-    
-    # Sync filesystem with DB? 
-    # For now, let's just return what's in DB, plus maybe what's on disk if we want to be robust?
-    # Let's trust DB for scoping.
+def list_images(
+    project_id: str = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """
+    Gallery listing, newest first. Everything comes from the images table;
+    size and dimensions are stored at upload and kept current by the
+    background reconciliation, so no file is touched here.
+    """
+    query = db.query(ImageModel, Blob).outerjoin(Blob, ImageModel.blob_sha256 == Blob.sha256)
     
     if project_id:
         query = query.filter(or_(ImageModel.project_id == project_id, ImageModel.project_id == None))
         
-    db_images = query.all()
+    db_images = (
+        query.order_by(ImageModel.created_at.desc(), ImageModel.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
     
     results = []
-    for img in db_images:
-        path = UPLOAD_DIR / img.filename
-        size = path.stat().st_size if path.exists() else 0
+    for img, blob in db_images:
+        relpath = image_index.relpath_for(img, blob)
+        url = f"/uploads/{relpath}"
         results.append({
             "filename": img.filename,
-            "url": f"/uploads/{img.filename}",
-            "size": size,
+            "url": url,
+            "size": img.size or 0,
+            "width": img.width,
+            "height": img.height,
+            "mime_type": img.mime_type,
+            "sha256": img.sha256,
+            "missing": img.missing,
             "created": img.created_at,
-            "project_id": img.project_id
+            "project_id": img.project_id,
+            **_variant_fields(img.filename, url, relpath, blob)
         })
         
     return results
 
+@router.get("/unused")
+def list_unused_images(
+    project_id: str = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """Images that no document or artifact embeds (orphan cleanup candidates)."""
+    images = image_refs.unused_images(db, project_id).offset(skip).limit(limit).all()
+    return [
+        {
+            "filename": img.filename,
+            "size": img.size or 0,
+            "sha256": img.sha256,
+            "created": img.created_at,
+            "project_id": img.project_id,
+        }
+        for img in images
+    ]
+
+@router.get("/{filename}/usages")
+def get_image_usages(filename: str, db: Session = Depends(get_db)):
+    """Documents and artifacts that embed this image, by name or by content."""
+    db_image = db.query(ImageModel).filter(ImageModel.filename == filename).first()
+    if db_image:
+        return image_refs.usages(db, db_image)
+    if not (UPLOAD_DIR / filename).is_file():
+        raise HTTPException(status_code=404, detail="Image not found")
+    # Legacy file with no images row: only name references are possible
+    return image_refs.usages(db, ImageModel(filename=filename))
+
+@router.post("/reconcile")
+async def reconcile_images(backfill_only: bool = False, db: Session = Depends(get_db)):
+    """
+    Run the image metadata reconciliation now (it also runs periodically in
+    the background). `backfill_only` limits it to rows without metadata.
+    """
+    return await run_in_threadpool(image_index.run_reconcile, db, backfill_only)
+
+@router.get("/reconcile/status")
+def reconcile_status():
+    return image_index.last_run()
+
+def _variant_fields(filename: str, url: str, relpath: str, blob) -> dict:
+    fields = image_variants.variant_listing(relpath, blob.variants if blob is not None else None)
+    if fields["thumbnail_url"] is None:
+        # Not generated yet (legacy or still queued): the variant route creates it on first use
+        if image_variants.is_supported(relpath):
+            fields["thumbnail_url"] = f"/api/v1/images/{quote(filename)}/variants/{image_variants.THUMBNAIL}"
+        else:
+            fields["thumbnail_url"] = url
+    return fields
+
+@router.get("/{filename}/variants/{variant}")
+async def get_image_variant(filename: str, variant: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Serve a thumbnail ("thumb") or width variant ("w960", ...) of an image,
+    generating it on first request. Falls back to the original when the
+    image has no such variant (vector formats, narrow originals, no Pillow).
+    """
+    row = (
+        db.query(ImageModel, Blob)
+        .outerjoin(Blob, ImageModel.blob_sha256 == Blob.sha256)
+        .filter(ImageModel.filename == filename)
+        .first()
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Image not found")
+    img, blob = row
+    relpath = blob.path if blob is not None else img.filename
+    if not (settings.UPLOAD_DIR / relpath).is_file():
+        raise HTTPException(status_code=404, detail="Image file missing")
+
+    path = await run_in_threadpool(image_variants.ensure_variant, relpath, variant)
+    if blob is not None and blob.variants is None:
+        # Uploaded before variants existed: record the full set for the listing
+        image_variants.schedule(blob.sha256, blob.path)
+    if path is None:
+        return RedirectResponse(f"/uploads/{relpath}")
+    return static_files.cached_file_response(path, request.headers, media_type="image/webp")
+
 class RenameRequest(BaseModel):
     new_filename: str
 
 @router.put("/{filename}/rename")
-def rename_image(filename: str, request: RenameRequest):
+def rename_image(filename: str, request: RenameRequest, db: Session = Depends(get_db)):
     old_path = UPLOAD_DIR / filename
-    if not old_path.exists():
+    db_image = db.query(ImageModel).filter(ImageModel.filename == filename).first()
+    if not db_image and not old_path.exists():
         raise HTTPException(status_code=404, detail="Image not found")
     
     new_filename = Path(request.new_filename).name
     new_path = UPLOAD_DIR / new_filename
     
-    if new_path.exists():
+    taken = db.query(ImageModel).filter(ImageModel.filename == new_filename).first()
+    if taken or new_path.exists():
         raise HTTPException(status_code=400, detail="A file with that name already exists")
     
+    moved = False
     try:
-        old_path.rename(new_path)
+        blob = db.get(Blob, db_image.blob_sha256) if db_image and db_image.blob_sha256 else None
+        # Documents and artifacts linking the old name are rewritten in the same transaction
+        rewritten = image_refs.rewrite_references(db, filename, new_filename)
+        if db_image:
+            db_image.filename = new_filename
+        db.flush()
+        if blob is None and old_path.exists():
+            # Legacy image stored by name: move the file too; variants regenerate lazily
+            old_path.rename(new_path)
+            moved = True
+        db.commit()
+        if moved:
+            image_variants.remove_variants(filename)
         return {
             "filename": new_filename,
-            "url": f"/uploads/{new_filename}"
+            "url": blob_store.blob_url(blob) if blob else f"/uploads/{new_filename}",
+            "references_updated": rewritten
         }
     except Exception as e:
+        db.rollback()
+        if moved:
+            new_path.rename(old_path)
         raise HTTPException(status_code=500, detail=f"Failed to rename image: {str(e)}")
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import uuid4
@@ -9,6 +10,15 @@ from app.schemas.linkage import LinkageCreate, LinkageOut
 
 router = APIRouter(prefix="/linkages", tags=["Linkages"])
 
+
+def _commit_edge(db: Session) -> None:
+    # uq_linkages_edge: the same link may exist only once
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(409, "Linkage already exists")
+
 def _artifact_exists(db: Session, typ: str, aid: str) -> bool:
     # Skip check for external links
     if typ in ["url", "external", "file"]:
@@ -64,7 +74,7 @@ def create_linkage(payload: LinkageCreate, db: Session = Depends(get_db)):
         raise HTTPException(400, "Target artifact not found")
     db_obj = Linkage(aid=str(uuid4()), **payload.model_dump())
     db.add(db_obj)
-    db.commit()
+    _commit_edge(db)
     db.refresh(db_obj)
     return db_obj
 
@@ -76,7 +86,7 @@ def update_linkage(aid: str, payload: LinkageCreate, db: Session = Depends(get_d
     update_data = payload.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_obj, field, value)
-    db.commit()
+    _commit_edge(db)
     db.refresh(db_obj)
     return db_obj
 
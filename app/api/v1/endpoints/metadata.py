@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from sqlalchemy import cast, String
 from typing import List
@@ -6,21 +6,27 @@ from typing import List
 from app.db.session import get_db
 from app.db.models.metadata import Area, Person
 from app.schemas.metadata import AreaCreate, AreaOut, PersonCreate, PersonOut
+from app.utils import response_cache
 import uuid
 
 router = APIRouter(prefix="/metadata", tags=["Metadata"])
 
+
+def _area_scope(area: Area):
+    # GLOBAL is listed with every project, so it invalidates them all
+    return None if area.code == "GLOBAL" else area.project_id
+
 # -------------------------------------------------
 # Areas
 # -------------------------------------------------
 @router.get("/areas", response_model=List[AreaOut])
-def list_areas(project_id: str = None, db: Session = Depends(get_db)):
+def list_areas(request: Request, project_id: str = None, db: Session = Depends(get_db)):
     query = db.query(Area)
     if project_id:
         # Strict filtering: Match project_id OR be the special 'GLOBAL' area
         # We explicitly do NOT match None project_ids generally, only the specific GLOBAL code
         query = query.filter((Area.project_id == project_id) | (Area.code == "GLOBAL"))
-    return query.all()
+    return response_cache.cached(request, "areas", project_id, List[AreaOut], query.all)
 
 
 @router.post("/areas", response_model=AreaOut, status_code=status.HTTP_201_CREATED)
@@ -35,6 +41,7 @@ def create_area(payload: AreaCreate, db: Session = Depends(get_db)):
     db.add(area)
     db.commit()
     db.refresh(area)
+    response_cache.invalidate("areas", _area_scope(area))
     return area
 
 @router.put("/areas/{code}", response_model=AreaOut)
@@ -42,6 +49,7 @@ def update_area(code: str, payload: AreaCreate, db: Session = Depends(get_db)):
     area = db.query(Area).filter(Area.code == code).first()
     if not area:
         raise HTTPException(status_code=404, detail="Area not found")
+    old_scope = _area_scope(area)
     
     for key, value in payload.dict().items():
         if key != 'code': # Don't update PK
@@ -49,6 +57,7 @@ def update_area(code: str, payload: AreaCreate, db: Session = Depends(get_db)):
             
     db.commit()
     db.refresh(area)
+    response_cache.invalidate("areas", old_scope, _area_scope(area))
     return area
 
 @router.delete("/areas/{code}", status_code=status.HTTP_204_NO_CONTENT)
@@ -56,8 +65,10 @@ def delete_area(code: str, db: Session = Depends(get_db)):
     area = db.query(Area).filter(Area.code == code).first()
     if not area:
         raise HTTPException(status_code=404, detail="Area not found")
+    scope = _area_scope(area)
     db.delete(area)
     db.commit()
+    response_cache.invalidate("areas", scope)
     return None
 
 # -------------------------------------------------
@@ -65,6 +76,7 @@ def delete_area(code: str, db: Session = Depends(get_db)):
 # -------------------------------------------------
 @router.get("/people", response_model=List[PersonOut])
 def list_people(
+    request: Request,
     project_id: str = None, 
     role: str = None, 
     db: Session = Depends(get_db)
@@ -82,7 +94,7 @@ def list_people(
         term = f'%"{role}"%'
         query = query.filter(cast(Person.roles, String).like(term))
         
-    return query.all()
+    return response_cache.cached(request, "people", project_id, List[PersonOut], query.all)
 
 @router.get("/people/{person_id}", response_model=PersonOut)
 def get_person(person_id: str, db: Session = Depends(get_db)):
@@ -97,6 +109,7 @@ def create_person(payload: PersonCreate, db: Session = Depends(get_db)):
     db.add(person)
     db.commit()
     db.refresh(person)
+    response_cache.invalidate("people", person.project_id)
     return person
 
 @router.put("/people/{person_id}", response_model=PersonOut)
@@ -104,6 +117,7 @@ def update_person(person_id: str, payload: PersonCreate, db: Session = Depends(g
     person = db.query(Person).filter(Person.id == person_id).first()
     if not person:
         raise HTTPException(status_code=404, detail="Person not found")
+    old_project_id = person.project_id
     
     for key, value in payload.dict().items():
         if key != 'id':
@@ -111,6 +125,7 @@ def update_person(person_id: str, payload: PersonCreate, db: Session = Depends(g
             
     db.commit()
     db.refresh(person)
+    response_cache.invalidate("people", old_project_id, person.project_id)
     return person
 
 @router.delete("/people/{person_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -118,8 +133,10 @@ def delete_person(person_id: str, db: Session = Depends(get_db)):
     person = db.query(Person).filter(Person.id == person_id).first()
     if not person:
         raise HTTPException(status_code=404, detail="Person not found")
+    project_id = person.project_id
     db.delete(person)
     db.commit()
+    response_cache.invalidate("people", project_id)
     return None
 
 
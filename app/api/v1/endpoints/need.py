@@ -1,7 +1,7 @@
 from datetime import datetime, UTC
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status as status_code
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status as status_code
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 from uuid import uuid4
@@ -16,16 +16,37 @@ from app.db.models.site import Site
 from app.db.models.component import Component
 from app.enums import Status, LinkType
 from app.schemas.need import NeedCreate, NeedOut
+from app.utils import etags, fast_json, response_cache
 from app.utils.id_generator import generate_artifact_id
 from app.api import deps
 
 router = APIRouter(prefix="/needs", tags=["Needs"])
 
+
+def _source_vision_link(db: Session, aid: str):
+    return db.query(Linkage).filter(
+        Linkage.source_id == aid,
+        Linkage.relationship_type == LinkType.DERIVES_FROM,
+        Linkage.target_artifact_type == 'vision'
+    ).first()
+
+
+def _embedded_version() -> str:
+    """Version of the sites and components nested in NeedOut."""
+    return response_cache.version("sites", "components")
+
+
+def _etag(db: Session, obj: Need) -> str:
+    link = _source_vision_link(db, obj.aid)
+    return etags.artifact_etag(obj, link.target_id if link else None, embedded=_embedded_version())
+
 # -------------------------------------------------
 # GET – list (filterable)
 # -------------------------------------------------
 @router.get("/", response_model=List[NeedOut])
 def list_needs(
+    request: Request,
+    response: Response,
     project_id: Optional[str] = Query(None, description="Filter by project ID"),
     area: Optional[List[str]] = Query(None, description="Filter by area (e.g., MCK)"),
     status: Optional[List[str]] = Query(None, description="Filter by status (e.g., Draft)"),
@@ -57,23 +78,29 @@ def list_needs(
             query = query.filter(
                 (Need.title.ilike(term)) | (Need.description.ilike(term))
             )
-    return query.order_by(Need.aid).all()
+
+    etag = etags.list_etag(query, Need, request, embedded=_embedded_version())
+    if cached := etags.not_modified(request, etag):
+        return cached
+    etags.set_etag(response, etag)
+    return fast_json.list_response(query.order_by(Need.aid), Need, NeedOut, response)
 
 # -------------------------------------------------
 # GET – by id
 # -------------------------------------------------
 @router.get("/{aid}", response_model=NeedOut)
-def get_need(aid: str, db: Session = Depends(get_db)):
+def get_need(aid: str, request: Request, response: Response, db: Session = Depends(get_db)):
     obj = db.query(Need).filter(Need.aid == aid).first()
     if not obj:
         raise HTTPException(404, "Need not found")
     
     # Fetch source vision linkage
-    link = db.query(Linkage).filter(
-        Linkage.source_id == aid,
-        Linkage.relationship_type == LinkType.DERIVES_FROM,
-        Linkage.target_artifact_type == 'vision'
-    ).first()
+    link = _source_vision_link(db, aid)
+
+    etag = etags.artifact_etag(obj, link.target_id if link else None, embedded=_embedded_version())
+    if cached := etags.not_modified(request, etag):
+        return cached
+    etags.set_etag(response, etag)
     
     result = NeedOut.model_validate(obj)
     if link:
@@ -137,12 +164,16 @@ def create_need(
 def update_need(
     aid: str, 
     payload: NeedCreate, 
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     _perm = Depends(deps.check_permissions(["need:edit"]))
 ):
     db_obj = db.query(Need).filter(Need.aid == aid).first()
     if not db_obj:
         raise HTTPException(404, "Need not found")
+    if etags.precondition_failed(request, _etag(db, db_obj)):
+        raise HTTPException(412, "Need was modified since it was read; reload and retry")
     update_data = payload.model_dump(exclude_unset=True)
     
     # Handle source_vision_id separately (not a column)
@@ -168,11 +199,7 @@ def update_need(
     if source_vision_id_present:
         new_vision_id = source_vision_id_update
         # Find existing linkage
-        existing_link = db.query(Linkage).filter(
-            Linkage.source_id == aid,
-            Linkage.relationship_type == LinkType.DERIVES_FROM,
-            Linkage.target_artifact_type == 'vision'
-        ).first()
+        existing_link = _source_vision_link(db, aid)
         
         if existing_link:
             if new_vision_id:
@@ -202,13 +229,10 @@ def update_need(
     result = NeedOut.model_validate(db_obj)
     if source_vision_id_present:
         result.source_vision_id = new_vision_id
-    elif existing_link := db.query(Linkage).filter(
-            Linkage.source_id == aid,
-            Linkage.relationship_type == LinkType.DERIVES_FROM,
-            Linkage.target_artifact_type == 'vision'
-        ).first():
+    elif existing_link := _source_vision_link(db, aid):
         result.source_vision_id = existing_link.target_id
-        
+
+    etags.set_etag(response, etags.artifact_etag(db_obj, result.source_vision_id, embedded=_embedded_version()))
     return result
 
 # -------------------------------------------------
@@ -223,10 +247,12 @@ def delete_need(
     db_obj = db.query(Need).filter(Need.aid == aid).first()
     if not db_obj:
         raise HTTPException(404, "Need not found")
-    # Delete associated linkages
-    db.query(Linkage).filter(
+    # Delete associated linkages one by one so the change feed records them
+    linkages = db.query(Linkage).filter(
         (Linkage.source_id == aid) | (Linkage.target_id == aid)
-    ).delete(synchronize_session=False)
+    ).all()
+    for linkage in linkages:
+        db.delete(linkage)
     
     db.delete(db_obj)
     db.commit()
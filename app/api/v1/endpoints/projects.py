@@ -1,17 +1,23 @@
 # app/api/v1/endpoints/projects.py
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List
 
+from app.core.config import settings
 from app.db.session import get_db
 from app.db.models.project import Project
-from app.schemas.project import ProjectCreate, ProjectOut, ProjectUpdate
+from app.schemas.project import ProjectChanges, ProjectCreate, ProjectOut, ProjectUpdate
+from app.utils import change_feed, events, image_refs, response_cache
 
 router = APIRouter(tags=["projects"])
 
 @router.get("/", response_model=List[ProjectOut])
-def list_projects(db: Session = Depends(get_db)):
-    return db.query(Project).all()
+def list_projects(request: Request, db: Session = Depends(get_db)):
+    return response_cache.cached(request, "projects", None, List[ProjectOut], db.query(Project).all)
 
 from uuid import UUID
 
@@ -33,6 +39,72 @@ def get_project(project_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Project not found")
     return project
 
+def _find_project_id(db: Session, project_id: str):
+    query = db.query(Project.id)
+    if is_valid_uuid(project_id):
+        return query.filter(Project.id == project_id).scalar()
+    return query.filter(Project.name == project_id).scalar()
+
+@router.get("/{project_id}/events/stream")
+async def stream_project_events(project_id: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Server-sent events for the project's artifacts, linkages, comments and
+    diagrams (see app.utils.events). EventSource reconnects send
+    Last-Event-ID and get the events they missed, or a "resync" event.
+    """
+    real_id = await run_in_threadpool(_find_project_id, db, project_id)
+    if real_id is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    # Do not hold a pooled connection for the lifetime of the stream
+    db.close()
+
+    last_event_id = request.headers.get("last-event-id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        last_event_id = -1  # unknown id: resync
+    events.get_backend().start(db.get_bind())
+    subscription = events.hub.subscribe(real_id, last_event_id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), settings.EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield events.format_sse(item)
+        finally:
+            events.hub.unsubscribe(subscription)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # nginx: do not buffer the stream
+    })
+
+@router.get("/{project_id}/changes", response_model=ProjectChanges)
+def get_project_changes(
+    project_id: str,
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    include_data: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Visions, needs, use cases, requirements, documents and linkages changed
+    after cursor `since`, oldest first, one entry per artifact (deletions
+    as tombstones). Page with `since=<cursor>` while `has_more`; keep the
+    last cursor for the next sync. See app.utils.change_feed.
+    """
+    resolved = _find_project_id(db, project_id)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return change_feed.changes(db, resolved, since=since, limit=limit, include_data=include_data)
+
 @router.post("/", response_model=ProjectOut, status_code=status.HTTP_201_CREATED)
 def create_project(payload: ProjectCreate, db: Session = Depends(get_db)):
     if db.query(Project).filter(Project.name == payload.name).first():
@@ -42,6 +114,7 @@ def create_project(payload: ProjectCreate, db: Session = Depends(get_db)):
     db.add(db_obj)
     db.commit()
     db.refresh(db_obj)
+    response_cache.invalidate("projects")
     return db_obj
 
 @router.put("/{project_id}", response_model=ProjectOut)
@@ -56,6 +129,7 @@ def update_project(project_id: str, payload: ProjectUpdate, db: Session = Depend
     
     db.commit()
     db.refresh(project)
+    response_cache.invalidate("projects")
     return project
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -74,6 +148,10 @@ def delete_project(project_id: str, db: Session = Depends(get_db)):
     # Delete Linkages first (referencing artifacts)
     db.query(Linkage).filter(Linkage.project_id == project_id).delete()
     
+    # Bulk deletes skip the ORM, so drop the image reference index and change feed rows explicitly
+    image_refs.forget_project(db, project_id)
+    change_feed.forget_project(db, project_id)
+    
     # Delete Artifacts
     db.query(Requirement).filter(Requirement.project_id == project_id).delete()
     db.query(UseCase).filter(UseCase.project_id == project_id).delete()
@@ -82,7 +160,10 @@ def delete_project(project_id: str, db: Session = Depends(get_db)):
     
     # Delete Project
     db.delete(project)
+    # The bulk deletes above are invisible to the event listener
+    events.publish(db, [events.resync(project_id, "deleted")])
     db.commit()
+    response_cache.invalidate("projects")
     return None
 
 @router.get("/{project_id}/export", response_model=None)
@@ -106,6 +187,9 @@ def export_project(project_id: str, db: Session = Depends(get_db)):
     postconditions = db.query(Postcondition).filter(Postcondition.project_id == project_id).all()
     exceptions = db.query(UCException).filter(UCException.project_id == project_id).all()
 
+    # Read before the data: a change feed sync from here may repeat, but never miss, a change
+    changes_cursor = change_feed.current_cursor(db)
+
     # Fetch all data
     visions = db.query(Vision).filter(Vision.project_id == project_id).all()
     needs = db.query(Need).filter(Need.project_id == project_id).all()
@@ -123,7 +207,7 @@ def export_project(project_id: str, db: Session = Depends(get_db)):
 
     # Helper to convert SQLAlchemy objects to dicts
     def to_dict_list(objects):
-        return [obj.as_dict() if hasattr(obj, 'as_dict') else {c.name: getattr(obj, c.name) for c in obj.__table__.columns} for obj in objects]
+        return [change_feed.as_dict(obj) for obj in objects]
 
     # Fetch association tables
     # We need to fetch raw rows for these
@@ -164,6 +248,7 @@ def export_project(project_id: str, db: Session = Depends(get_db)):
 
     export_data = {
         "project": {c.name: getattr(project, c.name) for c in project.__table__.columns},
+        "changes_cursor": changes_cursor,
         "visions": to_dict_list(visions),
         "needs": to_dict_list(needs),
         "use_cases": to_dict_list(use_cases),
@@ -212,8 +297,12 @@ def import_project(project_id: str, data: dict, db: Session = Depends(get_db)):
         from app.db.models.diagram import Diagram, DiagramComponent, DiagramEdge
         from app.db.models.metadata import Person
         
+        # Bulk deletes skip the ORM: tombstone what is about to go (the import re-creates the rest)
+        change_feed.tombstone_project(db, project_id, ("linkage", "requirement", "use_case", "need", "vision"))
+
         # Delete Linkages
         db.query(Linkage).filter(Linkage.project_id == project_id).delete()
+        image_refs.forget_project(db, project_id)
         
         # Delete Diagram internals
         # DiagramComponent/Edge cascade delete with Diagram? Yes.
@@ -311,7 +400,7 @@ def import_project(project_id: str, data: dict, db: Session = Depends(get_db)):
     from app.db.models.requirement import Requirement
     from app.db.models.component import Component
     from app.db.models.diagram import Diagram, DiagramComponent, DiagramEdge
-    from app.db.models.linkage import Linkage
+    from app.db.models.linkage import Linkage, EDGE_COLUMNS
     from app.db.models.site import Site
     from app.db.models.metadata import Person
     
@@ -380,7 +469,11 @@ def import_project(project_id: str, data: dict, db: Session = Depends(get_db)):
     insert_rows(Requirement, data.get("requirements", []))
     
     insert_rows(Diagram, data.get("diagrams", []))
-    insert_rows(Linkage, data.get("linkages", []))
+    # Exports taken before uq_linkages_edge may repeat an edge; keep the first
+    edges = {}
+    for row in data.get("linkages", []):
+        edges.setdefault(tuple(row.get(column) for column in EDGE_COLUMNS), row)
+    insert_rows(Linkage, list(edges.values()))
     
     db.flush()
     
@@ -410,6 +503,13 @@ def import_project(project_id: str, data: dict, db: Session = Depends(get_db)):
     insert_rows(DiagramComponent, data.get("diagram_components", []))
     insert_rows(DiagramEdge, data.get("diagram_edges", []))
 
+    # Bulk deletes and core inserts are invisible to the event listener
+    events.publish(db, [events.resync(project_id, "imported")])
     db.commit()
+    # Components and sites are shared between projects; people belong to this one
+    response_cache.invalidate("projects")
+    response_cache.invalidate("components")
+    response_cache.invalidate("sites")
+    response_cache.invalidate("people", project_id)
     return {"status": "success", "message": "Project imported successfully"}
 
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 from app.api import deps
 from app.db.models.vision import Vision
@@ -12,6 +12,9 @@ from app.db.models.document import Document
 
 from uuid import UUID
 from app.db.models.project import Project
+from app.schemas.report import CoverageReport
+from app.utils import change_feed, etags
+from app.utils.coverage_report import RULES_BY_NAME, build_coverage_report
 
 def is_valid_uuid(val):
     try:
@@ -86,3 +89,38 @@ def get_project_statistics(
         stats["total_count"] += type_total
 
     return stats
+
+
+@router.get("/coverage/{project_id}", response_model=CoverageReport)
+def get_coverage_report(
+    project_id: str,
+    request: Request,
+    response: Response,
+    rules: Optional[List[str]] = Query(None, description="Only these rules (default: all)"),
+    offset: int = Query(0, ge=0, description="Offset into every AID list"),
+    limit: int = Query(50, ge=0, le=1000, description="AIDs per list; 0 returns counts only"),
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Traceability coverage (e.g. needs without a satisfying use case, requirements
+    not allocated to a component) and orphaned artifacts, computed in the database.
+    """
+    if not is_valid_uuid(project_id):
+        project = db.query(Project).filter(Project.name == project_id).first()
+    else:
+        project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    unknown = [name for name in rules or [] if name not in RULES_BY_NAME]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown coverage rules: {', '.join(unknown)} (valid: {', '.join(RULES_BY_NAME)})",
+        )
+
+    # Coverage only changes when the project's artifacts or links do
+    etag = etags.weak_etag("coverage", project.id, change_feed.project_cursor(db, project.id), etags.query_key(request))
+    if cached := etags.not_modified(request, etag):
+        return cached
+    etags.set_etag(response, etag)
+    return build_coverage_report(db, project.id, rules=rules, offset=offset, limit=limit)
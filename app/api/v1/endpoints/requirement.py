@@ -1,5 +1,5 @@
 # app/api/v1/endpoints/requirement.py
-from fastapi import APIRouter, Depends, HTTPException, Query, status as status_code
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status as status_code
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, UTC
@@ -15,35 +15,66 @@ from app.enums import ReqLevel, EarsType, Status, LinkType
 from app.schemas.requirement import RequirementCreate, RequirementOut
 from app.utils.id_generator import generate_artifact_id
 from app.api import deps
-from app.utils import ears_validator
+from app.utils import ears_validator, etags, fast_json, response_cache
 from app.schemas.requirement import (
     RequirementCreate, 
     RequirementOut,
     EARSTemplateResponse,
     EARSValidationRequest,
-    EARSValidationResponse
+    EARSValidationResponse,
+    EARSBatchValidationRequest,
+    EARSConformanceReport
 )
+from app.utils.ears_report import build_conformance_report
 router = APIRouter(prefix="/requirements", tags=["Requirements"])
 
 
+def _source_use_case_link(db: Session, aid: str):
+    return db.query(Linkage).filter(
+        Linkage.source_id == aid,
+        Linkage.relationship_type == LinkType.SATISFIES
+    ).first()
+
+
+def _etag(db: Session, obj: Requirement) -> str:
+    link = _source_use_case_link(db, obj.aid)
+    return etags.artifact_etag(obj, link.target_id if link else None)
+
+
 # -------------------------------------------------
 #  EARS Grammar Support Endpoints
 # -------------------------------------------------
 
 @router.get("/ears/templates", response_model=EARSTemplateResponse)
-def get_ears_templates():
+def get_ears_templates(request: Request):
     """
     Get all EARS pattern templates and descriptions.
     """
-    templates = ears_validator.get_all_templates()
-    descriptions = {
-        pattern.value: ears_validator.get_pattern_description(pattern)
-        for pattern in EarsType
-    }
-    
-    return EARSTemplateResponse(
-        templates=templates,
-        descriptions=descriptions
+    def load():
+        templates = ears_validator.get_all_templates()
+        descriptions = {
+            pattern.value: ears_validator.get_pattern_description(pattern)
+            for pattern in EarsType
+        }
+        return EARSTemplateResponse(
+            templates=templates,
+            descriptions=descriptions
+        )
+
+    # Defined in code: never invalidated, only refreshed by the TTL
+    return response_cache.cached(request, "ears_templates", None, EARSTemplateResponse, load)
+
+
+def _validation_response(text: str, pattern: EarsType) -> EARSValidationResponse:
+    # Validation, detection and component extraction share a single cached parse
+    result = ears_validator.validate_requirement(text, pattern)
+    detected = result['detected_pattern']
+    return EARSValidationResponse(
+        valid=result['valid'],
+        message=result['message'],
+        suggestions=result['suggestions'],
+        detected_pattern=detected.value if detected else None,
+        components=result['components']
     )
 
 
@@ -53,30 +84,55 @@ def validate_ears_requirement(payload: EARSValidationRequest):
     Validate a requirement text against an EARS pattern.
     Returns validation result with suggestions if invalid.
     """
-    # Validate the requirement text
-    validation = ears_validator.validate_pattern(payload.text, payload.pattern)
-    
-    # Detect what pattern it actually matches
-    detected = ears_validator.detect_pattern(payload.text)
-    
-    # Extract components if valid
-    components = None
-    if validation['valid']:
-        components = ears_validator.extract_components(payload.text, payload.pattern)
-    
-    return EARSValidationResponse(
-        valid=validation['valid'],
-        message=validation['message'],
-        suggestions=validation['suggestions'],
-        detected_pattern=detected.value if detected else None,
-        components=components
-    )
+    return _validation_response(payload.text, payload.pattern)
+
+
+@router.post("/ears/validate/batch", response_model=List[EARSValidationResponse])
+def validate_ears_requirements_batch(payload: EARSBatchValidationRequest):
+    """
+    Validate many requirement texts in one request.
+    Results are returned in the same order as the submitted items.
+    """
+    return [_validation_response(item.text, item.pattern) for item in payload.items]
+
+
+@router.get("/ears/report", response_model=EARSConformanceReport)
+def get_ears_conformance_report(
+    project_id: str = Query(..., description="Project ID"),
+    include_invalid: bool = Query(False, description="Include the AIDs of non-conforming requirements"),
+    db: Session = Depends(get_db),
+):
+    """
+    Validate every requirement of a project against its declared EARS type.
+    Results are persisted, so only requirements edited since the last report
+    are re-validated.
+    """
+    report = build_conformance_report(db, project_id, include_invalid=include_invalid)
+    db.commit()
+    return report
+
+EARS_COMPONENT_FIELDS = ('ears_trigger', 'ears_state', 'ears_condition', 'ears_feature')
+
+
+def _store_ears_components(req: Requirement, fallback: dict) -> None:
+    """
+    Extract EARS components from the requirement text once, on write, so
+    readers can filter on the stored columns instead of re-parsing.
+    Values supplied by the client are kept only when the text does not parse.
+    """
+    columns = ears_validator.component_columns(req.text, req.ears_type)
+    if columns is None:
+        columns = {field: fallback.get(field) for field in EARS_COMPONENT_FIELDS}
+    for field, value in columns.items():
+        setattr(req, field, value)
 
 # -------------------------------------------------
 #  GET – list (filterable)
 # -------------------------------------------------
 @router.get("/", response_model=List[RequirementOut])
 def list_requirements(
+    request: Request,
+    response: Response,
     project_id: Optional[str] = Query(None, description="Filter by project ID"),
     area: Optional[List[str]] = Query(None, description="Filter by area (e.g., MCK)"),
     status: Optional[List[str]] = Query(None, description="Filter by status (e.g., Draft)"),
@@ -84,6 +140,10 @@ def list_requirements(
     level: Optional[List[str]] = Query(None, description="Filter by level (e.g., STK)"),
     ears_type: Optional[List[str]] = Query(None, description="Filter by EARS type (e.g., SYS)"),
     search: Optional[str] = Query(None, description="Keyword search in short_name/text"),
+    ears_trigger: Optional[str] = Query(None, description="Exact EARS trigger (WHEN ...)"),
+    ears_state: Optional[str] = Query(None, description="Exact EARS state (WHILE ...)"),
+    ears_condition: Optional[str] = Query(None, description="Exact EARS condition (IF ...)"),
+    ears_feature: Optional[str] = Query(None, description="Exact EARS feature (WHERE ...)"),
     select_all: bool = Query(False, description="Ignore all filters and return everything"),
     db: Session = Depends(get_db),
 ):
@@ -133,12 +193,25 @@ def list_requirements(
             query = query.filter(
                 (Requirement.short_name.ilike(term)) | (Requirement.text.ilike(term))
             )
-    
-    return query.order_by(Requirement.aid).all()
+        # Stored EARS components (indexed)
+        if ears_trigger:
+            query = query.filter(Requirement.ears_trigger == ears_trigger)
+        if ears_state:
+            query = query.filter(Requirement.ears_state == ears_state)
+        if ears_condition:
+            query = query.filter(Requirement.ears_condition == ears_condition)
+        if ears_feature:
+            query = query.filter(Requirement.ears_feature == ears_feature)
+
+    etag = etags.list_etag(query, Requirement, request)
+    if cached := etags.not_modified(request, etag):
+        return cached
+    etags.set_etag(response, etag)
+    return fast_json.list_response(query.order_by(Requirement.aid), Requirement, RequirementOut, response)
 
 
 @router.get("/{aid}")
-def get_requirement(aid: str, db: Session = Depends(get_db)):
+def get_requirement(aid: str, request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Retrieve a single requirement by its artifact identifier (aid).
     Includes source_use_case_id from linkage.
@@ -148,10 +221,12 @@ def get_requirement(aid: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Requirement not found")
     
     # Get the source use case from linkage
-    linkage = db.query(Linkage).filter(
-        Linkage.source_id == aid,
-        Linkage.relationship_type == LinkType.SATISFIES
-    ).first()
+    linkage = _source_use_case_link(db, aid)
+
+    etag = etags.artifact_etag(obj, linkage.target_id if linkage else None)
+    if cached := etags.not_modified(request, etag):
+        return cached
+    etags.set_etag(response, etag)
     
     # Convert to dict and add source_use_case_id
     result = RequirementOut.model_validate(obj).model_dump()
@@ -198,6 +273,7 @@ def create_requirement(
         owner=payload.owner,
         project_id=payload.project_id
     )
+    _store_ears_components(req, payload.model_dump())
     db.add(req)
     
     # 5. Linkages are now created separately via LinkageManager
@@ -214,25 +290,34 @@ def create_requirement(
 def update_requirement(
     aid: str,
     payload: RequirementCreate,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     _perm = Depends(deps.check_permissions(["requirement:edit"]))
 ):
     """
     Partial update of an existing requirement. Only fields present in the payload
-    are changed; `last_updated` is refreshed automatically.
+    are changed; `last_updated` is refreshed automatically. An If-Match that
+    no longer names the current version is rejected with 412.
     """
     db_req = db.query(Requirement).filter(Requirement.aid == aid).first()
     if not db_req:
         raise HTTPException(status_code=404, detail="Requirement not found")
+    if etags.precondition_failed(request, _etag(db, db_req)):
+        raise HTTPException(status_code=412, detail="Requirement was modified since it was read; reload and retry")
 
     update_data = payload.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_req, field, value)
         print(f'setting field {field} to {value}')
 
+    if {'text', 'ears_type'} & update_data.keys():
+        _store_ears_components(db_req, update_data)
+
     db_req.last_updated = datetime.now(UTC)
     db.commit()
     db.refresh(db_req)
+    etags.set_etag(response, _etag(db, db_req))
     return db_req
 
 
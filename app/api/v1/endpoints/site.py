@@ -2,12 +2,13 @@ from typing import List
 from uuid import uuid4
 import json
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
 from app.db.models.site import Site
 from app.schemas.site import SiteCreate, SiteUpdate, SiteOut
+from app.utils import response_cache
 
 router = APIRouter()
 
@@ -24,22 +25,26 @@ def create_site(site_in: SiteCreate, db: Session = Depends(get_db)):
     db.add(site)
     db.commit()
     db.refresh(site)
+    response_cache.invalidate("sites", site.project_id)
     # Deserialize tags for response
     site_dict = site.__dict__
     site_dict['tags'] = json.loads(site.tags) if site.tags else []
     return site_dict
 
 @router.get("/", response_model=List[SiteOut])
-def read_sites(skip: int = 0, limit: int = 100, project_id: str = None, db: Session = Depends(get_db)):
-    query = db.query(Site)
-    if project_id:
-        query = query.filter(Site.project_id == project_id)
-    sites = query.offset(skip).limit(limit).all()
+def read_sites(request: Request, skip: int = 0, limit: int = 100, project_id: str = None, db: Session = Depends(get_db)):
+    def load():
+        query = db.query(Site)
+        if project_id:
+            query = query.filter(Site.project_id == project_id)
+        sites = query.offset(skip).limit(limit).all()
 
-    # Deserialize tags for each site
-    for site in sites:
-        site.tags = json.loads(site.tags) if site.tags else []
-    return sites
+        # Deserialize tags for each site
+        for site in sites:
+            site.tags = json.loads(site.tags) if site.tags else []
+        return sites
+
+    return response_cache.cached(request, "sites", project_id, List[SiteOut], load)
 
 @router.get("/{site_id}", response_model=SiteOut)
 def read_site(site_id: str, db: Session = Depends(get_db)):
@@ -64,6 +69,7 @@ def update_site(site_id: str, site_in: SiteUpdate, db: Session = Depends(get_db)
         
     db.commit()
     db.refresh(site)
+    response_cache.invalidate("sites", site.project_id)
     site.tags = json.loads(site.tags) if site.tags else []
     return site
 
@@ -73,6 +79,8 @@ def delete_site(site_id: str, db: Session = Depends(get_db)):
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
     
+    project_id = site.project_id
     db.delete(site)
     db.commit()
+    response_cache.invalidate("sites", project_id)
     return {"ok": True}
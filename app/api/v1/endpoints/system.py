@@ -276,3 +276,83 @@ async def upgrade_dependency(request: UpgradeRequest, _auth = Depends(deps.check
         return {"success": False, "message": "Invalid source."}
     except Exception as e:
         return {"success": False, "message": str(e)}
+
+
+@router.get("/uploads/stats")
+def get_upload_store_stats(db: Session = Depends(deps.get_db)):
+    """
+    Size and reference counts of the content-addressed upload store.
+    """
+    from app.utils import blob_store
+    return blob_store.store_stats(db)
+
+
+@router.post("/uploads/gc")
+def collect_upload_garbage(
+    dry_run: bool = True,
+    grace_hours: float = None,
+    db: Session = Depends(deps.get_db),
+    _auth = Depends(deps.check_permissions(["admin"]))
+):
+    """
+    Delete stored uploads that no image or document references any more.
+    Defaults to a dry run that only reports what would be removed.
+    """
+    from app.utils import blob_store
+    return blob_store.collect_garbage(db, grace_hours=grace_hours, dry_run=dry_run)
+
+
+@router.get("/render-cache/stats")
+def get_render_cache_stats(db: Session = Depends(deps.get_db)):
+    """Hit/miss counters of the Markdown render cache and the number of stored renders."""
+    from app.utils import markdown_render
+    return markdown_render.cache_stats(db)
+
+
+@router.post("/render-cache/prune")
+def prune_render_cache(
+    db: Session = Depends(deps.get_db),
+    _auth = Depends(deps.check_permissions(["admin"]))
+):
+    """Delete stored renders of document versions that no longer exist."""
+    from app.utils import markdown_render
+    return {"deleted": markdown_render.prune(db)}
+
+
+@router.get("/diagram-cache/stats")
+def get_diagram_cache_stats():
+    """Size of the rendered diagram (SVG) cache and the active renderer."""
+    from app.utils import diagram_render
+    return diagram_render.cache_stats()
+
+
+@router.post("/diagram-cache/evict")
+def evict_diagram_cache(
+    max_mb: float = None,
+    _auth = Depends(deps.check_permissions(["admin"]))
+):
+    """Trim the diagram cache now (to DIAGRAM_CACHE_MAX_MB, or `max_mb` if given)."""
+    from app.utils import diagram_render
+    return diagram_render.evict(None if max_mb is None else int(max_mb * 1024 * 1024))
+
+
+@router.get("/response-cache/stats")
+def get_response_cache_stats():
+    """Hit/miss/invalidation counters of the reference data response cache, per namespace."""
+    from app.utils import response_cache
+    return response_cache.stats()
+
+
+@router.post("/response-cache/clear")
+def clear_response_cache(_auth = Depends(deps.check_permissions(["admin"]))):
+    """Invalidate every cached reference data response (e.g. after editing the database by hand)."""
+    from app.utils import response_cache
+    response_cache.clear()
+    return {"ok": True}
+
+
+@router.get("/compression/stats")
+def get_compression_stats():
+    """Responses compressed since startup and bytes before/after, per encoding."""
+    from app.utils import compression
+    return compression.stats()
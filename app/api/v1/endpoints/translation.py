@@ -1,8 +1,15 @@
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Union
-from deep_translator import GoogleTranslator
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.api import deps
+from app.core.config import settings
+from app.db.models.translation import TranslationMemory
+from app.utils import translation
+import json
 import os
 import requests
 import urllib3
@@ -26,21 +33,78 @@ class TranslationRequest(BaseModel):
     source: str = "auto"
     target: str = "ar"
 
+def _as_list(request: TranslationRequest) -> List[str]:
+    texts = request.text if isinstance(request.text, list) else [request.text]
+    if len(texts) > settings.TRANSLATION_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many strings: {len(texts)} (max {settings.TRANSLATION_MAX_ITEMS})"
+        )
+    return texts
+
 @router.post("/translate")
-def translate_text(request: TranslationRequest):
+async def translate_text(request: TranslationRequest, db: Session = Depends(deps.get_db)):
+    texts = _as_list(request)
+    if not any(text and text.strip() for text in texts):
+        return {"translated_text": texts if isinstance(request.text, list) else request.text}
+
+    metrics = translation.new_metrics(len(texts))
     try:
-        translator = GoogleTranslator(source=request.source, target=request.target)
-        if isinstance(request.text, list):
-            if not request.text:
-                return {"translated_text": []}
-            # deep-translator's update allows translate_batch
-            translated = translator.translate_batch(request.text)
-            return {"translated_text": translated}
-        else:
-            if not request.text:
-                return {"translated_text": ""}
-            translated = translator.translate(request.text)
-            return {"translated_text": translated}
+        results = {}
+        async for source_text, translated in translation.translate_stream(
+            db, texts, request.source, request.target, metrics
+        ):
+            results[source_text] = translated
     except Exception as e:
         print(f"Translation error: {e}")
         raise HTTPException(status_code=500, detail=f"Translation failed: {str(e)}")
+    translation.record_latency(metrics)
+
+    # Nothing could be translated at all: surface it instead of echoing the input
+    if metrics["failed"] == metrics["unique"]:
+        raise HTTPException(status_code=502, detail="Translation failed: backend unavailable")
+
+    translated = [results.get(text, text) for text in texts]
+    if isinstance(request.text, list):
+        return {"translated_text": translated, "metrics": metrics}
+    return {"translated_text": translated[0], "metrics": metrics}
+
+@router.post("/translate/stream")
+async def translate_text_stream(request: TranslationRequest, db: Session = Depends(deps.get_db)):
+    """
+    Stream translations as NDJSON while they complete.
+    Each line is {"indices": [...], "text": ...} for every position holding that
+    string; the last line is {"done": true, "metrics": {...}}.
+    """
+    texts = _as_list(request)
+    positions = {}
+    for i, text in enumerate(texts):
+        positions.setdefault(text, []).append(i)
+
+    async def lines():
+        metrics = translation.new_metrics(len(texts))
+        # Blank strings are not translated; echo them like the non-stream endpoint
+        for text, indices in positions.items():
+            if not (text and text.strip()):
+                yield json.dumps({"indices": indices, "text": text}) + "\n"
+        async for source_text, translated in translation.translate_stream(
+            db, texts, request.source, request.target, metrics
+        ):
+            yield json.dumps({"indices": positions[source_text], "text": translated}) + "\n"
+        translation.record_latency(metrics)
+        yield json.dumps({"done": True, "metrics": metrics}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/cache/stats")
+def translation_cache_stats(db: Session = Depends(deps.get_db)):
+    """
+    In-process cache counters, recent request latency and the size of the
+    persistent translation memory.
+    """
+    return {
+        "backend": translation.get_backend().name,
+        "memory_cache": translation.cache_stats(),
+        "latency": translation.latency_stats(),
+        "stored_translations": db.query(func.count(TranslationMemory.source_hash)).scalar(),
+    }
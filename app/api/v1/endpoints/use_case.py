@@ -1,5 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status as status_code
+import hashlib
+from datetime import datetime, UTC
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status as status_code
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
 from typing import List, Optional
 from uuid import uuid4
 
@@ -18,10 +24,30 @@ from app.schemas.use_case import (
     ExceptionCreate, ExceptionOut
 )
 from app.utils.id_generator import generate_artifact_id
+from app.utils import diagram_render, etags, fast_json, response_cache, sequence_diagram, static_files
 from app.api import deps
 
 router = APIRouter(prefix="/use-cases", tags=["Use Cases"])
 
+
+def _source_need_link(db: Session, aid: str):
+    return db.query(Linkage).filter(
+        Linkage.source_id == aid,
+        Linkage.source_artifact_type == "use_case",
+        Linkage.target_artifact_type == "need",
+        Linkage.relationship_type == LinkType.SATISFIES
+    ).first()
+
+
+def _embedded_version() -> str:
+    """Version of the people, preconditions and postconditions nested in UseCaseOut."""
+    return response_cache.version("people", "use_case_conditions")
+
+
+def _etag(db: Session, obj: UseCase) -> str:
+    link = _source_need_link(db, obj.aid)
+    return etags.artifact_etag(obj, link.target_id if link else None, embedded=_embedded_version())
+
 # --- Precondition Endpoints ---
 
 @router.get("/preconditions", response_model=List[PreconditionOut])
@@ -48,8 +74,11 @@ def delete_precondition(id: str, db: Session = Depends(get_db)):
     db_obj = db.query(Precondition).filter(Precondition.id == id).first()
     if not db_obj:
         raise HTTPException(status_code=404, detail="Precondition not found")
+    project_id = db_obj.project_id
     db.delete(db_obj)
     db.commit()
+    # Use cases embed their preconditions
+    response_cache.invalidate("use_case_conditions", project_id)
     return None
 
 # --- Postcondition Endpoints ---
@@ -78,8 +107,11 @@ def delete_postcondition(id: str, db: Session = Depends(get_db)):
     db_obj = db.query(Postcondition).filter(Postcondition.id == id).first()
     if not db_obj:
         raise HTTPException(status_code=404, detail="Postcondition not found")
+    project_id = db_obj.project_id
     db.delete(db_obj)
     db.commit()
+    # Use cases embed their postconditions
+    response_cache.invalidate("use_case_conditions", project_id)
     return None
 
 # --- Exception Endpoints ---
@@ -117,6 +149,8 @@ def delete_exception(id: str, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[UseCaseOut])
 def list_use_cases(
+        request: Request,
+        response: Response,
         project_id: str = Query(None, description="Project ID"),
         area: Optional[List[str]] = Query(None, description="Filter by area (e.g., MCK)"),
         status: Optional[List[str]] = Query(None, description="Filter by status (e.g., Draft)"),
@@ -133,21 +167,103 @@ def list_use_cases(
             query = query.filter(UseCase.status.in_(status))
         if primary_actor:
             query = query.filter(UseCase.primary_actor_id == primary_actor)
-    return query.order_by(UseCase.aid).all()
+
+    etag = etags.list_etag(query, UseCase, request, embedded=_embedded_version())
+    if cached := etags.not_modified(request, etag):
+        return cached
+    etags.set_etag(response, etag)
+    return fast_json.list_response(query.order_by(UseCase.aid), UseCase, UseCaseOut, response)
+
+# --- Sequence Diagrams ---
+
+SEQUENCE_LANGUAGE = Query("plantuml", pattern="^(plantuml|mermaid)$")
+
+def _sequence_sources(db: Session, rows, language: str) -> dict:
+    """aid -> generated source; only use cases missing from the cache are loaded in full."""
+    sources = {}
+    misses = []
+    for aid, last_updated in rows:
+        source = sequence_diagram.cached(aid, last_updated, language)
+        if source is None:
+            misses.append(aid)
+        else:
+            sources[aid] = source
+    if misses:
+        for use_case in db.query(UseCase).filter(UseCase.aid.in_(misses)):
+            sources[use_case.aid] = sequence_diagram.for_use_case(use_case, language)
+    return sources
+
+@router.get("/sequences")
+def list_use_case_sequences(
+    project_id: str = Query(..., description="Project ID"),
+    language: str = SEQUENCE_LANGUAGE,
+    db: Session = Depends(get_db),
+):
+    """Sequence diagram source of every use case in a project (batch mode)."""
+    rows = (
+        db.query(UseCase.aid, UseCase.last_updated)
+        .filter(UseCase.project_id == project_id)
+        .order_by(UseCase.aid)
+        .all()
+    )
+    sources = _sequence_sources(db, rows, language)
+    return [
+        {"aid": aid, "language": language, "last_updated": last_updated, "source": sources.get(aid, "")}
+        for aid, last_updated in rows
+    ]
+
+@router.get("/{aid}/sequence")
+def get_use_case_sequence(
+    aid: str,
+    request: Request,
+    language: str = SEQUENCE_LANGUAGE,
+    format: str = Query("source", pattern="^(source|svg)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    Sequence diagram of the use case's MSS, extensions and exceptions, as
+    source (JSON) or rendered SVG. Generated once per edit: the ETag is
+    derived from last_updated, so unchanged use cases are answered with 304.
+    """
+    row = db.query(UseCase.aid, UseCase.last_updated).filter(UseCase.aid == aid).first()
+    if not row:
+        raise HTTPException(404, "Use Case not found")
+
+    version = "|".join(sequence_diagram.cache_key(aid, row.last_updated, language) + (format,))
+    headers = {
+        "etag": f'"{hashlib.sha256(version.encode("utf-8")).hexdigest()[:32]}"',
+        "cache-control": static_files.REVALIDATE_CACHE,
+    }
+    if static_files.is_not_modified(Headers(headers), request.headers):
+        return Response(status_code=304, headers=headers)
+
+    source = _sequence_sources(db, [row], language)[aid]
+    if format == "source":
+        body = {"aid": aid, "language": language, "last_updated": row.last_updated, "source": source}
+        return JSONResponse(jsonable_encoder(body), headers=headers)
+    if not source:
+        raise HTTPException(404, "Use Case has no main success scenario to draw")
+    try:
+        _, svg = diagram_render.render(source, language)
+    except diagram_render.DiagramSourceError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except diagram_render.DiagramRenderError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return Response(svg, media_type="image/svg+xml", headers=headers)
 
 @router.get("/{aid}", response_model=UseCaseOut)
-def get_use_case(aid: str, db: Session = Depends(get_db)):
+def get_use_case(aid: str, request: Request, response: Response, db: Session = Depends(get_db)):
     obj = db.query(UseCase).filter(UseCase.aid == aid).first()
     if not obj:
         raise HTTPException(404, "Use Case not found")
     
     # Populate source_need_id from Linkage
-    link = db.query(Linkage).filter(
-        Linkage.source_id == aid,
-        Linkage.source_artifact_type == "use_case",
-        Linkage.target_artifact_type == "need",
-        Linkage.relationship_type == LinkType.SATISFIES
-    ).first()
+    link = _source_need_link(db, aid)
+
+    etag = etags.artifact_etag(obj, link.target_id if link else None, embedded=_embedded_version())
+    if cached := etags.not_modified(request, etag):
+        return cached
+    etags.set_etag(response, etag)
     
     if link:
         obj.source_need_id = link.target_id
@@ -218,12 +334,16 @@ def create_use_case(
 def update_use_case(
     aid: str, 
     payload: UseCaseCreate, 
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     _perm = Depends(deps.check_permissions(["use_case:edit"]))
 ):
     db_obj = db.query(UseCase).filter(UseCase.aid == aid).first()
     if not db_obj:
         raise HTTPException(404, "Use Case not found")
+    if etags.precondition_failed(request, _etag(db, db_obj)):
+        raise HTTPException(412, "Use Case was modified since it was read; reload and retry")
     
     # Handle relationships separately
     if payload.precondition_ids is not None:
@@ -251,9 +371,12 @@ def update_use_case(
             setattr(db_obj, k, v)
     
     # Linkages are now managed separately via LinkageManager
-    
+
+    # Set explicitly: a change to the relationships alone does not update the row
+    db_obj.last_updated = datetime.now(UTC)
     db.commit()
     db.refresh(db_obj)
+    etags.set_etag(response, _etag(db, db_obj))
     return db_obj
 
 
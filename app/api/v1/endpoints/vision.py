@@ -1,12 +1,13 @@
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.db.models.vision import Vision
 from app.db.session import get_db
 from app.schemas.vision import VisionCreate, VisionOut
+from app.utils import etags, fast_json
 from app.utils.id_generator import generate_artifact_id
 from app.api import deps
 
@@ -17,6 +18,8 @@ router = APIRouter(prefix="/vision-statements", tags=["Vision Statements"])
 # -------------------------------------------------
 @router.get("/", response_model=List[VisionOut])
 def list_vision_statements(
+    request: Request,
+    response: Response,
     project_id: str = Query(..., description="Filter by project ID"),
     search: Optional[str] = Query(None, description="Keyword search in title/description"),
     db: Session = Depends(get_db),
@@ -27,7 +30,12 @@ def list_vision_statements(
         query = query.filter(
             (Vision.title.ilike(search_term)) | (Vision.description.ilike(search_term))
         )
-    return query.all()
+
+    etag = etags.list_etag(query, Vision, request)
+    if cached := etags.not_modified(request, etag):
+        return cached
+    etags.set_etag(response, etag)
+    return fast_json.list_response(query, Vision, VisionOut, response)
 
 # -------------------------------------------------
 # POST – create
@@ -54,10 +62,14 @@ def create_vision_statement(
 # GET – by id
 # -------------------------------------------------
 @router.get("/{aid}", response_model=VisionOut)
-def get_vision_statement(aid: str, db: Session = Depends(get_db)):
+def get_vision_statement(aid: str, request: Request, response: Response, db: Session = Depends(get_db)):
     obj = db.query(Vision).filter(Vision.aid == aid).first()
     if not obj:
         raise HTTPException(status_code=404, detail="Vision Statement not found")
+    etag = etags.artifact_etag(obj)
+    if cached := etags.not_modified(request, etag):
+        return cached
+    etags.set_etag(response, etag)
     return obj
 
 # -------------------------------------------------
@@ -67,18 +79,23 @@ def get_vision_statement(aid: str, db: Session = Depends(get_db)):
 def update_vision_statement(
     aid: str,
     payload: VisionCreate,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     _perm = Depends(deps.check_permissions(["vision:edit"]))
 ):
     db_obj = db.query(Vision).filter(Vision.aid == aid).first()
     if not db_obj:
         raise HTTPException(status_code=404, detail="Vision Statement not found")
+    if etags.precondition_failed(request, etags.artifact_etag(db_obj)):
+        raise HTTPException(status_code=412, detail="Vision Statement was modified since it was read; reload and retry")
     update_data = payload.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_obj, field, value)
     db_obj.last_updated = datetime.now()
     db.commit()
     db.refresh(db_obj)
+    etags.set_etag(response, etags.artifact_etag(db_obj))
     return db_obj
 
 # -------------------------------------------------
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
@@ -32,6 +32,70 @@ class Settings(BaseSettings):
     CLASSIFIER_PROJECT_DIR: Path = Path(os.getenv("CLASSIFIER_PROJECT_DIR", str(registry_root.parent / "requirements_classifier")))
     CLASSIFIER_MODEL_PATH: Optional[Path] = Path(os.getenv("CLASSIFIER_MODEL_PATH", "")) if os.getenv("CLASSIFIER_MODEL_PATH") else None
 
+    # Translation: "google" (deep-translator) or "local" (offline stand-in, returns source text)
+    TRANSLATION_BACKEND: str = "google"
+    TRANSLATION_CHUNK_SIZE: int = 50
+    TRANSLATION_CACHE_SIZE: int = 10000
+    TRANSLATION_CONCURRENCY: int = 8          # backend requests in flight per translation request
+    TRANSLATION_TIMEOUT: float = 10.0         # seconds per attempt, also the backend's HTTP timeout
+    TRANSLATION_WORKERS: int = 16             # backend calls running at once, across all requests
+    TRANSLATION_RETRIES: int = 2
+    TRANSLATION_RETRY_BACKOFF: float = 0.5    # seconds, doubled per retry
+    TRANSLATION_MAX_ITEMS: int = 5000         # strings accepted per request
+
+    # Content-addressed upload store: unreferenced blobs younger than this are kept
+    # (a file is uploaded before the document that links it is saved)
+    BLOB_GC_GRACE_HOURS: float = 24.0
+    UPLOAD_MAX_IMAGE_MB: int = 25
+    UPLOAD_MAX_DOCUMENT_MB: int = 1024
+    UPLOAD_CHUNK_SIZE_MB: int = 8             # suggested chunk size for resumable uploads
+    UPLOAD_PRECOMPRESS: bool = True           # write .gz/.br sidecars for text-like uploads (SVG, CSV, ...)
+
+    # Image derivatives (WebP, needs Pillow): thumbnail box and responsive widths
+    IMAGE_THUMBNAIL_SIZE: int = 256
+    IMAGE_VARIANT_WIDTHS: List[int] = [480, 960, 1600]
+    IMAGE_VARIANT_WORKERS: int = 2
+    IMAGE_RECONCILE_INTERVAL_MINUTES: int = 60   # background check of image metadata vs disk; 0 disables
+
+    # Server-side Markdown rendering (needs markdown-it-py): rendered HTML kept in memory, backed by the DB
+    MARKDOWN_CACHE_SIZE: int = 256
+
+    # Server-side diagram rendering: "local" (offline stand-in) or "kroki" (DIAGRAM_RENDER_URL)
+    DIAGRAM_RENDER_BACKEND: str = "local"
+    DIAGRAM_RENDER_URL: str = "https://kroki.io"
+    DIAGRAM_RENDER_TIMEOUT: float = 10.0      # seconds per diagram
+    DIAGRAM_CACHE_DIR: Path = Path(os.getenv("DIAGRAM_CACHE_DIR", str(registry_root / "cache" / "diagrams")))
+    DIAGRAM_CACHE_MAX_MB: int = 256           # least recently used SVGs are evicted beyond this
+    SEQUENCE_DIAGRAM_CACHE_SIZE: int = 2048   # generated use case sequence sources kept in memory
+    DIAGRAM_CHANGE_LOG_SIZE: int = 500        # versions of node/edge deltas kept per diagram for /changes
+
+    # Change events (SSE, app/utils/events.py)
+    EVENTS_BACKEND: str = "memory"            # "memory" (single worker) or "postgres" (LISTEN/NOTIFY)
+    EVENTS_CHANNEL: str = "artifact_registry_events"
+    EVENTS_REPLAY_SIZE: int = 1000            # recent events kept per project for Last-Event-ID resume
+    EVENTS_QUEUE_SIZE: int = 1000             # per client; a client that falls further behind must resync
+    EVENTS_HEARTBEAT: float = 15.0            # seconds between keep-alive comments on idle streams
+
+    # Reference data response cache (app/utils/response_cache.py)
+    RESPONSE_CACHE_BACKEND: str = "memory"    # "memory" (per worker) or "redis" (shared, RESPONSE_CACHE_URL)
+    RESPONSE_CACHE_URL: str = "redis://localhost:6379/0"
+    RESPONSE_CACHE_SIZE: int = 512            # responses kept per worker by the memory backend
+    RESPONSE_CACHE_TTL: float = 300.0         # seconds; bounds staleness from writes the cache does not see
+
+    # Artifact list serialization (app/utils/fast_json.py)
+    FAST_LIST_RESPONSES: bool = True          # False sends lists through the regular response_model path
+
+    # Response compression (app/utils/compression.py): brotli needs the brotli package
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024      # bytes; smaller responses are sent as they are
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4       # 0-11; higher costs much more CPU per response
+    # Event streams are left out: add "text/event-stream" to compress SSE too (every event is flushed)
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "application/json", "application/x-ndjson", "application/xml", "application/javascript",
+        "image/svg+xml", "text/plain", "text/html", "text/css", "text/csv", "text/markdown", "text/xml",
+    ]
+
     # Secondary Pydantic config just in case
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -45,6 +109,7 @@ settings = Settings()
 settings.UPLOAD_DIR = settings.UPLOAD_DIR.resolve()
 settings.BACKUP_DIR = settings.BACKUP_DIR.resolve()
 settings.DATA_ARCHIVE_DIR = settings.DATA_ARCHIVE_DIR.resolve()
+settings.DIAGRAM_CACHE_DIR = settings.DIAGRAM_CACHE_DIR.resolve()
 
 # ENSURE DIRECTORIES EXIST IMMEDIATELY
 settings.UPLOAD_DIR.mkdir(exist_ok=True, parents=True)
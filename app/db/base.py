@@ -34,13 +34,23 @@ from app.db.models.vision import Vision
 from app.db.models.need import Need
 from app.db.models.use_case import UseCase, Precondition, Postcondition, Exception as UseCaseException
 from app.db.models.component import Component, ComponentRelationship
-from app.db.models.diagram import Diagram, DiagramComponent
+from app.db.models.diagram import Diagram, DiagramComponent, DiagramChange
 
-from app.db.models.requirement import Requirement
+from app.db.models.requirement import Requirement, RequirementEarsResult
 from app.db.models.linkage import Linkage
 from app.db.models.metadata import Area, Person
 from app.db.models.site import Site
 from app.db.models.artifact_event import ArtifactEvent
 from app.db.models.document import Document
 from app.db.models.comment import Comment
-from app.db.models.image import Image
\ No newline at end of file
+from app.db.models.blob import Blob
+from app.db.models.image import Image
+from app.db.models.translation import TranslationMemory
+from app.db.models.image_reference import ImageReference
+from app.db.models.rendered_markdown import RenderedMarkdown
+from app.db.models.artifact_change import ArtifactChange
+
+# Session listeners that keep derived tables in sync with the models above
+import app.utils.image_refs
+import app.utils.events
+import app.utils.change_feed
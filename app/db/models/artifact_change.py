@@ -0,0 +1,25 @@
+# app/db/models/artifact_change.py
+from sqlalchemy import Column, DateTime, Index, Integer, String
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class ArtifactChange(Base):
+    """
+    Latest change of one artifact or linkage, for GET /projects/{id}/changes.
+    Maintained on every write by app.utils.change_feed; never edited directly.
+    """
+    __tablename__ = "artifact_changes"
+    __table_args__ = (
+        Index("uq_artifact_changes_entity_key", "entity", "key", unique=True),
+        Index("ix_artifact_changes_project_seq", "project_id", "seq"),
+        # seq must never be reused after the newest row is replaced
+        {"sqlite_autoincrement": True},
+    )
+
+    seq        = Column(Integer, primary_key=True, autoincrement=True)
+    project_id = Column(String, nullable=False)
+    entity     = Column(String, nullable=False)   # "need", "use_case", "linkage", ...
+    key        = Column(String, nullable=False)   # aid
+    action     = Column(String, nullable=False)   # created / updated / status_changed / deleted
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, JSON
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class Blob(Base):
+    """
+    Content-addressed uploaded file. Stored once under UPLOAD_DIR/<path>
+    no matter how many images or documents reference it.
+    """
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String, nullable=False)          # relative to UPLOAD_DIR, e.g. blobs/ab/cd/abcd....png
+    size = Column(BigInteger, nullable=False)
+    mime_type = Column(String, nullable=True)
+    refcount = Column(Integer, nullable=False, default=0, index=True)  # images + documents pointing here
+    variants = Column(JSON, nullable=True)         # generated image variants: name -> width, e.g. {"thumb": 256, "w480": 480}
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
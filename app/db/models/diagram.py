@@ -19,6 +19,7 @@ class Diagram(Base):
     filter_data = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    layout_version = Column(Integer, nullable=False, default=0, server_default="0")  # bumped on every position/edge change
 
     # Relationships
     components = relationship("DiagramComponent", back_populates="diagram", cascade="all, delete-orphan")
@@ -48,3 +49,11 @@ class DiagramEdge(Base):
     # Relationships
     diagram = relationship("Diagram", back_populates="edges")
 
+class DiagramChange(Base):
+    """One versioned write to a diagram's nodes/edges; `data` holds the delta as returned to the writer."""
+    __tablename__ = "diagram_changes"
+
+    diagram_id = Column(String, ForeignKey("diagrams.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    data = Column(JSON, nullable=False)  # {"nodes": [...], "edges": [...], "removed_nodes": [...]}
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
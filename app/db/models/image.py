@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime
+from sqlalchemy import Column, String, ForeignKey, DateTime, BigInteger, Integer, Float, Boolean, Index
 from sqlalchemy.sql import func
 from app.db.base import Base
 from uuid import uuid4
@@ -8,8 +8,23 @@ def generate_uuid():
 
 class Image(Base):
     __tablename__ = "images"
+    __table_args__ = (
+        # Gallery pages are ordered newest first within a project
+        Index("ix_images_project_created", "project_id", "created_at"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid, index=True)
     filename = Column(String, nullable=False, unique=True)
     project_id = Column(String, ForeignKey("projects.id"), nullable=True) # Nullable for legacy/global
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=True, index=True) # Null for legacy files stored by name
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # File metadata, written at upload and kept in sync by the background reconciliation
+    size = Column(BigInteger, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    mime_type = Column(String, nullable=True)
+    sha256 = Column(String(64), nullable=True, index=True)
+    file_mtime = Column(Float, nullable=True)        # st_mtime seen at the last check
+    missing = Column(Boolean, nullable=False, default=False, server_default="false")
+    checked_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,23 @@
+# app/db/models/image_reference.py
+from sqlalchemy import Column, Integer, String, Text, Index
+from app.db.base import Base
+
+
+class ImageReference(Base):
+    """
+    One embedded image in one text field of a document or artifact.
+    Maintained on every write by app.utils.image_refs; never edited directly.
+    """
+    __tablename__ = "image_references"
+    __table_args__ = (
+        Index("ix_image_references_source", "source_type", "source_aid"),
+    )
+
+    id           = Column(Integer, primary_key=True, autoincrement=True)
+    source_type  = Column(String, nullable=False)              # "document", "need", "requirement", ...
+    source_aid   = Column(String, nullable=False)
+    field        = Column(String, nullable=False)              # e.g. content_text, description
+    project_id   = Column(String, nullable=True, index=True)
+    filename     = Column(String, nullable=True, index=True)   # image referenced by name (/uploads/<name>)
+    blob_sha256  = Column(String(64), nullable=True, index=True)  # image referenced by content (/uploads/blobs/...)
+    src          = Column(Text, nullable=False)                # the URL as written
@@ -1,11 +1,25 @@
 # app/db/models/linkage.py
-from sqlalchemy import Column, String, Enum as SQLEnum
+from sqlalchemy import Column, String, Enum as SQLEnum, Index
 from app.db.base import Base
 from app.enums import LinkType
 
 
+# An edge is unique. Ordered so that the unique index also serves lookups by
+# source_id (+ relationship_type + target_artifact_type): outgoing links, an
+# artifact's source link, the source side of delete cascades.
+EDGE_COLUMNS = ("source_id", "relationship_type", "target_artifact_type", "target_id", "source_artifact_type")
+
+
 class Linkage(Base):
     __tablename__ = "linkages"
+    __table_args__ = (
+        Index("uq_linkages_edge", *EDGE_COLUMNS, unique=True),
+        # Target side of delete cascades and incoming links
+        Index("ix_linkages_target", "target_id", "relationship_type", "source_artifact_type"),
+        # Coverage report anti-joins (app/utils/coverage_report.py), one per link direction
+        Index("ix_linkages_project_source", "project_id", "relationship_type", "source_artifact_type", "source_id"),
+        Index("ix_linkages_project_target", "project_id", "relationship_type", "target_artifact_type", "target_id"),
+    )
 
     aid                   = Column(String, primary_key=True, index=True)
     source_artifact_type  = Column(String, nullable=False)
@@ -13,4 +27,4 @@ class Linkage(Base):
     target_artifact_type  = Column(String, nullable=False)
     target_id             = Column(String, nullable=False)
     relationship_type     = Column(SQLEnum(LinkType), nullable=False)  # e.g., derives_from, satisfies, refines
-    project_id            = Column(String, nullable=False, index=True)
\ No newline at end of file
+    project_id            = Column(String, nullable=False, index=True)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class RenderedMarkdown(Base):
+    """Rendered, sanitized HTML of a Markdown body, keyed by the hash of renderer + text"""
+    __tablename__ = "rendered_markdown"
+
+    content_hash = Column(String(64), primary_key=True)
+    renderer = Column(String, nullable=False)            # e.g. "v1+nh3+plugins"
+    html = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,11 +1,18 @@
 # app/db/models/requirement.py
-from sqlalchemy import Column, String, JSON, Text, Enum as SQLEnum
+from sqlalchemy import Column, String, JSON, Text, Boolean, DateTime, ForeignKey, Index, Enum as SQLEnum, func
 from app.db.base import Base, BaseArtifact
 from app.enums import ReqLevel, EarsType
 
 
 class Requirement(BaseArtifact):
     __tablename__ = "requirements"
+    # Components are filtered by exact match; hash indexes (on PostgreSQL) have no key size limit
+    __table_args__ = (
+        Index("ix_requirements_ears_trigger", "ears_trigger", postgresql_using="hash"),
+        Index("ix_requirements_ears_state", "ears_state", postgresql_using="hash"),
+        Index("ix_requirements_ears_condition", "ears_condition", postgresql_using="hash"),
+        Index("ix_requirements_ears_feature", "ears_feature", postgresql_using="hash"),
+    )
 
     # Core requirement content
     short_name  = Column(String, nullable=False)   # e.g., "SYS-REQ-001"
@@ -16,7 +23,7 @@ class Requirement(BaseArtifact):
     ears_type   = Column(SQLEnum(EarsType), nullable=False, default=EarsType.UBIQUITOUS)  # UBIQUITOUS, EVENT, UNWANTED, STATE
     area        = Column(String, nullable=True)  # Area/domain (e.g., "AI", "Zero-Trust")
 
-    # EARS-specific fields for pattern components
+    # EARS-specific fields for pattern components, extracted from `text` on write
     ears_trigger = Column(Text, nullable=True)  # For EVENT_DRIVEN: the trigger event (WHEN...)
     ears_state   = Column(Text, nullable=True)  # For STATE_DRIVEN: the system state (WHILE...)
     ears_condition = Column(Text, nullable=True)  # For UNWANTED_BEHAVIOR: the condition (IF...)
@@ -24,4 +31,18 @@ class Requirement(BaseArtifact):
 
     # Optional but HIGHLY valuable for workshops
     rationale   = Column(Text, nullable=True)      # Why this requirement exists
-    owner       = Column(String, nullable=True)    # Who is accountable for verification
\ No newline at end of file
+    owner       = Column(String, nullable=True)    # Who is accountable for verification
+
+class RequirementEarsResult(Base):
+    """Cached EARS validation result for a requirement, used by the conformance report"""
+    __tablename__ = "requirement_ears_results"
+
+    requirement_aid  = Column(String, ForeignKey("requirements.aid", ondelete="CASCADE"), primary_key=True)
+    project_id       = Column(String, nullable=False, index=True)
+    text_hash        = Column(String(64), nullable=False)   # sha256 of the validated text
+    ears_type        = Column(SQLEnum(EarsType), nullable=False)
+    valid            = Column(Boolean, nullable=False)
+    detected_pattern = Column(String, nullable=True)
+    message          = Column(Text, nullable=True)
+    source_updated   = Column(DateTime, nullable=True)      # requirement.last_updated when validated
+    checked_at       = Column(DateTime, default=func.now())
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class TranslationMemory(Base):
+    """Persistent translation memory: one row per source text, language pair and backend"""
+    __tablename__ = "translation_memory"
+
+    source_hash = Column(String(64), primary_key=True)   # sha256 of the source text
+    source_lang = Column(String, primary_key=True)       # e.g. "auto", "en"
+    target_lang = Column(String, primary_key=True)       # e.g. "ar"
+    backend = Column(String, primary_key=True)           # e.g. "google", "local"
+    source_text = Column(Text, nullable=False)
+    translated_text = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
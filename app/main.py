@@ -1,10 +1,12 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from app.api.v1.router import api_router
 from app.core.config import settings
+from app.utils.compression import CompressionMiddleware
+from app.utils.static_files import UploadFiles
 import os
 
 app = FastAPI(title=settings.PROJECT_NAME, version="0.1.0")
+app.add_middleware(CompressionMiddleware)
 
 # EXTREMELY EXPLICIT MOUNTING UNIT
 upload_path = str(settings.UPLOAD_DIR.resolve())
@@ -13,6 +15,6 @@ print(f"MOUNTING /uploads TO: {upload_path}")
 print(f"PATH EXISTS? {os.path.exists(upload_path)}")
 print(f"!!!!!!!!!!!!!!!!!!!!!!!")
 
-app.mount("/uploads", StaticFiles(directory=upload_path), name="uploads")
+app.mount("/uploads", UploadFiles(directory=upload_path), name="uploads")
 
 app.include_router(api_router, prefix="/api/v1")
\ No newline at end of file
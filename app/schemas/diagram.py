@@ -1,10 +1,11 @@
-from typing import List, Optional
-from pydantic import BaseModel, ConfigDict
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 class DiagramComponentUpdate(BaseModel):
     x: int
     y: int
+    version: Optional[int] = None  # expected layout_version; 409 if stale
 
 class DiagramComponentOut(BaseModel):
     diagram_id: str
@@ -30,6 +31,7 @@ class DiagramUpdate(BaseModel):
 class DiagramEdgeUpdate(BaseModel):
     source_handle: Optional[str] = None
     target_handle: Optional[str] = None
+    version: Optional[int] = None  # expected layout_version; 409 if stale
 
 class DiagramEdgeOut(BaseModel):
     diagram_id: str
@@ -40,6 +42,47 @@ class DiagramEdgeOut(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class LayoutNode(BaseModel):
+    component_id: str
+    x: int
+    y: int
+
+class LayoutEdge(BaseModel):
+    source_id: str
+    target_id: str
+    source_handle: Optional[str] = None
+    target_handle: Optional[str] = None
+
+class DiagramLayoutPatch(BaseModel):
+    # layout_version the client last saw; a stale version is rejected with 409. Omit to force.
+    version: Optional[int] = None
+    nodes: List[LayoutNode] = Field(default_factory=list, max_length=5000)
+    edges: List[LayoutEdge] = Field(default_factory=list, max_length=5000)
+
+class DiagramAutoLayoutRequest(BaseModel):
+    # "auto": compositions layered top-down, communication links force-directed
+    algorithm: Literal["auto", "layered", "force"] = "auto"
+    version: Optional[int] = None
+
+class DiagramLayoutDelta(BaseModel):
+    diagram_id: str
+    version: int
+    nodes: List[LayoutNode] = []
+    edges: List[LayoutEdge] = []
+    removed_nodes: List[str] = []
+
+class DiagramChange(BaseModel):
+    version: int
+    nodes: List[LayoutNode] = []
+    edges: List[LayoutEdge] = []
+    removed_nodes: List[str] = []
+
+class DiagramChanges(BaseModel):
+    diagram_id: str
+    version: int
+    changes: List[DiagramChange] = []
+    reset: bool = False  # the log does not reach back to `since`; reload the diagram
+
 class DiagramOut(BaseModel):
     id: str
     project_id: str
@@ -50,7 +93,12 @@ class DiagramOut(BaseModel):
     filter_data: Optional[dict] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    layout_version: int = 0
     components: List[DiagramComponentOut] = []
     edges: List[DiagramEdgeOut] = []
 
     model_config = ConfigDict(from_attributes=True)
+
+class DiagramRenderRequest(BaseModel):
+    source: str
+    language: Optional[str] = None  # "mermaid" or "plantuml"; detected from the source if omitted
@@ -1,5 +1,5 @@
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from app.db.models.document import DocumentType
 
@@ -28,6 +28,12 @@ class DocumentUpdate(BaseModel):
     document_type: Optional[DocumentType] = None
     status: Optional[str] = None
 
+# Resumable upload of a large file
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int = Field(..., ge=0)
+    content_type: Optional[str] = None
+
 # Properties to return to client
 class Document(DocumentBase):
     aid: str
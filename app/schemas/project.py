@@ -1,6 +1,7 @@
 # app/schemas/project.py
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 class ProjectBase(BaseModel):
     name: str
@@ -15,3 +16,17 @@ class ProjectUpdate(ProjectBase):
 class ProjectOut(ProjectBase):
     id: str
     model_config = ConfigDict(from_attributes=True)
+
+class ArtifactChangeOut(BaseModel):
+    seq: int
+    entity: str                  # vision / need / use_case / requirement / document / linkage
+    key: str
+    action: str                  # created / updated / status_changed / deleted
+    changed_at: Optional[datetime] = None
+    data: Optional[Dict[str, Any]] = None  # current row, with include_data (None for deletions)
+
+class ProjectChanges(BaseModel):
+    project_id: str
+    cursor: int                  # pass as `since` for the next page
+    has_more: bool
+    changes: List[ArtifactChangeOut] = []
@@ -0,0 +1,34 @@
+# app/schemas/report.py
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+
+class CoverageRuleResult(BaseModel):
+    """Coverage of one artifact type by one kind of link"""
+    rule: str
+    artifact_type: str
+    relationship_type: str
+    counterpart_type: str
+    direction: str                      # outgoing: artifact is the link source; incoming: the target
+    total: int
+    covered: int
+    uncovered: int
+    coverage: float                     # covered / total (1.0 when there are no artifacts)
+    uncovered_aids: List[str] = []      # one page, ordered by AID
+
+
+class OrphanSet(BaseModel):
+    """Artifacts of one type without any link"""
+    total: int
+    orphans: int
+    aids: List[str] = []                # one page, ordered by AID
+
+
+class CoverageReport(BaseModel):
+    """Traceability coverage per rule and orphans per artifact type"""
+    project_id: str
+    offset: int
+    limit: int
+    coverage: List[CoverageRuleResult]
+    orphans: Dict[str, OrphanSet]
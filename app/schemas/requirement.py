@@ -62,10 +62,33 @@ class EARSValidationRequest(BaseModel):
     text: str
     pattern: EarsType
 
+class EARSBatchValidationRequest(BaseModel):
+    """Request model for validating many requirements at once"""
+    items: List[EARSValidationRequest] = Field(default_factory=list, max_length=5000)
+
 class EARSValidationResponse(BaseModel):
     """Response model for EARS validation"""
     valid: bool
     message: str
     suggestions: List[str]
     detected_pattern: Optional[str] = None
-    components: Optional[Dict[str, str]] = None
\ No newline at end of file
+    components: Optional[Dict[str, str]] = None
+class EARSConformanceBucket(BaseModel):
+    """Validation counts for one slice of a conformance report"""
+    total: int
+    valid: int
+    invalid: int
+    conformance: float
+
+class EARSConformanceReport(BaseModel):
+    """Project-wide EARS conformance, overall and by area, level and EARS type"""
+    project_id: str
+    recomputed: int
+    total: int
+    valid: int
+    invalid: int
+    conformance: float
+    by_area: Dict[str, EARSConformanceBucket]
+    by_level: Dict[str, EARSConformanceBucket]
+    by_ears_type: Dict[str, EARSConformanceBucket]
+    invalid_aids: Optional[List[str]] = None
@@ -0,0 +1,414 @@
+# app/utils/blob_store.py
+"""
+Content-addressed store for uploaded files.
+
+Every upload is hashed (SHA-256) while it is written to a temp file, then
+moved to a sharded path derived from the hash:
+
+    UPLOAD_DIR/blobs/ab/cd/abcd...<64 hex>.png
+
+Identical content is stored once. The `blobs` table records each file with a
+reference count: one per Image row pointing at it and one per document whose
+content_url or Markdown body links to it. Blobs whose count dropped to zero
+are removed by `collect_garbage` once they are older than BLOB_GC_GRACE_HOURS,
+so a file uploaded for a document that has not been saved yet survives. Files
+whose row was never committed (the upload's transaction rolled back) are
+swept by the same pass once they are past the grace period.
+
+`store_stream` is the async path used by the upload endpoints: chunks are
+written and hashed in the thread pool so large uploads never block the
+event loop, and the size limit is enforced while streaming.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Dict, Iterable, Optional, Set
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.blob import Blob
+from app.utils import image_variants, static_files
+
+BLOB_ROOT = "blobs"
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Matches both /uploads/blobs/... and /api/v1/documents/files/blobs/... links
+_DIGEST_IN_URL = re.compile(r"blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})")
+
+# A stored file, or one of its sidecars and variants, in a shard directory
+_DIGEST_IN_NAME = re.compile(r"([0-9a-f]{64})(?:\.|$)")
+
+
+class UploadTooLarge(ValueError):
+    """Raised while streaming once an upload exceeds its size limit."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds the {limit // (1024 * 1024)} MB limit")
+        self.limit = limit
+
+
+def max_upload_bytes(kind: str) -> int:
+    """Size limit for an upload kind ("image" or "document")."""
+    limits = {
+        "image": settings.UPLOAD_MAX_IMAGE_MB,
+        "document": settings.UPLOAD_MAX_DOCUMENT_MB,
+    }
+    return limits[kind] * 1024 * 1024
+
+
+def blob_dir() -> Path:
+    return settings.UPLOAD_DIR / BLOB_ROOT
+
+
+def temp_dir() -> Path:
+    path = blob_dir() / "tmp"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def blob_relpath(digest: str, extension: str = "") -> str:
+    return f"{BLOB_ROOT}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def blob_url(blob: Blob) -> str:
+    """Public URL served by the /uploads static mount."""
+    return f"/uploads/{blob.path}"
+
+
+def document_url(blob: Blob) -> str:
+    """URL served by the documents API (same file, document-style route)."""
+    return f"/api/v1/documents/files/{blob.path}"
+
+
+def digest_from_url(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    match = _DIGEST_IN_URL.search(url)
+    return match.group(1) if match else None
+
+
+def digests_in_text(text: Optional[str]) -> Set[str]:
+    """Blob hashes linked from a Markdown body (embedded images, file links)."""
+    if not text or BLOB_ROOT not in text:
+        return set()
+    return set(_DIGEST_IN_URL.findall(text))
+
+
+def document_digests(content_url: Optional[str], content_text: Optional[str]) -> Set[str]:
+    digests = digests_in_text(content_text)
+    url_digest = digest_from_url(content_url)
+    if url_digest:
+        digests.add(url_digest)
+    return digests
+
+
+def _extension(filename: Optional[str]) -> str:
+    # Keep the extension so the static mount can guess the content type
+    suffix = Path(filename or "").suffix.lower()
+    if 1 < len(suffix) <= 10 and suffix[1:].isalnum():
+        return suffix
+    return ""
+
+
+def adopt_file(
+    db: Session, temp_path: Path, digest: str, size: int,
+    filename: Optional[str], content_type: Optional[str] = None,
+) -> Blob:
+    """
+    Move a fully written temp file into the store under its hash.
+
+    If the content is already stored the temp file is discarded and the
+    existing blob is returned. The blob row is flushed, not committed; the
+    caller commits it together with whatever references it.
+    """
+    blob = db.get(Blob, digest)
+    if blob is not None:
+        target = settings.UPLOAD_DIR / blob.path
+        if target.exists():
+            os.remove(temp_path)
+        else:
+            # Row survived but the file was lost: heal it from this upload
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, target)
+        return blob
+
+    relpath = blob_relpath(digest, _extension(filename))
+    target = settings.UPLOAD_DIR / relpath
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(temp_path, target)
+    mime_type = content_type or mimetypes.guess_type(filename or "")[0]
+    static_files.write_sidecars(target, mime_type)
+
+    blob = Blob(
+        sha256=digest,
+        path=relpath,
+        size=size,
+        mime_type=mime_type,
+        refcount=0,
+    )
+    try:
+        # Savepoint: a conflict must not discard the caller's pending work
+        with db.begin_nested():
+            db.add(blob)
+    except IntegrityError:
+        # The same content was stored by a concurrent upload; the file is identical
+        blob = db.get(Blob, digest)
+    return blob
+
+
+def store_file(
+    db: Session, fileobj: BinaryIO, filename: Optional[str], content_type: Optional[str] = None
+) -> Blob:
+    """Copy `fileobj` into the store, hashing while writing. Returns the (possibly existing) blob."""
+    fd, temp_name = tempfile.mkstemp(dir=temp_dir(), suffix=".part")
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = fileobj.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(temp_name)
+        raise
+    return adopt_file(db, Path(temp_name), hasher.hexdigest(), size, filename, content_type)
+
+
+def _write_chunk(out: BinaryIO, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    out.write(chunk)
+
+
+async def write_chunks(
+    chunks: AsyncIterator[bytes], out: BinaryIO, hasher, max_bytes: int, written: int = 0
+) -> int:
+    """
+    Append `chunks` to `out`, updating `hasher`, without blocking the event loop.
+    Returns the total bytes written (starting from `written`).
+    """
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        written += len(chunk)
+        if written > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        await run_in_threadpool(_write_chunk, out, hasher, chunk)
+    return written
+
+
+async def iter_upload(upload: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await upload.read(COPY_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def store_stream(
+    db: Session, chunks: AsyncIterator[bytes], filename: Optional[str],
+    content_type: Optional[str], max_bytes: int,
+) -> Blob:
+    """
+    Async counterpart of `store_file`: stream `chunks` to a temp file, hashing
+    as they arrive, then move it into the store. Nothing is left behind if the
+    upload is too large or the client disconnects.
+    """
+    fd, temp_name = tempfile.mkstemp(dir=temp_dir(), suffix=".part")
+    hasher = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            size = await write_chunks(chunks, out, hasher, max_bytes)
+    except BaseException:
+        os.remove(temp_name)
+        raise
+    return await run_in_threadpool(
+        adopt_file, db, Path(temp_name), hasher.hexdigest(), size, filename, content_type
+    )
+
+
+def _adjust(db: Session, digests: Iterable[Optional[str]], delta: int) -> None:
+    digests = [d for d in digests if d]
+    if not digests:
+        return
+    query = db.query(Blob).filter(Blob.sha256.in_(digests))
+    if delta < 0:
+        query = query.filter(Blob.refcount > 0)
+    # Single UPDATE so concurrent writers cannot lose increments
+    query.update({Blob.refcount: Blob.refcount + delta}, synchronize_session=False)
+
+
+def acquire(db: Session, *digests: Optional[str]) -> None:
+    _adjust(db, digests, 1)
+
+
+def release(db: Session, *digests: Optional[str]) -> None:
+    _adjust(db, digests, -1)
+
+
+def apply_deltas(connection, deltas: Dict[str, int]) -> None:
+    """
+    Add per-blob refcount deltas with Core UPDATEs on `connection`, for
+    flush listeners that must not go through the Session.
+    """
+    for digest, delta in sorted(deltas.items()):
+        if not digest or not delta:
+            continue
+        stmt = update(Blob).where(Blob.sha256 == digest)
+        if delta < 0:
+            stmt = stmt.where(Blob.refcount > 0)
+        connection.execute(stmt.values(refcount=Blob.refcount + delta))
+
+
+def update_references(db: Session, old: Set[str], new: Set[str]) -> None:
+    """Move references from the `old` set of blobs to the `new` one."""
+    release(db, *(old - new))
+    acquire(db, *(new - old))
+
+
+def recount_references(db: Session) -> int:
+    """
+    Recompute every refcount from the images and documents tables and from
+    the artifacts' embedded images in the image reference index.
+    Returns the number of blobs whose stored count was wrong.
+    """
+    from app.db.models.document import Document
+    from app.db.models.image import Image
+    from app.db.models.image_reference import ImageReference
+    from app.utils.image_refs import COUNTED_SOURCES
+
+    counts: Dict[str, int] = {}
+    for (digest,) in db.query(Image.blob_sha256).filter(Image.blob_sha256.isnot(None)):
+        counts[digest] = counts.get(digest, 0) + 1
+    for content_url, content_text in db.query(Document.content_url, Document.content_text):
+        for digest in document_digests(content_url, content_text):
+            counts[digest] = counts.get(digest, 0) + 1
+    indexed = db.query(ImageReference.blob_sha256).filter(
+        ImageReference.blob_sha256.isnot(None), ImageReference.source_type.in_(COUNTED_SOURCES)
+    )
+    for (digest,) in indexed:
+        counts[digest] = counts.get(digest, 0) + 1
+
+    fixed = 0
+    for blob in db.query(Blob):
+        expected = counts.get(blob.sha256, 0)
+        if blob.refcount != expected:
+            blob.refcount = expected
+            fixed += 1
+    db.commit()
+    return fixed
+
+
+def _as_utc(value: Optional[datetime]) -> datetime:
+    if value is None:
+        return datetime.now(timezone.utc)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def collect_garbage(
+    db: Session, grace_hours: Optional[float] = None, dry_run: bool = False, recount: bool = True
+) -> Dict[str, int]:
+    """
+    Delete unreferenced blobs older than the grace period, and stale temp files.
+
+    Refcounts are recomputed first (unless `recount` is False) so drift from
+    manual edits can never delete a file that is still linked.
+    """
+    grace = settings.BLOB_GC_GRACE_HOURS if grace_hours is None else grace_hours
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=grace)
+    result = {
+        "recounted": 0, "deleted": 0, "bytes_freed": 0,
+        "untracked_files_removed": 0, "temp_files_removed": 0,
+    }
+
+    if recount and not dry_run:
+        result["recounted"] = recount_references(db)
+
+    candidates = (
+        db.query(Blob.sha256, Blob.path, Blob.size, Blob.created_at)
+        .filter(Blob.refcount <= 0)
+        .all()
+    )
+    for digest, path, size, created_at in candidates:
+        if _as_utc(created_at) > cutoff:
+            continue
+        if not dry_run:
+            # Re-check the count in the DELETE itself: an upload may have just claimed it
+            deleted = (
+                db.query(Blob)
+                .filter(Blob.sha256 == digest, Blob.refcount <= 0)
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            if not deleted:
+                continue
+            file_path = settings.UPLOAD_DIR / path
+            if file_path.exists():
+                os.remove(file_path)
+            static_files.remove_sidecars(file_path)
+            image_variants.remove_variants(path)
+        result["deleted"] += 1
+        result["bytes_freed"] += size or 0
+
+    _sweep_untracked(db, cutoff, dry_run, result)
+
+    tmp = blob_dir() / "tmp"
+    if tmp.exists():
+        for part in tmp.iterdir():
+            modified = datetime.fromtimestamp(part.stat().st_mtime, timezone.utc)
+            if part.is_file() and modified < cutoff:
+                if not dry_run:
+                    os.remove(part)
+                result["temp_files_removed"] += 1
+
+    result["dry_run"] = dry_run
+    return result
+
+
+def _sweep_untracked(db: Session, cutoff: datetime, dry_run: bool, result: Dict[str, int]) -> None:
+    """Remove files under blobs/ whose hash has no row, e.g. from a rolled-back upload."""
+    root = blob_dir()
+    if not root.exists():
+        return
+    tracked = {digest for (digest,) in db.query(Blob.sha256)}
+    for shard in root.glob("[0-9a-f][0-9a-f]/[0-9a-f][0-9a-f]"):
+        for path in shard.iterdir():
+            match = _DIGEST_IN_NAME.match(path.name)
+            if not match or match.group(1) in tracked or not path.is_file():
+                continue
+            stat = path.stat()
+            if datetime.fromtimestamp(stat.st_mtime, timezone.utc) >= cutoff:
+                continue
+            if not dry_run:
+                os.remove(path)
+            result["untracked_files_removed"] += 1
+            result["bytes_freed"] += stat.st_size
+
+
+def store_stats(db: Session) -> Dict[str, int]:
+    from sqlalchemy import func
+
+    count, total, referenced = db.query(
+        func.count(Blob.sha256),
+        func.coalesce(func.sum(Blob.size), 0),
+        func.coalesce(func.sum(Blob.refcount), 0),
+    ).one()
+    unreferenced = db.query(func.count(Blob.sha256)).filter(Blob.refcount <= 0).scalar()
+    return {
+        "blobs": count,
+        "bytes": int(total),
+        "references": int(referenced),
+        "unreferenced_blobs": unreferenced,
+    }
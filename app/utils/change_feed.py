@@ -0,0 +1,170 @@
+# app/utils/change_feed.py
+"""
+Change feed for incremental sync (GET /projects/{id}/changes).
+
+Every ORM write to a vision, need, use case, requirement, document or
+linkage records a row in artifact_changes in the same transaction, so the
+feed never shows a rolled-back change and never misses a committed one.
+`seq` is a global, strictly increasing change number and doubles as the
+cursor: a client keeps the `cursor` of the last page it applied and asks
+for `since=<cursor>` next time.
+
+The log is compacted to one row per artifact holding its latest change, so
+it grows with the number of artifacts rather than with edits. Deletions
+stay as tombstones (action "deleted"). A client at any cursor therefore
+learns about everything that changed since, in its latest state; it only
+skips the intermediate edits.
+
+A cursor is only safe if rows become visible in seq order. SQLite has a
+single writer; on PostgreSQL every transaction that logs a change takes a
+transaction-scoped advisory lock first, so seq order is commit order.
+
+Bulk deletes bypass the ORM: callers record tombstones beforehand
+(`tombstone_project`) or drop the project's rows with it (`forget_project`).
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, event, func, insert, literal, select, text
+from sqlalchemy.orm import Session
+
+from app.db.models.artifact_change import ArtifactChange
+from app.db.models.document import Document
+from app.db.models.linkage import Linkage
+from app.db.models.need import Need
+from app.db.models.requirement import Requirement
+from app.db.models.use_case import UseCase
+from app.db.models.vision import Vision
+from app.utils.events import describe
+
+MODELS: Dict[str, type] = {
+    "vision": Vision,
+    "need": Need,
+    "use_case": UseCase,
+    "requirement": Requirement,
+    "document": Document,
+    "linkage": Linkage,
+}
+_TRACKED = set(MODELS.values())
+# pg_advisory_xact_lock key shared by all feed writers
+_LOCK_KEY = 0x61726368
+
+
+def _serialize(connection) -> None:
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+
+
+def _record(connection, items: List[dict]) -> None:
+    _serialize(connection)
+    for item in items:
+        connection.execute(
+            delete(ArtifactChange).where(ArtifactChange.entity == item["entity"], ArtifactChange.key == item["key"])
+        )
+        connection.execute(
+            insert(ArtifactChange).values(
+                project_id=item["project_id"], entity=item["entity"], key=item["key"], action=item["action"],
+            )
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _log_after_flush(session: Session, flush_context) -> None:
+    items = []
+    for action, objects in (("created", session.new), ("updated", session.dirty), ("deleted", session.deleted)):
+        for obj in objects:
+            if type(obj) in _TRACKED:
+                item = describe(session, obj, action)
+                if item is not None:
+                    items.append(item)
+    if items:
+        _record(session.connection(), items)
+
+
+def tombstone_project(db: Session, project_id: str, entities: Iterable[str] = tuple(MODELS)) -> None:
+    """Mark every current artifact of the given kinds as deleted; call before bulk-deleting them."""
+    connection = db.connection()
+    _serialize(connection)
+    for entity in entities:
+        model = MODELS[entity]
+        keys = select(model.aid).where(model.project_id == project_id)
+        connection.execute(
+            delete(ArtifactChange).where(ArtifactChange.entity == entity, ArtifactChange.key.in_(keys))
+        )
+        connection.execute(
+            insert(ArtifactChange).from_select(
+                ["project_id", "entity", "key", "action"],
+                select(model.project_id, literal(entity), model.aid, literal("deleted"))
+                .where(model.project_id == project_id),
+            )
+        )
+
+
+def forget_project(db: Session, project_id: str) -> int:
+    """Drop a project's rows; for callers that delete the project itself."""
+    return (
+        db.query(ArtifactChange)
+        .filter(ArtifactChange.project_id == project_id)
+        .delete(synchronize_session=False)
+    )
+
+
+def current_cursor(db: Session) -> int:
+    return db.query(func.max(ArtifactChange.seq)).scalar() or 0
+
+
+def project_cursor(db: Session, project_id: str) -> int:
+    """Latest change of one project; moves whenever one of its artifacts or links changes."""
+    return (
+        db.query(func.max(ArtifactChange.seq)).filter(ArtifactChange.project_id == project_id).scalar() or 0
+    )
+
+
+def as_dict(obj) -> dict:
+    """Column values of a row, in the shape used by the project export."""
+    if hasattr(obj, "as_dict"):
+        return obj.as_dict()
+    return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
+
+
+def changes(db: Session, project_id: str, since: int = 0, limit: int = 500, include_data: bool = False) -> dict:
+    """
+    One page of a project's changes after cursor `since`, oldest first.
+
+    Returns:
+        {"project_id", "cursor", "has_more", "changes": [{"seq", "entity",
+        "key", "action", "changed_at", "data"?}]}; `data` is the current row
+        (None for tombstones) when `include_data` is set.
+    """
+    rows = (
+        db.query(ArtifactChange)
+        .filter(ArtifactChange.project_id == project_id, ArtifactChange.seq > since)
+        .order_by(ArtifactChange.seq)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [
+        {"seq": r.seq, "entity": r.entity, "key": r.key, "action": r.action, "changed_at": r.changed_at}
+        for r in rows
+    ]
+
+    if include_data:
+        wanted: Dict[str, List[str]] = {}
+        for item in items:
+            if item["action"] != "deleted":
+                wanted.setdefault(item["entity"], []).append(item["key"])
+        current: Dict[tuple, Optional[dict]] = {}
+        for entity, keys in wanted.items():
+            model = MODELS[entity]
+            for obj in db.query(model).filter(model.aid.in_(keys)):
+                current[(entity, obj.aid)] = as_dict(obj)
+        for item in items:
+            item["data"] = current.get((item["entity"], item["key"]))
+
+    return {
+        "project_id": project_id,
+        "cursor": items[-1]["seq"] if items else since,
+        "has_more": has_more,
+        "changes": items,
+    }
@@ -0,0 +1,157 @@
+# app/utils/chunked_upload.py
+"""
+Resumable chunked uploads for large files.
+
+A session is created with the final size, then the client sends the body in
+any number of chunks, each tagged with the offset it starts at. If the
+connection drops the client asks for the current offset and continues from
+there. When the last byte arrives the file is moved into the blob store.
+
+Session state lives next to the partial file in the blob store's temp
+directory (<id>.json + <id>.part), so sessions survive a restart and
+abandoned ones are removed by the blob store GC with the other temp files.
+The running SHA-256 is kept in memory while the process lives; after a
+restart the received bytes are hashed once more on completion.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db.models.blob import Blob
+from app.utils import blob_store
+
+
+class OffsetMismatch(ValueError):
+    """The chunk does not start where the received data ends."""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Upload is at offset {expected}")
+        self.expected = expected
+
+
+# upload id -> (hasher, offset it has consumed); lost on restart, rebuilt on completion
+_hashers: Dict[str, tuple] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _paths(upload_id: str):
+    # Session ids are generated by us; refuse anything that could escape the temp dir
+    if not upload_id or not all(c in "0123456789abcdef" for c in upload_id):
+        raise KeyError(upload_id)
+    base = blob_store.temp_dir() / upload_id
+    return base.with_suffix(".json"), base.with_suffix(".part")
+
+
+def _save(session: Dict) -> None:
+    meta_path, _ = _paths(session["upload_id"])
+    temp = meta_path.with_suffix(".json.tmp")
+    temp.write_text(json.dumps(session))
+    os.replace(temp, meta_path)
+
+
+def create_session(filename: str, size: int, content_type: Optional[str], kind: str) -> Dict:
+    """Start a resumable upload. Raises UploadTooLarge if `size` exceeds the kind's limit."""
+    limit = blob_store.max_upload_bytes(kind)
+    if size > limit:
+        raise blob_store.UploadTooLarge(limit)
+    upload_id = uuid.uuid4().hex
+    session = {
+        "upload_id": upload_id,
+        "filename": Path(filename).name,
+        "content_type": content_type,
+        "kind": kind,
+        "size": size,
+        "offset": 0,
+    }
+    _, part_path = _paths(upload_id)
+    part_path.touch()
+    _save(session)
+    _hashers[upload_id] = (hashlib.sha256(), 0)
+    return session
+
+
+def load_session(upload_id: str) -> Dict:
+    """Raises KeyError for unknown or expired sessions."""
+    meta_path, part_path = _paths(upload_id)
+    if not meta_path.exists() or not part_path.exists():
+        raise KeyError(upload_id)
+    session = json.loads(meta_path.read_text())
+    # The part file is the source of truth if we died between write and save
+    session["offset"] = part_path.stat().st_size
+    return session
+
+
+def _lock(upload_id: str) -> asyncio.Lock:
+    lock = _locks.get(upload_id)
+    if lock is None:
+        lock = _locks[upload_id] = asyncio.Lock()
+    return lock
+
+
+async def append_chunk(upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict:
+    """
+    Append one chunk starting at `offset`. Returns the updated session.
+    Raises KeyError, OffsetMismatch or UploadTooLarge.
+    """
+    async with _lock(upload_id):
+        session = await run_in_threadpool(load_session, upload_id)
+        if offset != session["offset"]:
+            raise OffsetMismatch(session["offset"])
+
+        hasher, hashed = _hashers.get(upload_id, (None, 0))
+        if hasher is None or hashed != offset:
+            # Unknown state (restart, or an interrupted chunk): hash on completion instead
+            hasher = None
+        _, part_path = _paths(upload_id)
+        running = hasher or hashlib.sha256()
+        with open(part_path, "ab") as out:
+            try:
+                written = await blob_store.write_chunks(chunks, out, running, session["size"], offset)
+            finally:
+                # Keep whatever arrived so the client can resume from there
+                await run_in_threadpool(out.flush)
+        if hasher is not None:
+            _hashers[upload_id] = (hasher, written)
+        else:
+            _hashers.pop(upload_id, None)
+
+        session["offset"] = written
+        await run_in_threadpool(_save, session)
+        return session
+
+
+def _file_digest(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(blob_store.COPY_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def complete(db: Session, session: Dict) -> Blob:
+    """Move a fully received upload into the blob store (call from a worker thread)."""
+    upload_id = session["upload_id"]
+    meta_path, part_path = _paths(upload_id)
+    hasher, hashed = _hashers.pop(upload_id, (None, 0))
+    digest = hasher.hexdigest() if hasher is not None and hashed == session["size"] else _file_digest(part_path)
+    blob = blob_store.adopt_file(db, part_path, digest, session["size"], session["filename"], session["content_type"])
+    meta_path.unlink(missing_ok=True)
+    _locks.pop(upload_id, None)
+    return blob
+
+
+def abort(upload_id: str) -> None:
+    meta_path, part_path = _paths(upload_id)
+    if not meta_path.exists():
+        raise KeyError(upload_id)
+    part_path.unlink(missing_ok=True)
+    meta_path.unlink(missing_ok=True)
+    _hashers.pop(upload_id, None)
+    _locks.pop(upload_id, None)
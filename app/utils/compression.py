@@ -0,0 +1,213 @@
+# app/utils/compression.py
+"""
+Response compression for API payloads (lists, exports, diagrams).
+
+`CompressionMiddleware` encodes responses with brotli (if the brotli package
+is installed) or gzip, whichever the client weights highest in
+Accept-Encoding (brotli on a tie; identity only if the client ranks it
+above both), when
+
+    - the content type is in COMPRESSION_CONTENT_TYPES ("type/*" allowed),
+    - the body is at least COMPRESSION_MINIMUM_SIZE bytes (streamed bodies
+      always qualify, their size is not known up front),
+    - the response is not encoded already and does not serve byte ranges.
+
+An encoded response gets a weak ETag: the encoded bytes differ from the
+identity ones, so a strong validator would no longer be true. Conditional
+requests compare weakly, so 304s keep working.
+
+File responses (uploads) advertise byte ranges and are left alone: a range
+of an encoded body would be a range of the encoded bytes. They have
+precompressed sidecars instead (app/utils/static_files.py).
+
+Streamed responses (NDJSON translations, opted-in event streams) are
+compressed chunk by chunk, and each chunk is flushed, so the client receives
+every line as soon as the endpoint sends it. Large bodies are compressed in
+a worker thread to keep the event loop responsive.
+
+Bytes in and out per encoding are counted for GET /system/compression/stats;
+scripts/benchmarks/bench_compression.py measures the main endpoints.
+"""
+import zlib
+from typing import Dict, Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.utils.static_files import encoding_weights
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# Bodies at least this large are compressed off the event loop
+THREAD_MIN_BYTES = 128 * 1024
+
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+class GzipEncoder:
+    encoding = "gzip"
+
+    def __init__(self):
+        # wbits 31: gzip container
+        self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliEncoder:
+    encoding = "br"
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+# Preferred first
+ENCODERS = {BrotliEncoder.encoding: BrotliEncoder, GzipEncoder.encoding: GzipEncoder}
+
+
+def available_encodings():
+    return [name for name in ENCODERS if name != "br" or BROTLI_AVAILABLE]
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The available encoding with the highest q-value, or None to send identity."""
+    weights = encoding_weights(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, weights.get("identity", 0.0)
+    for name in available_encodings():  # preferred first, so it wins ties
+        q = weights.get(name, wildcard)
+        if q > 0 and (q > best_q or (best is None and q == best_q)):
+            best, best_q = name, q
+    return best
+
+
+def is_compressible_type(content_type: Optional[str]) -> bool:
+    media_type = (content_type or "").partition(";")[0].strip().lower()
+    if not media_type:
+        return False
+    allowed = settings.COMPRESSION_CONTENT_TYPES
+    return media_type in allowed or media_type.partition("/")[0] + "/*" in allowed
+
+
+def stats() -> Dict[str, object]:
+    encodings = {}
+    for name, counters in _stats.items():
+        saved = counters["bytes_in"] - counters["bytes_out"]
+        encodings[name] = {
+            **counters,
+            "saved_ratio": round(saved / counters["bytes_in"], 3) if counters["bytes_in"] else 0.0,
+        }
+    return {
+        "enabled": settings.COMPRESSION_ENABLED,
+        "available": available_encodings(),
+        "minimum_size": settings.COMPRESSION_MINIMUM_SIZE,
+        "encodings": encodings,
+    }
+
+
+def _count(encoding: str, key: str, value: int) -> None:
+    counters = _stats.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+    counters[key] += value
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        await _Responder(self.app, encoding)(scope, receive, send)
+
+
+class _Responder:
+    """Holds back the start message until the first body chunk shows whether to encode."""
+
+    def __init__(self, app: ASGIApp, encoding: Optional[str]):
+        self.app = app
+        self.encoding = encoding
+        self.send: Send = None
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.encoder = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            status = message["status"]
+            self.passthrough = (
+                status < 200 or status in (204, 206, 304)
+                or "content-encoding" in headers
+                or "accept-ranges" in headers
+                or not is_compressible_type(headers.get("content-type"))
+            )
+            if self.passthrough:
+                await self._send_start()
+            return
+
+        if self.passthrough or message["type"] != "http.response.body":
+            await self._send_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if self.encoding is None or (not more_body and len(body) < settings.COMPRESSION_MINIMUM_SIZE):
+                self.passthrough = True
+                await self._send_start()
+                await self.send(message)
+                return
+
+            self.encoder = ENCODERS[self.encoding]()
+            headers["content-encoding"] = self.encoding
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["etag"] = f"W/{etag}"
+            _count(self.encoding, "responses", 1)
+            data = await self._compress(body, final=not more_body)
+            if more_body:
+                if "content-length" in headers:
+                    del headers["content-length"]
+            else:
+                headers["content-length"] = str(len(data))
+            await self._send_start()
+        else:
+            data = await self._compress(body, final=not more_body)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _send_start(self) -> None:
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self.send(start)
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        if len(body) >= THREAD_MIN_BYTES:
+            data = await anyio.to_thread.run_sync(self.encoder.compress, body, final)
+        else:
+            data = self.encoder.compress(body, final)
+        _count(self.encoding, "bytes_in", len(body))
+        _count(self.encoding, "bytes_out", len(data))
+        return data
@@ -0,0 +1,150 @@
+# app/utils/coverage_report.py
+"""
+Traceability coverage and orphan report for a project.
+
+Each rule names an artifact type and the link that covers it, following the
+conventions the UI creates links with:
+
+    need        <- satisfies      use_case      (a use case satisfies the need)
+    need        -> derives_from   vision
+    use_case    -> satisfies      need
+    use_case    <- satisfies      requirement
+    requirement -> satisfies      use_case
+    requirement -> allocated_to   component
+    vision      <- derives_from   need
+
+Everything is computed in the database: per rule, a count and one page of
+the uncovered AIDs, both plain `WHERE NOT EXISTS` queries so the planner can
+run them as anti-joins against `linkages` (ix_linkages_project_source /
+ix_linkages_project_target). Orphans are artifacts with no link at all, in
+either direction.
+"""
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import exists, func, not_
+from sqlalchemy.orm import Session
+
+from app.db.models.document import Document
+from app.db.models.linkage import Linkage
+from app.db.models.need import Need
+from app.db.models.requirement import Requirement
+from app.db.models.use_case import UseCase
+from app.db.models.vision import Vision
+from app.enums import LinkType
+
+ARTIFACTS = {
+    "vision": Vision,
+    "need": Need,
+    "use_case": UseCase,
+    "requirement": Requirement,
+    "document": Document,
+}
+
+
+class CoverageRule(NamedTuple):
+    name: str
+    artifact_type: str
+    relationship_type: LinkType
+    counterpart_type: str
+    direction: str          # "outgoing": artifact is the link source; "incoming": the target
+
+
+RULES = (
+    CoverageRule("need_satisfied_by_use_case", "need", LinkType.SATISFIES, "use_case", "incoming"),
+    CoverageRule("need_derives_from_vision", "need", LinkType.DERIVES_FROM, "vision", "outgoing"),
+    CoverageRule("use_case_satisfies_need", "use_case", LinkType.SATISFIES, "need", "outgoing"),
+    CoverageRule("use_case_satisfied_by_requirement", "use_case", LinkType.SATISFIES, "requirement", "incoming"),
+    CoverageRule("requirement_satisfies_use_case", "requirement", LinkType.SATISFIES, "use_case", "outgoing"),
+    CoverageRule("requirement_allocated_to_component", "requirement", LinkType.ALLOCATED_TO, "component", "outgoing"),
+    CoverageRule("vision_has_need", "vision", LinkType.DERIVES_FROM, "need", "incoming"),
+)
+RULES_BY_NAME = {rule.name: rule for rule in RULES}
+
+
+def _covered(rule: CoverageRule, project_id: str, model):
+    if rule.direction == "outgoing":
+        own_type, own_id = Linkage.source_artifact_type, Linkage.source_id
+        other_type = Linkage.target_artifact_type
+    else:
+        own_type, own_id = Linkage.target_artifact_type, Linkage.target_id
+        other_type = Linkage.source_artifact_type
+    return exists().where(
+        Linkage.project_id == project_id,
+        Linkage.relationship_type == rule.relationship_type,
+        own_type == rule.artifact_type,
+        other_type == rule.counterpart_type,
+        own_id == model.aid,
+    )
+
+
+def _linked(artifact_type: str, project_id: str, model):
+    as_source = exists().where(
+        Linkage.project_id == project_id,
+        Linkage.source_artifact_type == artifact_type,
+        Linkage.source_id == model.aid,
+    )
+    as_target = exists().where(
+        Linkage.project_id == project_id,
+        Linkage.target_artifact_type == artifact_type,
+        Linkage.target_id == model.aid,
+    )
+    return as_source | as_target
+
+
+def _missing(db: Session, model, project_id: str, condition, offset: int, limit: int):
+    """Count and one page of the project's artifacts matching `condition` (a NOT EXISTS)."""
+    query = db.query(model.aid).filter(model.project_id == project_id, condition)
+    count = query.with_entities(func.count()).scalar()
+    aids = [aid for (aid,) in query.order_by(model.aid).offset(offset).limit(limit)] if limit else []
+    return count, aids
+
+
+def build_coverage_report(
+    db: Session,
+    project_id: str,
+    rules: Optional[List[str]] = None,
+    offset: int = 0,
+    limit: int = 50,
+) -> Dict:
+    """
+    Coverage per rule and orphans per artifact type.
+
+    `offset`/`limit` page every AID list (limit=0 returns counts only);
+    `rules` restricts the report to the named rules (orphans are always included).
+    """
+    selected = [RULES_BY_NAME[name] for name in rules] if rules else list(RULES)
+    totals = {
+        artifact_type: db.query(func.count()).select_from(model).filter(model.project_id == project_id).scalar()
+        for artifact_type, model in ARTIFACTS.items()
+    }
+
+    coverage = []
+    for rule in selected:
+        model = ARTIFACTS[rule.artifact_type]
+        total = totals[rule.artifact_type]
+        uncovered, aids = _missing(db, model, project_id, not_(_covered(rule, project_id, model)), offset, limit)
+        coverage.append({
+            "rule": rule.name,
+            "artifact_type": rule.artifact_type,
+            "relationship_type": rule.relationship_type.value,
+            "counterpart_type": rule.counterpart_type,
+            "direction": rule.direction,
+            "total": total,
+            "covered": total - uncovered,
+            "uncovered": uncovered,
+            "coverage": round((total - uncovered) / total, 4) if total else 1.0,
+            "uncovered_aids": aids,
+        })
+
+    orphans = {}
+    for artifact_type, model in ARTIFACTS.items():
+        count, aids = _missing(db, model, project_id, not_(_linked(artifact_type, project_id, model)), offset, limit)
+        orphans[artifact_type] = {"total": totals[artifact_type], "orphans": count, "aids": aids}
+
+    return {
+        "project_id": project_id,
+        "offset": offset,
+        "limit": limit,
+        "coverage": coverage,
+        "orphans": orphans,
+    }
@@ -0,0 +1,453 @@
+# app/utils/diagram_layout.py
+"""
+Automatic layout for component diagrams.
+
+Composition relationships form hierarchies and are drawn top-down with a
+layered (Sugiyama-style) layout:
+    1. cycles are broken by reversing DFS back edges
+    2. nodes get layers by longest path from the roots
+    3. barycenter sweeps reorder each layer to cut edge crossings
+    4. nodes are centered under their parents, then parents over their
+       children, keeping a minimum gap within each layer
+
+Every composition tree (and every lone component) is one block. Blocks
+are placed with a force-directed layout (Fruchterman-Reingold, vectorized
+with numpy) in which communication links pull blocks together and all
+blocks push each other apart; blocks that still overlap are then moved
+outwards until they are clear.
+Without communication links the blocks are simply packed in rows.
+
+Positions are the top-left corner of each node, sized like the frontend's
+nodes (NODE_WIDTH x NODE_HEIGHT). The result is deterministic.
+"""
+import math
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NODE_WIDTH = 172
+NODE_HEIGHT = 36
+H_GAP = 40       # between neighbours in a layer
+V_GAP = 80       # between layers
+BLOCK_GAP = 60   # between blocks
+
+ALGORITHMS = ("auto", "layered", "force")
+
+CROSSING_SWEEPS = 4
+FORCE_ITERATIONS = 50
+
+Point = Tuple[float, float]
+
+
+class _Block:
+    __slots__ = ("positions", "width", "height")
+
+    def __init__(self, positions: Dict[str, Point]):
+        min_x = min(x for x, _ in positions.values())
+        min_y = min(y for _, y in positions.values())
+        self.positions = {node: (x - min_x, y - min_y) for node, (x, y) in positions.items()}
+        self.width = max(x for x, _ in self.positions.values()) + NODE_WIDTH
+        self.height = max(y for _, y in self.positions.values()) + NODE_HEIGHT
+
+
+def layout(
+    nodes: Sequence[str],
+    edges: Iterable[Tuple[str, str, Optional[str]]],
+    algorithm: str = "auto",
+) -> Dict[str, Tuple[int, int]]:
+    """
+    Positions for every node of a diagram.
+
+    Args:
+        nodes: component ids
+        edges: (parent/source, child/target, relationship type) triples;
+            type "communication" is a link, anything else a composition
+        algorithm: "auto" (compositions layered, links force-directed),
+            "layered" (every edge is a hierarchy edge) or "force" (every
+            edge is a link, no hierarchy)
+
+    Returns:
+        {node: (x, y)}, top-left corners with the diagram starting at (0, 0)
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown layout algorithm: {algorithm}")
+    node_ids = list(dict.fromkeys(nodes))
+    if not node_ids:
+        return {}
+    present = set(node_ids)
+
+    hierarchy, links = [], []
+    for source, target, kind in edges:
+        if source == target or source not in present or target not in present:
+            continue
+        if algorithm == "force" or (algorithm == "auto" and kind == "communication"):
+            links.append((source, target))
+        else:
+            hierarchy.append((source, target))
+
+    blocks = [_layered(members, block_edges) for members, block_edges in _split(node_ids, hierarchy)]
+    block_of = {node: i for i, block in enumerate(blocks) for node in block.positions}
+    weights: Dict[Tuple[int, int], int] = defaultdict(int)
+    for source, target in links:
+        a, b = block_of[source], block_of[target]
+        if a != b:
+            weights[min(a, b), max(a, b)] += 1
+
+    if weights:
+        origins = _force_directed(blocks, weights)
+    else:
+        origins = _pack(blocks, range(len(blocks)))
+
+    result = {}
+    for block, (ox, oy) in zip(blocks, origins):
+        for node, (x, y) in block.positions.items():
+            result[node] = (ox + x, oy + y)
+    min_x = min(x for x, _ in result.values())
+    min_y = min(y for _, y in result.values())
+    return {node: (round(x - min_x), round(y - min_y)) for node, (x, y) in result.items()}
+
+
+def _split(nodes: List[str], edges: List[Tuple[str, str]]) -> List[Tuple[List[str], List[Tuple[str, str]]]]:
+    """Weakly connected components of the hierarchy, largest first."""
+    parent = {node: node for node in nodes}
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for a, b in edges:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[rb] = ra
+    members: Dict[str, List[str]] = defaultdict(list)
+    for node in nodes:
+        members[find(node)].append(node)
+    block_edges: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+    for a, b in edges:
+        block_edges[find(a)].append((a, b))
+    groups = [(members[root], block_edges[root]) for root in members]
+    groups.sort(key=lambda group: -len(group[0]))
+    return groups
+
+
+# ---------------------------------------------------------------------------
+# Layered layout of one hierarchy
+# ---------------------------------------------------------------------------
+
+def _layered(members: List[str], edges: List[Tuple[str, str]]) -> _Block:
+    if not edges:
+        return _Block({members[0]: (0.0, 0.0)})
+
+    children: Dict[str, List[str]] = defaultdict(list)
+    has_parent = set()
+    for a, b in dict.fromkeys(edges):
+        children[a].append(b)
+        has_parent.add(b)
+    roots = [node for node in members if node not in has_parent]
+    order, acyclic = _acyclic(roots + [node for node in members if node in has_parent], children)
+
+    parents: Dict[str, List[str]] = defaultdict(list)
+    children = defaultdict(list)
+    for a, b in dict.fromkeys(acyclic):
+        parents[b].append(a)
+        children[a].append(b)
+
+    layer = _longest_path(order, parents, children)
+    layers: List[List[str]] = [[] for _ in range(max(layer.values()) + 1)]
+    for node in order:  # DFS preorder keeps subtrees together from the start
+        layers[layer[node]].append(node)
+
+    _reduce_crossings(layers, parents, children)
+    x = _assign_x(layers, parents, children)
+    return _Block({node: (x[node], layer[node] * (NODE_HEIGHT + V_GAP)) for node in members})
+
+
+def _acyclic(start_order: List[str], children: Dict[str, List[str]]) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """DFS from the roots; back edges are reversed. Returns (preorder, edges)."""
+    state: Dict[str, int] = {}  # 1 on the stack, 2 done
+    preorder: List[str] = []
+    edges: List[Tuple[str, str]] = []
+    for root in start_order:
+        if root in state:
+            continue
+        state[root] = 1
+        preorder.append(root)
+        stack = [(root, iter(children[root]))]
+        while stack:
+            node, pending = stack[-1]
+            for child in pending:
+                if state.get(child) == 1:
+                    edges.append((child, node))
+                    continue
+                edges.append((node, child))
+                if child not in state:
+                    state[child] = 1
+                    preorder.append(child)
+                    stack.append((child, iter(children[child])))
+                    break
+            else:
+                state[node] = 2
+                stack.pop()
+    return preorder, edges
+
+
+def _longest_path(nodes: List[str], parents, children) -> Dict[str, int]:
+    remaining = {node: len(parents[node]) for node in nodes}
+    layer = {node: 0 for node in nodes}
+    queue = deque(node for node in nodes if not remaining[node])
+    while queue:
+        node = queue.popleft()
+        for child in children[node]:
+            layer[child] = max(layer[child], layer[node] + 1)
+            remaining[child] -= 1
+            if not remaining[child]:
+                queue.append(child)
+    return layer
+
+
+def _reduce_crossings(layers: List[List[str]], parents, children) -> None:
+    """Barycenter heuristic, alternating downward and upward sweeps."""
+    rank: Dict[str, float] = {}
+
+    def index(row: List[str]) -> None:
+        for i, node in enumerate(row):
+            rank[node] = (i + 0.5) / len(row)
+
+    def reorder(row: List[str], neighbours) -> None:
+        keys = {}
+        for node in row:
+            adjacent = neighbours[node]
+            keys[node] = sum(rank[n] for n in adjacent) / len(adjacent) if adjacent else rank[node]
+        row.sort(key=keys.__getitem__)
+        index(row)
+
+    for row in layers:
+        index(row)
+    for _ in range(CROSSING_SWEEPS):
+        for row in layers[1:]:
+            reorder(row, parents)
+        for row in reversed(layers[:-1]):
+            reorder(row, children)
+
+
+def _place_row(row: List[str], x: Dict[str, float], desired: List[Optional[float]]) -> None:
+    """Put nodes at their desired x, left to right, keeping the minimum gap."""
+    step = NODE_WIDTH + H_GAP
+    previous = None
+    for node, want in zip(row, desired):
+        position = want if want is not None else (previous + step if previous is not None else 0.0)
+        if previous is not None and position < previous + step:
+            position = previous + step
+        x[node] = previous = position
+    # Pushing only moves nodes right; shift the row back so it stays centred on its targets
+    offsets = [want - x[node] for node, want in zip(row, desired) if want is not None]
+    if offsets:
+        shift = sum(offsets) / len(offsets)
+        for node in row:
+            x[node] += shift
+
+
+def _assign_x(layers: List[List[str]], parents, children) -> Dict[str, float]:
+    x: Dict[str, float] = {}
+    for row in layers:
+        _place_row(row, x, [
+            sum(x[p] for p in parents[node]) / len(parents[node]) if parents[node] else None
+            for node in row
+        ])
+    for row in reversed(layers[:-1]):
+        _place_row(row, x, [
+            sum(x[c] for c in children[node]) / len(children[node]) if children[node] else x[node]
+            for node in row
+        ])
+    return x
+
+
+# ---------------------------------------------------------------------------
+# Placement of blocks
+# ---------------------------------------------------------------------------
+
+def _pack(blocks: List[_Block], order: Iterable[int]) -> List[Point]:
+    """Rows of blocks, wrapped to keep the overall shape roughly square."""
+    area = sum((b.width + BLOCK_GAP) * (b.height + BLOCK_GAP) for b in blocks)
+    row_width = max(max(b.width for b in blocks), math.sqrt(area))
+    origins: List[Point] = [(0.0, 0.0)] * len(blocks)
+    x = y = row_height = 0.0
+    for i in order:
+        block = blocks[i]
+        if x and x + block.width > row_width:
+            x, y, row_height = 0.0, y + row_height + BLOCK_GAP, 0.0
+        origins[i] = (x, y)
+        x += block.width + BLOCK_GAP
+        row_height = max(row_height, block.height)
+    return origins
+
+
+def _link_order(count: int, weights: Dict[Tuple[int, int], int]) -> List[int]:
+    """Breadth-first over the links, so linked blocks start out near each other."""
+    adjacent: Dict[int, List[int]] = defaultdict(list)
+    for a, b in weights:
+        adjacent[a].append(b)
+        adjacent[b].append(a)
+    seen, order = set(), []
+    for start in sorted(range(count), key=lambda i: -len(adjacent[i])):
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for neighbour in adjacent[node]:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+    return order
+
+
+def _close_pairs(points: "np.ndarray", window: float) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Candidate index pairs (i, j) for points closer than `window` on both
+    axes: points are bucketed into columns `window` wide and sorted by
+    (column, y), so the neighbours of a point are two contiguous runs, in
+    its own column and in the next one.
+    """
+    x = points[:, 0] - points[:, 0].min()
+    y = points[:, 1] - points[:, 1].min()
+    stride = y.max() + 2 * window  # keeps columns apart in the sort key
+    key = np.floor(x / window) * stride + y
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+    index = np.arange(len(key))
+    firsts, seconds = [], []
+    for low, high in (
+        (index + 1, np.searchsorted(key, key + window)),
+        (np.searchsorted(key, key + stride - window), np.searchsorted(key, key + stride + window)),
+    ):
+        run = np.maximum(high - low, 0)
+        starts = np.cumsum(run) - run
+        firsts.append(np.repeat(index, run))
+        seconds.append(np.repeat(low, run) + np.arange(run.sum()) - np.repeat(starts, run))
+    return order[np.concatenate(firsts)], order[np.concatenate(seconds)]
+
+
+def _repulsion_pairs(
+    center: "np.ndarray", radius: "np.ndarray", cutoff: float, big_radius: float
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Candidate index pairs of blocks whose outlines may be within `cutoff`.
+
+    The sweep in `_close_pairs` needs a window that fits the largest
+    outline, so one big composition tree would widen it to every pair. It
+    only covers blocks up to `big_radius`; the few larger ones are paired
+    with every block directly.
+    """
+    count = len(center)
+    small = np.flatnonzero(radius <= big_radius)
+    big = np.flatnonzero(radius > big_radius)
+    i = np.repeat(big, count)
+    j = np.tile(np.arange(count), len(big))
+    keep = (j != i) & ((radius[j] <= big_radius) | (j > i))  # big-big pairs once
+    i, j = i[keep], j[keep]
+    if len(small) > 1:
+        si, sj = _close_pairs(center[small], cutoff + 2 * radius[small].max())
+        i, j = np.concatenate((small[si], i)), np.concatenate((small[sj], j))
+    return i, j
+
+
+def _accumulate(count: int, i: "np.ndarray", j: "np.ndarray", fx: "np.ndarray", fy: "np.ndarray") -> "np.ndarray":
+    """Per-node sum of pair forces, +force on i and -force on j."""
+    total = np.empty((count, 2))
+    for axis, force in ((0, fx), (1, fy)):
+        total[:, axis] = np.bincount(i, weights=force, minlength=count) - np.bincount(j, weights=force, minlength=count)
+    return total
+
+
+def _force_directed(blocks: List[_Block], weights: Dict[Tuple[int, int], int]) -> List[Point]:
+    """
+    Fruchterman-Reingold over blocks. Distances are measured between block
+    outlines (circles around each block), and repulsion only acts within
+    1.5k of an outline, which keeps each iteration near-linear.
+    """
+    count = len(blocks)
+    size = np.array([(b.width, b.height) for b in blocks], dtype=float)
+    start = np.array(_pack(blocks, _link_order(count, weights)), dtype=float)
+    center = start + size / 2
+    radius = np.hypot(size[:, 0], size[:, 1]) / 2
+
+    a, b = np.array(list(weights), dtype=int).T
+    weight = np.array(list(weights.values()), dtype=float)
+    k = NODE_WIDTH + BLOCK_GAP  # preferred gap between linked blocks
+    reach = radius[a] + radius[b]
+    cutoff = 1.5 * k
+    temperature = max(k, np.ptp(center, axis=0).max() / 10)
+
+    for step in range(FORCE_ITERATIONS):
+        i, j = _repulsion_pairs(center, radius, cutoff, big_radius=k)
+        dx = center[i, 0] - center[j, 0]
+        dy = center[i, 1] - center[j, 1]
+        length = np.maximum(np.sqrt(dx * dx + dy * dy), 1.0)
+        gap = np.maximum(length - radius[i] - radius[j], 1.0)
+        near = gap < cutoff
+        push = (k * k) / (gap[near] * length[near])
+        disp = _accumulate(count, i[near], j[near], dx[near] * push, dy[near] * push)
+
+        dx = center[a, 0] - center[b, 0]
+        dy = center[a, 1] - center[b, 1]
+        length = np.maximum(np.sqrt(dx * dx + dy * dy), 1.0)
+        gap = np.maximum(length - reach, 1.0)
+        pull = weight * gap * gap / (k * length)
+        disp -= _accumulate(count, a, b, dx * pull, dy * pull)
+
+        magnitude = np.maximum(np.hypot(disp[:, 0], disp[:, 1]), 1e-9)
+        limit = temperature * (1 - step / FORCE_ITERATIONS)
+        center += disp * (np.minimum(magnitude, limit) / magnitude)[:, None]
+
+    return _remove_overlaps(center, size)
+
+
+def _remove_overlaps(center: "np.ndarray", size: "np.ndarray") -> List[Point]:
+    """
+    Place blocks from the middle outwards at their force-directed position;
+    a block that overlaps one already placed moves straight away from the
+    middle until it is clear. Returns the top-left corners.
+    """
+    half_w = ((size[:, 0] + BLOCK_GAP) / 2).tolist()
+    half_h = ((size[:, 1] + BLOCK_GAP) / 2).tolist()
+    cell_w, cell_h = NODE_WIDTH + BLOCK_GAP, NODE_HEIGHT + BLOCK_GAP
+    middle = center.mean(axis=0)
+    offset = center - middle
+    distance = np.hypot(offset[:, 0], offset[:, 1])
+    grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    placed: List[Point] = [(0.0, 0.0)] * len(center)
+
+    def cells(i: int, x: float, y: float):
+        for cx in range(int((x - half_w[i]) // cell_w), int((x + half_w[i]) // cell_w) + 1):
+            for cy in range(int((y - half_h[i]) // cell_h), int((y + half_h[i]) // cell_h) + 1):
+                yield cx, cy
+
+    def clear(i: int, x: float, y: float) -> bool:
+        for cell in cells(i, x, y):
+            for j in grid.get(cell, ()):
+                px, py = placed[j]
+                if abs(x - px) < half_w[i] + half_w[j] and abs(y - py) < half_h[i] + half_h[j]:
+                    return False
+        return True
+
+    for i in np.argsort(distance, kind="stable").tolist():
+        x, y = center[i].tolist()
+        if distance[i] > 1e-6:
+            dx, dy = (offset[i] / distance[i]).tolist()
+        else:
+            dx, dy = 1.0, 0.0
+        step = min(half_w[i], half_h[i])
+        while not clear(i, x, y):
+            x += dx * step
+            y += dy * step
+        placed[i] = (x, y)
+        for cell in cells(i, x, y):
+            grid[cell].append(i)
+
+    return [(x - w / 2, y - h / 2) for (x, y), (w, h) in zip(placed, size.tolist())]
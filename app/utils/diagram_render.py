@@ -0,0 +1,272 @@
+# app/utils/diagram_render.py
+"""
+Mermaid / PlantUML source to SVG on the server, with a disk cache.
+
+Every rendering is stored under DIAGRAM_CACHE_DIR as <key>.svg, where the
+key hashes the language, the renderer name and version, and the source.
+Identical source is therefore laid out once, whatever diagram, document or
+use case it comes from. A renderer upgrade changes every key. Hits refresh
+the file's mtime; when the cache grows past DIAGRAM_CACHE_MAX_MB the least
+recently used files are removed.
+
+Renderers (DIAGRAM_RENDER_BACKEND):
+    "kroki"   HTTP rendering service (https://kroki.io or self-hosted) for
+              both languages
+    "local"   offline stand-in that draws the source as a text listing,
+              so the pipeline runs without network access (tests,
+              air-gapped installs). It does not lay diagrams out, so
+              /diagrams/{id}/svg answers 503 and clients draw the diagram
+              themselves.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import requests
+
+from app.core.config import settings
+
+LANGUAGES = ("mermaid", "plantuml")
+# Diagram.type -> source language
+DIAGRAM_TYPES = {"mermaid": "mermaid", "sequence": "mermaid", "plantuml": "plantuml"}
+
+
+class DiagramSourceError(ValueError):
+    """The renderer rejected the diagram source (syntax error)."""
+
+
+class DiagramRenderError(RuntimeError):
+    """The renderer failed or could not be reached."""
+
+
+class DiagramRenderer:
+    """Interface for rendering services. Implementations must be thread-safe."""
+    name = "base"
+    version = "1"
+    lays_out = True  # False for stand-ins whose SVG is not a real diagram
+
+    def render(self, source: str, language: str) -> str:
+        raise NotImplementedError
+
+
+class KrokiRenderer(DiagramRenderer):
+    """Kroki: POST /<language>/svg with the plain source as body."""
+    name = "kroki"
+
+    def render(self, source: str, language: str) -> str:
+        url = f"{settings.DIAGRAM_RENDER_URL.rstrip('/')}/{language}/svg"
+        try:
+            response = requests.post(
+                url, data=source.encode("utf-8"),
+                headers={"Content-Type": "text/plain"}, timeout=settings.DIAGRAM_RENDER_TIMEOUT,
+            )
+        except requests.RequestException as e:
+            raise DiagramRenderError(f"Diagram renderer unreachable: {e}") from e
+        if 400 <= response.status_code < 500:
+            raise DiagramSourceError(response.text.strip() or f"Invalid {language} source")
+        if response.status_code != 200:
+            raise DiagramRenderError(f"Diagram renderer returned {response.status_code}")
+        return response.text
+
+
+class LocalRenderer(DiagramRenderer):
+    """Offline stand-in: the source as a monospace listing in an SVG."""
+    name = "local"
+    lays_out = False
+
+    LINE_HEIGHT = 16
+    CHAR_WIDTH = 7.2
+    PADDING = 12
+
+    def render(self, source: str, language: str) -> str:
+        lines = source.splitlines() or [""]
+        width = int(max(len(line) for line in lines) * self.CHAR_WIDTH) + 2 * self.PADDING
+        height = len(lines) * self.LINE_HEIGHT + 2 * self.PADDING
+        rows = "".join(
+            f'<text x="{self.PADDING}" y="{self.PADDING + (i + 1) * self.LINE_HEIGHT - 4}" '
+            f'xml:space="preserve">{escape(line)}</text>'
+            for i, line in enumerate(lines)
+        )
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" data-language="{language}" data-renderer="{self.name}">'
+            f'<rect width="100%" height="100%" fill="#f8fafc" stroke="#e2e8f0"/>'
+            f'<g font-family="monospace" font-size="12" fill="#334155">{rows}</g></svg>'
+        )
+
+
+BACKENDS = {
+    KrokiRenderer.name: KrokiRenderer,
+    LocalRenderer.name: LocalRenderer,
+}
+
+_renderer: Optional[DiagramRenderer] = None
+_render_locks: Dict[str, Lock] = {}
+_render_locks_guard = Lock()
+_size_lock = Lock()
+_cache_bytes: Optional[int] = None
+
+
+def get_renderer() -> DiagramRenderer:
+    """Return the renderer selected by DIAGRAM_RENDER_BACKEND (created once per process)."""
+    global _renderer
+    if _renderer is None:
+        renderer_cls = BACKENDS.get(settings.DIAGRAM_RENDER_BACKEND.lower())
+        if renderer_cls is None:
+            raise ValueError(f"Unknown diagram renderer: {settings.DIAGRAM_RENDER_BACKEND}")
+        _renderer = renderer_cls()
+    return _renderer
+
+
+def set_renderer(renderer: Optional[DiagramRenderer]) -> None:
+    """Replace the active renderer (None resets to the configured one)."""
+    global _renderer
+    _renderer = renderer
+
+
+def detect_language(source: str) -> str:
+    return "plantuml" if source.lstrip().startswith("@start") else "mermaid"
+
+
+def render_key(source: str, language: str) -> str:
+    renderer = get_renderer()
+    return hashlib.sha256(f"{language}\n{renderer.name}/{renderer.version}\n{source}".encode("utf-8")).hexdigest()
+
+
+def cached_path(key: str) -> Path:
+    return settings.DIAGRAM_CACHE_DIR / key[:2] / f"{key}.svg"
+
+
+def _write(path: Path, svg: str) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = svg.encode("utf-8")
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_name, path)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+    return len(data)
+
+
+def _key_lock(key: str) -> Lock:
+    with _render_locks_guard:
+        return _render_locks.setdefault(key, Lock())
+
+
+def render(source: str, language: Optional[str] = None) -> Tuple[str, str]:
+    """
+    SVG for a diagram source, from the cache or freshly rendered.
+
+    Returns:
+        (key, svg); the key doubles as the ETag
+    """
+    language = language or detect_language(source)
+    if language not in LANGUAGES:
+        raise DiagramSourceError(f"Unsupported diagram language: {language}")
+    key = render_key(source, language)
+    path = cached_path(key)
+    lock = _key_lock(key)
+    try:
+        # One render per key at a time; concurrent requests wait for the first
+        with lock:
+            try:
+                svg = path.read_text(encoding="utf-8")
+                os.utime(path)
+                return key, svg
+            except FileNotFoundError:
+                pass
+            svg = get_renderer().render(source, language)
+            _account(_write(path, svg))
+        return key, svg
+    finally:
+        # Cache hits and failed renders must not leave their lock behind either
+        with _render_locks_guard:
+            if _render_locks.get(key) is lock:
+                del _render_locks[key]
+
+
+def _cache_files() -> List[Tuple[float, int, Path]]:
+    root = settings.DIAGRAM_CACHE_DIR
+    if not root.exists():
+        return []
+    files = []
+    for path in root.glob("*/*.svg"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    return files
+
+
+def _account(written: int) -> None:
+    global _cache_bytes
+    with _size_lock:
+        if _cache_bytes is None:
+            _cache_bytes = sum(size for _, size, _ in _cache_files())
+        else:
+            _cache_bytes += written
+        over = _cache_bytes > settings.DIAGRAM_CACHE_MAX_MB * 1024 * 1024
+    if over:
+        evict()
+
+
+def evict(max_bytes: Optional[int] = None) -> Dict[str, int]:
+    """
+    Remove least recently used renderings until the cache is below 90% of
+    `max_bytes` (DIAGRAM_CACHE_MAX_MB by default), so eviction does not run
+    again on the next write.
+    """
+    global _cache_bytes
+    limit = settings.DIAGRAM_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    with _size_lock:
+        files = sorted(_cache_files())
+        total = sum(size for _, size, _ in files)
+        removed = freed = 0
+        if total > limit:
+            target = int(limit * 0.9)
+            for _, size, path in files:
+                if total - freed <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                removed += 1
+                freed += size
+        _cache_bytes = total - freed
+    return {"removed": removed, "bytes_freed": freed, "size": total - freed}
+
+
+def prerender(sources: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, int]:
+    """Render a batch of (source, language) pairs into the cache; failures are counted, not raised."""
+    counts = {"rendered": 0, "cached": 0, "failed": 0}
+    for source, language in sources:
+        try:
+            if cached_path(render_key(source, language or detect_language(source))).exists():
+                counts["cached"] += 1
+                continue
+            render(source, language)
+            counts["rendered"] += 1
+        except (DiagramSourceError, DiagramRenderError) as e:
+            counts["failed"] += 1
+            print(f"Diagram pre-render failed: {e}")
+    return counts
+
+
+def cache_stats() -> Dict[str, object]:
+    files = _cache_files()
+    return {
+        "renderer": get_renderer().name,
+        "files": len(files),
+        "bytes": sum(size for _, size, _ in files),
+        "max_bytes": settings.DIAGRAM_CACHE_MAX_MB * 1024 * 1024,
+    }
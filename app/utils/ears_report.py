@@ -0,0 +1,153 @@
+# app/utils/ears_report.py
+"""
+Project-wide EARS conformance report.
+
+Validation results are persisted per requirement in `requirement_ears_results`
+together with the text hash and the requirement's `last_updated` at validation
+time, so a report only re-validates rows that changed since the previous run.
+"""
+from typing import Dict, List, Optional, Any
+
+from sqlalchemy import func, case, insert
+from sqlalchemy.orm import Session
+
+from app.db.models.requirement import Requirement, RequirementEarsResult
+from app.utils import ears_validator
+
+# Rows per DELETE ... IN / INSERT statement when refreshing results
+REFRESH_CHUNK_SIZE = 500
+
+
+def _chunks(items: List, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def refresh_project_results(db: Session, project_id: str) -> int:
+    """
+    Re-validate requirements whose `last_updated` moved since their stored result
+    and drop results of requirements that no longer exist.
+
+    Returns:
+        Number of requirements re-validated
+    """
+    # Compare timestamps in Python: the stored value round-trips through the
+    # driver, so this is exact even where the DB keeps datetimes as text.
+    current = dict(
+        db.query(Requirement.aid, Requirement.last_updated)
+        .filter(Requirement.project_id == project_id)
+        .all()
+    )
+    stored = dict(
+        db.query(RequirementEarsResult.requirement_aid, RequirementEarsResult.source_updated)
+        .filter(RequirementEarsResult.project_id == project_id)
+        .all()
+    )
+
+    orphans = [aid for aid in stored if aid not in current]
+    for chunk in _chunks(orphans, REFRESH_CHUNK_SIZE):
+        db.query(RequirementEarsResult).filter(
+            RequirementEarsResult.requirement_aid.in_(chunk)
+        ).delete(synchronize_session=False)
+
+    stale_aids = [
+        aid for aid, last_updated in current.items()
+        if aid not in stored or stored[aid] != last_updated
+    ]
+    if not stale_aids:
+        return 0
+
+    stale = []
+    for chunk in _chunks(stale_aids, REFRESH_CHUNK_SIZE):
+        stale.extend(
+            db.query(Requirement.aid, Requirement.text, Requirement.ears_type, Requirement.last_updated)
+            .filter(Requirement.aid.in_(chunk))
+            .all()
+        )
+
+    rows = []
+    for aid, text, ears_type, last_updated in stale:
+        result = ears_validator.validate_requirement(text or "", ears_type)
+        detected = result['detected_pattern']
+        rows.append({
+            "requirement_aid": aid,
+            "project_id": project_id,
+            "text_hash": ears_validator.text_hash(text or ""),
+            "ears_type": ears_type,
+            "valid": result['valid'],
+            "detected_pattern": detected.value if detected else None,
+            "message": result['message'],
+            "source_updated": last_updated,
+        })
+
+    for chunk in _chunks(rows, REFRESH_CHUNK_SIZE):
+        aids = [row["requirement_aid"] for row in chunk]
+        db.query(RequirementEarsResult).filter(
+            RequirementEarsResult.requirement_aid.in_(aids)
+        ).delete(synchronize_session=False)
+        db.execute(insert(RequirementEarsResult), chunk)
+
+    return len(rows)
+
+
+def _bucket() -> Dict[str, Any]:
+    return {"total": 0, "valid": 0, "invalid": 0, "conformance": 0.0}
+
+
+def _add(bucket: Dict[str, Any], total: int, valid: int) -> None:
+    bucket["total"] += total
+    bucket["valid"] += valid
+    bucket["invalid"] = bucket["total"] - bucket["valid"]
+    bucket["conformance"] = round(bucket["valid"] / bucket["total"], 4) if bucket["total"] else 0.0
+
+
+def _key(value: Optional[Any], default: str = "Unassigned") -> str:
+    if value is None:
+        return default
+    return value.value if hasattr(value, 'value') else str(value)
+
+
+def build_conformance_report(db: Session, project_id: str, include_invalid: bool = False) -> Dict[str, Any]:
+    """
+    Refresh stale results and aggregate EARS conformance for a project
+    overall and by area, level and EARS type.
+    """
+    recomputed = refresh_project_results(db, project_id)
+
+    valid_count = func.sum(case((RequirementEarsResult.valid.is_(True), 1), else_=0))
+    groups = (
+        db.query(
+            Requirement.area, Requirement.level, Requirement.ears_type,
+            func.count().label("total"), valid_count.label("valid"),
+        )
+        .join(RequirementEarsResult, RequirementEarsResult.requirement_aid == Requirement.aid)
+        .filter(Requirement.project_id == project_id)
+        .group_by(Requirement.area, Requirement.level, Requirement.ears_type)
+        .all()
+    )
+
+    report = {
+        "project_id": project_id,
+        "recomputed": recomputed,
+        **_bucket(),
+        "by_area": {},
+        "by_level": {},
+        "by_ears_type": {},
+        "invalid_aids": None,
+    }
+    for area, level, ears_type, total, valid in groups:
+        valid = int(valid or 0)
+        _add(report, total, valid)
+        _add(report["by_area"].setdefault(_key(area), _bucket()), total, valid)
+        _add(report["by_level"].setdefault(_key(level), _bucket()), total, valid)
+        _add(report["by_ears_type"].setdefault(_key(ears_type), _bucket()), total, valid)
+
+    if include_invalid:
+        report["invalid_aids"] = [
+            aid for (aid,) in db.query(RequirementEarsResult.requirement_aid)
+            .filter(RequirementEarsResult.project_id == project_id, RequirementEarsResult.valid.is_(False))
+            .order_by(RequirementEarsResult.requirement_aid)
+            .all()
+        ]
+
+    return report
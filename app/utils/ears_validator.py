@@ -4,8 +4,10 @@ EARS (Easy Approach to Requirements Syntax) Validator
 
 Provides utilities for validating, detecting, and parsing EARS-compliant requirements.
 """
+import hashlib
 import re
-from typing import Optional, Dict, List
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple, Any
 from app.enums import EarsType
 
 
@@ -19,30 +21,166 @@ EARS_TEMPLATES = {
 }
 
 
-# EARS Pattern Regex (case-insensitive)
-EARS_PATTERNS = {
-    EarsType.EVENT_DRIVEN: re.compile(
-        r"^WHEN\s+(.+?),?\s+(?:the\s+)?(.+?)\s+shall\s+(.+)$",
-        re.IGNORECASE | re.DOTALL
-    ),
-    EarsType.STATE_DRIVEN: re.compile(
-        r"^WHILE\s+(.+?),?\s+(?:the\s+)?(.+?)\s+shall\s+(.+)$",
-        re.IGNORECASE | re.DOTALL
-    ),
-    EarsType.UNWANTED_BEHAVIOR: re.compile(
-        r"^IF\s+(.+?),?\s+THEN\s+(?:the\s+)?(.+?)\s+shall\s+(.+)$",
-        re.IGNORECASE | re.DOTALL
-    ),
-    EarsType.OPTIONAL_FEATURE: re.compile(
-        r"^WHERE\s+(.+?),?\s+(?:the\s+)?(.+?)\s+shall\s+(.+)$",
-        re.IGNORECASE | re.DOTALL
-    ),
-    EarsType.UBIQUITOUS: re.compile(
-        r"^(?:The\s+)?(.+?)\s+shall\s+(.+)$",
-        re.IGNORECASE | re.DOTALL
-    ),
+# Leading keyword of each conditional EARS pattern. Detection dispatches on the
+# first token, so only one pattern is ever tried against a given text.
+PATTERN_KEYWORDS = {
+    "WHEN": EarsType.EVENT_DRIVEN,
+    "WHILE": EarsType.STATE_DRIVEN,
+    "IF": EarsType.UNWANTED_BEHAVIOR,
+    "WHERE": EarsType.OPTIONAL_FEATURE,
 }
 
+# Name of the clause component captured by each conditional pattern
+CLAUSE_COMPONENTS = {
+    EarsType.EVENT_DRIVEN: 'trigger',
+    EarsType.STATE_DRIVEN: 'state',
+    EarsType.UNWANTED_BEHAVIOR: 'condition',
+    EarsType.OPTIONAL_FEATURE: 'feature',
+}
+
+# All scanners below are anchored or use fixed-width lookarounds only, so a
+# parse is linear in the length of the text (no nested lazy groups to backtrack).
+_LEADING_KEYWORD = re.compile(r"(WHEN|WHILE|IF|WHERE)(?=\s)", re.IGNORECASE)
+_SHALL = re.compile(r"(?<=\s)shall(?=\s)", re.IGNORECASE)
+_THEN = re.compile(r"(?<=\s)THEN(?=\s)", re.IGNORECASE)
+_THE_WORD = re.compile(r"(?<=\s)the(?=\s)", re.IGNORECASE)
+_LEADING_THE = re.compile(r"the\s+", re.IGNORECASE)
+
+PARSE_CACHE_SIZE = 4096
+
+
+def text_hash(text: str) -> str:
+    """
+    Stable hash of a requirement text, used to key cached and persisted results.
+    """
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+def _strip_the(system: str) -> str:
+    """Drop a leading article from the system name, as the templates allow it."""
+    match = _LEADING_THE.match(system)
+    if match and match.end() < len(system):
+        return system[match.end():]
+    return system
+
+
+def _split_clause(body: str) -> Optional[Tuple[str, str]]:
+    """
+    Split '<clause>, the <system>' into its two parts.
+
+    Prefers the last comma, then the last standalone 'the', and finally the
+    first word boundary. Returns None if either part would be empty.
+    """
+    comma = body.rfind(',')
+    if comma != -1:
+        clause, system = body[:comma], body[comma + 1:]
+    else:
+        last_the = None
+        for last_the in _THE_WORD.finditer(body):
+            pass
+        if last_the is not None:
+            clause, system = body[:last_the.start()], body[last_the.start():]
+        else:
+            parts = body.split(None, 1)
+            if len(parts) < 2:
+                return None
+            clause, system = parts
+
+    clause, system = clause.strip(), system.strip()
+    if not clause or not system:
+        return None
+    return clause, _strip_the(system)
+
+
+def _components_for(
+    pattern: EarsType, keyword: Optional[str], head: str, action: str
+) -> Optional[Tuple[Tuple[str, str], ...]]:
+    """
+    Extract components of `pattern` from a text already split around 'shall'.
+    Returns None if the text does not match the pattern.
+    """
+    if pattern == EarsType.UBIQUITOUS:
+        return (('system', _strip_the(head)), ('action', action))
+
+    clause_name = CLAUSE_COMPONENTS.get(pattern)
+    if clause_name is None or PATTERN_KEYWORDS.get(keyword) != pattern:
+        return None
+
+    body = head[len(keyword):].lstrip()
+    if pattern == EarsType.UNWANTED_BEHAVIOR:
+        then = _THEN.search(body)
+        if not then:
+            return None
+        clause = body[:then.start()].rstrip().rstrip(',').rstrip()
+        system = body[then.end():].strip()
+        if not clause or not system:
+            return None
+        split = (clause, _strip_the(system))
+    else:
+        split = _split_clause(body)
+        if split is None:
+            return None
+
+    return ((clause_name, split[0]), ('system', split[1]), ('action', action))
+
+
+def _scan(text: str) -> Optional[Tuple[Optional[str], str, str]]:
+    """
+    Single scan of a stripped requirement text: leading keyword, the part
+    before the first 'shall' and the action after it.
+    """
+    shall = _SHALL.search(text)
+    if not shall:
+        return None
+    head = text[:shall.start()].rstrip()
+    action = text[shall.end():].lstrip()
+    if not head or not action:
+        return None
+    leading = _LEADING_KEYWORD.match(head)
+    keyword = leading.group(1).upper() if leading else None
+    return keyword, head, action
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(text: str, pattern: Optional[EarsType]) -> Tuple[
+    Optional[EarsType], Optional[Tuple[Tuple[str, str], ...]]
+]:
+    """
+    Detect the pattern of `text` and extract the components of `pattern`
+    (or of the detected pattern when `pattern` is None) in one pass.
+    Cached by text, so repeated validation of unchanged text is free.
+    """
+    scanned = _scan(text)
+    if scanned is None:
+        return None, None
+    keyword, head, action = scanned
+
+    detected = EarsType.UBIQUITOUS
+    keyword_pattern = PATTERN_KEYWORDS.get(keyword)
+    if keyword_pattern and _components_for(keyword_pattern, keyword, head, action):
+        detected = keyword_pattern
+
+    target = pattern or detected
+    return detected, _components_for(target, keyword, head, action)
+
+
+def parse_requirement(text: str, pattern: Optional[EarsType] = None) -> Tuple[
+    Optional[EarsType], Optional[Dict[str, str]]
+]:
+    """
+    Parse requirement text in a single pass.
+
+    Args:
+        text: The requirement text
+        pattern: Pattern to extract components for (defaults to the detected one)
+
+    Returns:
+        Tuple of (detected pattern, components dict or None if `pattern` does not match)
+    """
+    text = text.strip()
+    detected, components = _parse(text, pattern)
+    return detected, dict(components) if components is not None else None
+
 
 def detect_pattern(text: str) -> Optional[EarsType]:
     """
@@ -54,25 +192,14 @@ def detect_pattern(text: str) -> Optional[EarsType]:
     Returns:
         The detected EARS pattern type, or None if no pattern matches
     """
-    text = text.strip()
-    
-    # Check patterns in order of specificity (most specific first)
-    for pattern_type in [
-        EarsType.EVENT_DRIVEN,
-        EarsType.STATE_DRIVEN,
-        EarsType.UNWANTED_BEHAVIOR,
-        EarsType.OPTIONAL_FEATURE,
-        EarsType.UBIQUITOUS,
-    ]:
-        if EARS_PATTERNS[pattern_type].match(text):
-            return pattern_type
-    
-    return None
+    detected, _ = parse_requirement(text)
+    return detected
 
 
-def validate_pattern(text: str, pattern: EarsType) -> Dict[str, any]:
+def validate_requirement(text: str, pattern: EarsType) -> Dict[str, Any]:
     """
-    Validate that requirement text matches the declared EARS pattern.
+    Validate requirement text against the declared EARS pattern, detecting the
+    actual pattern and extracting components from the same parse.
     
     Args:
         text: The requirement text
@@ -83,7 +210,9 @@ def validate_pattern(text: str, pattern: EarsType) -> Dict[str, any]:
         {
             'valid': bool,
             'message': str,
-            'suggestions': List[str]
+            'suggestions': List[str],
+            'detected_pattern': Optional[EarsType],
+            'components': Optional[Dict[str, str]]
         }
     """
     text = text.strip()
@@ -92,29 +221,32 @@ def validate_pattern(text: str, pattern: EarsType) -> Dict[str, any]:
         return {
             'valid': False,
             'message': 'Requirement text cannot be empty',
-            'suggestions': [f'Use template: {EARS_TEMPLATES[pattern]}']
+            'suggestions': [f'Use template: {EARS_TEMPLATES[pattern]}'] if pattern in EARS_TEMPLATES else [],
+            'detected_pattern': None,
+            'components': None
         }
     
-    # Check if text matches the pattern
-    regex = EARS_PATTERNS.get(pattern)
-    if not regex:
+    if pattern not in EARS_TEMPLATES:
         return {
             'valid': False,
             'message': f'Unknown EARS pattern: {pattern}',
-            'suggestions': []
+            'suggestions': [],
+            'detected_pattern': detect_pattern(text),
+            'components': None
         }
     
-    match = regex.match(text)
-    if match:
+    detected, components = parse_requirement(text, pattern)
+    if components is not None:
         return {
             'valid': True,
             'message': f'Valid {pattern.value} requirement',
-            'suggestions': []
+            'suggestions': [],
+            'detected_pattern': detected,
+            'components': components
         }
     
     # Provide helpful suggestions
     suggestions = []
-    detected = detect_pattern(text)
     
     if detected and detected != pattern:
         suggestions.append(f'This looks like a {detected.value} requirement, not {pattern.value}')
@@ -137,7 +269,33 @@ def validate_pattern(text: str, pattern: EarsType) -> Dict[str, any]:
     return {
         'valid': False,
         'message': f'Does not match {pattern.value} pattern',
-        'suggestions': suggestions
+        'suggestions': suggestions,
+        'detected_pattern': detected,
+        'components': None
+    }
+
+
+def validate_pattern(text: str, pattern: EarsType) -> Dict[str, any]:
+    """
+    Validate that requirement text matches the declared EARS pattern.
+    
+    Args:
+        text: The requirement text
+        pattern: The declared EARS pattern type
+        
+    Returns:
+        Dictionary with validation results:
+        {
+            'valid': bool,
+            'message': str,
+            'suggestions': List[str]
+        }
+    """
+    result = validate_requirement(text, pattern)
+    return {
+        'valid': result['valid'],
+        'message': result['message'],
+        'suggestions': result['suggestions']
     }
 
 
@@ -160,40 +318,33 @@ def extract_components(text: str, pattern: EarsType) -> Dict[str, Optional[str]]
             'action': str
         }
     """
-    text = text.strip()
-    regex = EARS_PATTERNS.get(pattern)
-    
-    if not regex:
-        return {}
-    
-    match = regex.match(text)
-    if not match:
+    if pattern not in EARS_TEMPLATES:
         return {}
+    _, components = parse_requirement(text, pattern)
+    return components or {}
+
+
+def component_columns(text: str, pattern: EarsType) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Map the components extracted for `pattern` onto the Requirement EARS columns.
     
-    components = {}
-    groups = match.groups()
-    
-    if pattern == EarsType.EVENT_DRIVEN:
-        components['trigger'] = groups[0].strip() if len(groups) > 0 else None
-        components['system'] = groups[1].strip() if len(groups) > 1 else None
-        components['action'] = groups[2].strip() if len(groups) > 2 else None
-    elif pattern == EarsType.STATE_DRIVEN:
-        components['state'] = groups[0].strip() if len(groups) > 0 else None
-        components['system'] = groups[1].strip() if len(groups) > 1 else None
-        components['action'] = groups[2].strip() if len(groups) > 2 else None
-    elif pattern == EarsType.UNWANTED_BEHAVIOR:
-        components['condition'] = groups[0].strip() if len(groups) > 0 else None
-        components['system'] = groups[1].strip() if len(groups) > 1 else None
-        components['action'] = groups[2].strip() if len(groups) > 2 else None
-    elif pattern == EarsType.OPTIONAL_FEATURE:
-        components['feature'] = groups[0].strip() if len(groups) > 0 else None
-        components['system'] = groups[1].strip() if len(groups) > 1 else None
-        components['action'] = groups[2].strip() if len(groups) > 2 else None
-    elif pattern == EarsType.UBIQUITOUS:
-        components['system'] = groups[0].strip() if len(groups) > 0 else None
-        components['action'] = groups[1].strip() if len(groups) > 1 else None
-    
-    return components
+    Args:
+        text: The requirement text
+        pattern: The declared EARS pattern type
+        
+    Returns:
+        Dictionary with every EARS column (unused ones set to None), or None if
+        the text does not match the pattern
+    """
+    if pattern not in EARS_TEMPLATES:
+        return None
+    _, components = parse_requirement(text or "", pattern)
+    if components is None:
+        return None
+    return {
+        f'ears_{name}': components.get(name)
+        for name in CLAUSE_COMPONENTS.values()
+    }
 
 
 def generate_template(pattern: EarsType, system: str = "system") -> str:
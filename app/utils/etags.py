@@ -0,0 +1,98 @@
+# app/utils/etags.py
+"""
+Conditional requests for artifact reads and updates.
+
+Every artifact write moves `last_updated` forward, so validators can be
+computed without serializing anything:
+
+    single artifact   W/"hash(aid, last_updated, <linked ids in the response>)"
+    list              W/"hash(table, max(last_updated), count(*), query string)"
+
+Reference data embedded in a response (a need's sites and components, a
+use case's people) changes without touching the artifact, so those tags
+end in a second part, a hash of the response cache's version of the
+embedded namespaces (`response_cache.version`), which every write to them
+moves. If-Match only compares the first part: renaming a site does not
+make an edit of the need conflict.
+
+A GET whose If-None-Match matches is answered with 304 before the rows are
+serialized. A PUT whose If-Match no longer matches gets 412, so two editors
+cannot silently overwrite each other; without If-Match the update proceeds
+as before.
+
+The tags are weak: equal tags mean equal data, not byte-identical JSON.
+If-Match is compared weakly as well (RFC 9110 asks for strong comparison,
+which would never match a weak tag), since clients simply echo the tag
+they were given.
+"""
+import hashlib
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.utils import static_files
+
+
+def _digest(parts) -> str:
+    return hashlib.sha256("|".join("" if p is None else str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def weak_etag(*parts, embedded: Optional[str] = None) -> str:
+    """Tag of `parts`; `embedded` is the version of reference data nested in the response."""
+    if embedded is None:
+        return f'W/"{_digest(parts)[:32]}"'
+    return f'W/"{_digest(parts)[:32]}.{_digest([embedded])[:12]}"'
+
+
+def artifact_etag(obj, *extra, embedded: Optional[str] = None) -> str:
+    """Tag of one artifact; `extra` are values in the response that are not columns (e.g. a linked aid)."""
+    return weak_etag(
+        type(obj).__tablename__, obj.aid, obj.last_updated.isoformat() if obj.last_updated else "", *extra,
+        embedded=embedded,
+    )
+
+
+def query_key(request: Request) -> str:
+    """The query string in a canonical order, for tags that depend on filters."""
+    return "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+
+def list_etag(query: Query, model, request: Request, embedded: Optional[str] = None) -> str:
+    """Tag of a filtered list: one aggregate over the same filters, keyed by the query string."""
+    latest, count = query.with_entities(func.max(model.last_updated), func.count()).order_by(None).one()
+    return weak_etag(
+        model.__tablename__, latest.isoformat() if latest else "", count, query_key(request), embedded=embedded
+    )
+
+
+def _headers(etag: str) -> dict:
+    return {"etag": etag, "cache-control": static_files.REVALIDATE_CACHE}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the client already has this version, else None."""
+    headers = _headers(etag)
+    if static_files.is_not_modified(Headers(headers), request.headers):
+        return Response(status_code=304, headers=headers)
+    return None
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers.update(_headers(etag))
+
+
+def precondition_failed(request: Request, etag: str) -> bool:
+    """True if the request carries an If-Match that does not name the current version."""
+    if_match = request.headers.get("if-match")
+    if not if_match or if_match.strip() == "*":
+        return False
+    return _artifact_part(etag) not in [_artifact_part(tag) for tag in if_match.split(",")]
+
+
+def _artifact_part(etag: str) -> str:
+    # Embedded reference data is not part of the artifact's version
+    return etag.strip().removeprefix("W/").strip('"').split(".", 1)[0]
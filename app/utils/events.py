@@ -0,0 +1,431 @@
+# app/utils/events.py
+"""
+Per-project change events for the SSE stream (GET /projects/{id}/events/stream).
+
+A session listener turns ORM writes into small events and publishes them
+with the transaction's commit (nothing is sent for a rollback):
+
+    {"id": 17, "type": "need.updated", "entity": "need", "action": "updated",
+     "key": "PRJ-NEED-003", "project_id": "...", "fields": ["title"]}
+
+Actions are created / updated / deleted / status_changed (with "from" and
+"to"), plus "changed" with the new "version" for diagram node/edge writes.
+Events carry keys and changed field names, not rows: clients refetch
+what they display.
+
+Backends (EVENTS_BACKEND):
+    "memory"    in-process fan-out; enough for a single worker
+    "postgres"  PostgreSQL NOTIFY on the committing connection (delivered
+                by the database only if the commit succeeds) and one LISTEN
+                connection per worker, so every worker's subscribers see
+                every write
+
+Each worker numbers the events it delivers and keeps the last
+EVENTS_REPLAY_SIZE per project, so a reconnecting EventSource resumes
+from Last-Event-ID. An id the worker does not know (restart, another
+worker) yields a "resync" event: reload everything.
+
+Bulk writes that bypass the ORM (query.update/delete, core inserts) are
+not seen; endpoints that use them record an ORM row as well (e.g.
+DiagramChange) or queue their own events with `publish` (e.g. a "resync"
+after a project import).
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Set
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import BaseArtifact
+from app.db.models.comment import Comment
+from app.db.models.diagram import Diagram, DiagramChange
+from app.db.models.document import Document
+from app.db.models.linkage import Linkage
+from app.db.models.need import Need
+from app.db.models.requirement import Requirement
+from app.db.models.use_case import UseCase
+from app.db.models.vision import Vision
+
+ENTITIES = {
+    Vision: "vision",
+    Need: "need",
+    Requirement: "requirement",
+    UseCase: "use_case",
+    Document: "document",
+    Linkage: "linkage",
+    Comment: "comment",
+    Diagram: "diagram",
+}
+ARTIFACTS = (Vision, Need, Requirement, UseCase, Document)
+# Noise: bumped on every save anyway
+IGNORED_FIELDS = {"last_updated", "updated_at"}
+
+_PENDING = "pending_events"
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_MAX_BYTES = 7999
+
+
+# ---------------------------------------------------------------------------
+# Subscribers
+# ---------------------------------------------------------------------------
+
+class Subscription:
+    """One SSE client: an asyncio queue fed from any thread."""
+
+    def __init__(self, project_id: str, loop: asyncio.AbstractEventLoop):
+        self.project_id = project_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+
+    def offer(self, item: dict) -> None:
+        """Runs on the subscriber's loop. A client too slow to keep up is told to resync."""
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync"})
+
+
+class EventHub:
+    """Numbers events, keeps a replay buffer per project and fans out to subscribers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._last_id = 0
+        self._recent: Dict[str, Deque[dict]] = defaultdict(lambda: deque(maxlen=settings.EVENTS_REPLAY_SIZE))
+        self._evicted: Dict[str, int] = defaultdict(int)  # newest id no longer in the replay buffer
+
+    def subscribe(self, project_id: str, last_event_id: Optional[int] = None) -> Subscription:
+        """Register a subscriber on the running loop, queueing missed events (or a resync) first."""
+        subscription = Subscription(project_id, asyncio.get_running_loop())
+        with self._lock:
+            if last_event_id is not None:
+                if self._evicted[project_id] <= last_event_id <= self._last_id:
+                    missed = [e for e in self._recent[project_id] if e["id"] > last_event_id]
+                else:
+                    missed = [{"type": "resync"}]
+                for item in missed:
+                    subscription.offer(item)
+            self._subscribers[project_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.project_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.project_id]
+
+    def dispatch(self, events: List[dict]) -> None:
+        """Deliver events to this worker's subscribers; safe to call from any thread."""
+        with self._lock:
+            for item in events:
+                self._last_id = next(self._ids)
+                item = {**item, "id": self._last_id}
+                recent = self._recent[item["project_id"]]
+                if len(recent) == recent.maxlen:
+                    self._evicted[item["project_id"]] = recent[0]["id"]
+                recent.append(item)
+                for subscription in self._subscribers.get(item["project_id"], ()):
+                    try:
+                        subscription.loop.call_soon_threadsafe(subscription.offer, item)
+                    except RuntimeError:
+                        pass  # loop closed; the stream's finally block unsubscribes
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+hub = EventHub()
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class EventBackend:
+    name = "base"
+    # True: publish runs in before_commit on the session's connection and the
+    # database delivers the events with the commit. False: runs after commit.
+    transactional = False
+
+    def publish(self, events: List[dict], connection) -> None:
+        raise NotImplementedError
+
+    def start(self, bind) -> None:
+        """Called before the first subscription; start receiving events."""
+
+
+class MemoryBackend(EventBackend):
+    name = "memory"
+
+    def publish(self, events: List[dict], connection) -> None:
+        hub.dispatch(events)
+
+
+class PostgresBackend(EventBackend):
+    """NOTIFY inside the committing transaction; a daemon thread LISTENs and dispatches to the local hub."""
+    name = "postgres"
+    transactional = True
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def publish(self, events: List[dict], connection) -> None:
+        params = [{"channel": settings.EVENTS_CHANNEL, "payload": _payload(item)} for item in events]
+        connection.execute(text("SELECT pg_notify(:channel, :payload)"), params)
+
+    def start(self, bind) -> None:
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, args=(bind,), name="events-listener", daemon=True)
+                self._thread.start()
+
+    def _listen(self, bind) -> None:
+        import select as select_module
+
+        while True:
+            conn = None
+            try:
+                raw = bind.raw_connection()
+                raw.detach()  # long-lived, keep it out of the pool
+                conn = raw.dbapi_connection
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{settings.EVENTS_CHANNEL}"')
+                while True:
+                    if select_module.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    batch = []
+                    while conn.notifies:
+                        batch.append(json.loads(conn.notifies.pop(0).payload))
+                    if batch:
+                        hub.dispatch(batch)
+            except Exception as e:
+                print(f"Event listener lost its connection: {e!r}; reconnecting")
+                if conn is not None:
+                    # Detached from the pool, so nothing else would ever close it
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                time.sleep(2)
+
+
+BACKENDS = {
+    MemoryBackend.name: MemoryBackend,
+    PostgresBackend.name: PostgresBackend,
+}
+
+_backend: Optional[EventBackend] = None
+
+
+def get_backend() -> EventBackend:
+    """Return the backend selected by EVENTS_BACKEND (created once per process)."""
+    global _backend
+    if _backend is None:
+        backend_cls = BACKENDS.get(settings.EVENTS_BACKEND.lower())
+        if backend_cls is None:
+            raise ValueError(f"Unknown events backend: {settings.EVENTS_BACKEND}")
+        _backend = backend_cls()
+    return _backend
+
+
+def set_backend(backend: Optional[EventBackend]) -> None:
+    """Replace the active backend (None resets to the configured one)."""
+    global _backend
+    _backend = backend
+
+
+def format_sse(item: dict) -> str:
+    """One event in text/event-stream framing; the id lets EventSource resume."""
+    lines = [f"id: {item['id']}"] if "id" in item else []
+    lines.append(f"data: {json.dumps(item, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _payload(item: dict) -> str:
+    payload = json.dumps(item, default=str)
+    if len(payload.encode("utf-8")) > NOTIFY_MAX_BYTES:
+        # Only a huge field list can get here; the event still says what changed
+        payload = json.dumps({**item, "fields": []}, default=str)
+    return payload
+
+
+def resync(project_id: str, action: str) -> dict:
+    """Event telling a project's clients to reload everything (after bulk writes)."""
+    return {"type": "resync", "entity": "project", "action": action, "key": project_id, "project_id": project_id}
+
+
+def publish(session: Session, events: List[dict]) -> None:
+    """
+    Queue events the session listener cannot see (bulk writes). They are
+    published with the session's next commit and dropped by a rollback.
+    """
+    pending = session.info.setdefault(_PENDING, {})
+    for item in events:
+        _merge(pending, item)
+
+
+# ---------------------------------------------------------------------------
+# Session listener
+# ---------------------------------------------------------------------------
+
+def _key(obj) -> str:
+    # New objects have no identity yet inside after_flush; read the key columns
+    key = inspect(obj).mapper.primary_key_from_instance(obj)
+    return str(key[0]) if len(key) == 1 else "/".join(map(str, key))
+
+
+def _project_of_artifact(session: Session, aid: str) -> Optional[str]:
+    conn = session.connection()
+    for model in ARTIFACTS:
+        project_id = conn.execute(select(model.project_id).where(model.aid == aid)).scalar()
+        if project_id:
+            return project_id
+    return None
+
+
+def _project_of_diagram(session: Session, diagram_id: str) -> Optional[str]:
+    for obj in session.identity_map.values():
+        if isinstance(obj, Diagram) and obj.id == diagram_id:
+            return obj.project_id
+    return session.connection().execute(select(Diagram.project_id).where(Diagram.id == diagram_id)).scalar()
+
+
+def _changed_fields(obj) -> List[str]:
+    state = inspect(obj)
+    return [
+        attr.key for attr in state.mapper.column_attrs
+        if attr.key not in IGNORED_FIELDS and state.attrs[attr.key].history.has_changes()
+    ]
+
+
+def _event(entity: str, action: str, key: str, project_id: Optional[str], **extra) -> Optional[dict]:
+    if not project_id:
+        return None
+    return {"type": f"{entity}.{action}", "entity": entity, "action": action, "key": key, "project_id": project_id, **extra}
+
+
+def describe(session: Session, obj, action: str) -> Optional[dict]:
+    """The event for one flushed object, or None if it is not evented or nothing relevant changed."""
+    if isinstance(obj, DiagramChange):
+        if action != "created":
+            return None
+        return _event("diagram", "changed", obj.diagram_id, _project_of_diagram(session, obj.diagram_id), version=obj.version)
+
+    entity = ENTITIES.get(type(obj))
+    if entity is None:
+        return None
+    if isinstance(obj, Comment):
+        project_id = _project_of_artifact(session, obj.artifact_aid)
+        extra = {"artifact_aid": obj.artifact_aid}
+    else:
+        project_id = obj.project_id
+        extra = {}
+    if isinstance(obj, Linkage):
+        extra = {"source_id": obj.source_id, "target_id": obj.target_id}
+
+    if action != "updated":
+        return _event(entity, action, _key(obj), project_id, **extra)
+
+    fields = _changed_fields(obj)
+    if not fields:
+        return None
+    if isinstance(obj, BaseArtifact) and "status" in fields:
+        history = inspect(obj).attrs.status.history
+        before = history.deleted[0] if history.deleted else None
+        after = obj.status
+        extra["from"] = getattr(before, "value", before)
+        extra["to"] = getattr(after, "value", after)
+        action = "status_changed"
+    return _event(entity, action, _key(obj), project_id, fields=fields, **extra)
+
+
+def _merge(pending: Dict[tuple, dict], item: dict) -> None:
+    """One event per object and transaction: created wins over later updates, deleted over everything."""
+    if item["action"] == "changed":
+        pending[("diagram-change", item["key"], item["version"])] = item
+        return
+    slot = (item["entity"], item["key"])
+    previous = pending.get(slot)
+    if previous is None:
+        pending[slot] = item
+    elif item["action"] == "deleted":
+        if previous["action"] == "created":
+            del pending[slot]
+        else:
+            pending[slot] = item
+    elif previous["action"] == "created":
+        return
+    else:
+        fields = list(dict.fromkeys(previous.get("fields", []) + item.get("fields", [])))
+        merged = {**previous, **item, "fields": fields}
+        if previous["action"] == "status_changed":
+            merged["action"] = "status_changed"
+            merged["type"] = previous["type"]
+            merged["from"] = previous["from"]
+        pending[slot] = merged
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_after_flush(session: Session, flush_context) -> None:
+    pending = session.info.get(_PENDING)
+    for action, objects in (("created", session.new), ("updated", session.dirty), ("deleted", session.deleted)):
+        for obj in objects:
+            if type(obj) not in ENTITIES and not isinstance(obj, DiagramChange):
+                continue
+            item = describe(session, obj, action)
+            if item is not None:
+                if pending is None:
+                    pending = session.info[_PENDING] = {}
+                _merge(pending, item)
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_before_commit(session: Session) -> None:
+    backend = get_backend()
+    # Savepoints commit too; events wait for the outer transaction
+    if not backend.transactional or session.in_nested_transaction():
+        return
+    # The commit's own flush runs after this hook; its events must go out too
+    session.flush()
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        backend.publish(list(pending.values()), session.connection())
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    try:
+        get_backend().publish(list(pending.values()), None)
+    except Exception as e:
+        # The write is committed; a lost event only means clients refresh later
+        print(f"Publishing {len(pending)} change events failed: {e!r}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    # A savepoint rollback keeps the outer transaction's events (and may
+    # leave a few stale ones, which only make clients refetch)
+    if not session.in_nested_transaction():
+        session.info.pop(_PENDING, None)
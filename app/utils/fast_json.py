@@ -0,0 +1,93 @@
+# app/utils/fast_json.py
+"""
+Fast path for large artifact lists.
+
+With `response_model=List[...]` FastAPI hydrates one ORM object per row,
+validates each one attribute by attribute and only then serializes. For a
+project with 10k requirements that dominates the request.
+
+`list_response` serializes the list itself, in one TypeAdapter call:
+
+    flat schemas (requirements, visions, documents)
+        only the columns the schema returns are selected and the plain row
+        mappings are validated, so no ORM objects are built at all
+    schemas with nested objects (needs, use cases)
+        ORM objects are still loaded, but each relationship the schema
+        returns is fetched with one extra query instead of one per row
+
+The body is the JSON the response_model path produces (same validation,
+same serializer, by alias). FastAPI's ORJSONResponse is deprecated in favour
+of exactly this serializer, so orjson is not used. Set
+FAST_LIST_RESPONSES=False to send every list through the regular path.
+
+Benchmark: scripts/benchmarks/bench_list_serialization.py
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import inspect
+from sqlalchemy.orm import Query, selectinload
+from starlette.responses import Response
+
+from app.core.config import settings
+
+
+class _Plan(NamedTuple):
+    adapter: TypeAdapter
+    columns: Optional[List[Tuple[str, object]]]   # (key, column) when rows can skip the ORM
+    relationships: List[str]                      # eager-loaded otherwise
+
+
+_plans: Dict[tuple, _Plan] = {}
+
+
+def _plan(model, schema) -> _Plan:
+    plan = _plans.get((model, schema))
+    if plan is not None:
+        return plan
+
+    mapper = inspect(model)
+    columns, relationships, flat = [], [], True
+    for name, field in schema.model_fields.items():
+        if name in mapper.column_attrs:
+            columns.append((field.alias or name, getattr(model, name)))
+        elif name in mapper.relationships:
+            relationships.append(name)
+            flat = False
+        elif hasattr(model, name):
+            # Python property or hybrid: only the ORM object can compute it
+            flat = False
+    plan = _plans[(model, schema)] = _Plan(
+        adapter=TypeAdapter(List[schema]),
+        columns=columns if flat else None,
+        relationships=relationships,
+    )
+    return plan
+
+
+def serialize_list(query: Query, model, schema) -> bytes:
+    """JSON array of `schema` for the rows of `query` (filters, order and limits are kept)."""
+    plan = _plan(model, schema)
+    if plan.columns is not None:
+        keys = [key for key, _ in plan.columns]
+        rows = query.with_entities(*(column for _, column in plan.columns)).all()
+        items = plan.adapter.validate_python([dict(zip(keys, row)) for row in rows])
+    else:
+        if plan.relationships:
+            query = query.options(*(selectinload(getattr(model, name)) for name in plan.relationships))
+        items = plan.adapter.validate_python(query.all(), from_attributes=True)
+    return plan.adapter.dump_json(items, by_alias=True)
+
+
+def list_response(query: Query, model, schema, response: Response):
+    """
+    Response for a list endpoint declared with `response_model=List[schema]`.
+
+    Headers already set on the endpoint's `response` (ETag etc.) are carried
+    over. With FAST_LIST_RESPONSES off, the ORM rows are returned for FastAPI
+    to serialize as before.
+    """
+    if not settings.FAST_LIST_RESPONSES:
+        return query.all()
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return Response(serialize_list(query, model, schema), media_type="application/json", headers=headers)
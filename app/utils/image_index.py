@@ -0,0 +1,181 @@
+# app/utils/image_index.py
+"""
+Stored image metadata (size, dimensions, MIME type, content hash) so the
+gallery is served from the images table alone, without touching the
+filesystem per row.
+
+Metadata is written at upload. `reconcile` walks the table in batches and
+compares it with the files on disk: it fills rows that have no metadata yet
+(the backfill), refreshes rows whose file changed size or mtime and flags
+rows whose file disappeared. It runs in the background every
+IMAGE_RECONCILE_INTERVAL_MINUTES, never on the request path.
+"""
+import asyncio
+import hashlib
+import mimetypes
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.models.blob import Blob
+from app.db.models.image import Image
+from app.utils import image_variants
+
+RECONCILE_BATCH_SIZE = 500
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_task: Optional[asyncio.Task] = None
+_last_run: Dict[str, object] = {}
+
+
+def image_dimensions(path: Path):
+    """(width, height) read from the image header, or (None, None) if unknown or Pillow is missing."""
+    if not image_variants.PIL_AVAILABLE:
+        return None, None
+    try:
+        # Opening only parses the header; pixel data is not decoded
+        with image_variants.PILImage.open(path) as img:
+            return img.width, img.height
+    except Exception:
+        return None, None
+
+
+def file_sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def relpath_for(image: Image, blob: Optional[Blob]) -> str:
+    return blob.path if blob is not None else image.filename
+
+
+def apply_file_metadata(
+    image: Image, path: Path, sha256: Optional[str] = None, mime_type: Optional[str] = None
+) -> None:
+    """Fill the metadata columns of `image` from its file (one stat + header read)."""
+    stat = path.stat()
+    image.size = stat.st_size
+    image.file_mtime = stat.st_mtime
+    image.width, image.height = image_dimensions(path)
+    image.mime_type = mime_type or mimetypes.guess_type(path.name)[0]
+    # Blob images are already hashed by the store; legacy files are hashed here
+    image.sha256 = sha256 or file_sha256(path)
+    image.missing = False
+    image.checked_at = datetime.now(timezone.utc)
+
+
+def reconcile(db: Session, batch_size: int = RECONCILE_BATCH_SIZE, backfill_only: bool = False) -> Dict[str, int]:
+    """
+    Compare stored metadata with the files on disk, in id order, one batch per commit.
+
+    Args:
+        backfill_only: only fill rows that have no metadata yet
+
+    Returns:
+        Counters: checked, backfilled, refreshed, missing, unchanged
+    """
+    counts = {"checked": 0, "backfilled": 0, "refreshed": 0, "missing": 0, "unchanged": 0}
+    last_id = ""
+    while True:
+        query = (
+            db.query(Image, Blob)
+            .outerjoin(Blob, Image.blob_sha256 == Blob.sha256)
+            .filter(Image.id > last_id)
+        )
+        if backfill_only:
+            query = query.filter(Image.size.is_(None))
+        rows = query.order_by(Image.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        for image, blob in rows:
+            counts["checked"] += 1
+            path = settings.UPLOAD_DIR / relpath_for(image, blob)
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                if not image.missing:
+                    image.missing = True
+                    counts["missing"] += 1
+                else:
+                    counts["unchanged"] += 1
+                image.checked_at = datetime.now(timezone.utc)
+                continue
+
+            if image.size is None:
+                counts["backfilled"] += 1
+            elif image.missing or image.size != stat.st_size or image.file_mtime != stat.st_mtime:
+                counts["refreshed"] += 1
+            else:
+                counts["unchanged"] += 1
+                image.checked_at = datetime.now(timezone.utc)
+                continue
+            apply_file_metadata(
+                image, path,
+                sha256=blob.sha256 if blob is not None else None,
+                mime_type=blob.mime_type if blob is not None else None,
+            )
+
+        last_id = rows[-1][0].id
+        db.commit()
+    return counts
+
+
+def run_reconcile(db: Session, backfill_only: bool = False) -> Dict[str, int]:
+    """`reconcile`, remembering the result for the status endpoint."""
+    counts = reconcile(db, backfill_only=backfill_only)
+    _last_run.clear()
+    _last_run.update(counts, finished_at=datetime.now(timezone.utc).isoformat())
+    return counts
+
+
+def reconcile_in_new_session(backfill_only: bool = False) -> Dict[str, int]:
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return run_reconcile(db, backfill_only=backfill_only)
+    finally:
+        db.close()
+
+
+def last_run() -> Dict[str, object]:
+    return dict(_last_run)
+
+
+async def _reconcile_forever(interval_seconds: float) -> None:
+    while True:
+        # Wait first: startup should not compete with a full filesystem walk
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(reconcile_in_new_session)
+        except Exception as e:
+            print(f"Image reconciliation failed: {e!r}")
+
+
+def start_background_reconciler() -> None:
+    """Start the periodic reconciliation (no-op when the interval is 0)."""
+    global _task
+    interval = settings.IMAGE_RECONCILE_INTERVAL_MINUTES
+    if interval <= 0 or _task is not None:
+        return
+    _task = asyncio.get_running_loop().create_task(_reconcile_forever(interval * 60))
+
+
+async def stop_background_reconciler() -> None:
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
@@ -0,0 +1,287 @@
+# app/utils/image_refs.py
+"""
+Index of which documents and artifacts embed which uploaded images.
+
+Every text field that may contain Markdown (`![alt](src)`) or HTML
+(`<img src="...">`) is parsed on write and one image_references row is kept
+per embedded upload. A reference names the image either by filename
+(/uploads/<name>, /api/v1/images/<name>/variants/..., /api/v1/documents/files/<name>)
+or by content (/uploads/blobs/ab/cd/<sha256>...). External URLs are not indexed.
+
+The index is maintained by a session listener, so every ORM write keeps it
+current without the endpoints having to know. Bulk `query(...).delete()`
+bypasses the ORM; callers doing that clear the rows themselves
+(`forget_project`), and `rebuild` recreates the whole index from the tables.
+
+An artifact that embeds an image by content holds a reference on its blob,
+so deleting the image row does not let blob GC remove the file. The listener
+moves those refcounts with the rows; `forget_project` and `rebuild` do not,
+and leave the correction to the recount that blob GC runs first.
+"""
+import re
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+from sqlalchemy import and_, delete, event, exists, insert, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from app.db.models.document import Document
+from app.db.models.image import Image
+from app.db.models.image_reference import ImageReference
+from app.db.models.need import Need
+from app.db.models.requirement import Requirement
+from app.db.models.use_case import UseCase
+from app.db.models.vision import Vision
+from app.utils import blob_store
+
+# Model -> (source_type, text fields that may embed images)
+TRACKED: Dict[type, Tuple[str, Tuple[str, ...]]] = {
+    Document: ("document", ("content_text", "description", "content_url")),
+    Need: ("need", ("description", "rationale")),
+    Requirement: ("requirement", ("text", "rationale")),
+    UseCase: ("use_case", ("description",)),
+    Vision: ("vision", ("description",)),
+}
+# Fields holding a single URL rather than Markdown
+URL_FIELDS = {"content_url"}
+# Sources whose by-content rows hold a blob reference (one per row). Documents
+# count theirs through blob_store.document_digests, file links included.
+COUNTED_SOURCES = {"need", "requirement", "use_case", "vision"}
+
+_MARKDOWN_IMAGE = re.compile(r"(!\[[^\]]*\]\(\s*<?)(?P<src>[^)\s>]+)")
+_HTML_IMAGE = re.compile(r"""(<img\b[^>]*?\bsrc\s*=\s*["'])(?P<src>[^"']+)""", re.IGNORECASE)
+
+# Upload URLs that name an image by filename; group "name" is the (quoted) filename
+_BY_NAME = (
+    re.compile(r"^/uploads/variants/(?P<name>[^/]+)\.(?:thumb|w\d+)\.webp$"),
+    re.compile(r"^/uploads/(?P<name>[^/]+)$"),
+    re.compile(r"^/api/v1/images/(?P<name>[^/]+)/variants/[^/]+$"),
+    re.compile(r"^/api/v1/documents/files/(?P<name>[^/]+)$"),
+)
+
+
+def _source_type(obj) -> Optional[str]:
+    tracked = TRACKED.get(type(obj))
+    return tracked[0] if tracked else None
+
+
+def extract_sources(text: Optional[str]) -> List[str]:
+    """Image URLs embedded in a Markdown/HTML body, in order of appearance."""
+    if not text:
+        return []
+    found = [(m.start("src"), m.group("src")) for m in _MARKDOWN_IMAGE.finditer(text)]
+    found += [(m.start("src"), m.group("src")) for m in _HTML_IMAGE.finditer(text)]
+    return [src for _, src in sorted(found)]
+
+
+def classify(src: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """
+    (filename, blob_sha256) of the upload a URL points at, exactly one of
+    them set, or None if it is not an upload URL.
+    """
+    digest = blob_store.digest_from_url(src)
+    if digest:
+        return None, digest
+    path = urlsplit(src.strip()).path
+    for pattern in _BY_NAME:
+        match = pattern.match(path)
+        if match:
+            return unquote(match.group("name")), None
+    return None
+
+
+def _references(obj, source_type: str, fields: Iterable[str]) -> List[dict]:
+    rows = []
+    for field in fields:
+        value = getattr(obj, field, None)
+        sources = [value] if field in URL_FIELDS and value else extract_sources(value)
+        for src in sources:
+            target = classify(src)
+            if target is None:
+                continue
+            filename, digest = target
+            rows.append({
+                "source_type": source_type,
+                "source_aid": obj.aid,
+                "field": field,
+                "project_id": obj.project_id,
+                "filename": filename,
+                "blob_sha256": digest,
+                "src": src,
+            })
+    return rows
+
+
+def references_for(obj) -> List[dict]:
+    """Index rows for one document or artifact."""
+    return _references(obj, *TRACKED[type(obj)])
+
+
+def _replace(connection, source_type: str, aids: Iterable[str], rows: List[dict]) -> None:
+    aids = [aid for aid in aids if aid]
+    counted = source_type in COUNTED_SOURCES
+    deltas: Dict[str, int] = {}
+    if aids:
+        current = and_(ImageReference.source_type == source_type, ImageReference.source_aid.in_(aids))
+        if counted:
+            released = select(ImageReference.blob_sha256).where(current, ImageReference.blob_sha256.isnot(None))
+            for (digest,) in connection.execute(released):
+                deltas[digest] = deltas.get(digest, 0) - 1
+        connection.execute(delete(ImageReference).where(current))
+    if rows:
+        connection.execute(insert(ImageReference), rows)
+        if counted:
+            for row in rows:
+                if row["blob_sha256"]:
+                    deltas[row["blob_sha256"]] = deltas.get(row["blob_sha256"], 0) + 1
+    blob_store.apply_deltas(connection, deltas)
+
+
+def _changed(obj, names: Iterable[str]) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in names)
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_after_flush(session: Session, flush_context) -> None:
+    # new/dirty/deleted and attribute history still describe this flush here
+    connection = None
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        source_type = _source_type(obj)
+        if source_type is None:
+            continue
+        if connection is None:
+            connection = session.connection()
+
+        if obj in session.deleted:
+            _replace(connection, source_type, [obj.aid], [])
+        elif obj in session.new:
+            _replace(connection, source_type, [], references_for(obj))
+        elif _changed(obj, TRACKED[type(obj)][1] + ("aid", "project_id")):
+            # An aid rename moves the rows to the new aid
+            old_aids = inspect(obj).attrs.aid.history.deleted or []
+            _replace(connection, source_type, [obj.aid, *old_aids], references_for(obj))
+
+
+def forget_project(db: Session, project_id: str) -> int:
+    """Drop a project's rows; for callers that bulk-delete its artifacts."""
+    return (
+        db.query(ImageReference)
+        .filter(ImageReference.project_id == project_id)
+        .delete(synchronize_session=False)
+    )
+
+
+def rebuild(db: Session, batch_size: int = 500) -> Dict[str, int]:
+    """Recreate the whole index from the document and artifact tables."""
+    db.query(ImageReference).delete(synchronize_session=False)
+    connection = db.connection()
+    counts = {}
+    for model, (source_type, fields) in TRACKED.items():
+        names = ("aid", "project_id") + fields
+        rows = []
+        # Plain column tuples: nothing is loaded into the identity map
+        for row in db.query(*[getattr(model, name) for name in names]).yield_per(batch_size):
+            rows.extend(_references(SimpleNamespace(**dict(zip(names, row))), source_type, fields))
+        for start in range(0, len(rows), batch_size):
+            connection.execute(insert(ImageReference), rows[start:start + batch_size])
+        counts[source_type] = len(rows)
+    db.commit()
+    return counts
+
+
+def _image_filter(image: Image):
+    """References to `image`: by its name, or by its content if it is in the blob store."""
+    by_name = ImageReference.filename == image.filename
+    if image.blob_sha256:
+        return or_(by_name, ImageReference.blob_sha256 == image.blob_sha256)
+    return by_name
+
+
+def usages(db: Session, image: Image) -> List[dict]:
+    refs = (
+        db.query(ImageReference)
+        .filter(_image_filter(image))
+        .order_by(ImageReference.source_type, ImageReference.source_aid, ImageReference.field)
+        .all()
+    )
+    return [
+        {
+            "source_type": ref.source_type,
+            "source_aid": ref.source_aid,
+            "field": ref.field,
+            "project_id": ref.project_id,
+            "src": ref.src,
+            # Content URLs survive a delete or rename of the image row; name URLs do not
+            "by_name": ref.filename is not None,
+        }
+        for ref in refs
+    ]
+
+
+def name_references(db: Session, filename: str) -> int:
+    """References that break if the image called `filename` is deleted or renamed."""
+    return db.query(ImageReference).filter(ImageReference.filename == filename).count()
+
+
+def unused_images(db: Session, project_id: Optional[str] = None):
+    """Images no document or artifact embeds, by name or by content."""
+    referenced = exists().where(
+        or_(
+            ImageReference.filename == Image.filename,
+            and_(Image.blob_sha256.isnot(None), ImageReference.blob_sha256 == Image.blob_sha256),
+        )
+    )
+    query = db.query(Image).filter(~referenced)
+    if project_id:
+        query = query.filter(or_(Image.project_id == project_id, Image.project_id == None))
+    return query.order_by(Image.created_at.desc(), Image.id)
+
+
+def _renamed_src(src: str, old: str, new: str) -> str:
+    parts = urlsplit(src)
+    for pattern in _BY_NAME:
+        match = pattern.match(parts.path)
+        if match and unquote(match.group("name")) == old:
+            start, end = match.span("name")
+            path = parts.path[:start] + quote(new) + parts.path[end:]
+            return parts._replace(path=path).geturl()
+    return src
+
+
+def _rewrite_text(text: str, rewrite: Callable[[str], str]) -> str:
+    def substitute(match):
+        return match.group(1) + rewrite(match.group("src"))
+    return _HTML_IMAGE.sub(substitute, _MARKDOWN_IMAGE.sub(substitute, text))
+
+
+def rewrite_references(db: Session, old: str, new: str) -> int:
+    """
+    Point every by-name reference to image `old` at `new`, editing the
+    documents and artifacts in the session. Nothing is committed; the index
+    rows follow at flush. Returns the number of objects changed.
+    """
+    refs = (
+        db.query(ImageReference.source_type, ImageReference.source_aid)
+        .filter(ImageReference.filename == old)
+        .distinct()
+        .all()
+    )
+    models = {source_type: (model, fields) for model, (source_type, fields) in TRACKED.items()}
+    rewrite = lambda src: _renamed_src(src, old, new)
+    changed = 0
+    for source_type, aid in refs:
+        model, fields = models[source_type]
+        obj = db.query(model).filter(model.aid == aid).first()
+        if obj is None:
+            continue
+        for field in fields:
+            value = getattr(obj, field)
+            if not value:
+                continue
+            updated = rewrite(value) if field in URL_FIELDS else _rewrite_text(value, rewrite)
+            if updated != value:
+                setattr(obj, field, updated)
+        changed += 1
+    return changed
@@ -0,0 +1,198 @@
+# app/utils/image_variants.py
+"""
+Thumbnails and responsive width variants (WebP) for uploaded images.
+
+Variants are written next to the original in the blob store, named after the
+source hash, so they are as immutable as the original:
+
+    blobs/ab/cd/<sha256>.png            original
+    blobs/ab/cd/<sha256>.thumb.webp     fits IMAGE_THUMBNAIL_SIZE square
+    blobs/ab/cd/<sha256>.w960.webp      one per IMAGE_VARIANT_WIDTHS entry
+                                        narrower than the original
+
+New uploads are processed by a small background worker pool; the generated
+set is recorded on the blob so listings can link variants directly. Legacy
+images stored by name get theirs lazily on first request, under
+UPLOAD_DIR/variants/.
+
+Pillow is optional. Without it no variants are produced and callers fall
+back to the original image.
+"""
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+try:
+    from PIL import Image as PILImage, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PILImage = None
+    ImageOps = None
+    PIL_AVAILABLE = False
+
+THUMBNAIL = "thumb"
+LEGACY_VARIANT_DIR = "variants"
+WEBP_QUALITY = 80
+
+# Vector and unknown formats are served as-is
+RASTER_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = set()
+_pending_lock = Lock()
+
+
+def variant_names() -> List[str]:
+    return [THUMBNAIL] + [f"w{width}" for width in sorted(settings.IMAGE_VARIANT_WIDTHS)]
+
+
+def is_supported(relpath: str) -> bool:
+    return PIL_AVAILABLE and Path(relpath).suffix.lower() in RASTER_SUFFIXES
+
+
+def variant_relpath(source_relpath: str, name: str) -> str:
+    """Where variant `name` of the file at `source_relpath` (relative to UPLOAD_DIR) lives."""
+    source = Path(source_relpath)
+    if source.parts and source.parts[0] == "blobs":
+        return (source.parent / f"{source.stem}.{name}.webp").as_posix()
+    return f"{LEGACY_VARIANT_DIR}/{source.name}.{name}.webp"
+
+
+def variant_url(source_relpath: str, name: str) -> str:
+    return f"/uploads/{variant_relpath(source_relpath, name)}"
+
+
+def _save_webp(image, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".part")
+    os.close(fd)
+    try:
+        image.save(temp_name, "WEBP", quality=WEBP_QUALITY, method=4)
+        os.replace(temp_name, target)
+    except BaseException:
+        os.remove(temp_name)
+        raise
+
+
+def generate_variants(source_relpath: str) -> Dict[str, int]:
+    """
+    Write every missing (or stale) variant of one image.
+
+    Returns:
+        Dict of variant name -> pixel width for the variants that exist
+        afterwards; empty if the file is not a supported raster image.
+    """
+    if not is_supported(source_relpath):
+        return {}
+    source = settings.UPLOAD_DIR / source_relpath
+    source_mtime = source.stat().st_mtime
+
+    with PILImage.open(source) as opened:
+        # Respect camera rotation and drop palette/CMYK modes WebP cannot take
+        image = ImageOps.exif_transpose(opened)
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in opened.info else "RGB")
+
+    produced = {}
+    targets = {THUMBNAIL: None}
+    targets.update({f"w{width}": width for width in settings.IMAGE_VARIANT_WIDTHS if width < image.width})
+    for name, width in targets.items():
+        target = settings.UPLOAD_DIR / variant_relpath(source_relpath, name)
+        if not target.exists() or target.stat().st_mtime < source_mtime:
+            if name == THUMBNAIL:
+                resized = image.copy()
+                size = settings.IMAGE_THUMBNAIL_SIZE
+                resized.thumbnail((size, size), PILImage.LANCZOS)
+            else:
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), PILImage.LANCZOS)
+            _save_webp(resized, target)
+            produced[name] = resized.width
+        else:
+            with PILImage.open(target) as existing:
+                produced[name] = existing.width
+    return produced
+
+
+def generate_for_blob(digest: str) -> None:
+    """Worker job: generate variants for a stored blob and record them on it."""
+    from app.db.models.blob import Blob
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        blob = db.get(Blob, digest)
+        if blob is None:
+            return
+        blob.variants = generate_variants(blob.path)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Variant generation failed for {digest}: {e!r}")
+    finally:
+        db.close()
+        with _pending_lock:
+            _pending.discard(digest)
+
+
+def schedule(digest: str, relpath: str) -> bool:
+    """Queue variant generation for a blob. Returns False if there is nothing to do."""
+    global _executor
+    if not is_supported(relpath):
+        return False
+    with _pending_lock:
+        if digest in _pending:
+            return True
+        _pending.add(digest)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS, thread_name_prefix="image-variants"
+            )
+    _executor.submit(generate_for_blob, digest)
+    return True
+
+
+def ensure_variant(source_relpath: str, name: str) -> Optional[Path]:
+    """
+    Path to variant `name`, generating the image's variants on demand.
+    Returns None if the image cannot have that variant (unsupported format,
+    Pillow missing, or a width not smaller than the original).
+    """
+    if name not in variant_names() or not is_supported(source_relpath):
+        return None
+    target = settings.UPLOAD_DIR / variant_relpath(source_relpath, name)
+    source = settings.UPLOAD_DIR / source_relpath
+    if not target.exists() or target.stat().st_mtime < source.stat().st_mtime:
+        if name not in generate_variants(source_relpath):
+            return None
+    return target
+
+
+def variant_listing(source_relpath: str, variants: Optional[Dict[str, int]]) -> Dict[str, object]:
+    """URLs for the listing: thumbnail plus a srcset built from the width variants."""
+    variants = variants or {}
+    widths = sorted((width, name) for name, width in variants.items() if name != THUMBNAIL)
+    return {
+        "thumbnail_url": variant_url(source_relpath, THUMBNAIL) if THUMBNAIL in variants else None,
+        "variants": {name: variant_url(source_relpath, name) for name in variants},
+        "srcset": ", ".join(f"{variant_url(source_relpath, name)} {width}w" for width, name in widths) or None,
+    }
+
+
+def remove_variants(source_relpath: str) -> None:
+    """Delete all variants of a file (called when the original is removed)."""
+    first = settings.UPLOAD_DIR / variant_relpath(source_relpath, THUMBNAIL)
+    prefix = first.name[:-len(f"{THUMBNAIL}.webp")]
+    if not first.parent.exists():
+        return
+    # Match by pattern so variants of widths no longer configured go too
+    for path in first.parent.iterdir():
+        name = path.name
+        if name.startswith(prefix) and name.endswith(".webp"):
+            variant = name[len(prefix):-len(".webp")]
+            if variant == THUMBNAIL or (variant[:1] == "w" and variant[1:].isdigit()):
+                os.remove(path)
@@ -0,0 +1,175 @@
+# app/utils/markdown_render.py
+"""
+Server-side Markdown rendering with a two-level cache.
+
+Lookup order for a Markdown body:
+    1. in-process LRU (MARKDOWN_CACHE_SIZE entries)
+    2. `rendered_markdown` table, keyed by the content hash
+    3. render with markdown-it and sanitize with nh3
+
+The key hashes the renderer configuration together with the text, so a body
+is rendered once per edit (and once per renderer upgrade), never per view.
+Documents are rendered when saved; the first view of an older document pays
+for it once.
+
+Diagram fences (```mermaid, ```plantuml) are left as
+<pre><code class="language-...">, and math as <span class="math inline"> /
+<div class="math block">, for the browser to hydrate.
+
+markdown-it-py is optional; without it `RENDERING_AVAILABLE` is False and
+callers fall back to client-side rendering. Without nh3 raw HTML in the
+Markdown is escaped instead of sanitized. mdit-py-plugins adds math and
+task lists when installed.
+"""
+import hashlib
+from typing import Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.models.rendered_markdown import RenderedMarkdown
+
+try:
+    from markdown_it import MarkdownIt
+    RENDERING_AVAILABLE = True
+except ImportError:
+    MarkdownIt = None
+    RENDERING_AVAILABLE = False
+
+try:
+    import nh3
+    SANITIZER_AVAILABLE = True
+except ImportError:
+    nh3 = None
+    SANITIZER_AVAILABLE = False
+
+try:
+    from mdit_py_plugins.dollarmath import dollarmath_plugin
+    from mdit_py_plugins.tasklists import tasklists_plugin
+    PLUGINS_AVAILABLE = True
+except ImportError:
+    dollarmath_plugin = tasklists_plugin = None
+    PLUGINS_AVAILABLE = False
+
+# Bump when the output for the same text changes (options, plugins, sanitizer rules)
+RENDERER_VERSION = 1
+
+_CLASS_TAGS = ("code", "pre", "span", "div", "ul", "li", "input")
+
+_parser = None
+_memory_cache = LRUCache(maxsize=settings.MARKDOWN_CACHE_SIZE)
+
+
+def renderer_id() -> str:
+    """Identifies the rendering setup; part of every cache key."""
+    parts = [f"v{RENDERER_VERSION}"]
+    if SANITIZER_AVAILABLE:
+        parts.append("nh3")
+    if PLUGINS_AVAILABLE:
+        parts.append("plugins")
+    return "+".join(parts)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(f"{renderer_id()}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _get_parser():
+    global _parser
+    if _parser is None:
+        # Raw HTML passes through only when it will be sanitized afterwards
+        parser = MarkdownIt("commonmark", {"html": SANITIZER_AVAILABLE}).enable(["table", "strikethrough"])
+        if PLUGINS_AVAILABLE:
+            parser = parser.use(dollarmath_plugin).use(tasklists_plugin)
+        _parser = parser
+    return _parser
+
+
+def _sanitize(html: str) -> str:
+    attributes = {tag: set(allowed) for tag, allowed in nh3.ALLOWED_ATTRIBUTES.items()}
+    for tag in _CLASS_TAGS:
+        attributes.setdefault(tag, set()).add("class")
+    attributes["input"] |= {"type", "checked", "disabled"}
+    return nh3.clean(
+        html,
+        tags=nh3.ALLOWED_TAGS | {"input"},
+        attributes=attributes,
+        url_schemes={"http", "https", "mailto"},
+    )
+
+
+def render_html(text: str) -> str:
+    """Markdown to sanitized HTML, uncached."""
+    if not RENDERING_AVAILABLE:
+        raise RuntimeError("Server-side Markdown rendering needs markdown-it-py")
+    html = _get_parser().render(text)
+    return _sanitize(html) if SANITIZER_AVAILABLE else html
+
+
+def _store(db: Session, row: RenderedMarkdown) -> None:
+    try:
+        db.add(row)
+        db.commit()
+    except IntegrityError:
+        # Rendered concurrently by another request; the stored copy is identical
+        db.rollback()
+
+
+def render(db: Session, text: Optional[str], digest: Optional[str] = None) -> Dict[str, str]:
+    """
+    Cached rendering of a Markdown body.
+
+    Returns:
+        Dict with content_hash and html
+    """
+    text = text or ""
+    digest = digest or content_hash(text)
+    html = _memory_cache.get(digest)
+    if html is None:
+        row = db.get(RenderedMarkdown, digest)
+        if row is not None:
+            html = row.html
+        else:
+            html = render_html(text)
+            _store(db, RenderedMarkdown(content_hash=digest, renderer=renderer_id(), html=html))
+        _memory_cache.set(digest, html)
+    return {"content_hash": digest, "html": html}
+
+
+def warm(text: Optional[str]) -> None:
+    """Render and cache a body ahead of its first view (background task after a save)."""
+    if not RENDERING_AVAILABLE or not text:
+        return
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        render(db, text)
+    except Exception as e:
+        print(f"Markdown pre-render failed: {e!r}")
+    finally:
+        db.close()
+
+
+def prune(db: Session) -> int:
+    """Delete stored renders that no current document body hashes to."""
+    from app.db.models.document import Document
+
+    live = {
+        content_hash(text)
+        for (text,) in db.query(Document.content_text).filter(Document.content_text.isnot(None))
+    }
+    stale = [digest for (digest,) in db.query(RenderedMarkdown.content_hash) if digest not in live]
+    for start in range(0, len(stale), 500):
+        chunk = stale[start:start + 500]
+        db.query(RenderedMarkdown).filter(RenderedMarkdown.content_hash.in_(chunk)).delete(synchronize_session=False)
+        for digest in chunk:
+            _memory_cache.pop(digest)
+    db.commit()
+    return len(stale)
+
+
+def cache_stats(db: Session) -> Dict[str, Optional[int]]:
+    return {**_memory_cache.stats(), "stored": db.query(RenderedMarkdown).count(), "renderer": renderer_id()}
@@ -0,0 +1,278 @@
+# app/utils/response_cache.py
+"""
+Response cache for read-heavy reference data (areas, people, sites,
+components, projects, EARS templates).
+
+These lists are fetched on every page load but change a few times a week,
+so their serialized JSON bodies are cached and served without touching the
+database. Entries are keyed by route, query string and project.
+
+Invalidation works through generation counters. Every key embeds the
+current generation of its namespace ("sites") and of its project scope
+("sites" of project P, or of the unfiltered lists). A write endpoint bumps
+what it touched once it has committed; entries under older generations are
+never looked up again and age out of the LRU / TTL. Generations are read
+before the query runs, so a response computed from data older than a
+concurrent write is stored under the old generation and never served.
+
+    invalidate("sites", project_id)   that project's lists and the unfiltered lists
+    invalidate("components")          the whole namespace
+
+Backends (RESPONSE_CACHE_BACKEND):
+    "memory"  in-process LRU with TTL; another worker's writes are seen
+              once the entries expire (RESPONSE_CACHE_TTL)
+    "redis"   shared by all workers (redis package, RESPONSE_CACHE_URL);
+              if it cannot be set up, the in-process store stands in
+
+Cache errors never fail a request: the response is computed instead.
+"""
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pydantic import TypeAdapter
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+ALL = "*"          # scope of lists not filtered by project
+_EPOCH = "epoch"   # bumped by clear(); part of every key
+
+
+class ResponseCacheBackend:
+    """Interface for cache stores. Implementations must be thread-safe."""
+    name = "base"
+    shared = False  # True if all workers see the same generations
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    def generations(self, *names: str) -> Tuple[int, ...]:
+        raise NotImplementedError
+
+    def bump(self, *names: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, object]:
+        return {}
+
+
+class MemoryBackend(ResponseCacheBackend):
+    """In-process LRU of (expiry, body) entries."""
+    name = "memory"
+
+    def __init__(self):
+        self._entries = LRUCache(maxsize=settings.RESPONSE_CACHE_SIZE)
+        self._generations: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            self._entries.pop(key)
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries.set(key, (time.monotonic() + ttl, value))
+
+    def generations(self, *names: str) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._generations.get(name, 0) for name in names)
+
+    def bump(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def stats(self) -> Dict[str, object]:
+        return {"size": len(self._entries), "maxsize": self._entries.maxsize}
+
+
+class RedisBackend(ResponseCacheBackend):
+    """Redis: bodies with an expiry, generations as INCR counters."""
+    name = "redis"
+    shared = True
+    PREFIX = "response_cache:"
+
+    def __init__(self):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("the redis package is not installed")
+        self._client = redis.Redis.from_url(settings.RESPONSE_CACHE_URL, socket_timeout=1.0)
+        self._client.ping()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.PREFIX + key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._client.set(self.PREFIX + key, value, ex=max(1, int(ttl)))
+
+    def generations(self, *names: str) -> Tuple[int, ...]:
+        values = self._client.mget([f"{self.PREFIX}gen:{name}" for name in names])
+        return tuple(int(value or 0) for value in values)
+
+    def bump(self, *names: str) -> None:
+        pipeline = self._client.pipeline()
+        for name in names:
+            pipeline.incr(f"{self.PREFIX}gen:{name}")
+        pipeline.execute()
+
+
+BACKENDS = {
+    MemoryBackend.name: MemoryBackend,
+    RedisBackend.name: RedisBackend,
+}
+
+_backend: Optional[ResponseCacheBackend] = None
+_adapters: Dict[Any, TypeAdapter] = {}
+_counters: Dict[str, Dict[str, int]] = {}
+_counters_lock = Lock()
+
+
+def get_backend() -> ResponseCacheBackend:
+    """Return the store selected by RESPONSE_CACHE_BACKEND (created once per process)."""
+    global _backend
+    if _backend is None:
+        backend_cls = BACKENDS.get(settings.RESPONSE_CACHE_BACKEND.lower())
+        if backend_cls is None:
+            raise ValueError(f"Unknown response cache backend: {settings.RESPONSE_CACHE_BACKEND}")
+        try:
+            _backend = backend_cls()
+        except Exception as e:
+            print(f"Response cache backend '{backend_cls.name}' unavailable ({e}); using the in-process cache")
+            _backend = MemoryBackend()
+    return _backend
+
+
+def set_backend(backend: Optional[ResponseCacheBackend]) -> None:
+    """Replace the active store (None resets to the configured one)."""
+    global _backend
+    _backend = backend
+
+
+def _count(namespace: str, outcome: str) -> None:
+    with _counters_lock:
+        counters = _counters.setdefault(namespace, {"hits": 0, "misses": 0, "invalidations": 0, "errors": 0})
+        counters[outcome] += 1
+
+
+def _adapter(response_type) -> TypeAdapter:
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    return adapter
+
+
+def cached(
+    request: Request,
+    namespace: str,
+    project_id: Optional[str],
+    response_type,
+    compute: Callable[[], Any],
+) -> Response:
+    """
+    JSON response for a cacheable GET: the stored body if it is current,
+    otherwise `compute()` serialized as `response_type` (the endpoint's
+    response_model) and stored.
+    """
+    scope = project_id or ALL
+    path = request.url.path
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    backend = get_backend()
+    key = body = None
+    try:
+        epoch, generation, scoped = backend.generations(_EPOCH, namespace, f"{namespace}:{scope}")
+        key = f"{namespace}:{epoch}.{generation}.{scoped}:{scope}:{path}?{query}"
+        body = backend.get(key)
+    except Exception as e:
+        _count(namespace, "errors")
+        print(f"Response cache lookup failed: {e!r}")
+
+    if body is not None:
+        _count(namespace, "hits")
+        return Response(body, media_type="application/json", headers={"x-cache": "hit"})
+
+    _count(namespace, "misses")
+    adapter = _adapter(response_type)
+    body = adapter.dump_json(adapter.validate_python(compute(), from_attributes=True), by_alias=True)
+    if key is not None:
+        try:
+            backend.set(key, body, settings.RESPONSE_CACHE_TTL)
+        except Exception as e:
+            _count(namespace, "errors")
+            print(f"Response cache store failed: {e!r}")
+    return Response(body, media_type="application/json", headers={"x-cache": "miss"})
+
+
+def invalidate(namespace: str, *project_ids: Optional[str]) -> None:
+    """
+    Drop cached responses after a committed write: those of the given
+    projects plus the unfiltered lists, or the whole namespace if no
+    project (or None) is given.
+    """
+    scoped = [p for p in project_ids if p]
+    if not scoped or len(scoped) != len(project_ids):
+        names = [namespace]
+    else:
+        names = [f"{namespace}:{p}" for p in set(scoped)] + [f"{namespace}:{ALL}"]
+    _count(namespace, "invalidations")
+    try:
+        get_backend().bump(*names)
+    except Exception as e:
+        # Entries expire after RESPONSE_CACHE_TTL at the latest
+        _count(namespace, "errors")
+        print(f"Response cache invalidation of {namespace} failed: {e!r}")
+
+
+def version(*namespaces: str) -> str:
+    """
+    Token that changes whenever one of the namespaces is invalidated, for
+    validators of responses that embed its data (e.g. sites in a need's
+    ETag). With a per-process store it also changes every
+    RESPONSE_CACHE_TTL, so other workers' writes are picked up then.
+    """
+    names = [_EPOCH]
+    for namespace in namespaces:
+        names += [namespace, f"{namespace}:{ALL}"]
+    backend = get_backend()
+    try:
+        token = ".".join(str(g) for g in backend.generations(*names))
+    except Exception as e:
+        print(f"Response cache version lookup failed: {e!r}")
+        # Never equal to an earlier tag, so nothing is answered as unmodified
+        return f"error.{time.time_ns()}"
+    if not backend.shared:
+        token += f"@{int(time.time() // max(1, settings.RESPONSE_CACHE_TTL))}"
+    return token
+
+
+def clear() -> None:
+    """Invalidate every cached response, e.g. after a database restore."""
+    get_backend().bump(_EPOCH)
+
+
+def stats() -> Dict[str, object]:
+    backend = get_backend()
+    with _counters_lock:
+        namespaces = {name: dict(counters) for name, counters in _counters.items()}
+    return {
+        "backend": backend.name,
+        "ttl": settings.RESPONSE_CACHE_TTL,
+        **backend.stats(),
+        "namespaces": namespaces,
+    }
@@ -0,0 +1,171 @@
+# app/utils/sequence_diagram.py
+"""
+Sequence diagram source generated from a use case's main success scenario.
+
+Each MSS step with a `message` becomes an arrow from `actor` to
+`target_actor` (itself if unset), followed by a dashed `response` arrow if
+there is one; steps without a message become a note over the actor.
+Extensions are `alt` blocks after the step whose number they start with
+("3a" -> step 3), and exceptions are `opt` blocks after the main flow.
+
+PlantUML output matches what the frontend generated before (utils/plantuml.ts),
+so diagrams look the same; Mermaid is available too.
+
+Generated source is cached per (aid, last_updated, language): any edit
+bumps last_updated and so produces a new entry.
+"""
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+LANGUAGES = ("plantuml", "mermaid")
+
+_cache = LRUCache(maxsize=settings.SEQUENCE_DIAGRAM_CACHE_SIZE)
+_LEADING_NUMBER = re.compile(r"^\s*(\d+)")
+
+
+def _step_number(value) -> Optional[int]:
+    match = _LEADING_NUMBER.match(str(value or ""))
+    return int(match.group(1)) if match else None
+
+
+def _actors(mss: List[dict], extensions: List[dict], exceptions: List[dict]) -> List[str]:
+    """Participants in order of first appearance."""
+    seen: Dict[str, None] = {}
+    steps = list(mss) + list(extensions) + [s for exc in exceptions for s in (exc.get("steps") or [])]
+    for step in steps:
+        for key in ("actor", "target_actor"):
+            if step.get(key):
+                seen.setdefault(step[key], None)
+    return list(seen)
+
+
+def _plantuml(mss: List[dict], extensions: List[dict], exceptions: List[dict]) -> str:
+    actors = _actors(mss, extensions, exceptions)
+    lines = ["@startuml", "skinparam style strictuml", "skinparam sequenceMessageAlign center", "loop Main Flow"]
+    for step in mss:
+        if step.get("message"):
+            target = step.get("target_actor") or step["actor"]
+            lines.append(f'"{step["actor"]}" -> "{target}": {step["message"]} ')
+            if step.get("response"):
+                lines.append(f'"{target}" --> "{step["actor"]}": {step["response"]} ')
+        else:
+            lines.append(f'note over "{step["actor"]}": {step.get("description", "")} ')
+
+        for ext in extensions:
+            if _step_number(ext.get("step")) != step.get("step_num"):
+                continue
+            lines.append(f'alt {ext.get("condition", "")} ')
+            if ext.get("message"):
+                source = ext.get("actor") or step["actor"]
+                target = ext.get("target_actor") or source
+                lines.append(f'"{source}" -> "{target}": {ext["message"]} ')
+                if ext.get("response"):
+                    lines.append(f'"{target}" --> "{source}": {ext["response"]} ')
+            else:
+                lines.append(f'note over "{step["actor"]}": {ext.get("handling", "")} ')
+            lines.append("end")
+    lines.append("end")
+
+    if exceptions:
+        lines.append("== Exceptions ==")
+        for exc in exceptions:
+            lines.append(f'opt {exc.get("trigger", "")} ')
+            if exc.get("steps"):
+                for s in exc["steps"]:
+                    source = s.get("actor")
+                    target = s.get("target_actor") or source
+                    lines.append(f'"{source}" -> "{target}": {s.get("message") or s.get("description", "")} ')
+                    if s.get("response"):
+                        lines.append(f'"{target}" --> "{source}": {s["response"]} ')
+            else:
+                lines.append(f'note over "{actors[0] if actors else "System"}": {exc.get("handling", "")} ')
+            lines.append("end")
+    lines.append("@enduml")
+    return "\n".join(lines) + "\n"
+
+
+def _mermaid_text(text) -> str:
+    # Newlines and ';' end a Mermaid statement; '#' starts an entity code
+    return str(text or "").replace("\n", " ").replace(";", ",").replace("#", "#35;")
+
+
+def _mermaid(mss: List[dict], extensions: List[dict], exceptions: List[dict]) -> str:
+    actors = _actors(mss, extensions, exceptions) or ["System"]
+    ids = {name: f"p{i}" for i, name in enumerate(actors)}
+    lines = ["sequenceDiagram"]
+    lines += [f"    participant {ids[name]} as {_mermaid_text(name)}" for name in actors]
+
+    def arrows(indent: str, source: str, target: str, message, response) -> None:
+        lines.append(f"{indent}{ids[source]}->>{ids[target]}: {_mermaid_text(message)}")
+        if response:
+            lines.append(f"{indent}{ids[target]}-->>{ids[source]}: {_mermaid_text(response)}")
+
+    lines.append("    loop Main Flow")
+    for step in mss:
+        actor = step["actor"]
+        if step.get("message"):
+            arrows("        ", actor, step.get("target_actor") or actor, step["message"], step.get("response"))
+        else:
+            lines.append(f"        Note over {ids[actor]}: {_mermaid_text(step.get('description'))}")
+        for ext in extensions:
+            if _step_number(ext.get("step")) != step.get("step_num"):
+                continue
+            lines.append(f"        alt {_mermaid_text(ext.get('condition'))}")
+            if ext.get("message"):
+                source = ext.get("actor") or actor
+                arrows("            ", source, ext.get("target_actor") or source, ext["message"], ext.get("response"))
+            else:
+                lines.append(f"            Note over {ids[actor]}: {_mermaid_text(ext.get('handling'))}")
+            lines.append("        end")
+    lines.append("    end")
+
+    for exc in exceptions:
+        lines.append(f"    opt {_mermaid_text(exc.get('trigger'))}")
+        if exc.get("steps"):
+            for s in exc["steps"]:
+                source = s.get("actor") or actors[0]
+                arrows("        ", source, s.get("target_actor") or source,
+                       s.get("message") or s.get("description"), s.get("response"))
+        else:
+            lines.append(f"        Note over {ids[actors[0]]}: {_mermaid_text(exc.get('handling'))}")
+        lines.append("    end")
+    return "\n".join(lines) + "\n"
+
+
+def generate(mss, extensions=None, exceptions=None, language: str = "plantuml") -> str:
+    """Sequence diagram source for the given flows; empty string if there is no MSS."""
+    if language not in LANGUAGES:
+        raise ValueError(f"Unsupported language: {language}")
+    mss = [s for s in (mss or []) if s.get("actor")]
+    if not mss:
+        return ""
+    extensions = extensions if isinstance(extensions, list) else []
+    exceptions = exceptions if isinstance(exceptions, list) else []
+    builder = _plantuml if language == "plantuml" else _mermaid
+    return builder(mss, extensions, exceptions)
+
+
+def cache_key(aid: str, last_updated: Optional[datetime], language: str) -> Tuple[str, str, str]:
+    return aid, last_updated.isoformat() if last_updated else "", language
+
+
+def for_use_case(use_case, language: str = "plantuml") -> str:
+    """`generate` for a UseCase row, cached until its last_updated changes."""
+    key = cache_key(use_case.aid, use_case.last_updated, language)
+    source = _cache.get(key)
+    if source is None:
+        source = generate(use_case.mss, use_case.extensions, use_case.exceptions, language)
+        _cache.set(key, source)
+    return source
+
+
+def cached(aid: str, last_updated: Optional[datetime], language: str) -> Optional[str]:
+    return _cache.get(cache_key(aid, last_updated, language))
+
+
+def cache_stats() -> Dict[str, Optional[int]]:
+    return _cache.stats()
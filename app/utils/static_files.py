@@ -0,0 +1,193 @@
+# app/utils/static_files.py
+"""
+Cache-friendly serving of uploaded files.
+
+Files in the content-addressed blob store (blobs/ab/cd/<sha256>...) never
+change, so they are served with a strong ETag derived from the hash and
+`Cache-Control: immutable`; browsers keep them for a year without asking
+again. Everything else (legacy files stored by name) must be revalidated,
+which is cheap thanks to ETag / Last-Modified and 304 responses.
+
+Byte ranges come from Starlette's FileResponse. Compressible files may have
+precompressed sidecars (<file>.br, <file>.gz) written at upload time; they
+are served when the client accepts the encoding and no range is requested.
+"""
+import gzip
+import os
+import re
+from email.utils import parsedate
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.core.config import settings
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Preferred first
+SIDECARS = (("br", ".br"), ("gzip", ".gz"))
+
+# Already-compressed formats (PNG, JPEG, WebP, PDF, Office zips) gain nothing
+COMPRESSIBLE_TYPES = {
+    "image/svg+xml", "application/json", "application/xml", "application/javascript",
+    "application/x-yaml", "application/yaml", "application/rtf",
+}
+SIDECAR_MIN_BYTES = 1024
+
+_CONTENT_ADDRESSED = re.compile(r"(?:^|/)blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}[^/]*$")
+
+
+def is_compressible(media_type: Optional[str]) -> bool:
+    return bool(media_type) and (media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES)
+
+
+def content_etag(path: Path) -> Optional[str]:
+    """
+    Strong ETag for a content-addressed file: its name, i.e. the hash plus
+    variant and extension ("<sha256>.png", "<sha256>.thumb.webp").
+    None for files not in the blob store.
+    """
+    path = Path(path)
+    if not _CONTENT_ADDRESSED.search(path.as_posix()):
+        return None
+    return f'"{path.name}"'
+
+
+def write_sidecars(path: Path, media_type: Optional[str]) -> List[str]:
+    """Write .gz (and .br if brotli is installed) next to `path` if worth it."""
+    if not settings.UPLOAD_PRECOMPRESS or not is_compressible(media_type):
+        return []
+    data = path.read_bytes()
+    if len(data) < SIDECAR_MIN_BYTES:
+        return []
+    written = []
+    encoded = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if BROTLI_AVAILABLE:
+        encoded[".br"] = brotli.compress(data)
+    for suffix, payload in encoded.items():
+        # Keep a sidecar only if it is meaningfully smaller
+        if len(payload) < len(data) * 0.9:
+            sidecar = path.with_name(path.name + suffix)
+            temp = sidecar.with_name(sidecar.name + ".part")
+            temp.write_bytes(payload)
+            os.replace(temp, sidecar)
+            written.append(suffix)
+    return written
+
+
+def remove_sidecars(path: Path) -> None:
+    for _, suffix in SIDECARS:
+        sidecar = path.with_name(path.name + suffix)
+        if sidecar.exists():
+            os.remove(sidecar)
+
+
+def encoding_weights(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q-value}; q=0 entries are kept, they are refusals."""
+    weights = {}
+    for part in (header or "").split(","):
+        token, *params = part.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 1.0
+                if not 0.0 <= q <= 1.0:
+                    q = 1.0
+        weights[token] = q
+    return weights
+
+
+def accepted_encodings(header: Optional[str]) -> Set[str]:
+    return {token for token, q in encoding_weights(header).items() if q > 0}
+
+
+def is_not_modified(response_headers: Headers, request_headers: Headers) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        etag = response_headers.get("etag", "").removeprefix("W/")
+        return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+    if_modified_since = parsedate(request_headers.get("if-modified-since", ""))
+    last_modified = parsedate(response_headers.get("last-modified", ""))
+    return if_modified_since is not None and last_modified is not None and if_modified_since >= last_modified
+
+
+def cached_file_response(
+    path: Path,
+    request_headers: Headers,
+    stat_result: Optional[os.stat_result] = None,
+    media_type: Optional[str] = None,
+    status_code: int = 200,
+) -> Response:
+    """
+    FileResponse with caching headers, conditional GET and sidecar selection.
+    Range requests are handled by FileResponse itself.
+    """
+    path = Path(path)
+    if media_type is None:
+        guessed, encoding = guess_type(path.name)
+        # A sidecar requested by name is just bytes; don't label it as the decoded type
+        media_type = guessed if guessed and not encoding else "application/octet-stream"
+    etag = content_etag(path)
+    headers: Dict[str, str] = {"cache-control": IMMUTABLE_CACHE if etag else REVALIDATE_CACHE}
+
+    serve_path = path
+    if is_compressible(media_type):
+        headers["vary"] = "Accept-Encoding"
+        accepted = accepted_encodings(request_headers.get("accept-encoding"))
+        # A range of an encoded body is a range of the encoded bytes; keep ranges on the original
+        if accepted and "range" not in request_headers:
+            for encoding, suffix in SIDECARS:
+                sidecar = path.with_name(path.name + suffix)
+                if encoding in accepted and sidecar.is_file():
+                    serve_path, stat_result = sidecar, sidecar.stat()
+                    headers["content-encoding"] = encoding
+                    if etag:
+                        etag = f'{etag[:-1]}-{suffix[1:]}"'
+                    break
+
+    if stat_result is None:
+        stat_result = serve_path.stat()
+    if etag:
+        headers["etag"] = etag
+
+    response = FileResponse(
+        serve_path, status_code=status_code, headers=headers,
+        media_type=media_type, stat_result=stat_result,
+    )
+    if is_not_modified(response.headers, request_headers):
+        return NotModifiedResponse(response.headers)
+    return response
+
+
+class UploadFiles(StaticFiles):
+    """StaticFiles for the /uploads mount with the caching policy above."""
+
+    def file_response(
+        self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200
+    ) -> Response:
+        return cached_file_response(
+            Path(full_path), Headers(scope=scope), stat_result=stat_result, status_code=status_code
+        )
@@ -0,0 +1,350 @@
+# app/utils/translation.py
+"""
+Translation pipeline with a persistent translation memory.
+
+Lookup order for every distinct string in a request:
+    1. in-process LRU
+    2. `translation_memory` table (source text hash + language pair + backend)
+    3. the configured backend
+
+Only strings missing from both caches are sent to the backend, so translating
+a document set again only pays for new or edited strings. New translations are
+stored in batches of TRANSLATION_CHUNK_SIZE.
+
+`translate_stream` sends one request per string, at most
+TRANSLATION_CONCURRENCY in flight, each with a timeout and retries, yielding
+results as they complete. Backend calls run on a dedicated pool of
+TRANSLATION_WORKERS threads and pass TRANSLATION_TIMEOUT to their HTTP
+requests, so an attempt that times out also ends in its thread. Its database
+work runs in the threadpool, never on the event loop.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import anyio
+import requests
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.models.translation import TranslationMemory
+
+# Rows per IN (...) lookup against the translation memory
+MEMORY_LOOKUP_CHUNK = 500
+
+
+class TranslationBackend:
+    """Interface for translation services. Implementations must be thread-safe."""
+    name = "base"
+
+    def translate_one(self, text: str, source: str, target: str) -> str:
+        raise NotImplementedError
+
+
+class GoogleBackend(TranslationBackend):
+    """
+    Google Translate's mobile page, the endpoint deep-translator scrapes.
+    deep-translator calls requests without a timeout, so the page is fetched
+    here on a per-thread requests.Session with TRANSLATION_TIMEOUT and parsed
+    the same way.
+    """
+    name = "google"
+    url = "https://translate.google.com/m"
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    @staticmethod
+    def _code(language: str) -> str:
+        from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
+        return GOOGLE_LANGUAGES_TO_CODES.get(language.lower(), language)
+
+    def translate_one(self, text: str, source: str, target: str) -> str:
+        from bs4 import BeautifulSoup
+
+        source, target = self._code(source), self._code(target)
+        if source == target or not text.strip():
+            return text
+        response = self._session().get(
+            self.url, params={"sl": source, "tl": target, "q": text.strip()},
+            timeout=settings.TRANSLATION_TIMEOUT,
+        )
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, "html.parser")
+        element = soup.find("div", {"class": "t0"}) or soup.find("div", {"class": "result-container"})
+        if element is None:
+            raise ValueError("No translation found in the Google Translate response")
+        return element.get_text(strip=True)
+
+
+class LocalBackend(TranslationBackend):
+    """
+    Offline stand-in that returns the source text unchanged.
+    Lets the pipeline run without network access (tests, air-gapped installs).
+    """
+    name = "local"
+
+    def translate_one(self, text: str, source: str, target: str) -> str:
+        return text
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    LocalBackend.name: LocalBackend,
+}
+
+_backend: Optional[TranslationBackend] = None
+_memory_cache = LRUCache(maxsize=settings.TRANSLATION_CACHE_SIZE)
+
+# Wall-clock time of recent translation requests, for the stats endpoint
+_recent_latencies_ms = deque(maxlen=500)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_backend() -> TranslationBackend:
+    """Return the backend selected by TRANSLATION_BACKEND (created once per process)."""
+    global _backend
+    if _backend is None:
+        backend_cls = BACKENDS.get(settings.TRANSLATION_BACKEND.lower())
+        if backend_cls is None:
+            raise ValueError(f"Unknown translation backend: {settings.TRANSLATION_BACKEND}")
+        _backend = backend_cls()
+    return _backend
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.TRANSLATION_WORKERS, thread_name_prefix="translation"
+        )
+    return _executor
+
+
+def set_backend(backend: Optional[TranslationBackend]) -> None:
+    """Replace the active backend (None resets to the configured one)."""
+    global _backend
+    _backend = backend
+
+
+def source_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_stats() -> Dict[str, Optional[int]]:
+    return _memory_cache.stats()
+
+
+def record_latency(metrics: Dict[str, float]) -> None:
+    _recent_latencies_ms.append(metrics["elapsed_ms"])
+
+
+def latency_stats() -> Dict[str, Optional[float]]:
+    """Request latency percentiles over the most recent translation requests."""
+    samples = sorted(_recent_latencies_ms)
+    if not samples:
+        return {"requests": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+
+    def percentile(p: float) -> float:
+        return round(samples[min(len(samples) - 1, int(p * len(samples)))], 1)
+
+    return {
+        "requests": len(samples),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "max_ms": round(samples[-1], 1),
+    }
+
+
+def new_metrics(requested: int) -> Dict[str, float]:
+    return {
+        "requested": requested, "unique": 0, "cached": 0, "stored": 0,
+        "translated": 0, "failed": 0, "retries": 0,
+        "elapsed_ms": 0.0, "item_ms_avg": 0.0, "item_ms_max": 0.0,
+    }
+
+
+def _chunks(items: List, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _load_from_memory(
+    db: Session, hashes: List[str], source: str, target: str, backend: str
+) -> Dict[str, str]:
+    found = {}
+    for chunk in _chunks(hashes, MEMORY_LOOKUP_CHUNK):
+        rows = (
+            db.query(TranslationMemory.source_hash, TranslationMemory.translated_text)
+            .filter(
+                TranslationMemory.source_hash.in_(chunk),
+                TranslationMemory.source_lang == source,
+                TranslationMemory.target_lang == target,
+                TranslationMemory.backend == backend,
+            )
+            .all()
+        )
+        found.update(rows)
+    return found
+
+
+def _save_to_memory(db: Session, rows: List[TranslationMemory]) -> None:
+    if not rows:
+        return
+    try:
+        db.add_all(rows)
+        db.commit()
+    except IntegrityError:
+        # Another request stored some of these strings concurrently
+        db.rollback()
+        for row in rows:
+            db.merge(row)
+        db.commit()
+
+
+def _memory_row(text: str, digest: str, source: str, target: str, backend: str, translated: str):
+    return TranslationMemory(
+        source_hash=digest,
+        source_lang=source,
+        target_lang=target,
+        backend=backend,
+        source_text=text,
+        translated_text=translated,
+    )
+
+
+def _resolve_cached(
+    db: Session, texts: List[str], source: str, target: str,
+    backend: TranslationBackend, metrics: Dict[str, float],
+) -> Tuple[Dict[str, str], Dict[str, str], List[str]]:
+    """
+    Dedup `texts` and resolve what the LRU and the translation memory already know.
+
+    Returns:
+        Tuple of (hash per unique text, known translations, texts still missing)
+    """
+    # Dedup while preserving first-seen order; blanks are returned as-is
+    unique = [text for text in dict.fromkeys(texts) if text and text.strip()]
+    metrics["unique"] = len(unique)
+    hashes = {text: source_hash(text) for text in unique}
+    translations: Dict[str, str] = {}
+
+    missing = []
+    for text in unique:
+        cached = _memory_cache.get((hashes[text], source, target, backend.name))
+        if cached is not None:
+            translations[text] = cached
+        else:
+            missing.append(text)
+    metrics["cached"] = len(unique) - len(missing)
+
+    if missing:
+        stored = _load_from_memory(db, [hashes[t] for t in missing], source, target, backend.name)
+        still_missing = []
+        for text in missing:
+            translated = stored.get(hashes[text])
+            if translated is not None:
+                translations[text] = translated
+                _memory_cache.set((hashes[text], source, target, backend.name), translated)
+            else:
+                still_missing.append(text)
+        metrics["stored"] = len(missing) - len(still_missing)
+        missing = still_missing
+
+    return hashes, translations, missing
+
+
+async def _translate_with_retry(
+    backend: TranslationBackend, text: str, source: str, target: str,
+    semaphore: asyncio.Semaphore, metrics: Dict[str, float], item_ms: List[float],
+) -> Optional[str]:
+    """
+    Translate one string on the backend pool, bounded by `semaphore`, with a
+    per-attempt timeout and exponential backoff. Returns None if every attempt failed.
+    """
+    loop = asyncio.get_running_loop()
+    async with semaphore:
+        for attempt in range(settings.TRANSLATION_RETRIES + 1):
+            started = time.perf_counter()
+            try:
+                # On timeout a queued call is dropped; a running one ends at its HTTP timeout
+                translated = await asyncio.wait_for(
+                    loop.run_in_executor(_get_executor(), backend.translate_one, text, source, target),
+                    timeout=settings.TRANSLATION_TIMEOUT,
+                )
+                item_ms.append((time.perf_counter() - started) * 1000)
+                return translated if translated is not None else text
+            except Exception as e:
+                if attempt == settings.TRANSLATION_RETRIES:
+                    print(f"Translation failed after {attempt + 1} attempts: {e!r}")
+                    return None
+                metrics["retries"] += 1
+                await asyncio.sleep(settings.TRANSLATION_RETRY_BACKOFF * (2 ** attempt))
+
+
+async def translate_stream(
+    db: Session, texts: List[str], source: str, target: str, metrics: Dict[str, float]
+) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Yield (source text, translation) for every distinct string in `texts`,
+    cached ones first, then backend results in completion order.
+
+    Strings the backend could not translate are yielded unchanged and counted
+    in metrics["failed"]; they are not stored in the translation memory.
+    `metrics` is filled in as the stream progresses.
+    """
+    started = time.perf_counter()
+    backend = get_backend()
+    hashes, translations, missing = await run_in_threadpool(
+        _resolve_cached, db, texts, source, target, backend, metrics
+    )
+    for text, translated in translations.items():
+        yield text, translated
+
+    semaphore = asyncio.Semaphore(settings.TRANSLATION_CONCURRENCY)
+    item_ms: List[float] = []
+
+    async def worker(text: str) -> Tuple[str, Optional[str]]:
+        return text, await _translate_with_retry(backend, text, source, target, semaphore, metrics, item_ms)
+
+    tasks = [asyncio.create_task(worker(text)) for text in missing]
+    new_rows = []
+    try:
+        for completed in asyncio.as_completed(tasks):
+            text, translated = await completed
+            if translated is None:
+                metrics["failed"] += 1
+                yield text, text
+                continue
+            _memory_cache.set((hashes[text], source, target, backend.name), translated)
+            new_rows.append(_memory_row(text, hashes[text], source, target, backend.name, translated))
+            metrics["translated"] += 1
+            if len(new_rows) >= settings.TRANSLATION_CHUNK_SIZE:
+                await run_in_threadpool(_save_to_memory, db, new_rows)
+                new_rows = []
+            yield text, translated
+    finally:
+        # Client went away or the stream was closed early: stop outstanding work
+        for task in tasks:
+            task.cancel()
+        # Shielded: keep what was translated even if the request is being cancelled
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(_save_to_memory, db, new_rows)
+        if item_ms:
+            metrics["item_ms_avg"] = round(sum(item_ms) / len(item_ms), 1)
+            metrics["item_ms_max"] = round(max(item_ms), 1)
+        metrics["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
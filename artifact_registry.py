@@ -7,10 +7,12 @@ import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app.core.config import settings
+from app.utils.static_files import UploadFiles
+from app.utils import image_index
+from app.utils.compression import CompressionMiddleware
 from app.api.v1.router import api_router
 from app.db.session import SessionLocal
 from app.db.base import Base, engine
@@ -53,7 +55,11 @@ async def lifespan(app: FastAPI):
                 time.sleep(retry_delay)
             else:
                 print(f"Database connection failed after {max_retries} attempts: {e}")
+
+    # Keep stored image metadata in sync with the upload directory, off the request path
+    image_index.start_background_reconciler()
     yield
+    await image_index.stop_background_reconciler()
 
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
@@ -77,7 +83,7 @@ async def login(db: SessionLocal = Depends(deps.get_db), form_data: OAuth2Passwo
 
 # MOUNT UPLOADS
 UPLOAD_DIR = str(settings.UPLOAD_DIR.resolve())
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+app.mount("/uploads", UploadFiles(directory=UPLOAD_DIR), name="uploads")
 
 app.add_middleware(
     CORSMiddleware,
@@ -85,6 +91,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # read by clients for If-Match
 )
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(api_router, prefix="/api/v1")
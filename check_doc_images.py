@@ -1,18 +1,22 @@
-import psycopg2
-conn = psycopg2.connect('postgresql://admin@localhost:5433/registry')
-cur = conn.cursor()
-cur.execute("SELECT aid, title, content_text FROM documents LIMIT 20;")
-results = cur.fetchall()
-import re
-image_regex = r"!\[([^\]]*)\]\(([^)]+)\)"
-for row in results:
-    content = row[2] if row[2] is not None else ""
-    matches = re.findall(image_regex, content)
-    if matches:
-        print(f"AID: {row[0]}")
-        print(f"Title: {row[1]}")
-        for alt, src in matches:
-            print(f"  - Image: {src} (alt: {alt})")
-        print("-" * 50)
-cur.close()
-conn.close()
+"""List the uploaded images each document embeds, from the image reference index."""
+from app.db.base import SessionLocal
+from app.db.models.document import Document
+from app.db.models.image_reference import ImageReference
+
+db = SessionLocal()
+rows = (
+    db.query(Document.aid, Document.title, ImageReference.src, ImageReference.field)
+    .join(ImageReference, (ImageReference.source_type == "document") & (ImageReference.source_aid == Document.aid))
+    .order_by(Document.aid, ImageReference.id)
+    .all()
+)
+current = None
+for aid, title, src, field in rows:
+    if aid != current:
+        if current is not None:
+            print("-" * 50)
+        print(f"AID: {aid}")
+        print(f"Title: {title}")
+        current = aid
+    print(f"  - Image: {src} ({field})")
+db.close()
@@ -3,6 +3,8 @@ import { useState, useEffect } from 'react';
 import { useParams, useNavigate, Link, useLocation } from 'react-router-dom';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import MarkdownDisplay from './MarkdownDisplay';
+import RenderedDocument from './RenderedDocument';
+import DiagramImage from './DiagramImage';
 import { NeedsService, UseCasesService, RequirementsService, VisionService, LinkageService, ProjectsService, MetadataService } from '../client';
 import {
     ArrowLeft, Edit, ExternalLink, X, ChevronLeft, ChevronRight,
@@ -1029,7 +1031,15 @@ export default function ArtifactPresentation() {
                                                     diagramId={selectedLink.target_id}
                                                 />
                                             ) : (linkedArtifact.type === 'sequence' || linkedArtifact.type === 'mermaid') ? (
-                                                <SequenceDiagramEditor diagramId={selectedLink.target_id} readOnly={true} />
+                                                <DiagramImage
+                                                    diagramId={selectedLink.target_id}
+                                                    fallback={<SequenceDiagramEditor diagramId={selectedLink.target_id} readOnly={true} />}
+                                                />
+                                            ) : linkedArtifact.type === 'plantuml' ? (
+                                                <DiagramImage
+                                                    diagramId={selectedLink.target_id}
+                                                    fallback={<ComponentDiagram diagramId={selectedLink.target_id} readOnly={true} />}
+                                                />
                                             ) : (
                                                 <ComponentDiagram diagramId={selectedLink.target_id} readOnly={true} />
                                             )}
@@ -1414,7 +1424,17 @@ function NeedPresentation({ artifact, selectedField, highlightedField, onFieldCl
 }
 
 function UseCasePresentation({ artifact, selectedField, highlightedField, onFieldClick }: PresentationProps) {
-    const sequencePuml = generateSequenceDiagram(artifact.mss, artifact.extensions, artifact.exceptions);
+    // Generated and cached on the server per edit; the local generator covers the first paint
+    const { data: serverSequence } = useQuery({
+        queryKey: ['use-case-sequence', artifact.aid, artifact.last_updated],
+        queryFn: async () => {
+            const response = await fetch(`/api/v1/use_case/use-cases/${encodeURIComponent(artifact.aid)}/sequence`, { cache: 'no-cache' });
+            return response.ok ? await response.json() : null;
+        },
+        enabled: !!artifact.aid,
+        staleTime: Infinity,
+    });
+    const sequencePuml = serverSequence?.source ?? generateSequenceDiagram(artifact.mss, artifact.extensions, artifact.exceptions);
     const statePuml = generateStateDiagram(artifact);
     const [expandedDiagram, setExpandedDiagram] = useState<'state' | 'sequence' | null>(null);
     const isFieldActive = (field: string) => selectedField === field || highlightedField === field;
@@ -1782,7 +1802,11 @@ function DocumentPresentation({ artifact, selectedField, onFieldClick }: Present
                 <div className="mt-4">
                     <SelectableField fieldId="content_text" label="Document Content" isActive={selectedField === 'content_text'} onClick={onFieldClick}>
                         <div className="p-6 bg-white border border-slate-200 rounded-lg shadow-sm">
-                            <MarkdownDisplay content={artifact.content_text || artifact.text || '*No content.*'} />
+                            {artifact.aid && artifact.content_text ? (
+                                <RenderedDocument aid={artifact.aid} content={artifact.content_text} version={artifact.last_updated} />
+                            ) : (
+                                <MarkdownDisplay content={artifact.content_text || artifact.text || '*No content.*'} />
+                            )}
                         </div>
                     </SelectableField>
                 </div>
@@ -29,7 +29,8 @@ import {
     AlignVerticalJustifyCenter,
     AlignVerticalJustifyEnd,
     Tag,
-    Activity
+    Activity,
+    Network
 } from 'lucide-react';
 import { useParams } from 'react-router-dom';
 import { toPng, toSvg } from 'html-to-image';
@@ -126,6 +127,40 @@ const getLayoutedElements = (nodes: any[], edges: any[], direction = 'TB') => {
     return { nodes, edges };
 };
 
+// Apply one versioned delta (a write response or an entry of /changes) to a cached diagram.
+// Handles that are null in an edge delta keep their current value, like on the server.
+const applyDiagramChange = (diagram: any, change: any) => {
+    if (!diagram || change.version <= diagram.layout_version) return diagram;
+    const removed = new Set<string>(change.removed_nodes || []);
+    const components = new Map<string, any>();
+    (diagram.components || []).forEach((c: any) => {
+        if (!removed.has(c.component_id)) components.set(c.component_id, c);
+    });
+    (change.nodes || []).forEach((n: any) => {
+        components.set(n.component_id, { ...components.get(n.component_id), diagram_id: diagram.id, ...n });
+    });
+    const edges = new Map<string, any>();
+    (diagram.edges || []).forEach((e: any) => edges.set(`${e.source_id}->${e.target_id}`, e));
+    (change.edges || []).forEach((e: any) => {
+        const key = `${e.source_id}->${e.target_id}`;
+        const current = edges.get(key) || {};
+        edges.set(key, {
+            ...current,
+            diagram_id: diagram.id,
+            source_id: e.source_id,
+            target_id: e.target_id,
+            source_handle: e.source_handle ?? current.source_handle ?? null,
+            target_handle: e.target_handle ?? current.target_handle ?? null,
+        });
+    });
+    return {
+        ...diagram,
+        layout_version: change.version,
+        components: Array.from(components.values()),
+        edges: Array.from(edges.values()),
+    };
+};
+
 interface ComponentDiagramProps {
     diagramId?: string;
     readOnly?: boolean;
@@ -168,28 +203,95 @@ export default function ComponentDiagram({ diagramId: propDiagramId, readOnly =
         }
     }, [diagram, allComponents, diagramId]);
 
+    // Our own writes answer with the delta; apply it unless someone else wrote
+    // in between, in which case the change feed below catches up in order.
+    const applyLayoutDelta = useCallback((delta: any) => {
+        const current: any = queryClient.getQueryData(['diagram', diagramId]);
+        if (current && delta.version === current.layout_version + 1) {
+            queryClient.setQueryData(['diagram', diagramId], applyDiagramChange(current, delta));
+        } else {
+            queryClient.invalidateQueries({ queryKey: ['diagram-changes', diagramId] });
+        }
+    }, [queryClient, diagramId]);
+
+    // Pull other editors' changes as small deltas instead of reloading the diagram
+    useQuery({
+        queryKey: ['diagram-changes', diagramId],
+        queryFn: async () => {
+            const current: any = queryClient.getQueryData(['diagram', diagramId]);
+            if (!current) return null;
+            const response = await axios.get(`/api/v1/diagrams/${diagramId}/changes`, {
+                params: { since: current.layout_version },
+            });
+            if (response.data.reset) {
+                queryClient.invalidateQueries({ queryKey: ['diagram', diagramId] });
+            } else if (response.data.changes.length) {
+                queryClient.setQueryData(['diagram', diagramId], (old: any) =>
+                    response.data.changes.reduce(applyDiagramChange, old));
+            }
+            return response.data.version;
+        },
+        enabled: !!diagramId && !!diagram,
+        // Project events trigger a refetch on change; polling is the fallback
+        refetchInterval: 30000,
+    });
+
     const updateComponentMutation = useMutation({
         mutationFn: async ({ id, data }: { id: string; data: any }) => {
             if (diagramId) {
                 // Update diagram-specific position
-                await axios.put(`/api/v1/diagrams/${diagramId}/components/${id}`, {
+                const response = await axios.put(`/api/v1/diagrams/${diagramId}/components/${id}`, {
                     x: data.x,
                     y: data.y
                 });
+                return response.data;
             } else {
                 // Update global position (legacy)
                 await ComponentService.updateComponentApiV1ComponentsComponentIdPut(id, data);
             }
         },
-        onSuccess: () => {
+        onSuccess: (delta) => {
             if (diagramId) {
-                queryClient.invalidateQueries({ queryKey: ['diagram', diagramId] });
+                applyLayoutDelta(delta);
             } else {
                 queryClient.invalidateQueries({ queryKey: ['components'] });
             }
         },
     });
 
+    // Save every node of a (group) drag in one request. The layout_version
+    // we last saw guards against overwriting someone else's layout.
+    const saveLayoutMutation = useMutation({
+        mutationFn: async (positions: { component_id: string; x: number; y: number }[]) => {
+            const response = await axios.patch(`/api/v1/diagrams/${diagramId}/layout`, {
+                version: diagram?.layout_version,
+                nodes: positions,
+            });
+            return response.data;
+        },
+        onSuccess: (delta) => applyLayoutDelta(delta),
+        onError: (error: any) => {
+            if (error?.response?.status === 409) {
+                alert('This diagram was changed by someone else. It has been reloaded; please redo your move.');
+            }
+            queryClient.invalidateQueries({ queryKey: ['diagram', diagramId] });
+        },
+    });
+
+    // Server-side layout of the whole diagram (layered compositions, force-directed links)
+    const autoLayoutMutation = useMutation({
+        mutationFn: async () => {
+            const response = await axios.post(`/api/v1/diagrams/${diagramId}/layout/auto`, {
+                version: diagram?.layout_version,
+            });
+            return response.data;
+        },
+        onSuccess: (delta) => applyLayoutDelta(delta),
+        onError: () => {
+            queryClient.invalidateQueries({ queryKey: ['diagram', diagramId] });
+        },
+    });
+
     // Mutation to add/remove components from diagram
     const toggleComponentInDiagramMutation = useMutation({
         mutationFn: async ({ componentId, action }: { componentId: string; action: 'add' | 'remove' }) => {
@@ -197,23 +299,25 @@ export default function ComponentDiagram({ diagramId: propDiagramId, readOnly =
 
             if (action === 'add') {
                 // Add with default position (0,0)
-                await axios.put(`/api/v1/diagrams/${diagramId}/components/${componentId}`, {
+                const response = await axios.put(`/api/v1/diagrams/${diagramId}/components/${componentId}`, {
                     x: 0,
                     y: 0
                 });
+                return response.data;
             } else {
-                await axios.delete(`/api/v1/diagrams/${diagramId}/components/${componentId}`);
+                const response = await axios.delete(`/api/v1/diagrams/${diagramId}/components/${componentId}`);
+                return response.data;
             }
         },
-        onSuccess: () => {
-            queryClient.invalidateQueries({ queryKey: ['diagram', diagramId] });
+        onSuccess: (delta) => {
+            if (delta) applyLayoutDelta(delta);
         }
     });
 
     const updateEdgeMutation = useMutation({
         mutationFn: async ({ sourceId, targetId, sourceHandle, targetHandle }: { sourceId: string; targetId: string; sourceHandle: string; targetHandle: string }) => {
             if (!diagramId) return;
-            await axios.put(
+            const response = await axios.put(
                 `/api/v1/diagrams/${diagramId}/edges`,
                 {
                     source_handle: sourceHandle,
@@ -226,11 +330,10 @@ export default function ComponentDiagram({ diagramId: propDiagramId, readOnly =
                     }
                 }
             );
+            return response.data;
         },
-        onSuccess: () => {
-            // We don't necessarily need to invalidate immediately as local state updates first, 
-            // but it's good for consistency.
-            // queryClient.invalidateQueries({ queryKey: ['diagram', diagramId] });
+        onSuccess: (delta) => {
+            if (delta) applyLayoutDelta(delta);
         }
     });
 
@@ -373,13 +476,21 @@ export default function ComponentDiagram({ diagramId: propDiagramId, readOnly =
     );
 
     const onNodeDragStop = useCallback(
-        (_: React.MouseEvent, node: Node) => {
+        (_: React.MouseEvent, node: Node, draggedNodes: Node[]) => {
+            if (diagramId) {
+                saveLayoutMutation.mutate((draggedNodes?.length ? draggedNodes : [node]).map((n) => ({
+                    component_id: n.id,
+                    x: Math.round(n.position.x),
+                    y: Math.round(n.position.y),
+                })));
+                return;
+            }
             updateComponentMutation.mutate({
                 id: node.id,
                 data: { x: Math.round(node.position.x), y: Math.round(node.position.y) }
             });
         },
-        [updateComponentMutation]
+        [diagramId, saveLayoutMutation, updateComponentMutation]
     );
 
     const onEdgeUpdate = useCallback(
@@ -602,6 +713,16 @@ export default function ComponentDiagram({ diagramId: propDiagramId, readOnly =
                                 <button onClick={() => alignNodes('middle')} className="p-2 hover:bg-slate-50 text-slate-600" title="Align Middle"><AlignVerticalJustifyCenter className="w-4 h-4" /></button>
                                 <button onClick={() => alignNodes('bottom')} className="p-2 hover:bg-slate-50 text-slate-600" title="Align Bottom"><AlignVerticalJustifyEnd className="w-4 h-4" /></button>
                             </div>
+                            {diagramId && (
+                                <button
+                                    onClick={() => autoLayoutMutation.mutate()}
+                                    disabled={autoLayoutMutation.isPending}
+                                    className="bg-white p-2 rounded shadow border border-slate-200 hover:bg-slate-50 text-slate-600 flex items-center gap-1 text-sm font-medium disabled:opacity-50"
+                                    title="Arrange all components automatically"
+                                >
+                                    <Network className="w-4 h-4" /> Auto layout
+                                </button>
+                            )}
                             <button
                                 onClick={() => setShowFilter(!showFilter)}
                                 className={`p-2 rounded-md shadow-sm border ${showFilter ? 'bg-blue-50 border-blue-200 text-blue-600' : 'bg-white border-slate-200 text-slate-600'} hover:bg-slate-50`}
@@ -0,0 +1,31 @@
+import React, { useState } from 'react';
+
+interface DiagramImageProps {
+    diagramId: string;
+    fallback?: React.ReactNode;   // shown if the server cannot render (no renderer configured, or unreachable)
+    className?: string;
+}
+
+// Mermaid/PlantUML diagram laid out on the server and cached per source version.
+// The browser revalidates by ETag, so an unchanged diagram costs a 304.
+const DiagramImage: React.FC<DiagramImageProps> = ({ diagramId, fallback, className }) => {
+    const [failed, setFailed] = useState(false);
+
+    if (failed && fallback) {
+        return <>{fallback}</>;
+    }
+
+    return (
+        <div className={`w-full h-full overflow-auto bg-white flex items-start justify-center p-4 ${className || ''}`}>
+            <img
+                src={`/api/v1/diagrams/${encodeURIComponent(diagramId)}/svg`}
+                alt="Diagram"
+                loading="lazy"
+                className="max-w-full h-auto"
+                onError={() => setFailed(true)}
+            />
+        </div>
+    );
+};
+
+export default DiagramImage;
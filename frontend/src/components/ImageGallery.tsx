@@ -10,6 +10,8 @@ interface ImageFile {
     url: string;
     size: number;
     created: number;
+    thumbnail_url?: string;
+    srcset?: string | null;
     project_id?: string;
 }
 
@@ -158,8 +160,9 @@ const ImageGallery: React.FC = () => {
                         <div key={image.url} className="group bg-white rounded-lg border border-slate-200 shadow-sm hover:shadow-md transition-all overflow-hidden">
                             <div className="aspect-video bg-slate-100 relative overflow-hidden flex items-center justify-center p-2">
                                 <img
-                                    src={image.url}
+                                    src={image.thumbnail_url || image.url}
                                     alt={image.filename}
+                                    loading="lazy"
                                     className="object-contain w-full h-full"
                                 />
                                 <div className="absolute inset-0 bg-black/50 opacity-0 group-hover:opacity-100 transition-opacity flex items-center justify-center gap-2">
@@ -1,9 +1,11 @@
 
 import SidePanel from './SidePanel';
 import { Outlet, useParams } from 'react-router-dom';
+import { useProjectEvents } from '../utils/projectEvents';
 
 export default function ProjectLayout() {
     const { projectId } = useParams<{ projectId: string }>();
+    useProjectEvents(projectId);
     if (!projectId) return null;
 
     return (
@@ -0,0 +1,94 @@
+import React, { useEffect, useRef } from 'react';
+import { createRoot, Root } from 'react-dom/client';
+import { useQuery } from '@tanstack/react-query';
+import katex from 'katex';
+import 'katex/dist/katex.min.css';
+
+import MarkdownDisplay from './MarkdownDisplay';
+import MermaidBlock from './MermaidBlock';
+import PlantUMLBlock from './PlantUMLBlock';
+
+interface RenderedDocumentProps {
+    aid: string;
+    content: string;         // raw Markdown, rendered client-side if the server cannot
+    version?: string;        // e.g. last_updated; refetches after an edit
+}
+
+interface RenderedMarkdown {
+    aid: string;
+    content_hash: string;
+    html: string;
+}
+
+// Server-rendered document body (cached per content hash, revalidated by ETag).
+// Diagram fences and math arrive as placeholders and are hydrated here.
+const RenderedDocument: React.FC<RenderedDocumentProps> = ({ aid, content, version }) => {
+    const containerRef = useRef<HTMLDivElement>(null);
+
+    const { data, isError, isLoading } = useQuery<RenderedMarkdown>({
+        queryKey: ['document-rendered', aid, version],
+        queryFn: async () => {
+            // no-cache: let the browser revalidate with If-None-Match and reuse the body on 304
+            const response = await fetch(`/api/v1/documents/${encodeURIComponent(aid)}/rendered`, { cache: 'no-cache' });
+            if (!response.ok) throw new Error(`Render failed: ${response.status}`);
+            return response.json();
+        },
+        retry: false,
+        staleTime: Infinity,
+    });
+
+    useEffect(() => {
+        const container = containerRef.current;
+        if (!container || !data) return;
+        const roots: Root[] = [];
+
+        container.querySelectorAll('pre > code.language-mermaid, pre > code.language-plantuml').forEach((code) => {
+            const pre = code.parentElement as HTMLElement;
+            const source = (code.textContent || '').replace(/\n$/, '');
+            const mount = document.createElement('div');
+            mount.className = 'not-prose';
+            pre.replaceWith(mount);
+            const root = createRoot(mount);
+            root.render(code.classList.contains('language-mermaid')
+                ? <MermaidBlock chart={source} />
+                : <PlantUMLBlock code={source} />);
+            roots.push(root);
+        });
+
+        container.querySelectorAll<HTMLElement>('.math').forEach((el) => {
+            katex.render(el.textContent || '', el, {
+                displayMode: el.classList.contains('block'),
+                throwOnError: false,
+            });
+        });
+
+        return () => roots.forEach((root) => root.unmount());
+    }, [data]);
+
+    if (isError) {
+        return <MarkdownDisplay content={content} />;
+    }
+    if (isLoading || !data) {
+        return <div className="text-slate-400 italic">Loading…</div>;
+    }
+
+    return (
+        <div
+            ref={containerRef}
+            className="markdown-content prose prose-slate max-w-none
+                prose-headings:text-slate-900 prose-headings:font-bold prose-headings:mt-8 prose-headings:mb-4
+                prose-h1:text-3xl prose-h2:text-2xl prose-h3:text-xl
+                prose-p:text-slate-700 prose-p:leading-relaxed prose-p:mb-4
+                prose-ol:list-decimal prose-ol:pl-8 prose-ol:mb-4
+                prose-ul:list-disc prose-ul:pl-8 prose-ul:mb-4
+                prose-li:text-slate-700 prose-li:mb-2
+                prose-img:rounded-xl prose-headings:border-b prose-headings:pb-2
+                prose-a:text-blue-600 prose-blockquote:border-l-4 prose-blockquote:border-slate-300
+                prose-blockquote:bg-slate-50 prose-blockquote:py-2 prose-blockquote:px-6 prose-blockquote:not-italic"
+            // Sanitized server-side (nh3)
+            dangerouslySetInnerHTML={{ __html: data.html }}
+        />
+    );
+};
+
+export default RenderedDocument;
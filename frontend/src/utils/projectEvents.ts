@@ -0,0 +1,56 @@
+import { useEffect } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+
+interface ProjectEvent {
+    type: string;           // "<entity>.<action>" or "resync"
+    entity?: string;
+    action?: string;
+    key?: string;
+    version?: number;
+}
+
+// Query key prefixes that hold data for each entity type
+const ENTITY_QUERIES: Record<string, string[]> = {
+    vision: ['vision', 'visions'],
+    need: ['needs'],
+    use_case: ['use_cases', 'useCases', 'use-case-sequence'],
+    requirement: ['requirements'],
+    document: ['documents', 'document-rendered'],
+    linkage: ['linkages'],
+    comment: ['comments'],
+    diagram: ['diagrams', 'diagram'],
+};
+const ARTIFACT_QUERIES = ['artifact', 'artifacts', 'statistics', 'linkages'];
+
+// Keeps the cached queries of a project fresh from its server-sent event stream.
+export function useProjectEvents(projectId: string | undefined) {
+    const queryClient = useQueryClient();
+
+    useEffect(() => {
+        if (!projectId) return;
+        // EventSource reconnects by itself and sends Last-Event-ID, so missed events are replayed
+        const source = new EventSource(`/api/v1/projects/${encodeURIComponent(projectId)}/events/stream`);
+
+        source.onmessage = (message) => {
+            const event: ProjectEvent = JSON.parse(message.data);
+            if (event.type === 'resync' || !event.entity) {
+                queryClient.invalidateQueries();
+                return;
+            }
+            if (event.entity === 'diagram' && event.action === 'changed') {
+                // Node/edge edits: the open diagram pulls the delta
+                queryClient.invalidateQueries({ queryKey: ['diagram-changes', event.key] });
+                return;
+            }
+            const prefixes = new Set(ENTITY_QUERIES[event.entity] || []);
+            if (event.entity !== 'comment' && event.entity !== 'diagram') {
+                ARTIFACT_QUERIES.forEach((prefix) => prefixes.add(prefix));
+            }
+            queryClient.invalidateQueries({
+                predicate: (query) => prefixes.has(String(query.queryKey[0])),
+            });
+        };
+
+        return () => source.close();
+    }, [projectId, queryClient]);
+}
@@ -0,0 +1,34 @@
+"""index requirement ears components
+
+Revision ID: 0b3f6e2a9c14
+Revises: 5672533869e5
+Create Date: 2026-10-19 11:02:17.530114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b3f6e2a9c14'
+down_revision: Union[str, Sequence[str], None] = '5672533869e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EARS_COLUMNS = ('ears_trigger', 'ears_state', 'ears_condition', 'ears_feature')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Hash indexes: equality lookups only, and no btree key size limit on long clauses.
+    # Existing rows are filled by scripts/maintenance/backfill_ears_components.py
+    for column in EARS_COLUMNS:
+        op.create_index(f'ix_requirements_{column}', 'requirements', [column], unique=False, postgresql_using='hash')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in EARS_COLUMNS:
+        op.drop_index(f'ix_requirements_{column}', table_name='requirements')
@@ -0,0 +1,46 @@
+"""add content-addressed blob store
+
+Revision ID: 3d7c1a9e5b20
+Revises: 9bbdac3ce288
+Create Date: 2026-10-19 15:12:41.804113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d7c1a9e5b20'
+down_revision: Union[str, Sequence[str], None] = '9bbdac3ce288'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('mime_type', sa.String(), nullable=True),
+        sa.Column('refcount', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index(op.f('ix_blobs_refcount'), 'blobs', ['refcount'], unique=False)
+
+    op.add_column('images', sa.Column('blob_sha256', sa.String(length=64), nullable=True))
+    op.create_foreign_key('images_blob_sha256_fkey', 'images', 'blobs', ['blob_sha256'], ['sha256'])
+    op.create_index(op.f('ix_images_blob_sha256'), 'images', ['blob_sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_images_blob_sha256'), table_name='images')
+    op.drop_constraint('images_blob_sha256_fkey', 'images', type_='foreignkey')
+    op.drop_column('images', 'blob_sha256')
+    op.drop_index(op.f('ix_blobs_refcount'), table_name='blobs')
+    op.drop_table('blobs')
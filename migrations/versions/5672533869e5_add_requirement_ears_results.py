@@ -0,0 +1,49 @@
+"""add requirement_ears_results
+
+Revision ID: 5672533869e5
+Revises: db43ad1b0017
+Create Date: 2026-10-19 09:12:41.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5672533869e5'
+down_revision: Union[str, Sequence[str], None] = 'db43ad1b0017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Reuse the enum type already created for requirements.ears_type
+    ears_type = postgresql.ENUM(
+        'UBIQUITOUS', 'EVENT_DRIVEN', 'UNWANTED_BEHAVIOR', 'STATE_DRIVEN', 'OPTIONAL_FEATURE', 'COMPLEX',
+        name='earstype', create_type=False
+    )
+    op.create_table(
+        'requirement_ears_results',
+        sa.Column('requirement_aid', sa.String(), nullable=False),
+        sa.Column('project_id', sa.String(), nullable=False),
+        sa.Column('text_hash', sa.String(length=64), nullable=False),
+        sa.Column('ears_type', ears_type, nullable=False),
+        sa.Column('valid', sa.Boolean(), nullable=False),
+        sa.Column('detected_pattern', sa.String(), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('source_updated', sa.DateTime(), nullable=True),
+        sa.Column('checked_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['requirement_aid'], ['requirements.aid'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('requirement_aid')
+    )
+    op.create_index(op.f('ix_requirement_ears_results_project_id'), 'requirement_ears_results', ['project_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_requirement_ears_results_project_id'), table_name='requirement_ears_results')
+    op.drop_table('requirement_ears_results')
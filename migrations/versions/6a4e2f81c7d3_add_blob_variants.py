@@ -0,0 +1,28 @@
+"""add blob image variants
+
+Revision ID: 6a4e2f81c7d3
+Revises: 3d7c1a9e5b20
+Create Date: 2026-10-19 16:05:12.342871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a4e2f81c7d3'
+down_revision: Union[str, Sequence[str], None] = '3d7c1a9e5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('blobs', sa.Column('variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('blobs', 'variants')
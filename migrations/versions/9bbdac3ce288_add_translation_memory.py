@@ -0,0 +1,38 @@
+"""add translation_memory
+
+Revision ID: 9bbdac3ce288
+Revises: 0b3f6e2a9c14
+Create Date: 2026-10-19 13:40:55.187402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9bbdac3ce288'
+down_revision: Union[str, Sequence[str], None] = '0b3f6e2a9c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'translation_memory',
+        sa.Column('source_hash', sa.String(length=64), nullable=False),
+        sa.Column('source_lang', sa.String(), nullable=False),
+        sa.Column('target_lang', sa.String(), nullable=False),
+        sa.Column('backend', sa.String(), nullable=False),
+        sa.Column('source_text', sa.Text(), nullable=False),
+        sa.Column('translated_text', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('source_hash', 'source_lang', 'target_lang', 'backend')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('translation_memory')
@@ -0,0 +1,59 @@
+"""add artifact changes
+
+Revision ID: a7d4c9e2f518
+Revises: f3c6e2a9b714
+Create Date: 2026-10-19 22:08:52.340117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d4c9e2f518'
+down_revision: Union[str, Sequence[str], None] = 'f3c6e2a9b714'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = (
+    ('vision', 'visions'),
+    ('need', 'needs'),
+    ('use_case', 'use_cases'),
+    ('requirement', 'requirements'),
+    ('document', 'documents'),
+    ('linkage', 'linkages'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Compacted change log served by GET /projects/{id}/changes
+    op.create_table(
+        'artifact_changes',
+        sa.Column('seq', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('project_id', sa.String(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('seq'),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('uq_artifact_changes_entity_key', 'artifact_changes', ['entity', 'key'], unique=True)
+    op.create_index('ix_artifact_changes_project_seq', 'artifact_changes', ['project_id', 'seq'])
+
+    # Existing rows enter the feed as created, so since=0 lists everything
+    for entity, table in BACKFILL:
+        op.execute(
+            f"INSERT INTO artifact_changes (project_id, entity, key, action) "
+            f"SELECT project_id, '{entity}', aid, 'created' FROM {table}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_artifact_changes_project_seq', table_name='artifact_changes')
+    op.drop_index('uq_artifact_changes_entity_key', table_name='artifact_changes')
+    op.drop_table('artifact_changes')
@@ -0,0 +1,36 @@
+"""add linkage coverage indexes
+
+Revision ID: b5e8d1f3a926
+Revises: a7d4c9e2f518
+Create Date: 2026-10-20 09:14:27.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8d1f3a926'
+down_revision: Union[str, Sequence[str], None] = 'a7d4c9e2f518'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Anti-joins of the coverage report (/reports/coverage/{project_id})
+    op.create_index(
+        'ix_linkages_project_source', 'linkages',
+        ['project_id', 'relationship_type', 'source_artifact_type', 'source_id'],
+    )
+    op.create_index(
+        'ix_linkages_project_target', 'linkages',
+        ['project_id', 'relationship_type', 'target_artifact_type', 'target_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_linkages_project_target', table_name='linkages')
+    op.drop_index('ix_linkages_project_source', table_name='linkages')
@@ -0,0 +1,41 @@
+"""add image metadata columns
+
+Revision ID: b81f0c2d4e6a
+Revises: 6a4e2f81c7d3
+Create Date: 2026-10-19 17:20:33.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f0c2d4e6a'
+down_revision: Union[str, Sequence[str], None] = '6a4e2f81c7d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('images', sa.Column('size', sa.BigInteger(), nullable=True))
+    op.add_column('images', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('images', sa.Column('height', sa.Integer(), nullable=True))
+    op.add_column('images', sa.Column('mime_type', sa.String(), nullable=True))
+    op.add_column('images', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.add_column('images', sa.Column('file_mtime', sa.Float(), nullable=True))
+    op.add_column('images', sa.Column('missing', sa.Boolean(), server_default='false', nullable=False))
+    op.add_column('images', sa.Column('checked_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_images_sha256'), 'images', ['sha256'], unique=False)
+    # Gallery pages are ordered newest first
+    op.create_index('ix_images_project_created', 'images', ['project_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_images_project_created', table_name='images')
+    op.drop_index(op.f('ix_images_sha256'), table_name='images')
+    for column in ('checked_at', 'missing', 'file_mtime', 'sha256', 'mime_type', 'height', 'width', 'size'):
+        op.drop_column('images', column)
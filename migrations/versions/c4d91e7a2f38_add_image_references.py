@@ -0,0 +1,48 @@
+"""add image reference index
+
+Revision ID: c4d91e7a2f38
+Revises: b81f0c2d4e6a
+Create Date: 2026-10-19 18:02:47.530916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d91e7a2f38'
+down_revision: Union[str, Sequence[str], None] = 'b81f0c2d4e6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'image_references',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('source_type', sa.String(), nullable=False),
+        sa.Column('source_aid', sa.String(), nullable=False),
+        sa.Column('field', sa.String(), nullable=False),
+        sa.Column('project_id', sa.String(), nullable=True),
+        sa.Column('filename', sa.String(), nullable=True),
+        sa.Column('blob_sha256', sa.String(length=64), nullable=True),
+        sa.Column('src', sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_image_references_source', 'image_references', ['source_type', 'source_aid'], unique=False)
+    op.create_index(op.f('ix_image_references_project_id'), 'image_references', ['project_id'], unique=False)
+    op.create_index(op.f('ix_image_references_filename'), 'image_references', ['filename'], unique=False)
+    op.create_index(op.f('ix_image_references_blob_sha256'), 'image_references', ['blob_sha256'], unique=False)
+    # Filled by scripts/maintenance/rebuild_image_references.py
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_image_references_blob_sha256'), table_name='image_references')
+    op.drop_index(op.f('ix_image_references_filename'), table_name='image_references')
+    op.drop_index(op.f('ix_image_references_project_id'), table_name='image_references')
+    op.drop_index('ix_image_references_source', table_name='image_references')
+    op.drop_table('image_references')
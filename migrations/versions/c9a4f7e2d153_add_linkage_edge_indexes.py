@@ -0,0 +1,45 @@
+"""add linkage edge indexes
+
+Revision ID: c9a4f7e2d153
+Revises: b5e8d1f3a926
+Create Date: 2026-10-20 11:02:46.903518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9a4f7e2d153'
+down_revision: Union[str, Sequence[str], None] = 'b5e8d1f3a926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EDGE = 'source_id, relationship_type, target_artifact_type, target_id, source_artifact_type'
+# Duplicate edges except the one with the smallest aid
+DUPLICATES = (
+    f"SELECT aid FROM linkages WHERE aid NOT IN (SELECT MIN(aid) FROM linkages GROUP BY {EDGE})"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicate edges, leaving tombstones in the change feed (app/utils/change_feed.py)
+    op.execute(f"DELETE FROM artifact_changes WHERE entity = 'linkage' AND key IN ({DUPLICATES})")
+    op.execute(
+        "INSERT INTO artifact_changes (project_id, entity, key, action) "
+        f"SELECT project_id, 'linkage', aid, 'deleted' FROM linkages WHERE aid IN ({DUPLICATES})"
+    )
+    op.execute(f"DELETE FROM linkages WHERE aid IN ({DUPLICATES})")
+
+    # Leads with source_id: also serves outgoing links and source link lookups
+    op.create_index('uq_linkages_edge', 'linkages', EDGE.split(', '), unique=True)
+    # Target side of "source_id = :aid OR target_id = :aid" on artifact deletes
+    op.create_index('ix_linkages_target', 'linkages', ['target_id', 'relationship_type', 'source_artifact_type'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_linkages_target', table_name='linkages')
+    op.drop_index('uq_linkages_edge', table_name='linkages')
@@ -0,0 +1,35 @@
+"""add rendered markdown cache
+
+Revision ID: d2a7f5c8e913
+Revises: c4d91e7a2f38
+Create Date: 2026-10-19 18:41:09.274183
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7f5c8e913'
+down_revision: Union[str, Sequence[str], None] = 'c4d91e7a2f38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'rendered_markdown',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('renderer', sa.String(), nullable=False),
+        sa.Column('html', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('content_hash'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rendered_markdown')
@@ -0,0 +1,29 @@
+"""add diagram layout version
+
+Revision ID: e5b8a3d1c046
+Revises: d2a7f5c8e913
+Create Date: 2026-10-19 19:26:52.804417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8a3d1c046'
+down_revision: Union[str, Sequence[str], None] = 'd2a7f5c8e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Optimistic concurrency for layout edits (PATCH /diagrams/{id}/layout)
+    op.add_column('diagrams', sa.Column('layout_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('diagrams', 'layout_version')
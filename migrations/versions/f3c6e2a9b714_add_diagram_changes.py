@@ -0,0 +1,37 @@
+"""add diagram changes
+
+Revision ID: f3c6e2a9b714
+Revises: e5b8a3d1c046
+Create Date: 2026-10-19 20:41:13.216504
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c6e2a9b714'
+down_revision: Union[str, Sequence[str], None] = 'e5b8a3d1c046'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Per-version node/edge deltas served by GET /diagrams/{id}/changes
+    op.create_table(
+        'diagram_changes',
+        sa.Column('diagram_id', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['diagram_id'], ['diagrams.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('diagram_id', 'version'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('diagram_changes')
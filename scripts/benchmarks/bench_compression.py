@@ -0,0 +1,79 @@
+"""
+Measure response compression on the main list and export endpoints.
+
+Fills an in-memory SQLite database (same data as bench_list_serialization)
+and requests each endpoint with Accept-Encoding identity, gzip and br (br
+only if the brotli package is installed), reporting the bytes on the wire
+and the request time.
+
+Usage:
+    python scripts/benchmarks/bench_compression.py [rows]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from artifact_registry import app
+from app.api import deps
+from app.db.base import Base
+from app.db.session import get_db
+from app.utils import compression
+from bench_list_serialization import PROJECT, populate
+
+ENDPOINTS = (
+    ("requirements", f"/api/v1/requirement/requirements/?project_id={PROJECT}"),
+    ("needs", f"/api/v1/need/needs/?project_id={PROJECT}"),
+    ("use cases", f"/api/v1/use_case/use-cases/?project_id={PROJECT}"),
+    ("visions", f"/api/v1/vision/vision-statements/?project_id={PROJECT}"),
+    ("documents", f"/api/v1/documents/?project_id={PROJECT}&limit=1000000"),
+    ("export", f"/api/v1/projects/{PROJECT}/export"),
+)
+
+
+def wire_bytes(client, url, encoding):
+    start = time.perf_counter()
+    with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+        size = sum(len(chunk) for chunk in response.iter_raw())
+        assert response.headers.get("content-encoding", "identity") == encoding, response.headers
+    return size, time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    make_session = sessionmaker(bind=engine)
+    db = make_session()
+    populate(db, rows)
+    db.close()
+
+    def override_get_db():
+        session = make_session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[deps.get_db] = override_get_db
+    client = TestClient(app)  # no lifespan: nothing to start for these endpoints
+
+    encodings = ["identity"] + compression.available_encodings()[::-1]
+    print(f"{rows} rows per type; bytes on the wire (request ms)")
+    print(f"{'endpoint':<14}" + "".join(f"{name:>22}" for name in encodings) + f"{'saved':>8}")
+    for name, url in ENDPOINTS:
+        results = [wire_bytes(client, url, encoding) for encoding in encodings]
+        cells = "".join(f"{size:>13,} ({elapsed * 1000:5.0f})" for size, elapsed in results)
+        saved = 1 - min(size for size, _ in results) / results[0][0]
+        print(f"{name:<14}{cells}{saved:8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark automatic diagram layout on large random component graphs.
+
+Cases, all on the same components:
+    hierarchy   composition edges only (layered blocks, packed in rows)
+    links       communication links only (force-directed, lone blocks)
+    mixed       both: many small trees and lone components plus a few
+                large trees, pulled together by the links
+
+Usage:
+    python scripts/benchmarks/bench_diagram_layout.py [components]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.utils import diagram_layout
+
+# The mixed case should stay interactive for the Auto layout button
+TARGET_SECONDS = 1.0
+
+
+def random_graph(count, compositions, links, seed=1):
+    rnd = random.Random(seed)
+    nodes = [f"c{i}" for i in range(count)]
+    edges = []
+    for _ in range(compositions):
+        child = rnd.randrange(1, count)
+        edges.append((nodes[rnd.randrange(child)], nodes[child], "composition"))
+    for _ in range(links):
+        edges.append((nodes[rnd.randrange(count)], nodes[rnd.randrange(count)], "communication"))
+    return nodes, edges
+
+
+def timed(nodes, edges, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        diagram_layout.layout(nodes, edges)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cases = (
+        ("hierarchy", count // 2, 0),
+        ("links", 0, count * 3 // 2),
+        ("mixed", count // 2, count * 3 // 2),
+    )
+    print(f"{count} components, best of 3")
+    print(f"{'case':<12}{'compositions':>14}{'links':>8}{'ms':>10}")
+    slow = False
+    for name, compositions, links in cases:
+        elapsed = timed(*random_graph(count, compositions, links))
+        print(f"{name:<12}{compositions:>14}{links:>8}{elapsed * 1000:10.0f}")
+        slow = slow or (name == "mixed" and elapsed > TARGET_SECONDS)
+    if slow:
+        print(f"mixed case exceeds {TARGET_SECONDS:.1f} s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark the EARS validator on pathological long inputs.
+
+Compares the single-pass parser in app.utils.ears_validator against the
+previous sequence of lazy DOTALL regexes, which backtracked heavily on long
+texts that almost (but not quite) match a pattern.
+
+Usage:
+    python scripts/benchmarks/bench_ears_validator.py
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.enums import EarsType
+from app.utils import ears_validator
+
+# Previous implementation, kept here only for comparison
+LEGACY_PATTERNS = {
+    EarsType.EVENT_DRIVEN: re.compile(r"^WHEN\s+(.+?),?\s+(?:the\s+)?(.+?)\s+shall\s+(.+)$", re.IGNORECASE | re.DOTALL),
+    EarsType.STATE_DRIVEN: re.compile(r"^WHILE\s+(.+?),?\s+(?:the\s+)?(.+?)\s+shall\s+(.+)$", re.IGNORECASE | re.DOTALL),
+    EarsType.UNWANTED_BEHAVIOR: re.compile(r"^IF\s+(.+?),?\s+THEN\s+(?:the\s+)?(.+?)\s+shall\s+(.+)$", re.IGNORECASE | re.DOTALL),
+    EarsType.OPTIONAL_FEATURE: re.compile(r"^WHERE\s+(.+?),?\s+(?:the\s+)?(.+?)\s+shall\s+(.+)$", re.IGNORECASE | re.DOTALL),
+    EarsType.UBIQUITOUS: re.compile(r"^(?:The\s+)?(.+?)\s+shall\s+(.+)$", re.IGNORECASE | re.DOTALL),
+}
+
+# Beyond this size the legacy regexes take too long to be worth waiting for
+LEGACY_MAX_WORDS = 2000
+
+
+def legacy_detect(text):
+    text = text.strip()
+    for pattern_type, regex in LEGACY_PATTERNS.items():
+        if regex.match(text):
+            return pattern_type
+    return None
+
+
+def pathological_inputs(words):
+    filler = " ".join(["word"] * words)
+    return {
+        "when, no shall": f"WHEN {filler}, the system",
+        "if, no then": f"IF {filler}, the system shall respond",
+        "whitespace run": "The system" + " " * (words * 5) + "shal",
+        "many shall-like words": "WHEN " + " ".join(["shallow"] * words) + " the system",
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'input':<24}{'words':>8}{'new (ms)':>12}{'legacy (ms)':>14}")
+    for words in (250, 1000, 2000, 20000):
+        for name, text in pathological_inputs(words).items():
+            ears_validator._parse.cache_clear()
+            new_ms = timed(ears_validator.detect_pattern, text) * 1000
+            if words <= LEGACY_MAX_WORDS:
+                legacy_ms = f"{timed(legacy_detect, text) * 1000:14.2f}"
+            else:
+                legacy_ms = f"{'skipped':>14}"
+            print(f"{name:<24}{words:>8}{new_ms:12.2f}{legacy_ms}")
+
+    text = "WHEN the operator presses the stop button, the conveyor shall halt within 200 ms"
+    ears_validator._parse.cache_clear()
+    cold = timed(ears_validator.validate_requirement, text, EarsType.EVENT_DRIVEN)
+    warm = timed(ears_validator.validate_requirement, text, EarsType.EVENT_DRIVEN)
+    print(f"\nTypical requirement: cold {cold * 1e6:.1f} us, cached {warm * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark list serialization per artifact type.
+
+Compares, on an in-memory SQLite database:
+    current   ORM rows validated and dumped by the response_model (what
+              FastAPI does for `return query.all()`)
+    orjson    ORM rows through jsonable_encoder and ORJSONResponse, if
+              orjson is installed (the deprecated FastAPI fast path)
+    fast      app.utils.fast_json.serialize_list
+
+Usage:
+    python scripts/benchmarks/bench_list_serialization.py [rows]
+"""
+import os
+import sys
+import time
+import warnings
+from datetime import datetime
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models.document import Document, DocumentType
+from app.db.models.metadata import Person
+from app.db.models.need import Need
+from app.db.models.project import Project
+from app.db.models.requirement import Requirement
+from app.db.models.site import Site
+from app.db.models.use_case import Precondition, UseCase
+from app.db.models.vision import Vision
+from app.enums import EarsType
+from app.schemas.document import Document as DocumentOut
+from app.schemas.need import NeedOut
+from app.schemas.requirement import RequirementOut
+from app.schemas.use_case import UseCaseOut
+from app.schemas.vision import VisionOut
+from app.utils import fast_json
+
+try:
+    from fastapi.responses import ORJSONResponse
+    import orjson  # noqa: F401
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+PROJECT = "BENCH"
+TYPES = (
+    ("requirement", Requirement, RequirementOut),
+    ("vision", Vision, VisionOut),
+    ("document", Document, DocumentOut),
+    ("need", Need, NeedOut),
+    ("use_case", UseCase, UseCaseOut),
+)
+
+
+def populate(db, rows):
+    now = datetime(2026, 1, 1)
+    db.add(Project(id=PROJECT, name="Benchmark"))
+    sites = [Site(id=f"S{i}", name=f"Site {i}", project_id=PROJECT) for i in range(10)]
+    people = [Person(id=f"P{i}", name=f"Person {i}", project_id=PROJECT) for i in range(10)]
+    preconditions = [Precondition(id=f"PC{i}", text=f"Precondition {i}", project_id=PROJECT) for i in range(10)]
+    db.add_all(sites + people + preconditions)
+    for i in range(rows):
+        common = {"aid": f"{i:06d}", "project_id": PROJECT, "area": "GEN", "created_date": now, "last_updated": now}
+        db.add_all([
+            Requirement(
+                short_name=f"REQ-{i}", text=f"WHEN event {i} occurs, the system shall respond within {i} ms",
+                ears_type=EarsType.EVENT_DRIVEN, ears_trigger=f"event {i} occurs", owner="qa", **common,
+            ),
+            Vision(title=f"Vision {i}", description="A vision statement " * 5, **common),
+            Document(
+                title=f"Document {i}", document_type=DocumentType.TEXT, content_text="Some text " * 20, **common,
+            ),
+            Need(title=f"Need {i}", description="A need statement " * 5, sites=[sites[i % 10]], **common),
+            UseCase(
+                title=f"Use case {i}", primary_actor=people[i % 10], stakeholders=[people[(i + 1) % 10]],
+                preconditions=[preconditions[i % 10]], mss=[{"step_num": 1, "actor": "System", "description": "Go"}],
+                **common,
+            ),
+        ])
+    db.commit()
+
+
+def current(db, model, schema):
+    adapter = TypeAdapter(List[schema])
+    return adapter.dump_json(adapter.validate_python(db.query(model).all(), from_attributes=True), by_alias=True)
+
+
+def with_orjson(db, model, schema):
+    adapter = TypeAdapter(List[schema])
+    items = adapter.validate_python(db.query(model).all(), from_attributes=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # FastAPI deprecates ORJSONResponse
+        return ORJSONResponse(jsonable_encoder(items)).body
+
+
+def fast(db, model, schema):
+    return fast_json.serialize_list(db.query(model), model, schema)
+
+
+def timed(make_session, fn, model, schema, repeat=3):
+    best = None
+    for _ in range(repeat):
+        db = make_session()  # empty identity map, like a request
+        start = time.perf_counter()
+        fn(db, model, schema)
+        elapsed = time.perf_counter() - start
+        db.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    make_session = sessionmaker(bind=engine)
+    db = make_session()
+    populate(db, rows)
+    db.close()
+
+    print(f"{rows} rows per type, best of 3")
+    print(f"{'type':<14}{'current (ms)':>14}{'orjson (ms)':>14}{'fast (ms)':>12}{'speedup':>10}")
+    for name, model, schema in TYPES:
+        db = make_session()
+        assert fast(db, model, schema) == current(db, model, schema)
+        db.close()
+        current_s = timed(make_session, current, model, schema)
+        fast_s = timed(make_session, fast, model, schema)
+        if ORJSON_AVAILABLE:
+            orjson_ms = f"{timed(make_session, with_orjson, model, schema) * 1000:14.1f}"
+        else:
+            orjson_ms = f"{'n/a':>14}"
+        print(f"{name:<14}{current_s * 1000:14.1f}{orjson_ms}{fast_s * 1000:12.1f}{current_s / fast_s:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
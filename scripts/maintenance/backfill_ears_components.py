@@ -0,0 +1,84 @@
+"""
+One-time backfill of the stored EARS components (ears_trigger, ears_state,
+ears_condition, ears_feature) for requirements written before they were
+extracted on create/update.
+
+Rows are read in aid order in batches and written back with one executemany
+UPDATE per batch. last_updated is left untouched.
+
+Usage:
+    python scripts/maintenance/backfill_ears_components.py [--batch-size 1000] [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import bindparam, select, update
+
+from app.db.base import SessionLocal
+from app.db.models.requirement import Requirement
+from app.utils import ears_validator
+
+EARS_COLUMNS = ('ears_trigger', 'ears_state', 'ears_condition', 'ears_feature')
+
+
+def backfill(db, batch_size=1000, dry_run=False):
+    statement = (
+        update(Requirement.__table__)
+        .where(Requirement.__table__.c.aid == bindparam('b_aid'))
+        .values(
+            # Keep the edit timestamp: this is derived data, not a user edit
+            last_updated=Requirement.__table__.c.last_updated,
+            **{column: bindparam(f'b_{column}') for column in EARS_COLUMNS},
+        )
+    )
+
+    last_aid = ""
+    scanned = changed = 0
+    while True:
+        rows = db.execute(
+            select(Requirement.aid, Requirement.text, Requirement.ears_type,
+                   *[getattr(Requirement, column) for column in EARS_COLUMNS])
+            .where(Requirement.aid > last_aid)
+            .order_by(Requirement.aid)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        params = []
+        for row in rows:
+            columns = ears_validator.component_columns(row.text, row.ears_type)
+            if columns is None:
+                continue
+            if all(getattr(row, column) == columns[column] for column in EARS_COLUMNS):
+                continue
+            params.append({'b_aid': row.aid, **{f'b_{column}': columns[column] for column in EARS_COLUMNS}})
+
+        if params and not dry_run:
+            db.execute(statement, params)
+            db.commit()
+
+        scanned += len(rows)
+        changed += len(params)
+        last_aid = rows[-1].aid
+        print(f"Scanned {scanned} requirements, {changed} updated")
+
+    return scanned, changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        scanned, changed = backfill(db, batch_size=args.batch_size, dry_run=args.dry_run)
+    print(f"Done: {changed} of {scanned} requirements {'would be ' if args.dry_run else ''}updated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+One-time backfill of the image metadata columns (size, width, height,
+mime_type, sha256) for images uploaded before they were stored at upload.
+
+Same code path as the periodic background reconciliation, limited to rows
+that have no metadata yet. Run without --backfill-only to also refresh rows
+whose file changed on disk and flag rows whose file is missing.
+
+Usage:
+    python scripts/maintenance/backfill_image_metadata.py [--all] [--batch-size 500]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.db.base import SessionLocal
+from app.utils import image_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", help="Check every image, not only rows without metadata")
+    parser.add_argument("--batch-size", type=int, default=image_index.RECONCILE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        counts = image_index.reconcile(db, batch_size=args.batch_size, backfill_only=not args.all)
+    finally:
+        db.close()
+
+    for key, value in counts.items():
+        print(f"{key:>10}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+One-time move of legacy uploads (stored by name directly in UPLOAD_DIR) into
+the content-addressed blob store.
+
+For every image row and every document whose content_url points at
+/api/v1/documents/files/<name>:
+    - the file is hashed and stored once under blobs/<shard>/<hash>
+    - the image row gets its blob_sha256, the document its blob URL
+    - the legacy file is replaced by a hard link to the blob, so existing
+      /uploads/<name> links in Markdown keep working while duplicate
+      content only occupies disk space once
+
+Refcounts are recomputed at the end.
+
+Usage:
+    python scripts/maintenance/dedupe_uploads.py [--dry-run]
+"""
+import argparse
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.db.models.blob import Blob
+from app.db.models.document import Document
+from app.db.models.image import Image
+from app.utils import blob_store
+
+LEGACY_DOCUMENT_PREFIX = "/api/v1/documents/files/"
+
+
+def file_digest(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(blob_store.COPY_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def link_to_blob(legacy_path, blob):
+    """Replace `legacy_path` with a hard link to the stored blob. Returns False if not possible."""
+    target = settings.UPLOAD_DIR / blob.path
+    if os.path.samefile(legacy_path, target):
+        return True
+    temp_link = legacy_path.with_name(legacy_path.name + ".dedupe")
+    try:
+        os.link(target, temp_link)
+    except OSError as e:
+        print(f"  cannot hard link {legacy_path.name} ({e}); keeping the copy")
+        return False
+    os.replace(temp_link, legacy_path)
+    return True
+
+
+def store_legacy(db, path, stats, dry_run):
+    # Only content already stored (earlier in this run or before it) frees space;
+    # the first copy of anything just moves into the store
+    size = path.stat().st_size
+    if dry_run:
+        digest = file_digest(path)
+        if digest in stats["seen"]:
+            stats["bytes_freed"] += size
+        stats["seen"].add(digest)
+        return None
+    with open(path, "rb") as f:
+        blob = blob_store.store_file(db, f, path.name)
+    linked = link_to_blob(path, blob)
+    if linked and blob.sha256 in stats["seen"]:
+        stats["bytes_freed"] += size
+    stats["seen"].add(blob.sha256)
+    return blob
+
+
+def dedupe(db, dry_run=False):
+    stats = {"images": 0, "documents": 0, "missing": 0, "bytes_freed": 0}
+    stats["seen"] = {digest for (digest,) in db.query(Blob.sha256)}
+
+    for image in db.query(Image).filter(Image.blob_sha256.is_(None)).all():
+        path = settings.UPLOAD_DIR / image.filename
+        if not path.is_file():
+            stats["missing"] += 1
+            continue
+        blob = store_legacy(db, path, stats, dry_run)
+        if blob is not None:
+            image.blob_sha256 = blob.sha256
+        stats["images"] += 1
+
+    for document in db.query(Document).filter(Document.content_url.like(f"{LEGACY_DOCUMENT_PREFIX}%")).all():
+        if blob_store.digest_from_url(document.content_url):
+            continue
+        path = settings.UPLOAD_DIR / Path(document.content_url[len(LEGACY_DOCUMENT_PREFIX):]).name
+        if not path.is_file():
+            stats["missing"] += 1
+            continue
+        blob = store_legacy(db, path, stats, dry_run)
+        if blob is not None:
+            document.content_url = blob_store.document_url(blob)
+        stats["documents"] += 1
+
+    if not dry_run:
+        db.commit()
+        blob_store.recount_references(db)
+
+    del stats["seen"]
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deduplicated")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = dedupe(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    prefix = "Would move" if args.dry_run else "Moved"
+    print(f"{prefix} {stats['images']} images and {stats['documents']} documents into the blob store")
+    print(f"Missing files: {stats['missing']}")
+    print(f"Disk space freed: {stats['bytes_freed'] / (1024 * 1024):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
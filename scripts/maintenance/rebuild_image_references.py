@@ -0,0 +1,32 @@
+"""
+Rebuild the image reference index (which documents and artifacts embed
+which uploaded images) from scratch.
+
+The index is kept current on every write; run this once after the
+migration that creates it, or after bulk changes made outside the ORM.
+
+Usage:
+    python scripts/maintenance/rebuild_image_references.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.db.base import SessionLocal
+from app.utils import image_refs
+
+
+def main():
+    db = SessionLocal()
+    try:
+        counts = image_refs.rebuild(db)
+    finally:
+        db.close()
+
+    for source_type, count in counts.items():
+        print(f"{source_type:>12}: {count} references")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 # Import your FastAPI app
 from artifact_registry import app
@@ -13,12 +14,22 @@ from app.db.session import get_db
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
+@pytest.fixture(autouse=True)
+def fresh_response_cache():
+    """Cached responses (and their counters) belong to the previous test's database."""
+    from app.utils import response_cache
+    response_cache.set_backend(response_cache.MemoryBackend())
+    response_cache._counters.clear()
+    yield
+    response_cache.set_backend(None)
+
 @pytest.fixture(scope="function")
 def test_engine():
     """Fresh engine per test to avoid state leaks."""
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
         connect_args={"check_same_thread": False},
+        poolclass=StaticPool,  # share one connection so endpoint threads see the same in-memory DB
     )
     yield engine
     engine.dispose()
@@ -61,4 +72,19 @@ def auth_token(client):
         headers={"Content-Type": "application/x-www-form-urlencoded"}
     )
     assert resp.status_code == 200, f"Token failed: {resp.text}"
-    return resp.json()["access_token"]
\ No newline at end of file
+    return resp.json()["access_token"]
+
+@pytest.fixture
+def store_client(client, tmp_path, monkeypatch):
+    """Client for the upload endpoints (deps.get_db) writing into a temp UPLOAD_DIR."""
+    from app.api import deps
+    from app.core.config import settings
+    from app.utils import image_variants, markdown_render
+
+    app.dependency_overrides[deps.get_db] = app.dependency_overrides[get_db]
+    monkeypatch.setattr(settings, "UPLOAD_DIR", tmp_path)
+    # The variant worker opens its own SessionLocal; tests generate variants explicitly
+    monkeypatch.setattr(image_variants, "schedule", lambda digest, relpath: False)
+    # Same for the Markdown pre-render after a document save
+    monkeypatch.setattr(markdown_render, "warm", lambda text: None)
+    yield client
@@ -0,0 +1,174 @@
+# tests/test_blob_store.py
+from app.core.config import settings
+from app.db.models.blob import Blob
+from app.db.models.image import Image
+from app.utils import blob_store
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"pixels" * 100
+
+
+def upload_image(client, name, content=PNG):
+    return client.post("/api/v1/images/upload", files={"file": (name, content, "image/png")})
+
+
+def test_same_content_is_stored_once(store_client, db_session, tmp_path):
+    first = upload_image(store_client, "a.png").json()
+    second = upload_image(store_client, "b.png").json()
+
+    assert first["url"] == second["url"]
+    assert first["url"] == f"/uploads/blobs/{first['sha256'][:2]}/{first['sha256'][2:4]}/{first['sha256']}.png"
+    assert db_session.get(Blob, first["sha256"]).refcount == 2
+    assert len([p for p in (tmp_path / "blobs").rglob("*.png")]) == 1
+
+    listed = store_client.get("/api/v1/images/").json()
+    assert {img["filename"] for img in listed} == {"a.png", "b.png"}
+    assert all(img["size"] == len(PNG) for img in listed)
+
+
+def test_reupload_under_same_name_moves_reference(store_client, db_session):
+    old = upload_image(store_client, "a.png").json()
+    new = upload_image(store_client, "a.png", PNG + b"v2").json()
+    assert db_session.get(Blob, old["sha256"]).refcount == 0
+    assert db_session.get(Blob, new["sha256"]).refcount == 1
+    assert db_session.query(Image).count() == 1
+
+
+def test_document_references_keep_blobs_alive(store_client, db_session):
+    uploaded = store_client.post(
+        "/api/v1/documents/upload", files={"file": ("spec.pdf", b"%PDF-1.4 spec", "application/pdf")}
+    ).json()
+    assert uploaded["url"].startswith("/api/v1/documents/files/blobs/")
+    assert store_client.get(uploaded["url"]).content == b"%PDF-1.4 spec"
+
+    image = upload_image(store_client, "diagram.png").json()
+    doc = store_client.post("/api/v1/documents/", json={
+        "title": "Spec",
+        "document_type": "file",
+        "content_url": uploaded["url"],
+        "content_text": f"![diagram]({image['url']})",
+        "project_id": "p1",
+        "area": "GEN",
+    }).json()
+    assert db_session.get(Blob, uploaded["sha256"]).refcount == 1
+    assert db_session.get(Blob, image["sha256"]).refcount == 2
+
+    store_client.delete("/api/v1/images/diagram.png")
+    result = blob_store.collect_garbage(db_session, grace_hours=0, dry_run=False)
+    assert result["deleted"] == 0
+    assert db_session.get(Blob, image["sha256"]).refcount == 1
+
+    store_client.delete(f"/api/v1/documents/{doc['aid']}")
+    result = blob_store.collect_garbage(db_session, grace_hours=0, dry_run=False)
+    assert result["deleted"] == 2
+    assert db_session.query(Blob).count() == 0
+    assert store_client.get(uploaded["url"]).status_code == 404
+
+
+def test_gc_respects_grace_period_and_dry_run(store_client, db_session):
+    uploaded = store_client.post(
+        "/api/v1/documents/upload", files={"file": ("notes.txt", b"draft", "text/plain")}
+    ).json()
+    assert blob_store.collect_garbage(db_session)["deleted"] == 0
+    assert blob_store.collect_garbage(db_session, grace_hours=0, dry_run=True)["deleted"] == 1
+    assert db_session.get(Blob, uploaded["sha256"]) is not None
+
+
+def test_serve_file_rejects_paths_outside_upload_dir(store_client):
+    assert store_client.get("/api/v1/documents/files/..%2F..%2Fetc%2Fpasswd").status_code == 404
+
+
+def test_upload_over_limit_is_rejected(store_client, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_IMAGE_MB", 1)
+    response = upload_image(store_client, "huge.png", b"x" * (1024 * 1024 + 1))
+    assert response.status_code == 413
+    assert not list((tmp_path / "blobs").rglob("*.png"))
+
+
+def test_resumable_upload(store_client, db_session, tmp_path):
+    content = bytes(range(256)) * 40
+    session = store_client.post(
+        "/api/v1/documents/uploads",
+        json={"filename": "design.pdf", "size": len(content), "content_type": "application/pdf"},
+    ).json()
+    url = f"/api/v1/documents/uploads/{session['upload_id']}"
+
+    first = store_client.patch(url, content=content[:4000], headers={"Upload-Offset": "0"})
+    assert first.json()["offset"] == 4000
+
+    # A retried chunk at a stale offset is refused with the offset to resume from
+    stale = store_client.patch(url, content=content[:4000], headers={"Upload-Offset": "0"})
+    assert stale.status_code == 409
+    assert stale.json()["detail"]["offset"] == 4000
+    assert store_client.get(url).json()["offset"] == 4000
+
+    too_long = store_client.patch(url, content=content[4000:] + b"extra", headers={"Upload-Offset": "4000"})
+    assert too_long.status_code == 413
+
+    resume_at = store_client.get(url).json()["offset"]
+    done = store_client.patch(url, content=content[resume_at:], headers={"Upload-Offset": str(resume_at)})
+    data = done.json()
+    assert data["complete"] is True
+    assert store_client.get(data["url"]).content == content
+    assert store_client.get(url).status_code == 404
+
+    direct = store_client.post(
+        "/api/v1/documents/upload", files={"file": ("copy.pdf", content, "application/pdf")}
+    ).json()
+    assert direct["sha256"] == data["sha256"]
+
+
+def test_declared_size_over_limit_is_rejected(store_client, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_DOCUMENT_MB", 1)
+    response = store_client.post(
+        "/api/v1/documents/uploads", json={"filename": "big.iso", "size": 2 * 1024 * 1024}
+    )
+    assert response.status_code == 413
+
+
+def test_gc_sweeps_files_without_a_blob_row(store_client, db_session, tmp_path):
+    kept = upload_image(store_client, "a.png").json()
+    # What a rolled-back upload leaves behind: the file was moved in, its row never committed
+    digest = "f" * 64
+    orphan = tmp_path / blob_store.blob_relpath(digest, ".png")
+    orphan.parent.mkdir(parents=True, exist_ok=True)
+    orphan.write_bytes(PNG)
+    orphan.with_name(f"{digest}.thumb.webp").write_bytes(b"webp")
+
+    assert blob_store.collect_garbage(db_session)["untracked_files_removed"] == 0
+    result = blob_store.collect_garbage(db_session, grace_hours=0, dry_run=True)
+    assert result["untracked_files_removed"] == 2
+    assert orphan.exists()
+
+    result = blob_store.collect_garbage(db_session, grace_hours=0)
+    assert result["untracked_files_removed"] == 2
+    assert not orphan.exists()
+    assert [p.name for p in orphan.parent.iterdir()] == []
+    assert (tmp_path / kept["url"].removeprefix("/uploads/")).exists()
+
+
+def test_adopt_conflict_keeps_the_callers_pending_work(db_session, tmp_path, monkeypatch):
+    import hashlib
+    from app.db.models.project import Project
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", tmp_path)
+    digest = hashlib.sha256(PNG).hexdigest()
+    db_session.add(Blob(sha256=digest, path=blob_store.blob_relpath(digest, ".png"), size=len(PNG), refcount=0))
+    db_session.commit()
+
+    # A concurrent upload stored the same content between our lookup and our insert
+    get = db_session.get
+    lookups = []
+
+    def get_missing_once(*args, **kwargs):
+        lookups.append(args)
+        return None if len(lookups) == 1 else get(*args, **kwargs)
+
+    monkeypatch.setattr(db_session, "get", get_missing_once)
+    db_session.add(Project(id="P", name="Pending"))
+    temp = blob_store.temp_dir() / "upload.part"
+    temp.write_bytes(PNG)
+    blob = blob_store.adopt_file(db_session, temp, digest, len(PNG), "a.png", "image/png")
+    db_session.commit()
+
+    assert blob.sha256 == digest
+    assert db_session.query(Project).filter(Project.id == "P").count() == 1
@@ -0,0 +1,51 @@
+# tests/test_change_feed.py
+from app.db.models.need import Need
+from app.utils import change_feed
+
+
+def _project(client, name="Feed"):
+    return client.post("/api/v1/projects/", json={"name": name}).json()["id"]
+
+
+def test_feed_pages_latest_change_per_artifact_with_tombstones(store_client):
+    project_id = _project(store_client)
+    docs = [
+        store_client.post("/api/v1/documents/", json={
+            "title": title, "document_type": "text", "content_text": "x", "project_id": project_id, "area": "GEN",
+        }).json()
+        for title in ("Spec", "Notes")
+    ]
+    store_client.put(f"/api/v1/documents/{docs[0]['aid']}", json={"title": "Spec v2"})
+    store_client.delete(f"/api/v1/documents/{docs[1]['aid']}")
+
+    first = store_client.get(f"/api/v1/projects/{project_id}/changes", params={"limit": 1, "include_data": True}).json()
+    assert first["has_more"] is True
+    assert [(c["key"], c["action"]) for c in first["changes"]] == [(docs[0]["aid"], "updated")]
+    assert first["changes"][0]["data"]["title"] == "Spec v2"
+
+    second = store_client.get(f"/api/v1/projects/{project_id}/changes", params={"since": first["cursor"]}).json()
+    assert second["has_more"] is False
+    assert [(c["key"], c["action"]) for c in second["changes"]] == [(docs[1]["aid"], "deleted")]
+    assert second["cursor"] > first["cursor"]
+
+    caught_up = store_client.get(f"/api/v1/projects/{project_id}/changes", params={"since": second["cursor"]}).json()
+    assert caught_up["changes"] == [] and caught_up["cursor"] == second["cursor"]
+    assert store_client.get("/api/v1/projects/missing/changes").status_code == 404
+
+
+def test_rollbacks_are_not_logged_and_bulk_deletes_leave_tombstones(client, db_session):
+    project_id = _project(client)
+    db_session.add(Need(aid="N-1", title="t", description="d", project_id=project_id))
+    db_session.commit()
+    cursor = change_feed.current_cursor(db_session)
+
+    db_session.add(Need(aid="N-2", title="t", description="d", project_id=project_id))
+    db_session.flush()
+    db_session.rollback()
+    assert change_feed.changes(db_session, project_id, since=cursor)["changes"] == []
+
+    change_feed.tombstone_project(db_session, project_id, ("need",))
+    db_session.query(Need).filter(Need.project_id == project_id).delete()
+    db_session.commit()
+    page = change_feed.changes(db_session, project_id, since=cursor)
+    assert [(c["key"], c["action"]) for c in page["changes"]] == [("N-1", "deleted")]
@@ -0,0 +1,106 @@
+# tests/test_compression.py
+import gzip
+import zlib
+
+import anyio
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.db.models.requirement import Requirement
+from app.utils import compression
+
+
+def test_large_json_lists_are_gzipped_and_small_or_unlisted_ones_are_not(client, db_session):
+    project_id = client.post("/api/v1/projects/", json={"name": "Zip"}).json()["id"]
+    db_session.add_all([
+        Requirement(aid=f"R-{i:03d}", short_name=f"R{i}", text="The pump shall stop " * 5, project_id=project_id)
+        for i in range(50)
+    ])
+    db_session.commit()
+    before = compression.stats()["encodings"].get("gzip", {}).get("bytes_in", 0)
+
+    url = "/api/v1/requirement/requirements/"
+    response = client.get(url, params={"project_id": project_id}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) == 50
+    assert compression.stats()["encodings"]["gzip"]["bytes_in"] > before
+
+    identity = client.get(url, params={"project_id": project_id}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers and identity.json() == response.json()
+    small = client.get(url, params={"project_id": "none"}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_streamed_chunks_are_flushed_as_they_are_sent():
+    async def lines():
+        for i in range(3):
+            yield f'{{"line": {i}}}\n'
+
+    app = Starlette(routes=[
+        Route("/stream", lambda request: StreamingResponse(lines(), media_type="application/x-ndjson")),
+        Route("/events", lambda request: PlainTextResponse("x" * 5000, media_type="text/event-stream")),
+    ])
+    middleware = compression.CompressionMiddleware(app)
+
+    async def call(path):
+        messages = []
+
+        requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await anyio.sleep_forever()  # the client stays connected
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "headers": [(b"accept-encoding", b"gzip")], "scheme": "http", "server": ("test", 80), "root_path": "",
+        }
+        await middleware(scope, receive, send)
+        return dict(messages[0]["headers"]), [m["body"] for m in messages[1:]]
+
+    headers, chunks = anyio.run(call, "/stream")
+    assert headers[b"content-encoding"] == b"gzip"
+    decoder = zlib.decompressobj(31)
+    # Every chunk decodes on its own, i.e. nothing was held back
+    assert [decoder.decompress(chunk) for chunk in chunks[:3]] == [b'{"line": 0}\n', b'{"line": 1}\n', b'{"line": 2}\n']
+    assert gzip.decompress(b"".join(chunks)).count(b"line") == 3
+
+    headers, _ = anyio.run(call, "/events")
+    assert b"content-encoding" not in headers
+
+
+def test_choose_encoding_follows_q_values(monkeypatch):
+    monkeypatch.setattr(compression, "BROTLI_AVAILABLE", True)
+    choose = compression.choose_encoding
+    assert choose("gzip, br") == "br"                    # tie: server preference
+    assert choose("br;q=0.5, gzip;q=0.9") == "gzip"
+    assert choose("gzip;q=0.4, identity;q=0.8") is None
+    assert choose("gzip;q=0.4, identity;q=0.4") == "gzip"
+    assert choose("*;q=0.3, br;q=0") == "gzip"
+    assert choose("br;q=0, gzip;q=0") is None
+    assert choose(None) is None and choose("deflate") is None
+
+    monkeypatch.setattr(compression, "BROTLI_AVAILABLE", False)
+    assert choose("br;q=1.0, gzip;q=0.1") == "gzip"
+
+
+def test_encoded_responses_get_a_weak_etag():
+    body = [{"n": i, "text": "repeated text"} for i in range(200)]
+    app = Starlette(routes=[
+        Route("/strong", lambda request: JSONResponse(body, headers={"etag": '"abc"'})),
+        Route("/weak", lambda request: JSONResponse(body, headers={"etag": 'W/"abc"'})),
+    ])
+    client = TestClient(compression.CompressionMiddleware(app))
+
+    encoded = client.get("/strong", headers={"Accept-Encoding": "gzip"})
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.headers["etag"] == 'W/"abc"'
+    assert client.get("/weak", headers={"Accept-Encoding": "gzip"}).headers["etag"] == 'W/"abc"'
+    assert client.get("/strong", headers={"Accept-Encoding": "identity"}).headers["etag"] == '"abc"'
@@ -0,0 +1,57 @@
+# tests/test_coverage_report.py
+from app.db.models.linkage import Linkage
+from app.db.models.need import Need
+from app.db.models.requirement import Requirement
+from app.db.models.use_case import UseCase
+from app.enums import LinkType
+
+
+def _link(aid, source_type, source_id, target_type, target_id, relationship, project_id):
+    return Linkage(
+        aid=aid, source_artifact_type=source_type, source_id=source_id, target_artifact_type=target_type,
+        target_id=target_id, relationship_type=relationship, project_id=project_id,
+    )
+
+
+def test_coverage_and_orphans_are_counted_and_paged(store_client, db_session):
+    project_id = store_client.post("/api/v1/projects/", json={"name": "Trace"}).json()["id"]
+    db_session.add_all(
+        [Need(aid=f"N-{i}", title="t", description="d", project_id=project_id) for i in range(1, 4)]
+        + [UseCase(aid="UC-1", title="t", project_id=project_id)]
+        + [Requirement(aid=f"R-{i}", short_name="r", text="The pump shall stop", project_id=project_id) for i in (1, 2)]
+    )
+    db_session.add_all([
+        _link("L1", "use_case", "UC-1", "need", "N-1", LinkType.SATISFIES, project_id),
+        _link("L2", "requirement", "R-1", "use_case", "UC-1", LinkType.SATISFIES, project_id),
+        _link("L3", "requirement", "R-1", "component", "C-1", LinkType.ALLOCATED_TO, project_id),
+        # Wrong direction: does not satisfy N-2
+        _link("L4", "need", "N-2", "use_case", "UC-1", LinkType.SATISFIES, project_id),
+    ])
+    db_session.commit()
+
+    url = f"/api/v1/reports/coverage/{project_id}"
+    report = store_client.get(url, params={"limit": 1}).json()
+    rules = {rule["rule"]: rule for rule in report["coverage"]}
+    needs = rules["need_satisfied_by_use_case"]
+    assert (needs["total"], needs["covered"], needs["uncovered"], needs["uncovered_aids"]) == (3, 1, 2, ["N-2"])
+    assert store_client.get(url, params={"limit": 1, "offset": 1}).json()["coverage"][0]["uncovered_aids"] == ["N-3"]
+    allocated = rules["requirement_allocated_to_component"]
+    assert (allocated["covered"], allocated["uncovered_aids"]) == (1, ["R-2"])
+    assert report["orphans"]["need"] == {"total": 3, "orphans": 1, "aids": ["N-3"]}
+    assert report["orphans"]["requirement"]["aids"] == ["R-2"]
+
+    counts = store_client.get(url, params={"rules": ["use_case_satisfies_need"], "limit": 0})
+    assert [(r["rule"], r["coverage"], r["uncovered_aids"]) for r in counts.json()["coverage"]] == [
+        ("use_case_satisfies_need", 1.0, [])
+    ]
+    assert store_client.get(url, params={"rules": ["nope"]}).status_code == 400
+    assert store_client.get("/api/v1/reports/coverage/missing").status_code == 404
+
+    # Revalidation is answered from the change feed cursor until a link changes
+    etag = counts.headers["etag"]
+    params = {"rules": ["use_case_satisfies_need"], "limit": 0}
+    assert store_client.get(url, params=params, headers={"If-None-Match": etag}).status_code == 304
+    db_session.delete(db_session.get(Linkage, "L1"))
+    db_session.commit()
+    changed = store_client.get(url, params=params, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["coverage"][0]["covered"] == 0
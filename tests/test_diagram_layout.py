@@ -0,0 +1,145 @@
+# tests/test_diagram_layout.py
+import pytest
+
+from app.core.config import settings
+from app.db.models.component import Component, ComponentRelationship
+from app.db.models.diagram import Diagram, DiagramComponent, DiagramEdge
+from app.db.models.project import Project
+from app.utils import diagram_layout
+
+
+@pytest.fixture
+def diagram_id(db_session):
+    db_session.add(Project(id="p1", name="p1"))
+    db_session.add_all([Component(id=c, name=c.upper(), type="Software") for c in ("a", "b", "c")])
+    diagram = Diagram(project_id="p1", name="Context", type="component")
+    db_session.add(diagram)
+    db_session.flush()
+    db_session.add(DiagramComponent(diagram_id=diagram.id, component_id="a", x=0, y=0))
+    db_session.commit()
+    return diagram.id
+
+
+def test_batch_layout_upserts_nodes_and_edges(store_client, db_session, diagram_id):
+    response = store_client.patch(f"/api/v1/diagrams/{diagram_id}/layout", json={
+        "version": 0,
+        "nodes": [{"component_id": "a", "x": 10, "y": 20}, {"component_id": "b", "x": 30, "y": 40}],
+        "edges": [{"source_id": "a", "target_id": "b", "source_handle": "right"}],
+    })
+    assert response.status_code == 200
+    delta = response.json()
+    assert delta["version"] == 1
+    assert [n["component_id"] for n in delta["nodes"]] == ["a", "b"]
+
+    db_session.expire_all()
+    positions = {dc.component_id: (dc.x, dc.y) for dc in db_session.query(DiagramComponent)}
+    assert positions == {"a": (10, 20), "b": (30, 40)}
+
+    # Omitted handles keep their stored value
+    store_client.patch(f"/api/v1/diagrams/{diagram_id}/layout", json={
+        "edges": [{"source_id": "a", "target_id": "b", "target_handle": "left"}],
+    })
+    db_session.expire_all()
+    edge = db_session.query(DiagramEdge).one()
+    assert (edge.source_handle, edge.target_handle) == ("right", "left")
+    assert store_client.get(f"/api/v1/diagrams/{diagram_id}").json()["layout_version"] == 2
+
+
+def test_stale_version_is_rejected(store_client, db_session, diagram_id):
+    assert store_client.patch(f"/api/v1/diagrams/{diagram_id}/layout", json={
+        "version": 0, "nodes": [{"component_id": "a", "x": 1, "y": 1}],
+    }).status_code == 200
+
+    stale = store_client.patch(f"/api/v1/diagrams/{diagram_id}/layout", json={
+        "version": 0, "nodes": [{"component_id": "a", "x": 99, "y": 99}],
+    })
+    assert stale.status_code == 409
+    assert stale.json()["detail"]["version"] == 1
+    db_session.expire_all()
+    assert db_session.query(DiagramComponent).one().x == 1
+
+
+def test_single_component_update_bumps_version(store_client, diagram_id):
+    store_client.put(f"/api/v1/diagrams/{diagram_id}/components/c", json={"x": 5, "y": 5})
+    assert store_client.get(f"/api/v1/diagrams/{diagram_id}").json()["layout_version"] == 1
+    assert store_client.patch("/api/v1/diagrams/missing/layout", json={}).status_code == 404
+
+
+def test_layered_layout_puts_children_below_parents():
+    positions = diagram_layout.layout(
+        ["root", "a", "b", "leaf", "loose"],
+        [("root", "a", "composition"), ("root", "b", None), ("a", "leaf", "composition"), ("leaf", "root", "composition")],
+    )
+    assert positions["root"][1] < positions["a"][1] == positions["b"][1] < positions["leaf"][1]
+    assert len(set(positions.values())) == 5
+
+    tree = diagram_layout.layout(["p", "c1", "c2"], [("p", "c1", None), ("p", "c2", None)])
+    assert tree["p"][0] == (tree["c1"][0] + tree["c2"][0]) // 2
+
+
+def test_force_layout_has_no_overlaps():
+    nodes = [f"c{i}" for i in range(60)]
+    links = [(f"c{i}", f"c{(i * 7 + 3) % 60}", "communication") for i in range(60)]
+    positions = list(diagram_layout.layout(nodes, links).values())
+    for i, (x1, y1) in enumerate(positions):
+        for x2, y2 in positions[i + 1:]:
+            assert abs(x1 - x2) >= diagram_layout.NODE_WIDTH or abs(y1 - y2) >= diagram_layout.NODE_HEIGHT
+
+
+def test_repulsion_pairs_cover_every_close_pair_around_large_blocks():
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    count, cutoff = 300, 100.0
+    center = rng.uniform(0, 5000, (count, 2))
+    radius = np.full(count, 90.0)
+    radius[:3] = (2000.0, 600.0, 400.0)  # a few large trees among lone components
+
+    def close(i, j):
+        gap = np.hypot(*(center[i] - center[j]).T) - radius[i] - radius[j]
+        near = gap < cutoff
+        return sorted(zip(np.minimum(i, j)[near].tolist(), np.maximum(i, j)[near].tolist()))
+
+    i, j = diagram_layout._repulsion_pairs(center, radius, cutoff, big_radius=200.0)
+    assert len(set(zip(np.minimum(i, j).tolist(), np.maximum(i, j).tolist()))) == len(i)
+    assert close(i, j) == close(*np.triu_indices(count, 1))
+    assert len(i) < count * (count - 1) // 4
+
+
+def test_auto_layout_endpoint_persists_positions(store_client, db_session, diagram_id):
+    for cid in ("b", "c"):
+        db_session.add(DiagramComponent(diagram_id=diagram_id, component_id=cid, x=0, y=0))
+    db_session.add(ComponentRelationship(parent_id="a", child_id="b", type="composition"))
+    db_session.add(ComponentRelationship(parent_id="b", child_id="c", type="communication"))
+    db_session.commit()
+
+    response = store_client.post(f"/api/v1/diagrams/{diagram_id}/layout/auto", json={"version": 0})
+    assert response.status_code == 200
+    assert response.json()["version"] == 1
+
+    db_session.expire_all()
+    positions = {dc.component_id: (dc.x, dc.y) for dc in db_session.query(DiagramComponent)}
+    assert positions["a"][1] < positions["b"][1]
+    assert len(set(positions.values())) == 3
+    assert store_client.post(f"/api/v1/diagrams/{diagram_id}/layout/auto", json={"version": 0}).status_code == 409
+
+
+def test_changes_feed_returns_deltas_since_version(store_client, diagram_id, monkeypatch):
+    base = f"/api/v1/diagrams/{diagram_id}"
+    store_client.put(f"{base}/components/b", json={"x": 1, "y": 2})
+    store_client.put(f"{base}/edges", params={"source_id": "a", "target_id": "b"}, json={"source_handle": "right"})
+    removed = store_client.delete(f"{base}/components/a", params={"version": 2})
+    assert removed.json() == {"diagram_id": diagram_id, "version": 3, "nodes": [], "edges": [], "removed_nodes": ["a"]}
+
+    feed = store_client.get(f"{base}/changes", params={"since": 1}).json()
+    assert feed["version"] == 3 and not feed["reset"]
+    assert [c["version"] for c in feed["changes"]] == [2, 3]
+    assert feed["changes"][0]["edges"][0]["source_handle"] == "right"
+    assert store_client.get(f"{base}/changes", params={"since": 3}).json()["changes"] == []
+
+    # Stale writers are refused
+    assert store_client.put(f"{base}/components/c", json={"x": 0, "y": 0, "version": 1}).status_code == 409
+
+    monkeypatch.setattr(settings, "DIAGRAM_CHANGE_LOG_SIZE", 1)
+    store_client.put(f"{base}/components/c", json={"x": 0, "y": 0})
+    assert store_client.get(f"{base}/changes", params={"since": 1}).json()["reset"] is True
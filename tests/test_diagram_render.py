@@ -0,0 +1,105 @@
+# tests/test_diagram_render.py
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.db.models.diagram import Diagram
+from app.db.models.project import Project
+from app.utils import diagram_render
+
+SEQUENCE = "sequenceDiagram\n    User->>System: Log in\n    System-->>User: Token"
+
+
+@pytest.fixture
+def diagram_client(store_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DIAGRAM_CACHE_DIR", tmp_path / "diagrams")
+    monkeypatch.setattr(settings, "DIAGRAM_RENDER_BACKEND", "local")
+    monkeypatch.setattr(diagram_render, "_cache_bytes", None)
+    diagram_render.set_renderer(None)
+    yield store_client
+    diagram_render.set_renderer(None)
+
+
+class CountingRenderer(diagram_render.LocalRenderer):
+    lays_out = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def render(self, source, language):
+        self.calls += 1
+        return super().render(source, language)
+
+
+def create_diagram(db_session, content, type_="sequence"):
+    db_session.add(Project(id="p1", name="p1"))
+    diagram = Diagram(project_id="p1", name="Login", type=type_, content=content)
+    db_session.add(diagram)
+    db_session.commit()
+    return diagram.id
+
+
+def test_diagram_svg_is_rendered_once_and_revalidated(diagram_client, db_session):
+    renderer = CountingRenderer()
+    diagram_render.set_renderer(renderer)
+    diagram_id = create_diagram(db_session, SEQUENCE)
+
+    first = diagram_client.get(f"/api/v1/diagrams/{diagram_id}/svg")
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "image/svg+xml"
+    assert "Log in" in first.text
+
+    assert diagram_client.get(f"/api/v1/diagrams/{diagram_id}/svg").text == first.text
+    not_modified = diagram_client.get(
+        f"/api/v1/diagrams/{diagram_id}/svg", headers={"If-None-Match": first.headers["etag"]}
+    )
+    assert not_modified.status_code == 304
+    assert renderer.calls == 1
+
+
+def test_diagram_svg_is_unavailable_without_a_real_renderer(diagram_client, db_session):
+    diagram_id = create_diagram(db_session, SEQUENCE)
+    response = diagram_client.get(f"/api/v1/diagrams/{diagram_id}/svg")
+    assert response.status_code == 503
+    assert not list(settings.DIAGRAM_CACHE_DIR.glob("*/*.svg"))
+
+
+def test_render_endpoint_detects_plantuml(diagram_client):
+    response = diagram_client.post("/api/v1/diagrams/render", json={"source": "@startuml\nA -> B\n@enduml"})
+    assert response.status_code == 200
+    assert 'data-language="plantuml"' in response.text
+
+
+def test_prerender_fills_the_cache(diagram_client, db_session):
+    create_diagram(db_session, SEQUENCE)
+    response = diagram_client.post("/api/v1/projects/p1/diagrams/prerender")
+    assert response.json() == {"queued": 1}
+    assert diagram_render.cached_path(diagram_render.render_key(SEQUENCE, "mermaid")).exists()
+    assert diagram_render.prerender([(SEQUENCE, "mermaid")]) == {"rendered": 0, "cached": 1, "failed": 0}
+
+
+def test_eviction_removes_least_recently_used(diagram_client):
+    keys = [diagram_render.render(f"graph TD; A{i}-->B", "mermaid")[0] for i in range(3)]
+    for age, key in enumerate(reversed(keys)):
+        path = diagram_render.cached_path(key)
+        os.utime(path, (1000 + age, 1000 + age))
+    size = diagram_render.cached_path(keys[0]).stat().st_size
+
+    result = diagram_render.evict(max_bytes=int(size * 1.5))
+    assert result["removed"] == 2
+    assert diagram_render.cached_path(keys[0]).exists()
+    assert not diagram_render.cached_path(keys[2]).exists()
+
+
+def test_render_locks_are_released_on_hits_and_failures(diagram_client):
+    class FailingRenderer(diagram_render.LocalRenderer):
+        def render(self, source, language):
+            raise diagram_render.DiagramSourceError("bad source")
+
+    diagram_render.render(SEQUENCE, "mermaid")
+    diagram_render.render(SEQUENCE, "mermaid")  # cache hit
+    diagram_render.set_renderer(FailingRenderer())
+    with pytest.raises(diagram_render.DiagramSourceError):
+        diagram_render.render("graph TD; X-->Y", "mermaid")
+    assert diagram_render._render_locks == {}
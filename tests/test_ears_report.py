@@ -0,0 +1,57 @@
+# tests/test_ears_report.py
+from datetime import datetime, timedelta
+
+from fastapi import status
+
+from app.db.models.project import Project
+from app.db.models.requirement import Requirement
+from app.enums import EarsType, ReqLevel
+
+REPORT_URL = "/api/v1/requirement/requirements/ears/report"
+
+
+def _seed(db_session):
+    db_session.add(Project(id="p1", name="P1"))
+    db_session.add_all([
+        Requirement(aid="P1-A-REQ-001", short_name="a", text="The system shall log", area="A",
+                    level=ReqLevel.SYS, ears_type=EarsType.UBIQUITOUS, project_id="p1"),
+        Requirement(aid="P1-A-REQ-002", short_name="b", text="The system shall stop", area="A",
+                    level=ReqLevel.STK, ears_type=EarsType.EVENT_DRIVEN, project_id="p1"),
+        Requirement(aid="P1-B-REQ-001", short_name="c", text="WHEN armed, the alarm shall sound", area="B",
+                    level=ReqLevel.SYS, ears_type=EarsType.EVENT_DRIVEN, project_id="p1"),
+    ])
+    db_session.commit()
+
+
+def test_report_aggregates_by_area_and_level(client, db_session):
+    _seed(db_session)
+
+    response = client.get(REPORT_URL, params={"project_id": "p1", "include_invalid": True})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["recomputed"] == 3
+    assert (data["total"], data["valid"], data["invalid"]) == (3, 2, 1)
+    assert data["by_area"]["A"]["invalid"] == 1
+    assert data["by_area"]["B"]["conformance"] == 1.0
+    assert data["by_level"]["sys"]["valid"] == 2
+    assert data["invalid_aids"] == ["P1-A-REQ-002"]
+
+
+def test_report_only_recomputes_changed_rows(client, db_session):
+    _seed(db_session)
+    assert client.get(REPORT_URL, params={"project_id": "p1"}).json()["recomputed"] == 3
+    assert client.get(REPORT_URL, params={"project_id": "p1"}).json()["recomputed"] == 0
+
+    req = db_session.query(Requirement).filter(Requirement.aid == "P1-A-REQ-002").first()
+    req.text = "WHEN stopped, the system shall stop"
+    req.last_updated = datetime.now() + timedelta(seconds=1)
+    db_session.commit()
+
+    data = client.get(REPORT_URL, params={"project_id": "p1"}).json()
+    assert data["recomputed"] == 1
+    assert data["invalid"] == 0
+
+    db_session.delete(req)
+    db_session.commit()
+    data = client.get(REPORT_URL, params={"project_id": "p1"}).json()
+    assert data["total"] == 2
@@ -0,0 +1,100 @@
+# tests/test_ears_validator.py
+import time
+
+from fastapi import status
+
+from app.enums import EarsType
+from app.utils import ears_validator
+
+
+def test_detect_each_pattern():
+    cases = {
+        "The system shall log every login attempt": EarsType.UBIQUITOUS,
+        "WHEN the operator presses stop, the conveyor shall halt": EarsType.EVENT_DRIVEN,
+        "WHILE in maintenance mode, the robot shall limit speed": EarsType.STATE_DRIVEN,
+        "IF the sensor fails, THEN the controller shall raise an alarm": EarsType.UNWANTED_BEHAVIOR,
+        "WHERE GPS is fitted, the unit shall report position": EarsType.OPTIONAL_FEATURE,
+    }
+    for text, expected in cases.items():
+        assert ears_validator.detect_pattern(text) == expected
+
+
+def test_detect_no_pattern():
+    assert ears_validator.detect_pattern("Log every login attempt") is None
+    assert ears_validator.detect_pattern("") is None
+
+
+def test_keyword_without_clause_falls_back_to_ubiquitous():
+    assert ears_validator.detect_pattern("WHEN ready shall start") == EarsType.UBIQUITOUS
+
+
+def test_extract_components():
+    components = ears_validator.extract_components(
+        "WHEN the operator presses stop, the conveyor shall halt within 200 ms",
+        EarsType.EVENT_DRIVEN,
+    )
+    assert components == {
+        "trigger": "the operator presses stop",
+        "system": "conveyor",
+        "action": "halt within 200 ms",
+    }
+
+    components = ears_validator.extract_components(
+        "IF power is lost, THEN the UPS shall engage", EarsType.UNWANTED_BEHAVIOR
+    )
+    assert components == {"condition": "power is lost", "system": "UPS", "action": "engage"}
+
+
+def test_extract_components_mismatch_is_empty():
+    assert ears_validator.extract_components("The system shall log", EarsType.EVENT_DRIVEN) == {}
+    assert ears_validator.extract_components("The system shall log", EarsType.COMPLEX) == {}
+
+
+def test_validate_requirement_single_pass_result():
+    result = ears_validator.validate_requirement("The pump shall stop", EarsType.STATE_DRIVEN)
+    assert result["valid"] is False
+    assert result["detected_pattern"] == EarsType.UBIQUITOUS
+    assert result["components"] is None
+    assert any("WHILE" in s for s in result["suggestions"])
+
+
+def test_pathological_inputs_are_linear():
+    filler = " ".join(["word"] * 50000)
+    texts = [
+        f"WHEN {filler}, the system",
+        "The system" + " " * 200000 + "shal",
+        "WHEN " + " ".join(["shallow"] * 50000) + " the system",
+    ]
+    start = time.perf_counter()
+    for text in texts:
+        for pattern in EarsType:
+            ears_validator.validate_requirement(text, pattern)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_validate_batch_endpoint(client):
+    payload = {
+        "items": [
+            {"text": "The system shall log", "pattern": "ubiquitous"},
+            {"text": "The system shall log", "pattern": "event-driven"},
+        ]
+    }
+    response = client.post("/api/v1/requirement/requirements/ears/validate/batch", json=payload)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [item["valid"] for item in data] == [True, False]
+    assert data[0]["components"] == {"system": "system", "action": "log"}
+    assert data[1]["detected_pattern"] == "ubiquitous"
+
+
+def test_component_columns():
+    columns = ears_validator.component_columns(
+        "WHILE docked, the rover shall charge", EarsType.STATE_DRIVEN
+    )
+    assert columns == {
+        "ears_trigger": None,
+        "ears_state": "docked",
+        "ears_condition": None,
+        "ears_feature": None,
+    }
+    assert ears_validator.component_columns("The rover shall charge", EarsType.STATE_DRIVEN) is None
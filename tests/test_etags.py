@@ -0,0 +1,66 @@
+# tests/test_etags.py
+
+
+def _document(client, title="Spec"):
+    return client.post("/api/v1/documents/", json={
+        "title": title, "document_type": "text", "content_text": "x", "project_id": "p1", "area": "GEN",
+    }).json()
+
+
+def test_reads_and_lists_revalidate_with_304(store_client):
+    doc = _document(store_client)
+    url = f"/api/v1/documents/{doc['aid']}"
+
+    first = store_client.get(url)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"') and first.headers["cache-control"] == "no-cache"
+    revalidated = store_client.get(url, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+
+    listing = store_client.get("/api/v1/documents/", params={"project_id": "p1"})
+    list_etag = listing.headers["etag"]
+    assert store_client.get("/api/v1/documents/", params={"project_id": "p1"},
+                            headers={"If-None-Match": list_etag}).status_code == 304
+    # Other filters, other tag
+    assert store_client.get("/api/v1/documents/", params={"project_id": "p2"}).headers["etag"] != list_etag
+
+    _document(store_client, "Notes")
+    assert store_client.get("/api/v1/documents/", params={"project_id": "p1"},
+                            headers={"If-None-Match": list_etag}).status_code == 200
+
+
+def test_if_match_rejects_stale_updates(store_client):
+    doc = _document(store_client)
+    url = f"/api/v1/documents/{doc['aid']}"
+    etag = store_client.get(url).headers["etag"]
+
+    updated = store_client.put(url, json={"title": "Spec v2"}, headers={"If-Match": etag})
+    assert updated.status_code == 200
+    assert updated.headers["etag"] == store_client.get(url).headers["etag"] != etag
+
+    stale = store_client.put(url, json={"title": "Spec v3"}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert store_client.get(url).json()["title"] == "Spec v2"
+    assert store_client.put(url, json={"title": "Spec v3"}).status_code == 200
+
+
+def test_renaming_an_embedded_site_changes_the_need_tags(store_client, db_session):
+    from app.db.models.need import Need
+    from app.db.models.site import Site
+
+    site = Site(id="s1", name="Plant A", project_id="p1")
+    db_session.add(Need(aid="N-1", title="t", description="d", project_id="p1", sites=[site]))
+    db_session.commit()
+    url = "/api/v1/need/needs/N-1"
+    etag = store_client.get(url).headers["etag"]
+    list_etag = store_client.get("/api/v1/need/needs/", params={"project_id": "p1"}).headers["etag"]
+
+    assert store_client.put("/api/v1/sites/s1", json={"name": "Plant B"}).status_code == 200
+
+    fresh = store_client.get(url, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.json()["sites"][0]["name"] == "Plant B"
+    assert store_client.get("/api/v1/need/needs/", params={"project_id": "p1"},
+                            headers={"If-None-Match": list_etag}).status_code == 200
+    # The need itself did not change, so an edit based on the old tag is no conflict
+    assert fresh.headers["etag"] != etag
+    assert fresh.headers["etag"].split(".")[0] == etag.split(".")[0]
@@ -0,0 +1,123 @@
+# tests/test_events.py
+import asyncio
+
+import pytest
+
+from app.db.models.comment import Comment
+from app.db.models.need import Need
+from app.enums import Status
+from app.utils import events
+
+
+@pytest.fixture
+def subscribe():
+    """Subscribe on a private loop; `drain(subscription)` returns what was delivered so far."""
+    loop = asyncio.new_event_loop()
+    subscriptions = []
+
+    async def _subscribe(project_id, last_event_id):
+        return events.hub.subscribe(project_id, last_event_id)
+
+    def make(project_id="p1", last_event_id=None):
+        subscription = loop.run_until_complete(_subscribe(project_id, last_event_id))
+        subscriptions.append(subscription)
+        return subscription
+
+    def drain(subscription):
+        loop.run_until_complete(asyncio.sleep(0))
+        items = []
+        while not subscription.queue.empty():
+            items.append(subscription.queue.get_nowait())
+        return items
+
+    make.drain = drain
+    yield make
+    for subscription in subscriptions:
+        events.hub.unsubscribe(subscription)
+    loop.close()
+
+
+def test_writes_publish_events_after_commit(store_client, db_session, subscribe):
+    subscription = subscribe()
+    doc = store_client.post("/api/v1/documents/", json={
+        "title": "Spec", "document_type": "text", "content_text": "x", "project_id": "p1", "area": "GEN",
+    }).json()
+    store_client.put(f"/api/v1/documents/{doc['aid']}", json={"title": "Spec v2"})
+    store_client.delete(f"/api/v1/documents/{doc['aid']}")
+
+    received = subscribe.drain(subscription)
+    assert [(e["type"], e["key"]) for e in received] == [
+        ("document.created", doc["aid"]),
+        ("document.updated", doc["aid"]),
+        ("document.deleted", doc["aid"]),
+    ]
+    assert received[1]["fields"] == ["title"]
+    assert received[0]["id"] < received[1]["id"] < received[2]["id"]
+
+
+def test_status_changes_comments_and_rollbacks(db_session, subscribe):
+    subscription = subscribe()
+    need = Need(aid="N-1", title="t", description="d", project_id="p1")
+    db_session.add(need)
+    db_session.commit()
+    need.status = Status.READY_FOR_REVIEW
+    db_session.add(Comment(artifact_aid="N-1", field_name="title", comment_text="?", author="rev"))
+    db_session.commit()
+
+    need.title = "discarded"
+    db_session.flush()
+    db_session.rollback()
+
+    received = {e["type"]: e for e in subscribe.drain(subscription)}
+    assert set(received) == {"need.created", "need.status_changed", "comment.created"}
+    assert received["need.status_changed"]["to"] == Status.READY_FOR_REVIEW.value
+    assert received["comment.created"]["artifact_aid"] == "N-1"
+
+
+def test_reconnect_replays_missed_events_or_asks_for_resync(subscribe):
+    events.hub.dispatch([{"type": "need.created", "entity": "need", "action": "created", "key": "N-9", "project_id": "p9"}])
+    last = subscribe.drain(subscribe("p9", 0))[-1]
+    assert last["key"] == "N-9"
+    assert "data: " in events.format_sse(last) and f"id: {last['id']}" in events.format_sse(last)
+
+    events.hub.dispatch([{"type": "need.deleted", "entity": "need", "action": "deleted", "key": "N-9", "project_id": "p9"}])
+    assert [e["type"] for e in subscribe.drain(subscribe("p9", last["id"]))] == ["need.deleted"]
+    assert subscribe.drain(subscribe("p9", 10 ** 9)) == [{"type": "resync"}]
+
+
+def test_bulk_project_writes_publish_a_resync(store_client, db_session, subscribe):
+    from app.db.models.project import Project
+
+    db_session.add(Project(id="p1", name="p1"))
+    db_session.add(Need(aid="N-1", title="t", description="d", project_id="p1"))
+    db_session.commit()
+    subscription = subscribe()
+
+    assert store_client.post("/api/v1/projects/p1/import", json={"needs": []}).status_code == 200
+    assert store_client.delete("/api/v1/projects/p1").status_code == 204
+
+    received = [(e["type"], e["action"]) for e in subscribe.drain(subscription)]
+    assert received == [("resync", "imported"), ("resync", "deleted")]
+
+
+def test_transactional_backend_publishes_on_the_committing_connection(db_session):
+    published = []
+
+    class RecordingBackend(events.EventBackend):
+        transactional = True
+
+        def publish(self, items, connection):
+            published.append(([item["key"] for item in items], connection is db_session.connection()))
+
+    events.set_backend(RecordingBackend())
+    try:
+        db_session.add(Need(aid="N-1", title="t", description="d", project_id="p1"))
+        db_session.flush()
+        with db_session.begin_nested():
+            db_session.add(Need(aid="N-2", title="t", description="d", project_id="p1"))
+        db_session.add(Need(aid="N-3", title="t", description="d", project_id="p1"))  # flushed by the commit
+        db_session.commit()
+    finally:
+        events.set_backend(None)
+
+    assert published == [(["N-1", "N-2", "N-3"], True)]
@@ -0,0 +1,64 @@
+# tests/test_fast_json.py
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.db.models.metadata import Person
+from app.db.models.need import Need
+from app.db.models.project import Project
+from app.db.models.requirement import Requirement
+from app.db.models.site import Site
+from app.db.models.use_case import Precondition, UseCase
+from app.enums import EarsType
+from app.schemas.need import NeedOut
+from app.schemas.use_case import UseCaseOut
+from app.utils import fast_json
+
+
+def _regular(query, schema) -> bytes:
+    adapter = TypeAdapter(List[schema])
+    return adapter.dump_json(adapter.validate_python(query.all(), from_attributes=True), by_alias=True)
+
+
+def test_list_endpoint_body_matches_the_response_model_path(client, db_session, monkeypatch):
+    project_id = client.post("/api/v1/projects/", json={"name": "Fast"}).json()["id"]
+    db_session.add_all([
+        Requirement(aid="R-1", short_name="Stop", text="The pump shall stop", project_id=project_id),
+        Requirement(
+            aid="R-2", short_name="Start", text="WHEN the valve opens, the pump shall start",
+            ears_type=EarsType.EVENT_DRIVEN, ears_trigger="the valve opens", project_id=project_id,
+        ),
+    ])
+    db_session.commit()
+
+    fast = client.get("/api/v1/requirement/requirements/", params={"project_id": project_id})
+    monkeypatch.setattr(settings, "FAST_LIST_RESPONSES", False)
+    regular = client.get("/api/v1/requirement/requirements/", params={"project_id": project_id})
+
+    assert len(fast.json()) == 2
+    assert fast.content == regular.content
+    assert fast.headers["etag"] == regular.headers["etag"]
+    assert client.get(
+        "/api/v1/requirement/requirements/", params={"project_id": project_id},
+        headers={"If-None-Match": fast.headers["etag"]},
+    ).status_code == 304
+
+
+def test_nested_schemas_keep_their_relationships(db_session):
+    db_session.add(Project(id="P", name="P"))
+    site = Site(id="S1", name="Plant", project_id="P")
+    actor = Person(id="A1", name="Operator", project_id="P")
+    need = Need(aid="N-1", title="t", description="d", project_id="P", sites=[site])
+    use_case = UseCase(
+        aid="UC-1", title="Start", project_id="P", primary_actor=actor, stakeholders=[actor],
+        preconditions=[Precondition(id="PC1", text="Power on", project_id="P")],
+    )
+    db_session.add_all([need, use_case])
+    db_session.commit()
+    db_session.expunge_all()
+
+    for model, schema in ((Need, NeedOut), (UseCase, UseCaseOut)):
+        query = db_session.query(model).order_by(model.aid)
+        assert fast_json.serialize_list(query, model, schema) == _regular(query, schema)
+    assert b'"name":"Plant"' in fast_json.serialize_list(db_session.query(Need), Need, NeedOut)
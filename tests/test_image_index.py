@@ -0,0 +1,76 @@
+# tests/test_image_index.py
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from app.db.models.image import Image
+from app.utils import image_index
+
+
+def png_bytes(width, height):
+    PILImage = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (width, height)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def upload(client, name, content):
+    return client.post("/api/v1/images/upload", files={"file": (name, content, "image/png")}).json()
+
+
+def test_upload_stores_metadata_and_listing_never_stats(store_client, monkeypatch):
+    content = png_bytes(64, 32)
+    uploaded = upload(store_client, "a.png", content)
+    assert (uploaded["width"], uploaded["height"]) == (64, 32)
+
+    def no_stat(*args, **kwargs):
+        raise AssertionError("listing touched the filesystem")
+
+    monkeypatch.setattr(Path, "stat", no_stat)
+    listed = store_client.get("/api/v1/images/").json()[0]
+    assert listed["size"] == len(content)
+    assert (listed["width"], listed["height"]) == (64, 32)
+    assert listed["mime_type"] == "image/png"
+    assert listed["sha256"] == uploaded["sha256"]
+
+
+def test_listing_is_paginated_newest_first(store_client, db_session):
+    for i in range(5):
+        upload(store_client, f"img{i}.png", f"content {i}".encode())
+    # Same-second uploads: make the order explicit
+    for i, image in enumerate(db_session.query(Image).order_by(Image.filename)):
+        image.created_at = image.created_at.replace(second=i)
+    db_session.commit()
+
+    page = store_client.get("/api/v1/images/", params={"skip": 1, "limit": 2}).json()
+    assert [img["filename"] for img in page] == ["img3.png", "img2.png"]
+
+
+def test_reconcile_backfills_refreshes_and_flags_missing(store_client, db_session, tmp_path):
+    legacy = tmp_path / "legacy.png"
+    legacy.write_bytes(b"legacy image")
+    db_session.add(Image(filename="legacy.png"))
+    db_session.add(Image(filename="gone.png"))
+    db_session.commit()
+
+    counts = image_index.reconcile(db_session, backfill_only=True)
+    assert counts["backfilled"] == 1
+    assert counts["missing"] == 1
+    row = db_session.query(Image).filter_by(filename="legacy.png").one()
+    assert row.size == len(b"legacy image")
+    assert row.sha256 == image_index.file_sha256(legacy)
+
+    assert image_index.reconcile(db_session)["unchanged"] == 2
+
+    legacy.write_bytes(b"edited legacy image")
+    os.utime(legacy, (1, 1))
+    counts = image_index.reconcile(db_session)
+    assert counts["refreshed"] == 1
+    db_session.refresh(row)
+    assert row.size == len(b"edited legacy image")
+
+    legacy.unlink()
+    assert image_index.reconcile(db_session)["missing"] == 1
+    assert store_client.get("/api/v1/images/").json()[0]["missing"] is True
@@ -0,0 +1,99 @@
+# tests/test_image_refs.py
+from app.db.models.blob import Blob
+from app.db.models.document import Document
+from app.db.models.image_reference import ImageReference
+from app.db.models.need import Need
+from app.utils import blob_store, image_refs
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"pixels" * 100
+
+
+def upload_image(client, name, content=PNG):
+    return client.post("/api/v1/images/upload", files={"file": (name, content, "image/png")}).json()
+
+
+def create_document(client, text):
+    return client.post("/api/v1/documents/", json={
+        "title": "Spec",
+        "document_type": "text",
+        "content_text": text,
+        "project_id": "p1",
+        "area": "GEN",
+    }).json()
+
+
+def test_classify_upload_urls():
+    digest = "ab" * 32
+    assert image_refs.classify(f"/uploads/blobs/ab/ab/{digest}.png") == (None, digest)
+    assert image_refs.classify("/uploads/my%20plot.png") == ("my plot.png", None)
+    assert image_refs.classify("/api/v1/images/a.png/variants/thumb") == ("a.png", None)
+    assert image_refs.classify("/uploads/variants/a.png.w480.webp") == ("a.png", None)
+    assert image_refs.classify("https://example.com/logo.png") is None
+
+
+def test_index_follows_document_writes(store_client, db_session):
+    image = upload_image(store_client, "flow.png")
+    doc = create_document(store_client, "![flow](/uploads/flow.png)\n\n<img src='/uploads/other.png'>")
+
+    assert {r.filename for r in db_session.query(ImageReference)} == {"flow.png", "other.png"}
+    usages = store_client.get("/api/v1/images/flow.png/usages").json()
+    assert [(u["source_aid"], u["field"]) for u in usages] == [(doc["aid"], "content_text")]
+
+    store_client.put(f"/api/v1/documents/{doc['aid']}", json={"content_text": f"![flow]({image['url']})"})
+    db_session.expire_all()
+    refs = db_session.query(ImageReference).all()
+    assert [(r.filename, r.blob_sha256) for r in refs] == [(None, image["sha256"])]
+
+    store_client.delete(f"/api/v1/documents/{doc['aid']}")
+    assert db_session.query(ImageReference).count() == 0
+
+
+def test_delete_refuses_images_embedded_by_name(store_client):
+    upload_image(store_client, "used.png")
+    upload_image(store_client, "orphan.png", PNG + b"2")
+    create_document(store_client, "![x](/uploads/used.png)")
+
+    assert [i["filename"] for i in store_client.get("/api/v1/images/unused").json()] == ["orphan.png"]
+
+    refused = store_client.delete("/api/v1/images/used.png")
+    assert refused.status_code == 409
+    assert refused.json()["detail"]["usages"][0]["src"] == "/uploads/used.png"
+    assert store_client.delete("/api/v1/images/used.png?force=true").status_code == 200
+
+
+def test_rename_rewrites_references(store_client, db_session):
+    upload_image(store_client, "old.png")
+    doc = create_document(store_client, "See ![old](/uploads/old.png) and ![t](/api/v1/images/old.png/variants/thumb)")
+
+    response = store_client.put("/api/v1/images/old.png/rename", json={"new_filename": "new name.png"})
+    assert response.json()["references_updated"] == 1
+
+    db_session.expire_all()
+    text = db_session.get(Document, doc["aid"]).content_text
+    assert text == "See ![old](/uploads/new%20name.png) and ![t](/api/v1/images/new%20name.png/variants/thumb)"
+    assert {r.filename for r in db_session.query(ImageReference)} == {"new name.png"}
+
+
+def test_rebuild_recreates_the_index(store_client, db_session):
+    create_document(store_client, "![a](/uploads/a.png)")
+    db_session.query(ImageReference).delete()
+    db_session.commit()
+
+    assert image_refs.rebuild(db_session)["document"] == 1
+    assert db_session.query(ImageReference).one().filename == "a.png"
+
+
+def test_artifacts_embedding_by_content_keep_the_blob_alive(store_client, db_session):
+    image = upload_image(store_client, "plot.png")
+    db_session.add(Need(aid="N-1", title="t", description=f"![plot]({image['url']})", project_id="p1"))
+    db_session.commit()
+
+    assert store_client.delete("/api/v1/images/plot.png").status_code == 200
+    blob_store.collect_garbage(db_session, grace_hours=0)
+    assert db_session.get(Blob, image["sha256"]).refcount == 1
+
+    db_session.query(Need).one().description = "No picture"
+    db_session.commit()
+    assert db_session.get(Blob, image["sha256"]).refcount == 0
+    assert blob_store.collect_garbage(db_session, grace_hours=0)["deleted"] == 1
+
@@ -0,0 +1,68 @@
+# tests/test_image_variants.py
+import io
+
+import pytest
+
+from app.utils import image_variants
+
+PILImage = pytest.importorskip("PIL.Image")
+
+
+def png_bytes(width, height):
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (width, height), (200, 30, 30)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def upload(client, name, content):
+    return client.post("/api/v1/images/upload", files={"file": (name, content, "image/png")}).json()
+
+
+def test_upload_schedules_variants(store_client, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(image_variants, "schedule", lambda digest, relpath: scheduled.append(digest))
+    uploaded = upload(store_client, "photo.png", png_bytes(40, 20))
+    assert scheduled == [uploaded["sha256"]]
+
+
+def test_generate_variants_skips_upscaling(store_client, db_session, tmp_path):
+    uploaded = upload(store_client, "wide.png", png_bytes(1000, 500))
+    relpath = uploaded["url"][len("/uploads/"):]
+
+    variants = image_variants.generate_variants(relpath)
+    assert variants == {"thumb": 256, "w480": 480, "w960": 960}
+    with PILImage.open(tmp_path / image_variants.variant_relpath(relpath, "w480")) as img:
+        assert img.format == "WEBP"
+        assert img.size == (480, 240)
+
+    listing = image_variants.variant_listing(relpath, variants)
+    assert listing["thumbnail_url"].endswith(".thumb.webp")
+    assert listing["srcset"].endswith("960w")
+
+    image_variants.remove_variants(relpath)
+    assert not list(tmp_path.rglob("*.webp"))
+    assert (tmp_path / relpath).exists()
+
+
+def test_variant_route_generates_lazily(store_client):
+    upload(store_client, "legacy.png", png_bytes(600, 300))
+    listed = store_client.get("/api/v1/images/").json()[0]
+    assert listed["thumbnail_url"] == "/api/v1/images/legacy.png/variants/thumb"
+
+    response = store_client.get(listed["thumbnail_url"])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+
+    # Wider than the original: the original is served instead
+    response = store_client.get("/api/v1/images/legacy.png/variants/w960", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == listed["url"]
+
+
+def test_without_pillow_falls_back_to_original(store_client, monkeypatch):
+    monkeypatch.setattr(image_variants, "PIL_AVAILABLE", False)
+    uploaded = upload(store_client, "plain.png", png_bytes(600, 300))
+    listed = store_client.get("/api/v1/images/").json()[0]
+    assert listed["thumbnail_url"] == uploaded["url"]
+    response = store_client.get("/api/v1/images/plain.png/variants/thumb", follow_redirects=False)
+    assert response.headers["location"] == uploaded["url"]
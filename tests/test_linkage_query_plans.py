@@ -0,0 +1,87 @@
+# tests/test_linkage_query_plans.py
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from artifact_registry import app
+from app.api import deps
+from app.db.models.linkage import Linkage
+from app.db.models.need import Need
+from app.db.models.requirement import Requirement
+from app.db.models.use_case import UseCase
+from app.db.models.vision import Vision
+from app.enums import LinkType
+
+# (operation, the indexes its linkages queries must use)
+HOT_PATHS = [
+    (("GET", "/api/v1/need/needs/N-1"), {"uq_linkages_edge"}),
+    (("GET", "/api/v1/use_case/use-cases/UC-1"), {"uq_linkages_edge"}),
+    (("GET", "/api/v1/requirement/requirements/R-1"), {"uq_linkages_edge"}),
+    (("GET", "/api/v1/linkage/linkages/from/R-1"), {"uq_linkages_edge"}),
+    (("DELETE", "/api/v1/need/needs/N-1"), {"uq_linkages_edge", "ix_linkages_target"}),
+    (("DELETE", "/api/v1/use_case/use-cases/UC-1"), {"uq_linkages_edge", "ix_linkages_target"}),
+    (("DELETE", "/api/v1/requirement/requirements/R-1"), {"uq_linkages_edge", "ix_linkages_target"}),
+    (("DELETE", "/api/v1/vision/vision-statements/V-1"), {"uq_linkages_edge", "ix_linkages_target"}),
+]
+
+
+@pytest.fixture
+def traced_project(client, db_session):
+    app.dependency_overrides[deps.get_current_user] = lambda: SimpleNamespace(roles=["admin"])
+    project_id = client.post("/api/v1/projects/", json={"name": "Plans"}).json()["id"]
+    db_session.add_all([
+        Vision(aid="V-1", title="v", description="d", project_id=project_id),
+        Need(aid="N-1", title="n", description="d", project_id=project_id),
+        UseCase(aid="UC-1", title="u", project_id=project_id),
+        Requirement(aid="R-1", short_name="r", text="The pump shall stop", project_id=project_id),
+    ])
+    for aid, source, target, relationship in (
+        ("L1", ("need", "N-1"), ("vision", "V-1"), LinkType.DERIVES_FROM),
+        ("L2", ("use_case", "UC-1"), ("need", "N-1"), LinkType.SATISFIES),
+        ("L3", ("requirement", "R-1"), ("use_case", "UC-1"), LinkType.SATISFIES),
+    ):
+        db_session.add(Linkage(
+            aid=aid, source_artifact_type=source[0], source_id=source[1], target_artifact_type=target[0],
+            target_id=target[1], relationship_type=relationship, project_id=project_id,
+        ))
+    db_session.commit()
+    return client
+
+
+@pytest.mark.parametrize("operation, indexes", HOT_PATHS, ids=[" ".join(op) for op, _ in HOT_PATHS])
+def test_hot_linkage_queries_use_an_index(traced_project, db_session, operation, indexes):
+    engine = db_session.get_bind()
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM linkages" in statement and "WHERE" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = traced_project.request(*operation)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert response.status_code < 300, response.text
+    assert statements
+
+    used = set()
+    for statement, parameters in statements:
+        plan = [row[-1] for row in db_session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, parameters
+        )]
+        assert not any(step.startswith("SCAN linkages") for step in plan), (statement, plan)
+        used.update(index for step in plan for index in indexes if f"INDEX {index} " in step)
+    assert used == indexes
+
+
+def test_duplicate_edges_are_rejected(traced_project):
+    edge = {
+        "source_artifact_type": "requirement", "source_id": "R-1", "target_artifact_type": "need",
+        "target_id": "N-1", "relationship_type": "satisfies", "project_id": "x",
+    }
+    assert traced_project.post("/api/v1/linkage/linkages/", json=edge).status_code == 201
+    assert traced_project.post("/api/v1/linkage/linkages/", json=edge).status_code == 409
+    # Rewriting another link into the same edge is refused as well
+    assert traced_project.put("/api/v1/linkage/linkages/L3", json=edge).status_code == 409
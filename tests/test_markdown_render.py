@@ -0,0 +1,69 @@
+# tests/test_markdown_render.py
+import pytest
+
+from app.db.models.rendered_markdown import RenderedMarkdown
+from app.utils import markdown_render
+
+pytest.importorskip("markdown_it")
+
+
+def create_document(client, text):
+    return client.post("/api/v1/documents/", json={
+        "title": "Spec",
+        "document_type": "text",
+        "content_text": text,
+        "project_id": "p1",
+        "area": "GEN",
+    }).json()
+
+
+def test_rendered_document_is_cached_and_revalidated(store_client, db_session, monkeypatch):
+    doc = create_document(store_client, "# Spec\n\n```mermaid\ngraph TD; A-->B\n```")
+    url = f"/api/v1/documents/{doc['aid']}/rendered"
+
+    first = store_client.get(url)
+    assert first.status_code == 200
+    assert "<h1>Spec</h1>" in first.json()["html"]
+    assert 'class="language-mermaid"' in first.json()["html"]
+    assert first.headers["etag"] == f'"{first.json()["content_hash"]}"'
+    assert db_session.query(RenderedMarkdown).count() == 1
+
+    def no_render(text):
+        raise AssertionError("rendered again")
+
+    monkeypatch.setattr(markdown_render, "render_html", no_render)
+    assert store_client.get(url, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    # A fresh process finds it in the DB tier
+    markdown_render._memory_cache.clear()
+    assert store_client.get(url).json()["html"] == first.json()["html"]
+
+
+def test_edit_changes_the_etag(store_client):
+    doc = create_document(store_client, "one")
+    url = f"/api/v1/documents/{doc['aid']}/rendered"
+    before = store_client.get(url).headers["etag"]
+    store_client.put(f"/api/v1/documents/{doc['aid']}", json={"content_text": "two"})
+    response = store_client.get(url, headers={"If-None-Match": before})
+    assert response.status_code == 200
+    assert "two" in response.json()["html"]
+
+
+def test_output_is_sanitized():
+    pytest.importorskip("nh3")
+    html = markdown_render.render_html(
+        '<script>alert(1)</script><img src="/uploads/a.png" onerror="x()">\n\n[x](javascript:alert(1))'
+    )
+    assert "<script" not in html
+    assert "onerror" not in html
+    assert "href=\"javascript" not in html
+    assert 'src="/uploads/a.png"' in html
+
+
+def test_prune_keeps_current_versions(store_client, db_session):
+    doc = create_document(store_client, "old")
+    store_client.get(f"/api/v1/documents/{doc['aid']}/rendered")
+    store_client.put(f"/api/v1/documents/{doc['aid']}", json={"content_text": "new"})
+    store_client.get(f"/api/v1/documents/{doc['aid']}/rendered")
+
+    assert markdown_render.prune(db_session) == 1
+    assert db_session.query(RenderedMarkdown).one().content_hash == markdown_render.content_hash("new")
@@ -1,7 +1,12 @@
 # tests/test_requirement_filters.py
 import pytest
+from app.api import deps
+from app.core.roles import Role
+from app.db.models.project import Project
 from app.db.models.requirement import Requirement
+from app.enums import EarsType
 from app.utils.id_generator import generate_artifact_id
+from artifact_registry import app
 
 def create_req(db_session, short_name, text, area, level):
     aid = generate_artifact_id(db_session, Requirement, area)
@@ -50,4 +55,82 @@ def test_filter_by_area_and_level(client, db_session, sample_requirements, auth_
 def test_no_filter_returns_all(client, db_session, sample_requirements, auth_token):
     resp = client.get("/requirements", headers={"Authorization": f"Bearer {auth_token}"})
     assert resp.status_code == 200
-    assert len(resp.json()) >= 5
\ No newline at end of file
+    assert len(resp.json()) >= 5
+
+def test_filter_by_stored_ears_components(client, db_session):
+    db_session.add(Project(id="p1", name="P1"))
+    db_session.add_all([
+        Requirement(aid="R-1", short_name="a", text="WHEN armed, the alarm shall sound",
+                    ears_type=EarsType.EVENT_DRIVEN, ears_trigger="armed", project_id="p1"),
+        Requirement(aid="R-2", short_name="b", text="WHILE armed, the light shall blink",
+                    ears_type=EarsType.STATE_DRIVEN, ears_state="armed", project_id="p1"),
+    ])
+    db_session.commit()
+
+    response = client.get("/api/v1/requirement/requirements/", params={"ears_trigger": "armed"})
+    assert response.status_code == 200
+    assert [r["aid"] for r in response.json()] == ["R-1"]
+
+    response = client.get("/api/v1/requirement/requirements/", params={"ears_state": "armed"})
+    assert [r["aid"] for r in response.json()] == ["R-2"]
+
+@pytest.fixture
+def editor_client(client, db_session):
+    """Client allowed to create and edit requirements, with project p1."""
+    db_session.add(Project(id="p1", name="P1"))
+    db_session.commit()
+    app.dependency_overrides[deps.get_current_user] = lambda: type("Admin", (), {"roles": [Role.ADMIN.value]})()
+    yield client
+    app.dependency_overrides.pop(deps.get_current_user, None)
+
+def stored_components(db_session, aid):
+    db_session.expire_all()
+    req = db_session.query(Requirement).filter(Requirement.aid == aid).one()
+    return {f: getattr(req, f) for f in ("ears_trigger", "ears_state", "ears_condition", "ears_feature")}
+
+def test_write_stores_parsed_ears_components(editor_client, db_session):
+    url = "/api/v1/requirement/requirements/"
+    created = editor_client.post(url, json={
+        "short_name": "alarm", "text": "When the door opens, the alarm shall sound.",
+        "ears_type": "event-driven", "ears_trigger": "typed by the client", "project_id": "p1",
+    })
+    assert created.status_code == 201
+    aid = created.json()["aid"]
+    # The parsed text wins over client-supplied values
+    assert stored_components(db_session, aid) == {
+        "ears_trigger": "the door opens", "ears_state": None, "ears_condition": None, "ears_feature": None,
+    }
+
+    # Switching pattern re-parses and nulls the components the new one does not use
+    updated = editor_client.put(f"{url}{aid}", json={
+        "short_name": "alarm", "text": "While the door is open, the light shall blink.",
+        "ears_type": "state-driven", "project_id": "p1",
+    })
+    assert updated.status_code == 200
+    assert stored_components(db_session, aid) == {
+        "ears_trigger": None, "ears_state": "the door is open", "ears_condition": None, "ears_feature": None,
+    }
+
+    # On update too, client-supplied values do not override a parseable text
+    editor_client.put(f"{url}{aid}", json={
+        "short_name": "light", "text": "While the door is open, the light shall blink.",
+        "ears_type": "state-driven", "ears_state": "typed by the client", "project_id": "p1",
+    })
+    assert stored_components(db_session, aid)["ears_state"] == "the door is open"
+
+def test_write_keeps_client_components_when_the_text_does_not_parse(editor_client, db_session):
+    url = "/api/v1/requirement/requirements/"
+    aid = editor_client.post(url, json={
+        "short_name": "alarm", "text": "The alarm sounds", "ears_type": "event-driven",
+        "ears_trigger": "door opens", "project_id": "p1",
+    }).json()["aid"]
+    assert stored_components(db_session, aid)["ears_trigger"] == "door opens"
+
+    # Text still unparseable: the components follow the payload, absent ones become null
+    editor_client.put(f"{url}{aid}", json={
+        "short_name": "alarm", "text": "The alarm rings", "ears_type": "event-driven", "project_id": "p1",
+    })
+    assert stored_components(db_session, aid) == {
+        "ears_trigger": None, "ears_state": None, "ears_condition": None, "ears_feature": None,
+    }
+
@@ -0,0 +1,32 @@
+# tests/test_response_cache.py
+def test_reference_lists_are_served_from_cache_until_a_write(store_client):
+    store_client.post("/api/v1/sites/", json={"name": "Plant A", "project_id": "p1"})
+    store_client.post("/api/v1/sites/", json={"name": "Plant B", "project_id": "p2"})
+
+    first = store_client.get("/api/v1/sites/", params={"project_id": "p1"})
+    again = store_client.get("/api/v1/sites/", params={"project_id": "p1"})
+    assert (first.headers["x-cache"], again.headers["x-cache"]) == ("miss", "hit")
+    assert again.json() == first.json() and [s["name"] for s in again.json()] == ["Plant A"]
+    assert store_client.get("/api/v1/sites/", params={"project_id": "p2"}).headers["x-cache"] == "miss"
+    assert store_client.get("/api/v1/sites/").headers["x-cache"] == "miss"
+
+    # A write in p2 leaves p1 cached but refreshes p2 and the unfiltered list
+    store_client.post("/api/v1/sites/", json={"name": "Plant C", "project_id": "p2"})
+    assert store_client.get("/api/v1/sites/", params={"project_id": "p1"}).headers["x-cache"] == "hit"
+    p2 = store_client.get("/api/v1/sites/", params={"project_id": "p2"})
+    assert p2.headers["x-cache"] == "miss" and len(p2.json()) == 2
+    assert len(store_client.get("/api/v1/sites/").json()) == 3
+
+    stats = store_client.get("/api/v1/system/response-cache/stats").json()
+    assert stats["backend"] == "memory"
+    assert stats["namespaces"]["sites"]["hits"] == 2
+    assert stats["namespaces"]["sites"]["invalidations"] == 3
+
+
+def test_global_area_invalidates_every_project(client):
+    client.post("/api/v1/metadata/metadata/areas", json={"code": "MCK", "name": "Mechanics", "project_id": "p1"})
+    assert [a["code"] for a in client.get("/api/v1/metadata/metadata/areas", params={"project_id": "p1"}).json()] == ["MCK"]
+
+    client.post("/api/v1/metadata/metadata/areas", json={"code": "GLOBAL", "name": "Global"})
+    codes = [a["code"] for a in client.get("/api/v1/metadata/metadata/areas", params={"project_id": "p1"}).json()]
+    assert sorted(codes) == ["GLOBAL", "MCK"]
@@ -0,0 +1,58 @@
+# tests/test_sequence_diagram.py
+from app.db.models.use_case import UseCase
+from app.utils import sequence_diagram
+
+MSS = [
+    {"step_num": 1, "actor": "Operator", "description": "Opens map", "message": "Open map", "target_actor": "COP", "response": "Map"},
+    {"step_num": 2, "actor": "COP", "description": "Highlights threats"},
+]
+EXTENSIONS = [{"step": "1a", "condition": "Map offline", "handling": "Show cached map"}]
+EXCEPTIONS = [{"trigger": "Feed lost", "handling": "Alert operator", "steps": []}]
+
+
+def test_plantuml_matches_frontend_generator():
+    source = sequence_diagram.generate(MSS, EXTENSIONS, EXCEPTIONS)
+    assert source.splitlines() == [
+        "@startuml",
+        "skinparam style strictuml",
+        "skinparam sequenceMessageAlign center",
+        "loop Main Flow",
+        '"Operator" -> "COP": Open map ',
+        '"COP" --> "Operator": Map ',
+        "alt Map offline ",
+        'note over "Operator": Show cached map ',
+        "end",
+        'note over "COP": Highlights threats ',
+        "end",
+        "== Exceptions ==",
+        "opt Feed lost ",
+        'note over "Operator": Alert operator ',
+        "end",
+        "@enduml",
+    ]
+
+
+def test_mermaid_uses_participant_aliases():
+    source = sequence_diagram.generate(MSS, EXTENSIONS, EXCEPTIONS, language="mermaid")
+    assert "participant p0 as Operator" in source
+    assert "p0->>p1: Open map" in source
+    assert "p1-->>p0: Map" in source
+    assert sequence_diagram.generate([], language="mermaid") == ""
+
+
+def test_sequence_endpoint_is_cached_by_last_updated(client, db_session, monkeypatch):
+    db_session.add(UseCase(aid="UC-GEN-001", title="Track", project_id="p1", mss=MSS, extensions=EXTENSIONS))
+    db_session.commit()
+    url = "/api/v1/use_case/use-cases/UC-GEN-001/sequence"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.json()["source"].startswith("@startuml")
+    assert client.get(url, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    def no_generate(*args, **kwargs):
+        raise AssertionError("generated again")
+
+    monkeypatch.setattr(sequence_diagram, "generate", no_generate)
+    batch = client.get("/api/v1/use_case/use-cases/sequences", params={"project_id": "p1"}).json()
+    assert [item["source"] for item in batch] == [first.json()["source"]]
@@ -0,0 +1,59 @@
+# tests/test_static_files.py
+import gzip
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.utils.static_files import IMMUTABLE_CACHE, REVALIDATE_CACHE, UploadFiles
+
+SVG = ("<svg xmlns='http://www.w3.org/2000/svg'>" + "<rect width='1' height='1'/>" * 100 + "</svg>").encode()
+
+
+def upload_document(client, name, content, content_type):
+    return client.post("/api/v1/documents/upload", files={"file": (name, content, content_type)}).json()
+
+
+def test_blob_files_are_immutable_with_strong_etag(store_client):
+    uploaded = upload_document(store_client, "spec.pdf", b"%PDF-1.4 " + b"x" * 5000, "application/pdf")
+    response = store_client.get(uploaded["url"])
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE
+    assert response.headers["etag"] == f'"{uploaded["sha256"]}.pdf"'
+
+    cached = store_client.get(uploaded["url"], headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_byte_ranges(store_client):
+    uploaded = upload_document(store_client, "big.pdf", b"%PDF-1.4 " + bytes(range(256)) * 20, "application/pdf")
+    response = store_client.get(uploaded["url"], headers={"Range": "bytes=0-7"})
+    assert response.status_code == 206
+    assert response.content == b"%PDF-1.4"
+    assert response.headers["content-range"].startswith("bytes 0-7/")
+
+
+def test_precompressed_sidecar_is_negotiated(store_client, tmp_path):
+    uploaded = upload_document(store_client, "diagram.svg", SVG, "image/svg+xml")
+    path = tmp_path / uploaded["url"].split("/files/", 1)[1]
+    assert gzip.decompress(path.with_name(path.name + ".gz").read_bytes()) == SVG
+
+    compressed = store_client.get(uploaded["url"], headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert compressed.headers["etag"].endswith('-gz"')
+    assert compressed.content == SVG
+
+    plain = store_client.get(uploaded["url"], headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.content == SVG
+
+
+def test_upload_mount_revalidates_legacy_files(tmp_path):
+    (tmp_path / "legacy.png").write_bytes(b"png bytes")
+    app = Starlette(routes=[Mount("/uploads", UploadFiles(directory=tmp_path))])
+    with TestClient(app) as client:
+        response = client.get("/uploads/legacy.png")
+        assert response.headers["cache-control"] == REVALIDATE_CACHE
+        cached = client.get("/uploads/legacy.png", headers={"If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304
@@ -0,0 +1,198 @@
+# tests/test_translation.py
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from app.api import deps
+from app.db.models.translation import TranslationMemory
+from app.db.session import get_db
+from app.utils import translation
+from artifact_registry import app
+
+
+class CountingBackend(translation.TranslationBackend):
+    name = "counting"
+
+    def __init__(self, delay=0.0):
+        self.single_calls = []
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def translate_one(self, text, source, target):
+        with self._lock:
+            self.single_calls.append(text)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return f"{target}:{text}"
+
+
+class FlakyBackend(translation.TranslationBackend):
+    name = "flaky"
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.attempts = 0
+
+    def translate_one(self, text, source, target):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError("boom")
+        return text.upper()
+
+
+@pytest.fixture
+def backend():
+    backend = CountingBackend()
+    translation.set_backend(backend)
+    translation._memory_cache.clear()
+    yield backend
+    translation.set_backend(None)
+    translation._memory_cache.clear()
+
+
+@pytest.fixture
+def translation_client(client):
+    # The translation endpoint uses deps.get_db; point it at the test session too
+    app.dependency_overrides[deps.get_db] = app.dependency_overrides[get_db]
+    yield client
+
+
+def test_translate_dedups_and_keeps_order(translation_client, backend):
+    response = translation_client.post(
+        "/api/v1/translation/translate",
+        json={"text": ["Hello", "World", "Hello", ""], "target": "ar"},
+    )
+    assert response.status_code == 200
+    assert response.json()["translated_text"] == ["ar:Hello", "ar:World", "ar:Hello", ""]
+    assert sorted(backend.single_calls) == ["Hello", "World"]
+    assert response.json()["metrics"]["unique"] == 2
+
+
+def test_translate_single_string(translation_client, backend):
+    response = translation_client.post("/api/v1/translation/translate", json={"text": "Hello"})
+    assert response.json()["translated_text"] == "ar:Hello"
+
+
+def test_translation_memory_only_pays_for_new_strings(translation_client, db_session, backend):
+    def translate(texts):
+        return translation_client.post(
+            "/api/v1/translation/translate", json={"text": texts, "source": "en", "target": "ar"}
+        ).json()
+
+    translate(["one", "two"])
+    assert db_session.query(TranslationMemory).count() == 2
+
+    # A fresh process has an empty LRU but still finds the stored rows
+    translation._memory_cache.clear()
+    data = translate(["two", "three", "one"])
+    assert data["translated_text"] == ["ar:two", "ar:three", "ar:one"]
+    assert data["metrics"]["stored"] == 2
+    assert data["metrics"]["translated"] == 1
+    assert backend.single_calls[-1] == "three"
+
+    data = translate(["one", "three"])
+    assert data["metrics"]["cached"] == 2
+    assert len(backend.single_calls) == 3
+
+
+def test_local_backend_is_identity():
+    assert translation.LocalBackend().translate_one("a", "en", "ar") == "a"
+
+
+def test_concurrency_is_bounded(translation_client, monkeypatch):
+    backend = CountingBackend(delay=0.05)
+    translation.set_backend(backend)
+    translation._memory_cache.clear()
+    monkeypatch.setattr(translation.settings, "TRANSLATION_CONCURRENCY", 4)
+    try:
+        texts = [f"s{i}" for i in range(20)]
+        started = time.perf_counter()
+        response = translation_client.post("/api/v1/translation/translate", json={"text": texts})
+        elapsed = time.perf_counter() - started
+    finally:
+        translation.set_backend(None)
+        translation._memory_cache.clear()
+
+    assert response.json()["translated_text"] == [f"ar:{t}" for t in texts]
+    assert backend.max_in_flight == 4
+    assert elapsed < 20 * 0.05
+
+
+def test_retries_then_succeeds(translation_client, monkeypatch):
+    monkeypatch.setattr(translation.settings, "TRANSLATION_RETRY_BACKOFF", 0)
+    translation.set_backend(FlakyBackend(failures=2))
+    translation._memory_cache.clear()
+    try:
+        response = translation_client.post("/api/v1/translation/translate", json={"text": ["abc"]})
+    finally:
+        translation.set_backend(None)
+    data = response.json()
+    assert data["translated_text"] == ["ABC"]
+    assert data["metrics"]["retries"] == 2
+
+
+def test_all_failures_return_502(translation_client, db_session, monkeypatch):
+    monkeypatch.setattr(translation.settings, "TRANSLATION_RETRY_BACKOFF", 0)
+    translation.set_backend(FlakyBackend(failures=100))
+    translation._memory_cache.clear()
+    try:
+        response = translation_client.post("/api/v1/translation/translate", json={"text": ["abc"]})
+    finally:
+        translation.set_backend(None)
+    assert response.status_code == 502
+    assert db_session.query(TranslationMemory).count() == 0
+
+
+def test_stream_reports_every_position(translation_client, backend):
+    response = translation_client.post(
+        "/api/v1/translation/translate/stream",
+        json={"text": ["a", "b", "a", "", "  "]},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1]["done"] is True
+    positions = {}
+    for line in lines[:-1]:
+        for i in line["indices"]:
+            positions[i] = line["text"]
+    assert positions == {0: "ar:a", 1: "ar:b", 2: "ar:a", 3: "", 4: "  "}
+
+
+def test_google_backend_requests_get_the_translation_timeout(translation_client, monkeypatch):
+    seen = []
+
+    def send(adapter, request, **kwargs):
+        seen.append((threading.current_thread().name, kwargs["timeout"], request.url))
+        response = requests.Response()
+        response.status_code = 200
+        response._content = '<div class="result-container">مرحبا</div>'.encode("utf-8")
+        response.encoding = "utf-8"
+        response.request = request
+        return response
+
+    monkeypatch.setattr(requests.adapters.HTTPAdapter, "send", send)
+    monkeypatch.setattr(translation.settings, "TRANSLATION_TIMEOUT", 2.5)
+    translation.set_backend(translation.GoogleBackend())
+    translation._memory_cache.clear()
+    try:
+        response = translation_client.post(
+            "/api/v1/translation/translate", json={"text": ["hello"], "source": "english"}
+        )
+    finally:
+        translation.set_backend(None)
+
+    assert response.json()["translated_text"] == ["مرحبا"]
+    assert len(seen) == 1
+    name, timeout, url = seen[0]
+    assert name.startswith("translation")
+    assert timeout == 2.5
+    assert "sl=en" in url and "tl=ar" in url
+    # Other requests users in the process are left alone
+    assert requests.Session.request.__module__ == "requests.sessions"